@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Load test for /agent admission control: a burst of scrapes, with and without it.
+
+Runs the real app in-process (httpx ASGITransport) with the agent run
+replaced by a stand-in that sleeps 0.2 s + max_projects/--projects-per-second
+and books simulated memory: --browser-mb for the Chromium plus
+--mb-per-project for the rows. --clients clients (one X-Forwarded-For each)
+fire --requests requests each, --spacing seconds apart, with max_projects
+cycling through 20/200/1000. One more client sends 4x as many requests 4x
+as fast, to exercise its token bucket. /healthz/ready is polled throughout.
+
+Without admission control every request runs at once, and the simulated
+peak shows whether the 2 GB container would have been OOM-killed. With it,
+peak memory stays bounded, the excess gets 429 with Retry-After, and
+readiness reports 503 while saturated.
+
+Usage:
+    python benchmarks/bench_admission.py [--clients 6] [--requests 4] [--memory-mb 2048]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import types
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("STARTUP_PREWARM", "none")
+
+import httpx  # noqa: E402
+
+import src.server.agent.routes as agent_routes  # noqa: E402
+import src.server.healthz.routes as healthz_routes  # noqa: E402
+from src.server import create_app  # noqa: E402
+from src.server.agent.admission import AdmissionController  # noqa: E402
+from src.server.agent.capacity import scrapes  # noqa: E402
+
+SIZES = (20, 200, 1000)
+
+
+class SimulatedAgent:
+    """run_up_rera_scraper_agent stand-in that books memory while it runs."""
+
+    def __init__(self, args):
+        self.args = args
+        self.mb = 0.0
+        self.peak_mb = 0.0
+        self.peak_running = 0
+        self.running = 0
+
+    async def run_up_rera_scraper_agent(self, max_projects: int = 20):
+        mb = self.args.browser_mb + max_projects * self.args.mb_per_project
+        self.mb += mb
+        self.running += 1
+        self.peak_mb = max(self.peak_mb, self.mb)
+        self.peak_running = max(self.peak_running, self.running)
+        try:
+            await asyncio.sleep(0.2 + max_projects / self.args.projects_per_second)
+        finally:
+            self.mb -= mb
+            self.running -= 1
+        return types.SimpleNamespace(status="success", final_output="ok", usage={}, error=None)
+
+
+async def run(mode: str, args):
+    sim = SimulatedAgent(args)
+
+    async def load_agent_module():
+        return sim
+
+    agent_routes.load_agent_module = load_agent_module
+    controller = AdmissionController(tracker=scrapes, queue_timeout=args.queue_timeout,
+                                     enabled=(mode == "admission"))
+    agent_routes.admission = healthz_routes.admission = controller
+    scrapes.max_in_flight = args.max_in_flight
+    scrapes.max_queued = args.max_queued
+
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    statuses: Counter = Counter()
+    latencies, retry_after = [], []
+    ready_codes: Counter = Counter()
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def request(client_id: int, n: int, spacing: float):
+            await asyncio.sleep(n * spacing)
+            start = time.perf_counter()
+            response = await client.get("/agent/", params={"max_projects": SIZES[n % len(SIZES)]},
+                                        headers={"X-Forwarded-For": f"10.0.0.{client_id}"})
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            elif response.status_code == 429:
+                retry_after.append(response.headers.get("retry-after"))
+
+        async def poll_ready():
+            while not done.is_set():
+                ready_codes[(await client.get("/healthz/ready")).status_code] += 1
+                await asyncio.sleep(0.1)
+
+        poller = asyncio.create_task(poll_ready())
+        start = time.perf_counter()
+        calls = [request(c, n, args.spacing) for c in range(args.clients) for n in range(args.requests)]
+        calls += [request(99, n, args.spacing / 4) for n in range(args.requests * 4)]
+        await asyncio.gather(*calls)
+        seconds = time.perf_counter() - start
+        done.set()
+        await poller
+
+    return {
+        "mode": mode,
+        "seconds": seconds,
+        "statuses": dict(statuses),
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 2 else 0.0,
+        "retry_after_ok": all(r and r.isdigit() for r in retry_after),
+        "peak_running": sim.peak_running,
+        "peak_mb": sim.peak_mb,
+        "oom": sim.peak_mb > args.memory_mb,
+        "ready": dict(ready_codes),
+        "admission": controller.as_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per well-behaved client")
+    parser.add_argument("--spacing", type=float, default=0.5, help="Seconds between a client's requests")
+    parser.add_argument("--memory-mb", type=float, default=2048, help="Container memory")
+    parser.add_argument("--browser-mb", type=float, default=350)
+    parser.add_argument("--mb-per-project", type=float, default=0.5)
+    parser.add_argument("--projects-per-second", type=float, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    parser.add_argument("--max-queued", type=int, default=4)
+    parser.add_argument("--queue-timeout", type=float, default=3)
+    args = parser.parse_args()
+
+    total = args.clients * args.requests + args.requests * 4
+    print(f"{total} /agent requests from {args.clients + 1} clients, "
+          f"{args.memory_mb:.0f} MB container")
+    for mode in ("unbounded", "admission"):
+        r = asyncio.run(run(mode, args))
+        print(f"\n{mode}: {r['seconds']:.1f}s, statuses {r['statuses']}, "
+              f"latency p50 {r['p50']:.2f}s p95 {r['p95']:.2f}s")
+        print(f"  peak scrapes {r['peak_running']}, peak memory {r['peak_mb']:.0f} MB "
+              f"-> {'OOM-killed' if r['oom'] else 'within limit'}")
+        print(f"  /healthz/ready codes {r['ready']}")
+        if mode == "admission":
+            print(f"  429s carry Retry-After: {r['retry_after_ok']}, rejected {r['admission']['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Bytes a downstream consumer reads per day: full dumps vs the change log.
+
+Simulates --days daily scrapes of --projects projects where --churn of
+them get a new end_date, a few new ones register and a few disappear.
+Each day is uploaded with upload_json_to_s3 (what a consumer diffing dumps
+reads) and run through capture_changes (the events it reads instead), both
+to a temporary file:// target. Reports per-day MB and rows for both, the
+event mix, and the capture time.
+
+Usage:
+    python benchmarks/bench_cdc.py [--projects 5000] [--days 7] [--churn 0.02]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from bench_normalize import make_rows  # noqa: E402
+from pipeline.cdc import CdcState, capture_changes  # noqa: E402
+from pipeline.normalize import normalize_projects  # noqa: E402
+from pipeline.storage import upload_json_to_s3  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--churn", type=float, default=0.02, help="Share of projects changing per day")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(7)
+    projects = normalize_projects(make_rows(args.projects))
+    with tempfile.TemporaryDirectory() as tmp:
+        bucket = f"file://{tmp}"
+        state = CdcState(db_path=os.path.join(tmp, "cdc.sqlite3"))
+        # Day 0 seeds the state; its events are every project and not counted
+        capture_changes(bucket, projects, state=state, queue=None, full=True, now=datetime(2025, 10, 31))
+
+        print(f"{args.projects} projects, {args.churn:.0%} daily churn\n")
+        print(f"{'day':<4} {'dump MB':>8} {'dump rows':>10} {'log KB':>8} {'events':>7} "
+              f"{'ins/upd/del':>12} {'capture s':>10}")
+        for day in range(args.days):
+            for project in rng.sample(projects, int(len(projects) * args.churn)):
+                project["end_date"] = f"20{rng.randint(26, 35)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+            new = normalize_projects(make_rows(args.projects // 200 or 1, seed=1000 + day))
+            for n, project in enumerate(new):
+                project["rera_number"] = f"UPRERAPRJ{900000 + day * 10000 + n}"
+            projects.extend(new)
+            for gone in rng.sample(range(len(projects)), args.projects // 1000 or 1):
+                projects[gone] = None
+            projects = [p for p in projects if p is not None]
+
+            now = datetime(2025, 11, 1 + day, 6)
+            dump = upload_json_to_s3(bucket, projects, prefix="dumps")
+            start = time.perf_counter()
+            result = capture_changes(bucket, projects, state=state, queue=None, full=True, now=now)
+            seconds = time.perf_counter() - start
+            dump_mb = os.path.getsize(dump["key"]) / 1e6
+            log_kb = os.path.getsize(os.path.join(tmp, result["log_key"])) / 1e3
+            mix = f"{result['inserts']}/{result['updates']}/{result['deletes']}"
+            print(f"{day + 1:<4} {dump_mb:>8.2f} {len(projects):>10} {log_kb:>8.1f} {result['events']:>7} "
+                  f"{mix:>12} {seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
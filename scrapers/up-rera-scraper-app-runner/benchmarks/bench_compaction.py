@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+File count and scan cost of a month of scheduled runs, before and after compaction.
+
+Writes --days days of --runs-per-day uploads of --rows records each with
+upload_json_to_s3 (half of them split by district, as district crawls
+are) to a temporary file:// target, then compacts the month with
+compact_period. Reports data objects, bytes and the time a downstream job
+needs to list and read every record. Then it prints the compaction
+throughput. The object counts are also the number of GET requests a
+query engine issues per scan on S3.
+
+Usage:
+    python benchmarks/bench_compaction.py [--days 30] [--runs-per-day 12] [--rows 500]
+"""
+
+import argparse
+import gzip
+import logging
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from bench_normalize import make_rows  # noqa: E402
+from pipeline.compaction import compact_period, list_compactable  # noqa: E402
+from pipeline.normalize import normalize_projects  # noqa: E402
+from pipeline.storage import iter_ndjson, read_object, upload_json_to_s3  # noqa: E402
+
+
+def scan(bucket: str, base: str):
+    start = time.perf_counter()
+    keys = list_compactable(bucket, base)
+    size = rows = 0
+    for key in keys:
+        body = read_object(bucket, key)
+        size += len(body)
+        rows += sum(1 for _ in iter_ndjson(gzip.decompress(body) if key.endswith(".gz") else body))
+    return len(keys), size / 1e6, rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs-per-day", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="Rows sorted in memory per spill")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    raw = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        bucket = f"file://{tmp}"
+        for day in range(args.days):
+            for run in range(args.runs_per_day):
+                # Spread the runs over the month
+                now = datetime(2025, 11, 1 + day % 30, run % 24)
+                rows = normalize_projects([dict(r) for r in raw], scraped_at=now.isoformat())
+                upload_json_to_s3(bucket, rows, prefix="p", partition_by="district" if run % 2 else None, now=now)
+
+        base = "p/year=2025/month=11"
+        before = scan(bucket, base)
+        result = compact_period(bucket, "p", "2025-11", chunk_rows=args.chunk_rows)
+        after = scan(bucket, base)
+
+        print(f"{args.days * args.runs_per_day} runs of {args.rows} rows\n")
+        print(f"{'layout':<10} {'objects':>8} {'MB':>8} {'rows':>9} {'scan s':>8}")
+        for name, (objects, mb, n, seconds) in (("per-run", before), ("compacted", after)):
+            print(f"{name:<10} {objects:>8} {mb:>8.2f} {n:>9} {seconds:>8.2f}")
+        print(f"\ncompaction: {result['objects_in']} -> {result['objects_out']} objects, "
+              f"{result['ratio']}x smaller, {result['rows_per_second']} rows/s, "
+              f"{result['mb_per_second']} MB/s in, {result['sort_spills']} sort spill(s), "
+              f"phases {result['phase_seconds']}")
+
+
+if __name__ == "__main__":
+    main()
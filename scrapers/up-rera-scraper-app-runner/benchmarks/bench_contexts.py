@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Throughput of the partitioned grid crawl for K = 1..8 browser contexts.
+
+Starts the local fixture site (benchmarks/fixture_site.py), launches one
+Chromium and scrapes the whole grid with K isolated contexts, partitioned by
+grid page (--mode pages) or by district filter (--mode districts), reporting
+partitions/s, rows/s and process-tree peak RSS per K. Needs Playwright's Chromium
+(`uv run playwright install chromium`).
+
+Usage:
+    python benchmarks/bench_contexts.py [--rows 2000] [--page-size 50] [--latency 0.5] [--max-k 8]
+                                        [--mode pages|districts]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from fixture_site import FixtureSite  # noqa: E402
+from pipeline.browser_pool import launch_browser  # noqa: E402
+from pipeline.crawl import (discover_districts, plan_district_partitions,  # noqa: E402
+                            scrape_districts, scrape_grid_pages)
+from pipeline.memory import MemoryMonitor  # noqa: E402
+from pipeline.retry import Retrier  # noqa: E402
+
+
+async def run(args, site: FixtureSite):
+    async with async_playwright() as p:
+        browser = await launch_browser(p, single_process=False)
+        try:
+            if args.mode == "districts":
+                options = await discover_districts(browser, Retrier(), 60000, base_url=site.base_url)
+                partitions = plan_district_partitions(options)
+            else:
+                partitions = range(1, site.pages() + 1)
+            print(f"{len(site.rows):,} rows, {len(partitions)} {args.mode}, "
+                  f"{args.latency}s latency per response")
+            print(f"{'K':>3} {'seconds':>9} {'parts/s':>9} {'rows/s':>9} {'speedup':>8} {'peak MB':>8}")
+            baseline = None
+            for k in range(1, args.max_k + 1):
+                monitor = MemoryMonitor()
+                start = time.perf_counter()
+                scrape = scrape_districts if args.mode == "districts" else scrape_grid_pages
+                task = asyncio.ensure_future(scrape(
+                    browser, partitions, k, Retrier(), timeout_ms=60000, base_url=site.base_url))
+                while not task.done():
+                    monitor.sample(f"k={k}")
+                    await asyncio.sleep(0.5)
+                projects, outcome = task.result()
+                seconds = time.perf_counter() - start
+                baseline = baseline or seconds
+                assert len(projects) == len(site.rows), (len(projects), outcome.errors)
+                print(f"{k:>3} {seconds:>9.2f} {len(partitions) / seconds:>9.2f} "
+                      f"{len(projects) / seconds:>9.0f} {baseline / seconds:>7.2f}x "
+                      f"{monitor.peak_bytes / 1024 / 1024:>8.0f}")
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Seconds the fixture waits before every response")
+    parser.add_argument("--max-k", type=int, default=8)
+    parser.add_argument("--mode", choices=("pages", "districts"), default="pages")
+    args = parser.parse_args()
+
+    with FixtureSite(args.rows, args.page_size, args.latency) as site:
+        asyncio.run(run(args, site))
+
+
+if __name__ == "__main__":
+    main()
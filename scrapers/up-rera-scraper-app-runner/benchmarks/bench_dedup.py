@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Storage growth of per-run uploads vs deduplicated daily snapshots.
+
+Simulates --days days of --runs-per-day scheduled scrapes of --projects
+projects. Each run re-reads the whole set; --churn of the projects change
+per day, a few new ones register, and --partial of each run's rows come
+back as Strategy 3 RERA-only rows. "runs" uploads every run with
+upload_json_to_s3 (one run directory per scrape). "dedup" sends the same
+runs through dedup_upload (one snapshot per day). Both write to a
+temporary file:// target. Reports objects, MB and rows a downstream job
+scans, plus the dedup index and Bloom filter size.
+
+Usage:
+    python benchmarks/bench_dedup.py [--projects 5000] [--days 7] [--runs-per-day 6] [--churn 0.02]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from bench_normalize import make_rows  # noqa: E402
+from pipeline.dedup import DedupIndex, dedup_upload  # noqa: E402
+from pipeline.normalize import normalize_projects  # noqa: E402
+from pipeline.records import build_project_from_rera_number  # noqa: E402
+from pipeline.storage import iter_ndjson, list_keys, read_object, upload_json_to_s3  # noqa: E402
+
+
+def storage(bucket: str, prefix: str):
+    keys = list_keys(bucket, prefix)
+    root = bucket[len("file://"):]
+    size = sum(os.path.getsize(os.path.join(root, k)) for k in keys)
+    rows = sum(1 for k in keys for _ in iter_ndjson(read_object(bucket, k)))
+    return len(keys), size / 1e6, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--runs-per-day", type=int, default=6)
+    parser.add_argument("--churn", type=float, default=0.02, help="Share of projects changing per day")
+    parser.add_argument("--partial", type=float, default=0.01, help="Share of rows per run that are RERA-only")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    projects = normalize_projects(make_rows(args.projects))
+    with tempfile.TemporaryDirectory() as tmp:
+        bucket = f"file://{tmp}"
+        index = DedupIndex(db_path=os.path.join(tmp, "_dedup.sqlite3"))
+        seconds = {"runs": 0.0, "dedup": 0.0}
+        for day in range(args.days):
+            for project in rng.sample(projects, int(len(projects) * args.churn)):
+                project["end_date"] = f"20{rng.randint(26, 35)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+            new = normalize_projects(make_rows(args.projects // 200 or 1, seed=1000 + day))
+            for n, project in enumerate(new):
+                project["rera_number"] = f"UPRERAPRJ{900000 + day * 10000 + n}"
+            projects.extend(new)
+            now = datetime(2025, 11, 1 + day, 6)
+            for run in range(args.runs_per_day):
+                rows = [dict(p) for p in projects]
+                for i in rng.sample(range(len(rows)), int(len(rows) * args.partial)):
+                    rows[i] = build_project_from_rera_number(rows[i]["rera_number"])
+                start = time.perf_counter()
+                upload_json_to_s3(bucket, rows, prefix="runs")
+                seconds["runs"] += time.perf_counter() - start
+                start = time.perf_counter()
+                dedup_upload(bucket, rows, prefix="dedup", index=index, now=now)
+                seconds["dedup"] += time.perf_counter() - start
+
+        total_runs = args.days * args.runs_per_day
+        print(f"{total_runs} runs over {args.days} days, {len(projects)} projects at the end, "
+              f"{args.churn:.0%} daily churn\n")
+        print(f"{'layout':<8} {'objects':>8} {'MB':>8} {'rows scanned':>13} {'write s':>8}")
+        for name in ("runs", "dedup"):
+            objects, mb, rows = storage(bucket, name)
+            print(f"{name:<8} {objects:>8} {mb:>8.2f} {rows:>13} {seconds[name]:>8.2f}")
+        stats = index.stats()
+        print(f"\ndedup index: {stats['keys']} keys, Bloom filter {stats['bloom']['kb']} KB, "
+              f"expected false positives {stats['bloom']['false_positive_rate']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Partitioned crawl timings replayed from a HAR recording, K = 1..--max-k.
+
+Records one crawl of the local fixture site (benchmarks/fixture_site.py)
+with SCRAPER_HAR=record, stops the site, then replays the grid crawl with
+SCRAPER_HAR=playback at --latency seconds per response, --repeat times per
+K. Unrecorded requests are aborted, so nothing reaches the network. Reports
+the mean and spread of each K's runs. A low spread shows playback is stable
+enough to compare extraction, pagination and concurrency changes offline.
+Needs Playwright's Chromium (`uv run playwright install chromium`).
+
+Usage:
+    python benchmarks/bench_har.py [--rows 2000] [--page-size 50] [--latency 0.2] [--max-k 4] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from fixture_site import FixtureSite  # noqa: E402
+import pipeline.har as har  # noqa: E402
+from pipeline.browser_pool import launch_browser  # noqa: E402
+from pipeline.crawl import scrape_grid_pages  # noqa: E402
+from pipeline.retry import Retrier  # noqa: E402
+
+
+async def crawl(base_url: str, pages: int, k: int):
+    async with async_playwright() as p:
+        browser = await launch_browser(p, single_process=False)
+        try:
+            start = time.perf_counter()
+            projects, outcome = await scrape_grid_pages(
+                browser, range(1, pages + 1), k, Retrier(), timeout_ms=60000, base_url=base_url)
+            return projects, outcome, time.perf_counter() - start
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", default="0.2", help="SCRAPER_HAR_LATENCY for playback")
+    parser.add_argument("--record-latency", type=float, default=0.0,
+                        help="Seconds the fixture waits before every response while recording")
+    parser.add_argument("--max-k", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(SCRAPER_HAR="record", SCRAPER_HAR_PATH=tmp)
+        with FixtureSite(args.rows, args.page_size, args.record_latency) as site:
+            base_url, pages, rows = site.base_url, site.pages(), len(site.rows)
+            projects, outcome, seconds = asyncio.run(crawl(base_url, pages, args.max_k))
+        assert len(projects) == rows, (len(projects), outcome.errors)
+        files = sorted(Path(tmp).glob("*.har"))
+        size = sum(f.stat().st_size for f in files) / 1e6
+        print(f"recorded {rows:,} rows over {pages} pages in {seconds:.2f}s: "
+              f"{len(files)} HAR files, {size:.1f} MB\n")
+
+        os.environ.update(SCRAPER_HAR="playback", SCRAPER_HAR_LATENCY=args.latency, SCRAPER_HAR_MISS="abort")
+        print(f"playback at {args.latency}s per response, site stopped")
+        print(f"{'K':>3} {'mean s':>8} {'stdev s':>8} {'spread':>7} {'rows/s':>8} {'hits':>6} {'misses':>6}")
+        for k in range(1, args.max_k + 1):
+            runs = []
+            for _ in range(args.repeat):
+                har.start_playback_run()
+                projects, outcome, seconds = asyncio.run(crawl(base_url, pages, k))
+                assert len(projects) == rows, (len(projects), outcome.errors)
+                runs.append(seconds)
+            stats = har.get_playback().stats
+            mean = statistics.mean(runs)
+            stdev = statistics.stdev(runs) if len(runs) > 1 else 0.0
+            print(f"{k:>3} {mean:>8.2f} {stdev:>8.3f} {stdev / mean:>6.1%} {rows / mean:>8.0f} "
+                  f"{stats['hits']:>6} {stats['misses']:>6}")
+
+
+if __name__ == "__main__":
+    main()
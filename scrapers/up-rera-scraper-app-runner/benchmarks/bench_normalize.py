@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch (column-wise) vs per-row normalization of project rows.
+
+Usage:
+    python benchmarks/bench_normalize.py [--rows 100000] [--batch 1000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from pipeline.normalize import normalize_project, normalize_projects  # noqa: E402
+
+DISTRICTS = ["Lucknow", "LUCKNOW", "Gautam Buddha Nagar", "GHAZIABAD", "agra",
+             "Varanasi", "Kanpur Nagar", "Prayagraj", "Meerut", "Bareilly"]
+TYPES = ["Residential", "RESIDENTIAL", "Commercial", "Mixed", "Plotted"]
+
+
+def make_rows(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    promoters = [f"Promoter  {i} Pvt Ltd" for i in range(500)]
+    rows = []
+    for i in range(n):
+        d = f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(2017, 2025)}"
+        rows.append({
+            "serial_no": str(i + 1),
+            "promoter_name": rng.choice(promoters),
+            "project_name": f"Project {i}",
+            "rera_number": f"UPRERAPRJ{100000 + i}",
+            "project_type": rng.choice(TYPES),
+            "district": rng.choice(DISTRICTS),
+            "start_date": d,
+            "end_date": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2025, 2030)}",
+            "registration_date": d,
+            "detail_link": f"https://www.up-rera.in/Frm_View_Project_Details.aspx?id={i}",
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000,
+                        help="Rows per batch (one grid page or spill window)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"Normalizing {args.rows:,} synthetic rows (batch={args.batch})")
+
+    start = time.perf_counter()
+    per_row = [normalize_project(r) for r in rows]
+    per_row_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(rows), args.batch):
+        batched.extend(normalize_projects(rows[i:i + args.batch]))
+    batch_s = time.perf_counter() - start
+
+    assert [r["start_date"] for r in per_row] == [r["start_date"] for r in batched]
+    print(f"  per-row : {per_row_s:7.3f}s  ({per_row_s / args.rows * 1e6:6.2f} us/row)")
+    print(f"  batched : {batch_s:7.3f}s  ({batch_s / args.rows * 1e6:6.2f} us/row)")
+    print(f"  speedup : {per_row_s / batch_s:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
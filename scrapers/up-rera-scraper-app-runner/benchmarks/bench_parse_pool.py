@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Grid parsing on the event loop vs in a ParsePool of worker processes.
+
+Renders grid pages with the fixture site's HTML (no server or browser), then
+simulates C contexts fetching them concurrently with --latency seconds of
+network time per page. Each fetched page is parsed either inline on the event
+loop or by submitting it to a ParsePool with W workers. Reports wall time,
+pages/s and the worst event-loop lag seen by a 10 ms ticker: lag is what
+stalls Playwright's driver traffic for every other context while a page is
+being parsed.
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--pages 200] [--page-size 500] [--contexts 8]
+                                          [--latency 0.05] [--workers 1,2,4]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from fixture_site import FixtureSite  # noqa: E402
+from pipeline.html_grid import parse_grid_html  # noqa: E402
+from pipeline.parse_pool import ParsePool  # noqa: E402
+
+TICK = 0.01
+
+
+def render_pages(pages: int, page_size: int):
+    site = FixtureSite(pages * page_size, page_size, latency=0)
+    # Only the renderer is needed; release the listening socket straight away
+    site.server.server_close()
+    return [site.render(n) for n in range(1, pages + 1)]
+
+
+async def max_loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+    return worst
+
+
+async def crawl(htmls, contexts: int, latency: float, parser=None):
+    queue = asyncio.Queue()
+    for n, html in enumerate(htmls, 1):
+        queue.put_nowait((n, html))
+    rows = 0
+
+    async def context():
+        nonlocal rows
+        while not queue.empty():
+            n, html = queue.get_nowait()
+            await asyncio.sleep(latency)
+            if parser:
+                await parser.submit(n, html)
+            else:
+                rows += len(parse_grid_html(html))
+
+    await asyncio.gather(*(context() for _ in range(contexts)))
+    if parser:
+        rows = sum(len(page.projects) for page in (await parser.drain()).values())
+    return rows
+
+
+async def run(htmls, contexts: int, latency: float, workers: int):
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_lag(stop))
+    start = time.perf_counter()
+    if workers:
+        async with ParsePool(workers) as parser:
+            rows = await crawl(htmls, contexts, latency, parser)
+    else:
+        rows = await crawl(htmls, contexts, latency)
+    seconds = time.perf_counter() - start
+    stop.set()
+    return rows, seconds, await ticker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--contexts", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated fetch seconds per page")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated ParsePool sizes")
+    args = parser.parse_args()
+
+    htmls = render_pages(args.pages, args.page_size)
+    print(f"{args.pages} pages x {args.page_size} rows ({sum(map(len, htmls)) / 1e6:.1f} MB HTML), "
+          f"{args.contexts} contexts, {args.latency}s fetch")
+    print(f"{'parser':>10} {'seconds':>9} {'pages/s':>9} {'rows':>8} {'max lag ms':>11}")
+    for workers in [0] + [int(w) for w in args.workers.split(",") if w]:
+        rows, seconds, lag = asyncio.run(run(htmls, args.contexts, args.latency, workers))
+        label = "inline" if not workers else f"pool x{workers}"
+        print(f"{label:>10} {seconds:>9.2f} {args.pages / seconds:>9.1f} {rows:>8} {lag * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
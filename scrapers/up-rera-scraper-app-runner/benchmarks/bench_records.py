@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-row record building: the previous inline logic from
+mcp_servers.py vs pipeline.records.build_project_from_cells, plus Strategy 3
+RERA-number extraction over a large page text.
+
+Usage:
+    python benchmarks/bench_records.py [--rows 10000 100000]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from pipeline.records import build_project_from_cells, extract_rera_numbers  # noqa: E402
+
+
+def legacy_build(cell_texts, detail_link, link_text):
+    """Row handling as it was inlined in scrape_projects_list."""
+    if not cell_texts or all(not t for t in cell_texts):
+        return None
+    first_cell_text = cell_texts[0].lower()
+    if any(keyword in first_cell_text for keyword in ['s.no', 'sr.', 'serial', 'project name', 'rera']):
+        return None
+    rera_number = ''
+    rera_match = re.search(r'UPRERAPRJ\d+', link_text)
+    if rera_match:
+        rera_number = rera_match.group(0)
+    project = {
+        'serial_no': cell_texts[0] if len(cell_texts) > 0 else '',
+        'promoter_name': cell_texts[1] if len(cell_texts) > 1 else '',
+        'project_name': cell_texts[2] if len(cell_texts) > 2 else '',
+        'rera_number': rera_number or (cell_texts[3] if len(cell_texts) > 3 else ''),
+        'project_type': cell_texts[4] if len(cell_texts) > 4 else '',
+        'district': cell_texts[5] if len(cell_texts) > 5 else '',
+        'start_date': cell_texts[6] if len(cell_texts) > 6 else '',
+        'end_date': cell_texts[7] if len(cell_texts) > 7 else '',
+        'registration_date': cell_texts[8] if len(cell_texts) > 8 else '',
+        'detail_link': detail_link,
+    }
+    raw_text_parts = []
+    for field, label in (('project_name', 'Project Name'), ('rera_number', 'RERA Number'),
+                         ('promoter_name', 'Promoter'), ('project_type', 'Type'),
+                         ('district', 'District'), ('start_date', 'Start Date'),
+                         ('end_date', 'End Date'), ('registration_date', 'Registration Date'),
+                         ('detail_link', 'Details')):
+        if project[field]:
+            raw_text_parts.append(f"{label}: {project[field]}")
+    project['raw_text'] = " | ".join(raw_text_parts)
+    if project['project_name'] or project['rera_number']:
+        return project
+    return None
+
+
+def make_rows(n):
+    return [([str(i + 1), f"Promoter {i % 500} Pvt Ltd", f"Project {i}", f"UPRERAPRJ{100000 + i}",
+              "Residential", "Lucknow", "01-04-2020", "31-03-2025", "15-03-2020", "View"],
+             f"https://www.up-rera.in/Frm_View_Project_Details.aspx?id={100000 + i}",
+             f"UPRERAPRJ{100000 + i}") for i in range(n)]
+
+
+def bench(fn, rows):
+    start = time.perf_counter()
+    for cells, link, text in rows:
+        fn(cells, link, text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    for n in args.rows:
+        rows = make_rows(n)
+        assert legacy_build(*rows[0]) == build_project_from_cells(*rows[0])
+        legacy_s = bench(legacy_build, rows)
+        new_s = bench(build_project_from_cells, rows)
+        print(f"{n:>7,} rows  legacy {legacy_s / n * 1e6:6.2f} us/row   "
+              f"records {new_s / n * 1e6:6.2f} us/row   ({legacy_s / new_s:4.2f}x)")
+
+        page_text = "\n".join(" ".join(cells) for cells, _, _ in rows)
+        start = time.perf_counter()
+        legacy_rera = list(set(re.findall(r'UPRERAPRJ\d+', page_text)))
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        ordered = extract_rera_numbers(page_text)
+        new_s = time.perf_counter() - start
+        assert sorted(legacy_rera) == sorted(ordered)
+        print(f"{'':>13}page-text RERA dedup: set {legacy_s * 1e3:6.1f} ms   "
+              f"ordered {new_s * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Per-turn prompt size and latency of the agent workflow, compact vs pre-compaction tool results.
+
+Runs the real Runner with a scripted mock model through the scrape ->
+ingest -> upload workflow. The scrape result comes from the real
+_finish_run on a synthetic district crawl, the upload goes to a temporary
+file:// target, and ingest/upload are the real tools. The "legacy" mode
+replays the pre-compaction result shapes with the indent=2 formatting
+FastMCP and json.dumps(indent=2) produced. The mock model bills
+len(input)/4 tokens per turn and simulates prefill time at --prefill-tps
+tokens/s, so latency differences come from input size alone.
+
+Usage:
+    python benchmarks/bench_tool_output.py [--projects 50] [--prefill-tps 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents import Agent, function_tool, set_tracing_disabled  # noqa: E402
+from agents.items import ModelResponse  # noqa: E402
+from agents.models.interface import Model  # noqa: E402
+from agents.usage import Usage  # noqa: E402
+from openai.types.responses import (ResponseFunctionToolCall, ResponseOutputMessage,  # noqa: E402
+                                    ResponseOutputText)
+
+from bench_normalize import make_rows  # noqa: E402
+from mcp_servers import _finish_run  # noqa: E402
+from pipeline.browser_pool import PartitionResults  # noqa: E402
+from pipeline.crawl import DistrictPartition  # noqa: E402
+from pipeline.memory import MemoryMonitor  # noqa: E402
+from pipeline.retry import Retrier  # noqa: E402
+from pipeline.storage import upload_json_to_s3  # noqa: E402
+from pipeline.tool_output import tool_result  # noqa: E402
+from src.server.agent.context import get_agent_instructions  # noqa: E402
+from src.server.agent.execution import BudgetedModel, RunAccounting, run_within_budget  # noqa: E402
+from src.server.agent.tools import ingest_scraped_data, upload_to_s3  # noqa: E402
+
+STEPS = ("scrape_projects_list", "ingest_scraped_data", "upload_to_s3")
+
+
+class ScriptedModel(Model):
+    """Calls the workflow's tools in order, then answers; latency scales with input size."""
+
+    def __init__(self, prefill_tps: float):
+        self.prefill_tps = prefill_tps
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, **kwargs):
+        outputs = [i for i in input if isinstance(i, dict) and i.get("type") == "function_call_output"]
+        tokens = len(json.dumps(input)) // 4 + len(system_instructions or "") // 4
+        await asyncio.sleep(0.05 + tokens / self.prefill_tps)
+        step = len(outputs)
+        if step < len(STEPS):
+            args = {"max_projects": 50}
+            if step:
+                scraped = json.loads(outputs[0]["output"])
+                file_path = scraped.get("file") or scraped.get("data", {}).get("saved_file")
+                args = {"file_path": file_path}
+                if STEPS[step] == "upload_to_s3":
+                    args.update(bucket=f"file://{self.target}", prefix="bench")
+            output = [ResponseFunctionToolCall(type="function_call", call_id=f"call_{step}", id=f"fc_{step}",
+                                               name=STEPS[step], arguments=json.dumps(args))]
+        else:
+            output = [ResponseOutputMessage(id="msg", type="message", role="assistant", status="completed",
+                                            content=[ResponseOutputText(type="output_text", annotations=[],
+                                                                        text="Scraped and uploaded.")])]
+        return ModelResponse(output=output, response_id=None,
+                             usage=Usage(requests=1, input_tokens=tokens, output_tokens=40,
+                                         total_tokens=tokens + 40))
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def synthetic_scrape(n: int) -> dict:
+    """Run the real _finish_run on a synthetic 4-context district crawl."""
+    rows = make_rows(n)
+    outcome = PartitionResults()
+    for row in rows:
+        outcome.results.setdefault(DistrictPartition(row["district"], row["district"].title()), []).append(row)
+    outcome.slots = [{"slot": k, "items": 3, "failed": 0, "busy_seconds": 12.5} for k in range(4)]
+    outcome.seconds = 42.0
+    retrier = Retrier()
+    monitor = MemoryMonitor()
+    for label in ("browser_launched", "grid_loaded", "extraction_done"):
+        monitor.sample(label)
+    return _finish_run("bench1234", datetime.now(), rows, len(rows), rows[:3], retrier, monitor,
+                       extra={"partition_by": "district", "partitions": outcome.as_dict()})
+
+
+def legacy_tools(compact_scrape: dict):
+    """Tools returning the pre-compaction result shapes and formatting."""
+    saved = json.loads(Path(compact_scrape["file"]).read_text())
+    data = saved["data"]
+
+    @function_tool(name_override="scrape_projects_list")
+    def legacy_scrape(max_projects: int = 50) -> str:
+        extra = {k: data[k] for k in ("partition_by", "partitions") if k in data}
+        return json.dumps({
+            "success": True,
+            "data": {
+                "total_projects": data["total_projects"], "run_id": data["run_id"],
+                "scraped_at": data["scraped_at"], "duration_seconds": data["duration_seconds"],
+                "retries": data["retries"],
+                "memory": {k: v for k, v in data["memory"].items() if k != "samples"},
+                "saved_file": compact_scrape["file"],
+                "file_size_bytes": Path(compact_scrape["file"]).stat().st_size,
+                "file_size_kb": round(Path(compact_scrape["file"]).stat().st_size / 1024, 2),
+                **extra,
+                "sample_projects": [{"project_name": p.get("project_name", "N/A"),
+                                     "rera_number": p.get("rera_number", "N/A"),
+                                     "district": p.get("district", "N/A")} for p in data["projects"][:3]],
+            },
+            "message": f"Successfully scraped {data['total_projects']} projects and saved to {compact_scrape['file']}",
+        }, indent=2)
+
+    @function_tool(name_override="ingest_scraped_data")
+    def legacy_ingest(file_path: str) -> str:
+        projects = json.loads(Path(file_path).read_text())["data"]["projects"]
+        return json.dumps({"status": "success", "file_path": file_path, "total_projects": len(projects),
+                           "sample_projects": projects[:3], "message": f"Verified {len(projects)} projects"},
+                          indent=2)
+
+    @function_tool(name_override="upload_to_s3")
+    def legacy_upload(file_path: str, bucket: str, prefix: str = "up-rera-projects") -> str:
+        doc = json.loads(Path(file_path).read_text())["data"]
+        result = upload_json_to_s3(bucket, doc["projects"], prefix=prefix, run_id=doc["run_id"],
+                                   partition_by=doc.get("partition_by"))
+        return json.dumps({
+            "status": "success", "upload_type": result["type"], "bucket": bucket, "target": result["target"],
+            "s3_key": result["key"], "manifest_key": result["manifest_key"], "parts": result["parts"],
+            "retries": result["retries"]["total_retries"], "retry_seconds": result["retries"]["total_retry_seconds"],
+            "file_size": Path(file_path).stat().st_size, "total_projects": len(doc["projects"]),
+            "run_id": result["run_id"], "scraped_at": doc["scraped_at"],
+            "message": f"Successfully uploaded {len(doc['projects'])} projects to {bucket}",
+            "partition_by": result.get("partition_by"),
+            "partitions": {v: p["rows"] for v, p in (result.get("partitions") or {}).items()},
+        }, indent=2)
+
+    return [legacy_scrape, legacy_ingest, legacy_upload]
+
+
+async def run(mode: str, scrape: dict, prefill_tps: float, target: str) -> RunAccounting:
+    if mode == "legacy":
+        tools = legacy_tools(scrape)
+    else:
+        @function_tool(name_override="scrape_projects_list")
+        def compact_scrape(max_projects: int = 50) -> str:
+            return tool_result("scrape_projects_list", scrape)
+        tools = [compact_scrape, ingest_scraped_data, upload_to_s3]
+    model = ScriptedModel(prefill_tps)
+    model.target = target
+    accounting = RunAccounting()
+    agent = Agent(name="bench", instructions=get_agent_instructions(), tools=tools,
+                  model=BudgetedModel(model, "mock", accounting))
+    await run_within_budget(agent, "Scrape 50 projects and upload them to the bucket.", accounting)
+    return accounting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--prefill-tps", type=float, default=2000, help="Simulated prompt tokens/s")
+    args = parser.parse_args()
+    set_tracing_disabled(True)
+
+    scrape = synthetic_scrape(args.projects)
+    results = {}
+    for mode in ("legacy", "compact"):
+        with tempfile.TemporaryDirectory() as target:
+            results[mode] = asyncio.run(run(mode, scrape, args.prefill_tps, target)).as_dict()
+
+    print(f"{'turn':>4} {'legacy chars':>13} {'compact chars':>14} {'legacy s':>9} {'compact s':>10}")
+    for old, new in zip(results["legacy"]["by_turn"], results["compact"]["by_turn"]):
+        print(f"{old['turn']:>4} {old['input_chars']:>13,} {new['input_chars']:>14,} "
+              f"{old['latency_seconds']:>9.3f} {new['latency_seconds']:>10.3f}")
+    for mode in ("legacy", "compact"):
+        r = results[mode]
+        print(f"{mode:>8}: {r['input_tokens']:,} input tokens, {r['model_seconds']:.2f}s model time, "
+              f"tool result bytes {r['tool_output_bytes']}")
+
+
+if __name__ == "__main__":
+    main()
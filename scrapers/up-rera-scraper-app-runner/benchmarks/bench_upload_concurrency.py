@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Concurrent uploads: blocking upload_json_to_s3 on the event loop vs aupload_json_to_s3.
+
+R requests each upload N records partitioned by district. The S3 client is
+a stand-in whose put_object blocks for --latency seconds, the way a boto3
+call does. "blocking" runs upload_json_to_s3 inside each coroutine with
+serial part writes, which was upload_to_s3's behaviour before.
+"async" awaits aupload_json_to_s3, which runs on the upload executor
+and writes partitions concurrently. Reports wall time, uploads/s and the
+worst event-loop lag seen by a 10 ms ticker. Lag is how long every other
+request in the API process was frozen.
+
+Usage:
+    python benchmarks/bench_upload_concurrency.py [--requests 8] [--rows 2000] [--latency 0.03]
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server" / "agent"))
+
+from bench_normalize import make_rows  # noqa: E402
+from pipeline.storage import aupload_json_to_s3, upload_json_to_s3  # noqa: E402
+
+TICK = 0.01
+
+
+class SlowS3:
+    """put_object that blocks like a network round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.puts = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.puts += 1
+
+
+async def max_loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - start - TICK)
+    return worst
+
+
+async def run(mode: str, requests: int, rows, s3: SlowS3):
+    async def request(n: int):
+        kwargs = dict(prefix="bench", run_id=f"{mode}-{n}", partition_by="district", s3_client=s3)
+        if mode == "blocking":
+            return upload_json_to_s3("bench-bucket", rows, concurrency=1, **kwargs)
+        return await aupload_json_to_s3("bench-bucket", rows, **kwargs)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(request(n) for n in range(requests)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    return results, seconds, await ticker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.03, help="Seconds per put_object")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.requests} concurrent uploads of {args.rows:,} rows partitioned by district, "
+          f"{args.latency * 1000:.0f} ms per put")
+    print(f"{'mode':>9} {'seconds':>9} {'uploads/s':>10} {'puts':>6} {'max lag ms':>11}")
+    for mode in ("blocking", "async"):
+        s3 = SlowS3(args.latency)
+        results, seconds, lag = asyncio.run(run(mode, args.requests, rows, s3))
+        assert all(r["total_rows"] == args.rows for r in results)
+        print(f"{mode:>9} {seconds:>9.2f} {args.requests / seconds:>10.2f} {s3.puts:>6} {lag * 1000:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for up-rera.in used by the browser benchmarks.
+
+Serves /index with a "Registered Projects" link and /projects with an
+ASP.NET-style #grdPojDetail grid. Paging is a form postback from pager links
+(__doPostBack('ctl00$ContentPlaceHolder1$grdPojDetail', 'Page$N')), the
+district dropdown posts back on change, and every response is delayed by
+--latency seconds to mimic the slow site.
+
+Usage:
+    python benchmarks/fixture_site.py [--port 8765] [--rows 2000] [--page-size 50] [--latency 0.5]
+"""
+
+import argparse
+import html
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+from bench_normalize import make_rows
+
+GRID_TARGET = "ctl00$ContentPlaceHolder1$grdPojDetail"
+
+COLUMNS = ("serial_no", "promoter_name", "project_name", "rera_number", "project_type",
+           "district", "start_date", "end_date", "registration_date")
+
+INDEX_HTML = """<html><body><h1>UP RERA (fixture)</h1>
+<a href="/projects">Registered Projects</a></body></html>"""
+
+PAGE_HTML = """<html><body>
+<form id="form1" method="post" action="/projects">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="">
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="">
+<script>
+function __doPostBack(target, arg) {{
+    document.getElementById('__EVENTTARGET').value = target;
+    document.getElementById('__EVENTARGUMENT').value = arg;
+    document.getElementById('form1').submit();
+}}
+</script>
+<select name="ddlDistrict" id="ddlDistrict" onchange="__doPostBack('ddlDistrict', '')">
+<option value="0">--Select District--</option>
+{options}
+</select>
+<p>Page {page} of {pages}</p>
+<table id="grdPojDetail"><tbody>
+<tr><th>S.No</th><th>Promoter Name</th><th>Project Name</th><th>RERA Reg.No.</th><th>ProjectType</th>
+<th>District</th><th>StartDate</th><th>EndDate</th><th>Registration Date</th><th>Details</th></tr>
+{rows}
+</tbody></table>
+<div class="pager">{pager}</div>
+</form></body></html>"""
+
+
+def render_row(row: Dict[str, str]) -> str:
+    cells = "".join(f"<td>{html.escape(row[c])}</td>" for c in COLUMNS)
+    link = f'<td><a href="Frm_View_Project_Details.aspx?id={row["serial_no"]}">{row["rera_number"]}</a></td>'
+    return f"<tr>{cells}{link}</tr>"
+
+
+class FixtureSite:
+    """Threaded fixture server; use as a context manager to run it in the background."""
+
+    def __init__(self, rows: int = 2000, page_size: int = 50, latency: float = 0.5, port: int = 0):
+        self.rows: List[Dict[str, str]] = make_rows(rows)
+        # One spelling per district so the dropdown has distinct entries
+        for row in self.rows:
+            row["district"] = row["district"].title()
+        self.page_size = page_size
+        self.latency = latency
+        self.sessions = set()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: str, cookie: str = ""):
+                time.sleep(site.latency)
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                if cookie:
+                    self.send_header("Set-Cookie", f"ASP.NET_SessionId={cookie}; Path=/")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _session(self) -> str:
+                cookie = self.headers.get("Cookie", "")
+                if "ASP.NET_SessionId=" in cookie:
+                    return ""
+                session = uuid.uuid4().hex
+                site.sessions.add(session)
+                return session
+
+            def do_GET(self):
+                if self.path.startswith("/projects"):
+                    self._send(site.render(1), self._session())
+                else:
+                    self._send(INDEX_HTML, self._session())
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                page = 1
+                arg = form.get("__EVENTARGUMENT", "")
+                if arg.startswith("Page$") and arg[5:].isdigit():
+                    page = int(arg[5:])
+                self._send(site.render(page, form.get("ddlDistrict", "0")))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def districts(self) -> List[str]:
+        return sorted({r["district"] for r in self.rows})
+
+    def rows_for(self, district: str = "0") -> List[Dict[str, str]]:
+        if district == "0":
+            return self.rows
+        return [r for r in self.rows if r["district"] == district]
+
+    def pages(self, district: str = "0") -> int:
+        return max(1, -(-len(self.rows_for(district)) // self.page_size))
+
+    def render(self, page: int, district: str = "0") -> str:
+        rows, pages = self.rows_for(district), self.pages(district)
+        page = min(max(page, 1), pages)
+        chunk = rows[(page - 1) * self.page_size:page * self.page_size]
+        options = "\n".join(
+            f'<option value="{html.escape(d)}"{" selected" if d == district else ""}>{html.escape(d)}</option>'
+            for d in self.districts())
+        pager = " ".join(
+            f"<a href=\"javascript:__doPostBack('{GRID_TARGET}','Page${n}')\">{n}</a>" if n != page else f"<span>{n}</span>"
+            for n in range(1, pages + 1))
+        return PAGE_HTML.format(page=page, pages=pages, options=options, pager=pager,
+                                rows="\n".join(render_row(r) for r in chunk))
+
+    def __enter__(self) -> "FixtureSite":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.rows, args.page_size, args.latency, args.port)
+    print(f"Serving {args.rows} rows ({site.pages()} pages) at {site.base_url}/index")
+    site.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
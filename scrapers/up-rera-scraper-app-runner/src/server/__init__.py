@@ -1,17 +1,33 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from .healthz import router as healthz_router
 from .agent import router as agent_router
+from .search import router as search_router
+from .projects import router as projects_router
+from .startup import StartupProfile, lifespan_with
 # Load environment
 load_dotenv(override=True)
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
 
 def create_app() -> FastAPI:
 
+    profile = StartupProfile(origin=_IMPORT_START)
+    profile.record("import", _IMPORT_SECONDS)
+    start = time.perf_counter()
+
     app = FastAPI(title="UP RERA Scraper",
                   description="API for UP RERA real estate data scraping",
-                  version="1.0.0")
+                  version="1.0.0",
+                  lifespan=lifespan_with(profile))
 
     app.include_router(healthz_router, prefix="/healthz", tags=["healthz"])
     app.include_router(agent_router, prefix="/agent", tags=["agent"])
+    app.include_router(search_router, prefix="/search", tags=["search"])
+    app.include_router(projects_router, prefix="/projects", tags=["projects"])
+    profile.record("create_app", time.perf_counter() - start)
     return app
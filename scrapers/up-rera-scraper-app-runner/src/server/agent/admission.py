@@ -0,0 +1,285 @@
+"""
+Admission control for scrape requests (GET /agent/ and GET /agent/stream).
+
+Each admitted scrape launches a Chromium in a 2 GB container, so scrapes
+are admitted against a fixed budget rather than run as they arrive:
+
+- cost: a request costs ceil(max_projects / ADMISSION_PROJECTS_PER_UNIT)
+  units (default 250 projects per unit, at least 1, at most the capacity)
+- global cap: admitted scrapes hold their units until they finish; a scrape
+  starts only while fewer than MAX_CONCURRENT_SCRAPES are in flight and its
+  cost fits in ADMISSION_CAPACITY units (default 8)
+- wait queue: requests that don't fit wait in FIFO order, up to
+  MAX_QUEUED_SCRAPES of them, for at most ADMISSION_QUEUE_TIMEOUT seconds
+  (default 30). FIFO keeps a stream of cheap requests from starving an
+  expensive one.
+- per-client token buckets: each client spends its cost in tokens from a bucket refilled at
+  ADMISSION_CLIENT_RATE units per minute (default 6), holding at most
+  ADMISSION_CLIENT_BURST (default 8). The client is the X-Forwarded-For hop
+  appended by the outermost of ADMISSION_TRUSTED_PROXIES proxies (default 1,
+  the App Runner load balancer), else the peer address. Hops left of it are
+  whatever the caller sent, so they are never trusted.
+
+Scheduled jobs (scheduler.py) are admitted the same way with kind
+"scheduled" but without a token bucket, so their units count against the
+capacity and releasing them wakes the queue.
+
+Requests that are rate limited, find the queue full or time out waiting
+raise AdmissionRejected. Routes turn that into 429 with a Retry-After
+estimate. ADMISSION_CONTROL=0 disables all of it (scrapes are still counted
+for readiness).
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import Request
+
+from .capacity import ScrapeTracker, scrapes
+
+logger = logging.getLogger(__name__)
+
+MAX_BUCKETS = 10_000
+MAX_RETRY_AFTER = 600
+
+
+class AdmissionRejected(Exception):
+    """A scrape request was not admitted; retry_after is in seconds."""
+
+    def __init__(self, reason: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(min(max(math.ceil(self.retry_after), 1), MAX_RETRY_AFTER))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"reason": self.reason, "message": str(self), "retry_after": int(self.retry_after_header)}
+
+
+class TokenBucket:
+    """rate tokens/s up to burst; take(cost) spends or says how long to wait."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float) -> float:
+        """Spend cost tokens and return 0, or return the seconds until they are available."""
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float(MAX_RETRY_AFTER)
+
+    def refund(self, cost: float) -> None:
+        self.tokens = min(self.burst, self.tokens + cost)
+
+    @property
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+@dataclass
+class Ticket:
+    """An admitted scrape; hand it back with AdmissionController.release()."""
+    kind: str
+    client: str
+    cost: int
+    admitted_at: float = field(default_factory=time.monotonic)
+    waited_seconds: float = 0.0
+    released: bool = False
+
+
+@dataclass
+class _Waiter:
+    kind: str
+    cost: int
+    future: asyncio.Future
+
+
+def client_key(request: Request, trusted_proxies: Optional[int] = None) -> str:
+    """Client identity for rate limiting.
+
+    Each proxy appends the address it received the request from, so with
+    `trusted_proxies` proxies in front of the service the client is the
+    trusted_proxies-th hop from the right; a client can prepend hops but not
+    change that one. 0 ignores X-Forwarded-For and uses the peer address.
+    """
+    if trusted_proxies is None:
+        trusted_proxies = int(os.environ.get("ADMISSION_TRUSTED_PROXIES", 1))
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    if trusted_proxies > 0 and hops:
+        return hops[-min(trusted_proxies, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+class AdmissionController:
+    """Global cost-weighted cap, FIFO wait queue and per-client token buckets."""
+
+    def __init__(self, tracker: Optional[ScrapeTracker] = None, capacity: Optional[int] = None,
+                 projects_per_unit: Optional[int] = None, queue_timeout: Optional[float] = None,
+                 client_rate_per_minute: Optional[float] = None, client_burst: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.tracker = tracker or scrapes
+        self.capacity = capacity or int(os.environ.get("ADMISSION_CAPACITY", 8))
+        self.projects_per_unit = projects_per_unit or int(os.environ.get("ADMISSION_PROJECTS_PER_UNIT", 250))
+        self.queue_timeout = queue_timeout or float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 30))
+        rate = client_rate_per_minute or float(os.environ.get("ADMISSION_CLIENT_RATE", 6))
+        self.client_rate = rate / 60
+        self.client_burst = client_burst or float(os.environ.get("ADMISSION_CLIENT_BURST", self.capacity))
+        self.enabled = enabled if enabled is not None else os.environ.get("ADMISSION_CONTROL", "1") != "0"
+        self.used = 0
+        self.queue: Deque[_Waiter] = deque()
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.rejected: Dict[str, int] = {}
+        self.admitted = 0
+        # Moving average of scrape duration, for Retry-After estimates
+        self.avg_seconds = 30.0
+
+    def cost(self, max_projects: int) -> int:
+        return min(max(math.ceil(max_projects / self.projects_per_unit), 1), self.capacity)
+
+    def _fits(self, cost: int) -> bool:
+        return self.tracker.in_flight < self.tracker.max_in_flight and self.used + cost <= self.capacity
+
+    def _grant(self, kind: str, cost: int) -> None:
+        self.used += cost
+        self.tracker.begin(kind)
+
+    def _dispatch(self) -> None:
+        """Admit queued requests from the head while they fit."""
+        while self.queue and self._fits(self.queue[0].cost):
+            waiter = self.queue.popleft()
+            if waiter.future.done():
+                continue
+            self._grant(waiter.kind, waiter.cost)
+            waiter.future.set_result(True)
+        self.tracker.waiting = len(self.queue)
+
+    def _estimate_wait(self, position: int) -> float:
+        """Seconds until a request at queue position `position` would likely start."""
+        rounds = math.ceil((position + 1) / max(self.tracker.max_in_flight, 1))
+        return self.avg_seconds * rounds
+
+    def _reject(self, reason: str, retry_after: float, message: str) -> AdmissionRejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        logger.info(f"🚫 Scrape rejected ({reason}): {message}; retry after {retry_after:.0f}s")
+        return AdmissionRejected(reason, retry_after, message)
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= MAX_BUCKETS:
+                # Full buckets carry no state worth keeping
+                for key in [k for k, b in self.buckets.items() if b.full]:
+                    del self.buckets[key]
+            bucket = self.buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+        return bucket
+
+    async def acquire(self, client: str, max_projects: int, kind: str, rate_limited: bool = True) -> Ticket:
+        """Admit a scrape or raise AdmissionRejected.
+
+        Args:
+            client: Client identity (see client_key)
+            max_projects: Requested projects; sets the cost
+            kind: "agent", "stream" or "scheduled", for in-flight accounting
+            rate_limited: Spend the client's tokens; False for the service's
+                own jobs, which still queue for capacity
+
+        Returns:
+            Ticket to release() when the scrape has finished
+        """
+        cost = self.cost(max_projects)
+        if not self.enabled:
+            self.tracker.begin(kind)
+            return Ticket(kind=kind, client=client, cost=0)
+
+        bucket = self._bucket(client) if rate_limited else None
+        wait = bucket.take(cost) if bucket else 0.0
+        if wait > 0:
+            raise self._reject("rate_limited", wait,
+                               f"Client {client} is over its scrape rate ({cost} units requested)")
+
+        start = time.monotonic()
+        if not self.queue and self._fits(cost):
+            self._grant(kind, cost)
+        else:
+            if len(self.queue) >= self.tracker.max_queued:
+                if bucket:
+                    bucket.refund(cost)
+                raise self._reject("queue_full", self._estimate_wait(len(self.queue)),
+                                   f"{len(self.queue)} scrapes already waiting")
+            waiter = _Waiter(kind, cost, asyncio.get_running_loop().create_future())
+            self.queue.append(waiter)
+            self.tracker.waiting = len(self.queue)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.future.done():
+                    # Admitted just as we gave up: hand the slot back
+                    self._release(kind, cost)
+                else:
+                    waiter.future.cancel()
+                    self.queue.remove(waiter)
+                    self.tracker.waiting = len(self.queue)
+                if bucket:
+                    bucket.refund(cost)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                raise self._reject("queue_timeout", self._estimate_wait(len(self.queue)),
+                                   f"No scrape slot within {self.queue_timeout:.0f}s") from None
+
+        self.admitted += 1
+        waited = time.monotonic() - start
+        logger.info(f"🎟️  Admitted {kind} scrape for {client} (cost {cost}, waited {waited:.1f}s, "
+                    f"{self.used}/{self.capacity} units in use)")
+        return Ticket(kind=kind, client=client, cost=cost, waited_seconds=round(waited, 3))
+
+    def _release(self, kind: str, cost: int) -> None:
+        self.used -= cost
+        self.tracker.end(kind)
+        self._dispatch()
+
+    def release(self, ticket: Ticket) -> None:
+        """Hand back an admitted scrape's units and wake the queue. Safe to call twice."""
+        if ticket.released:
+            return
+        ticket.released = True
+        seconds = time.monotonic() - ticket.admitted_at
+        self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+        if not self.enabled:
+            self.tracker.end(ticket.kind)
+            return
+        self._release(ticket.kind, ticket.cost)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "units_in_use": self.used,
+            "capacity": self.capacity,
+            "queued": len(self.queue),
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "clients": len(self.buckets),
+            "avg_scrape_seconds": round(self.avg_seconds, 1),
+        }
+
+
+admission = AdmissionController()
@@ -1,11 +1,15 @@
 import os
 import logging
-from typing import Optional
-from agents import Agent, Runner, trace
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from agents import Agent, trace
 from agents.extensions.models.litellm_model import LitellmModel
 from agents.mcp import MCPServerStdio
 from .context import get_agent_instructions, get_default_query
-from .tools import upload_to_s3
+from .execution import (AgentBudget, BudgetedModel, BudgetExceeded, RunAccounting, TurnCache,
+                        budgeted_model_settings, run_within_budget)
+from .tools import ingest_scraped_data, upload_to_s3
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -13,16 +17,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "bedrock/anthropic.claude-3-haiku-20240307-v1:0"
 
-async def run_up_rera_scraper_agent(max_projects: int = 20) -> str:
+_models: Dict[str, LitellmModel] = {}
+_models_lock = threading.Lock()
+
+
+def configure_aws_region() -> str:
+    """Point LiteLLM and boto3 at REGION (default us-east-1); done once, before the first model is built."""
+    region = os.environ.get("REGION", "us-east-1")
+    os.environ["AWS_REGION_NAME"] = region  # LiteLLM's preferred variable
+    os.environ["AWS_REGION"] = region  # Boto3 standard
+    os.environ["AWS_DEFAULT_REGION"] = region  # Fallback
+    return region
+
+
+def get_model(name: Optional[str] = None) -> LitellmModel:
+    """LitellmModel for LLM_MODEL, built once per process and reused across runs.
+
+    The model object holds no per-run state; budgets and caching are added
+    per run by wrapping it in BudgetedModel.
+    """
+    name = name or os.environ.get("LLM_MODEL", DEFAULT_MODEL)
+    with _models_lock:
+        if name not in _models:
+            configure_aws_region()
+            _models[name] = LitellmModel(model=name)
+            logger.info(f"🤖 Created LLM client for {name}")
+        return _models[name]
+
+
+@dataclass
+class AgentRun:
+    """Outcome of one agent run: the final answer plus token/latency accounting."""
+    final_output: Optional[str]
+    status: str = "success"
+    error: Optional[str] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+
+
+async def run_up_rera_scraper_agent(max_projects: int = 20) -> AgentRun:
     """Run the UP RERA Scraper Agent with optional S3 upload.
 
     S3 configuration is read from environment variables:
     - S3_BUCKET: S3 bucket name for upload (optional). If not set, only scrapes and verifies.
     - S3_PREFIX: S3 key prefix for organizing data (default: "up-rera-projects")
 
+    Budgets (AGENT_MAX_TOKENS, AGENT_MAX_SECONDS, AGENT_MAX_TURNS) and the
+    LLM turn cache (LLM_CACHE, LLM_CACHE_DIR) are described in execution.py.
+
     Args:
         max_projects: Maximum number of projects to scrape (default: 20)
+
+    Returns:
+        AgentRun; status is "budget_exceeded" when a budget stopped the run
     """
     # Read S3 configuration from environment variables
     s3_bucket = os.environ.get("S3_BUCKET")
@@ -33,18 +81,12 @@ async def run_up_rera_scraper_agent(max_projects: int = 20) -> str:
     logger.info(f"   S3 Bucket: {s3_bucket or 'Not configured (no upload)'}")
     logger.info(f"   S3 Prefix: {s3_prefix}")
 
-    os.environ["AWS_REGION_NAME"] = os.environ.get(
-        "REGION", "us-east-1")  # LiteLLM's preferred variable
-    os.environ["AWS_REGION"] = os.environ.get(
-        "REGION", "us-east-1")  # Boto3 standard
-    os.environ["AWS_DEFAULT_REGION"] = os.environ.get(
-        "REGION", "us-east-1")  # Fallback
-
-    MODEL = os.environ.get(
-        "LLM_MODEL", "bedrock/anthropic.claude-3-haiku-20240307-v1:0")
+    MODEL = os.environ.get("LLM_MODEL", DEFAULT_MODEL)
     logger.info(f"🤖 Using LLM Model: {MODEL}")
 
-    model = LitellmModel(model=MODEL)
+    budget = AgentBudget.from_env()
+    accounting = RunAccounting(budget=budget)
+    model = BudgetedModel(get_model(MODEL), MODEL, accounting, TurnCache.from_env())
 
     with trace("UP RERA Scraper Agent Execution"):
 
@@ -71,15 +113,24 @@ async def run_up_rera_scraper_agent(max_projects: int = 20) -> str:
                 name="UP RERA Scraper Agent",
                 instructions=get_agent_instructions(),
                 model=model,
-                tools=[upload_to_s3],
+                model_settings=budgeted_model_settings(budget),
+                tools=[ingest_scraped_data, upload_to_s3],
                 mcp_servers=[mcp_server])
 
             logger.info(
                 "⏳ Running agent (this may take 1-2 minutes for scraping)...")
-            result = await Runner.run(up_rera_agent, input=query, max_turns=15)
+            try:
+                result = await run_within_budget(up_rera_agent, query, accounting)
+            except BudgetExceeded as e:
+                logger.warning(f"⛔ {e}")
+                return AgentRun(final_output=None, status="budget_exceeded", error=str(e),
+                                usage=accounting.as_dict())
             logger.info("✅ Agent execution completed")
 
+    usage = accounting.as_dict()
     logger.info("🎉 UP RERA Scraper Agent run completed")
     logger.info(
         f"📊 Final Output (first 500 chars): {str(result.final_output)[:500]}")
-    return result.final_output
+    logger.info(f"🧮 {usage['model_calls']} model calls, {usage['cache_hits']} cache hits, "
+                f"{usage['input_tokens']} in / {usage['output_tokens']} out tokens in {usage['seconds']}s")
+    return AgentRun(final_output=result.final_output, usage=usage)
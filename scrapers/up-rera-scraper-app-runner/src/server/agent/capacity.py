@@ -0,0 +1,137 @@
+"""
+Scrape capacity of this instance, for readiness checks.
+
+Every scrape the API process starts (GET /agent/ through the MCP
+subprocess, GET /agent/stream in-process) runs one Chromium, and the
+instance has memory for only a few. `scrapes.track(kind)` counts them while
+they run, and `readiness()` turns the counts, the process-tree RSS and the
+upstream circuit into a ready/saturated verdict:
+
+- in-flight scrapes at MAX_CONCURRENT_SCRAPES (default 2)
+- requests waiting for a scrape slot at MAX_QUEUED_SCRAPES (default 4)
+- memory headroom below READY_MIN_HEADROOM_MB (default 384); headroom is
+  the container memory limit (cgroup, else SCRAPER_RSS_CEILING_MB) minus
+  the process-tree RSS
+
+The upstream circuit is reported but doesn't make an instance unready.
+Every instance shares the same upstream, so routing elsewhere would not
+help.
+"""
+
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from .pipeline.circuit import CircuitBreaker
+from .pipeline.memory import DEFAULT_RSS_CEILING_MB, process_tree_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+CGROUP_MEMORY_LIMITS = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+
+def memory_limit_mb() -> int:
+    """Container memory limit from cgroup v2/v1, else SCRAPER_RSS_CEILING_MB."""
+    for path in CGROUP_MEMORY_LIMITS:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge number (v1) means no limit
+        if value.isdigit() and int(value) < 1 << 50:
+            return int(value) // 1024 // 1024
+    return int(os.environ.get("SCRAPER_RSS_CEILING_MB", DEFAULT_RSS_CEILING_MB))
+
+
+class ScrapeTracker:
+    """In-flight and waiting scrapes of this process, by kind ("agent", "stream")."""
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queued: Optional[int] = None):
+        self.max_in_flight = max_in_flight or int(os.environ.get("MAX_CONCURRENT_SCRAPES", 2))
+        self.max_queued = max_queued if max_queued is not None else int(os.environ.get("MAX_QUEUED_SCRAPES", 4))
+        self.running: Dict[str, int] = {}
+        self.waiting = 0
+        self.started = 0
+        self.finished = 0
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self.running.values())
+
+    def begin(self, kind: str) -> None:
+        self.running[kind] = self.running.get(kind, 0) + 1
+        self.started += 1
+
+    def end(self, kind: str) -> None:
+        self.running[kind] -= 1
+        self.finished += 1
+
+    @asynccontextmanager
+    async def track(self, kind: str):
+        """Count a scrape as in flight while the block runs."""
+        self.begin(kind)
+        try:
+            yield
+        finally:
+            self.end(kind)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "by_kind": {k: v for k, v in self.running.items() if v},
+            "limit": self.max_in_flight,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+scrapes = ScrapeTracker()
+upstream_circuit = CircuitBreaker("up-rera")
+
+
+def readiness(tracker: Optional[ScrapeTracker] = None, circuit: Optional[CircuitBreaker] = None,
+              browser_launchable: Optional[bool] = None) -> Dict[str, Any]:
+    """Capacity report; "ready" is False with "reasons" when saturated.
+
+    Reads /proc for the process-tree RSS, so call it off the event loop.
+    """
+    tracker = tracker or scrapes
+    circuit = circuit or upstream_circuit
+    start = time.perf_counter()
+    min_headroom_mb = int(os.environ.get("READY_MIN_HEADROOM_MB", 384))
+    limit_mb = memory_limit_mb()
+    rss_mb = process_tree_rss_bytes() / 1024 / 1024
+    headroom_mb = limit_mb - rss_mb
+
+    in_flight = tracker.in_flight
+    reasons: List[str] = []
+    if in_flight >= tracker.max_in_flight:
+        reasons.append(f"{in_flight} scrapes in flight (limit {tracker.max_in_flight})")
+    if tracker.max_queued and tracker.waiting >= tracker.max_queued:
+        reasons.append(f"{tracker.waiting} scrapes queued (limit {tracker.max_queued})")
+    if headroom_mb < min_headroom_mb:
+        reasons.append(f"{headroom_mb:.0f} MB memory headroom (minimum {min_headroom_mb} MB)")
+
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "scrapes": tracker.as_dict(),
+        "browsers": {
+            # One Chromium per in-flight scrape
+            "available": max(tracker.max_in_flight - in_flight, 0),
+            "total": tracker.max_in_flight,
+            "launchable": browser_launchable,
+        },
+        "queue": {"depth": tracker.waiting, "limit": tracker.max_queued},
+        "memory": {
+            "rss_mb": round(rss_mb, 1),
+            "limit_mb": limit_mb,
+            "headroom_mb": round(headroom_mb, 1),
+            "min_headroom_mb": min_headroom_mb,
+        },
+        "upstream": circuit.as_dict(),
+        "check_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
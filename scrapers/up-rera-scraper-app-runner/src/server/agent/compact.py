@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compact the small per-run NDJSON objects of whole days or months.
+
+Merges every data object of each period into large parts sorted by
+district and rera_number and gzipped, writes a manifest next to them and
+then deletes the inputs (see pipeline/compaction.py). Works against S3,
+LOCAL (LOCAL_OUTPUT_DIR) and file:// targets.
+
+Usage:
+    uv run ./src/server/agent/compact.py --bucket LOCAL --day 2025-11-08 --dry-run
+    uv run ./src/server/agent/compact.py --bucket my-bucket --month 2025-11 --partition-by district
+    uv run ./src/server/agent/compact.py --bucket file:///tmp/out --days-ago 1
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from pipeline.compaction import COMPACT_ROWS_PER_PART, COMPACT_SORT_CHUNK, DEFAULT_SORT_BY, compact_period
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[COMPACT] %(asctime)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default=os.environ.get("S3_BUCKET"),
+                        help="Data store: S3 bucket, LOCAL or file://path (default: S3_BUCKET)")
+    parser.add_argument("--prefix", default="up-rera-projects")
+    parser.add_argument("--day", action="append", default=[], help="Day to compact, YYYY-MM-DD (repeatable)")
+    parser.add_argument("--month", action="append", default=[], help="Month to compact, YYYY-MM (repeatable)")
+    parser.add_argument("--days-ago", type=int, default=None,
+                        help="Compact the UTC day this many days back (e.g. 1 for a nightly job)")
+    parser.add_argument("--sort-by", default=",".join(DEFAULT_SORT_BY), help="Comma-separated sort fields")
+    parser.add_argument("--partition-by", default=None, help='Keep a directory per value, e.g. "district"')
+    parser.add_argument("--rows-per-part", type=int, default=COMPACT_ROWS_PER_PART)
+    parser.add_argument("--chunk-rows", type=int, default=COMPACT_SORT_CHUNK,
+                        help="Rows sorted in memory before spilling to disk")
+    parser.add_argument("--min-objects", type=int, default=2, help="Skip periods with fewer objects")
+    parser.add_argument("--keep-sources", action="store_true", help="Do not delete the compacted inputs")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be compacted")
+    args = parser.parse_args()
+
+    if not args.bucket:
+        parser.error("pass --bucket or set S3_BUCKET")
+    periods = args.day + args.month
+    if args.days_ago is not None:
+        periods.append(f"{datetime.utcnow() - timedelta(days=args.days_ago):%Y-%m-%d}")
+    if not periods:
+        parser.error("pass --day, --month or --days-ago")
+
+    results = []
+    for period in periods:
+        results.append(compact_period(
+            args.bucket, args.prefix, period,
+            sort_by=[f.strip() for f in args.sort_by.split(",") if f.strip()],
+            partition_by=args.partition_by,
+            rows_per_part=args.rows_per_part,
+            chunk_rows=args.chunk_rows,
+            min_objects=args.min_objects,
+            delete_sources=not args.keep_sources,
+            dry_run=args.dry_run))
+
+    compacted = [r for r in results if "objects_out" in r]
+    summary = {
+        "periods": results,
+        "objects_in": sum(r["objects_in"] for r in compacted),
+        "objects_out": sum(r["objects_out"] for r in compacted),
+        "rows": sum(r["rows"] for r in compacted),
+        "bytes_in": sum(r["bytes_in"] for r in compacted),
+        "bytes_out": sum(r["bytes_out"] for r in compacted),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,22 +19,31 @@ Workflow:
 Step 1: Call scrape_projects_list with appropriate parameters:
    - max_projects: Number of projects to scrape (use the value from user query)
    - timeout: Maximum time in seconds (default: 180)
+   - districts (optional): only when the user asks for specific districts or a district-wise crawl,
+     e.g. districts="Lucknow,Agra", districts="all" or districts="top:5"
    - The MCP tool will automatically save the data to /tmp and return the file path
 
 Step 2: Extract the saved file path from the response:
-   - Look for the "saved_file" field in response["data"]["saved_file"]
-   - This contains the absolute path where data was saved (e.g., "/tmp/up_rera_projects_20251108_120000_abc123.json")
+   - Tool results are compact JSON; "ok" tells whether the call succeeded
+   - The "file" field holds the absolute path where data was saved (e.g., "/tmp/up_rera_projects_20251108_120000_abc123.json")
+   - On failure, "error" describes the problem and "log" points to the full traceback
 
 Step 3: Call ingest_scraped_data to verify the saved file:
    - Pass the file path from Step 2 to the file_path parameter
    - Example: ingest_scraped_data(file_path=saved_file_path)
-   - The tool will verify the file, read it, and provide a detailed summary
+   - The tool verifies the file and returns counts: projects, top districts, duplicates and empty key fields
 
 Step 4 (Optional): Call upload_to_s3 to upload data to AWS S3:
    - Only if the user specifies an S3 bucket in their query
    - Pass the same file_path and the bucket name
    - Example: upload_to_s3(file_path=saved_file_path, bucket="my-datalake-bucket", prefix="up-rera-projects")
-   - The tool uploads as NDJSON with partitioned keys: s3://bucket/prefix/year=YYYY/month=MM/day=DD/timestamp.json
+   - The tool uploads as NDJSON with partitioned keys: s3://bucket/prefix/year=YYYY/month=MM/day=DD/run_id=<run_id>/<timestamp>_part-00000.json
+   - A _manifest.json listing the parts, row counts and checksums is written next to the data
+   - District crawls are written as one .../day=DD/district=<name>/run_id=<run_id>/ partition per district
+   - Pass dedup=true when the user asks for deduplicated output or daily snapshots: only new or changed
+     projects are written, merged into one .../day=DD/snapshot/ object per day
+   - Pass cdc=true when the user wants change events (new registrations, extended end dates, removed
+     projects): the result's "cdc" counts inserts/updates/deletes and names the change log object
    - Supports three destination types:
      * S3 bucket: bucket="my-bucket-name"
      * Local directory: bucket="LOCAL" (requires LOCAL_OUTPUT_DIR env var)
@@ -46,12 +55,13 @@ Step 5: Return a comprehensive summary including:
    - File size in KB
    - Sample project names
    - Scraping duration
-   - S3 upload details (if uploaded): bucket, key, URL
+   - S3 upload details (if uploaded): bucket, manifest, URL
 
 IMPORTANT NOTES:
 - The scrape_projects_list MCP tool now automatically saves data to avoid passing large payloads through agent parameters
 - The upload_to_s3 tool converts projects to NDJSON format and uploads with partitioned keys
-- Always extract the "saved_file" path from the scraper response before calling other tools
+- Always extract the "file" path from the scraper response before calling other tools
+- Full run details (every record, per-partition and retry statistics) are in that file; do not ask for them inline
 - S3 upload is optional - only do it if user mentions S3, bucket, or upload in their query
 
 If any step fails, report the error clearly with details from the error response."""
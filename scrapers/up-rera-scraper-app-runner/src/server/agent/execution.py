@@ -0,0 +1,342 @@
+"""
+Budgeted, cacheable execution of the scraper agent.
+
+BudgetedModel wraps the agent's model and sits under every Runner turn:
+
+- Budgets: a run stops with BudgetExceeded once it has used AGENT_MAX_TOKENS
+  tokens, AGENT_MAX_SECONDS of wall time or AGENT_MAX_TURNS turns. Each
+  turn's output is capped at AGENT_MAX_OUTPUT_TOKENS.
+- Turn cache (LLM_CACHE=readwrite|replay, files under LLM_CACHE_DIR): every
+  model response is stored under a SHA-256 of the conversation state it
+  answered. That state is the model, instructions, input items, tool schemas
+  and settings. A repeat of the same state replays the stored response
+  without calling Bedrock. "replay" also fails on a miss, which keeps
+  offline runs honest.
+- Accounting: tokens, cache hits, latency and input size per turn, plus
+  the bytes each tool's results added to the conversation, exposed by
+  RunAccounting.as_dict().
+
+Prompt-prefix caching is separate. The instructions are static and sent
+first, and the per-run query and tool results follow them, so Bedrock can
+reuse the cached prefix. LLM_PROMPT_CACHE=1 asks LiteLLM to mark the system
+message as a cache point (Claude models with prompt caching only).
+
+Keys are exact. A later turn replays only when earlier tool results were
+identical, which live scrapes rarely are because run ids and timestamps
+change. Masking them would replay stale file paths into tool calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents import Agent, ModelSettings, Runner
+from agents.exceptions import MaxTurnsExceeded
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import ResponseOutputItem
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CACHE_DIR = "/tmp/up_rera_llm_cache"
+CACHE_MODES = ("off", "readwrite", "replay")
+
+_OUTPUT_ITEM = TypeAdapter(ResponseOutputItem)
+
+
+class BudgetExceeded(Exception):
+    """A run hit one of its AgentBudget limits."""
+
+    def __init__(self, kind: str, limit: float, used: float):
+        super().__init__(f"Agent {kind} budget exceeded: used {used} of {limit}")
+        self.kind = kind
+        self.limit = limit
+        self.used = used
+
+
+class CacheMiss(Exception):
+    """LLM_CACHE=replay and the conversation state has no stored response."""
+
+
+@dataclass
+class AgentBudget:
+    """Hard limits for one agent run."""
+    max_tokens: int = 200_000
+    max_seconds: float = 600.0
+    max_turns: int = 15
+    max_output_tokens: Optional[int] = 2048
+
+    @classmethod
+    def from_env(cls) -> "AgentBudget":
+        output = int(os.environ.get("AGENT_MAX_OUTPUT_TOKENS", cls.max_output_tokens))
+        return cls(
+            max_tokens=int(os.environ.get("AGENT_MAX_TOKENS", cls.max_tokens)),
+            max_seconds=float(os.environ.get("AGENT_MAX_SECONDS", cls.max_seconds)),
+            max_turns=int(os.environ.get("AGENT_MAX_TURNS", cls.max_turns)),
+            max_output_tokens=output or None,
+        )
+
+
+@dataclass
+class TurnRecord:
+    turn: int
+    cached: bool
+    input_tokens: int
+    output_tokens: int
+    cached_input_tokens: int
+    latency_seconds: float
+    input_chars: int = 0
+    key: Optional[str] = None
+
+
+@dataclass
+class RunAccounting:
+    """Token and latency accounting for one agent run."""
+    budget: AgentBudget = field(default_factory=AgentBudget)
+    turns: List[TurnRecord] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    # Bytes of tool results in the conversation, by tool name
+    tool_output_bytes: Dict[str, int] = field(default_factory=dict)
+    _seen_outputs: set = field(default_factory=set, repr=False)
+
+    def measure_input(self, input: Any) -> int:
+        """Size of a turn's input in characters; also accounts tool results not seen before."""
+        if isinstance(input, str):
+            return len(input)
+        names = {}
+        for item in input:
+            item = item.model_dump(exclude_none=True) if isinstance(item, BaseModel) else item
+            if not isinstance(item, dict):
+                continue
+            if item.get("type") == "function_call":
+                names[item.get("call_id")] = item.get("name")
+            elif item.get("type") == "function_call_output" and item.get("call_id") not in self._seen_outputs:
+                self._seen_outputs.add(item.get("call_id"))
+                output = item.get("output")
+                size = len((output if isinstance(output, str) else json.dumps(output, default=_jsonable)).encode("utf-8"))
+                tool = names.get(item.get("call_id")) or "unknown"
+                self.tool_output_bytes[tool] = self.tool_output_bytes.get(tool, 0) + size
+        return len(json.dumps(input, separators=(",", ":"), default=_jsonable))
+
+    @property
+    def billed_tokens(self) -> int:
+        return sum(t.input_tokens + t.output_tokens for t in self.turns if not t.cached)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def check(self) -> None:
+        """Raise BudgetExceeded before starting a turn that is no longer allowed."""
+        if self.billed_tokens >= self.budget.max_tokens:
+            raise BudgetExceeded("tokens", self.budget.max_tokens, self.billed_tokens)
+        if self.elapsed >= self.budget.max_seconds:
+            raise BudgetExceeded("seconds", self.budget.max_seconds, round(self.elapsed, 1))
+
+    def record(self, usage: Usage, latency: float, cached: bool, key: Optional[str],
+               input_chars: int = 0) -> TurnRecord:
+        details = getattr(usage, "input_tokens_details", None)
+        turn = TurnRecord(
+            turn=len(self.turns) + 1,
+            cached=cached,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=getattr(details, "cached_tokens", 0) or 0,
+            latency_seconds=round(latency, 3),
+            input_chars=input_chars,
+            key=key[:12] if key else None,
+        )
+        self.turns.append(turn)
+        return turn
+
+    def as_dict(self) -> Dict[str, Any]:
+        live = [t for t in self.turns if not t.cached]
+        hits = [t for t in self.turns if t.cached]
+        return {
+            "turns": len(self.turns),
+            "model_calls": len(live),
+            "cache_hits": len(hits),
+            "input_tokens": sum(t.input_tokens for t in live),
+            "output_tokens": sum(t.output_tokens for t in live),
+            "prompt_cached_input_tokens": sum(t.cached_input_tokens for t in live),
+            "tokens_saved_by_cache": sum(t.input_tokens + t.output_tokens for t in hits),
+            "model_seconds": round(sum(t.latency_seconds for t in live), 3),
+            "max_input_chars": max((t.input_chars for t in self.turns), default=0),
+            "tool_output_bytes": dict(self.tool_output_bytes),
+            "seconds": round(self.elapsed, 3),
+            "budget": {
+                "max_tokens": self.budget.max_tokens,
+                "max_seconds": self.budget.max_seconds,
+                "max_turns": self.budget.max_turns,
+            },
+            "by_turn": [t.__dict__ for t in self.turns],
+        }
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def _tool_spec(tool: Any) -> Dict[str, Any]:
+    return {
+        "name": getattr(tool, "name", type(tool).__name__),
+        "description": getattr(tool, "description", None),
+        "parameters": getattr(tool, "params_json_schema", None),
+    }
+
+
+class TurnCache:
+    """File-backed cache of model responses keyed by conversation state.
+
+    Entries are JSON files at <directory>/<ab>/<sha256>.json holding the
+    response's output items and the usage of the call that produced them.
+    """
+
+    def __init__(self, mode: str = "off", directory: str = DEFAULT_LLM_CACHE_DIR):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"LLM cache mode must be one of {CACHE_MODES}, got {mode!r}")
+        self.mode = mode
+        self.directory = directory
+
+    @classmethod
+    def from_env(cls) -> "TurnCache":
+        return cls(os.environ.get("LLM_CACHE", "off").lower() or "off",
+                   os.environ.get("LLM_CACHE_DIR", DEFAULT_LLM_CACHE_DIR))
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def key(self, model: str, system_instructions: Optional[str], input: Any,
+            model_settings: ModelSettings, tools: List[Any], output_schema: Any, handoffs: List[Any]) -> str:
+        state = {
+            "model": model,
+            "instructions": system_instructions,
+            "input": input,
+            "settings": model_settings.to_json_dict(),
+            "tools": sorted((_tool_spec(t) for t in tools), key=lambda t: t["name"]),
+            "output_schema": output_schema.json_schema() if output_schema else None,
+            "handoffs": sorted(getattr(h, "tool_name", str(h)) for h in handoffs),
+        }
+        canonical = json.dumps(state, sort_keys=True, separators=(",", ":"), default=_jsonable)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Unreadable LLM cache entry {key[:12]}: {e}")
+            return None
+
+    def put(self, key: str, response: ModelResponse) -> None:
+        entry = {
+            # exclude_unset: replayed items must feed the next turn's input exactly as live ones do
+            "output": [item.model_dump(mode="json", exclude_unset=True) for item in response.output],
+            "usage": {"input_tokens": response.usage.input_tokens,
+                      "output_tokens": response.usage.output_tokens},
+        }
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees half an entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def to_response(entry: Dict[str, Any]) -> ModelResponse:
+        # Replayed turns bill nothing; the SDK's own usage totals stay honest
+        return ModelResponse(output=[_OUTPUT_ITEM.validate_python(item) for item in entry["output"]],
+                             usage=Usage(), response_id=None)
+
+
+class BudgetedModel(Model):
+    """Model wrapper that enforces a RunAccounting's budget and consults a TurnCache."""
+
+    def __init__(self, model: Model, model_name: str, accounting: RunAccounting,
+                 cache: Optional[TurnCache] = None):
+        self.model = model
+        self.model_name = model_name
+        self.accounting = accounting
+        self.cache = cache or TurnCache()
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, *, previous_response_id=None, conversation_id=None,
+                           prompt=None) -> ModelResponse:
+        self.accounting.check()
+        input_chars = self.accounting.measure_input(input)
+        key = None
+        if self.cache.enabled:
+            key = self.cache.key(self.model_name, system_instructions, input, model_settings,
+                                 tools, output_schema, handoffs)
+            entry = await asyncio.to_thread(self.cache.get, key)
+            if entry is not None:
+                self.accounting.record(Usage(**entry["usage"]), 0.0, cached=True, key=key,
+                                       input_chars=input_chars)
+                logger.info(f"♻️  LLM turn {len(self.accounting.turns)} replayed from cache ({key[:12]})")
+                return self.cache.to_response(entry)
+            if self.cache.mode == "replay":
+                raise CacheMiss(f"No cached LLM response for conversation state {key[:12]}")
+
+        start = time.perf_counter()
+        response = await self.model.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+            previous_response_id=previous_response_id, conversation_id=conversation_id, prompt=prompt)
+        turn = self.accounting.record(response.usage, time.perf_counter() - start, cached=False, key=key,
+                                      input_chars=input_chars)
+        logger.info(f"🧮 LLM turn {turn.turn}: {turn.input_tokens} in / {turn.output_tokens} out tokens "
+                    f"({turn.cached_input_tokens} prompt-cached, {input_chars} input chars) "
+                    f"in {turn.latency_seconds}s")
+        if key:
+            await asyncio.to_thread(self.cache.put, key, response)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema,
+                              handoffs, tracing, *, previous_response_id=None, conversation_id=None,
+                              prompt=None) -> AsyncIterator[Any]:
+        # Streaming runs are budget-checked but neither cached nor accounted per token
+        self.accounting.check()
+        async for event in self.model.stream_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+                previous_response_id=previous_response_id, conversation_id=conversation_id, prompt=prompt):
+            yield event
+
+
+def budgeted_model_settings(budget: AgentBudget) -> ModelSettings:
+    """ModelSettings with the per-turn output cap and, with LLM_PROMPT_CACHE=1, a system-prompt cache point."""
+    extra_args = None
+    if os.environ.get("LLM_PROMPT_CACHE") == "1":
+        extra_args = {"cache_control_injection_points": [{"location": "message", "role": "system"}]}
+    return ModelSettings(max_tokens=budget.max_output_tokens, extra_args=extra_args)
+
+
+async def run_within_budget(agent: Agent, query: str, accounting: RunAccounting):
+    """Runner.run bounded by the accounting's turn and wall-time budget.
+
+    Raises:
+        BudgetExceeded: A token, time or turn limit was hit
+    """
+    budget = accounting.budget
+    try:
+        async with asyncio.timeout(max(0.0, budget.max_seconds - accounting.elapsed)):
+            return await Runner.run(agent, input=query, max_turns=budget.max_turns)
+    except TimeoutError:
+        raise BudgetExceeded("seconds", budget.max_seconds, round(accounting.elapsed, 1)) from None
+    except MaxTurnsExceeded:
+        raise BudgetExceeded("turns", budget.max_turns, len(accounting.turns)) from None
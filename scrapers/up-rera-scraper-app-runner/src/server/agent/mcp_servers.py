@@ -6,15 +6,28 @@ Optimized for slow website with proper timeouts and retries
 """
 
 import asyncio
-import json
-import re
+import itertools
 import logging
 import os
 from playwright.async_api import async_playwright
 from mcp.server.fastmcp import FastMCP
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import sys
+from pipeline.normalize import normalize_projects
+from pipeline.browser_pool import DEFAULT_CONTEXT_OPTIONS, launch_browser, new_context
+from pipeline.crawl import plan_districts, scrape_districts, scrape_grid_pages
+from pipeline.grid import iter_grid_windows, open_projects_list, read_grid_html, wait_for_grid
+from pipeline.har import har_stats, start_playback_run
+from pipeline.memory import MemoryCeilingExceeded, MemoryMonitor
+from pipeline.profiling import profiled, profiling_enabled
+from pipeline.retry import Retrier
+from pipeline.snapshots import SnapshotStore, archive_detail_pages
+from pipeline.storage import NdjsonSpill, write_json_document
+from pipeline.tool_output import tool_result
+from pipeline.records import (build_project_from_card, build_project_from_cells,
+                              build_project_from_rera_number, extract_rera_numbers,
+                              is_detail_href, resolve_detail_link)
 
 # Configure logging to stderr so it appears in MCP server logs
 logging.basicConfig(
@@ -27,8 +40,184 @@ logger = logging.getLogger(__name__)
 mcp = FastMCP("scrape_up_rera_projects_list")
 
 
-@mcp.tool()
-async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Dict[str, Any]:
+def _failure_response(run_id: str, scrape_start_time: datetime, error: Exception,
+                      error_traceback: str, retrier: Retrier, monitor: MemoryMonitor) -> Dict[str, Any]:
+    """Compact error result for a failed scrape; the traceback goes to a log file, not to the agent."""
+    duration_seconds = (datetime.now() - scrape_start_time).total_seconds()
+    log_path = f"/tmp/up_rera_error_{run_id}.log"
+    try:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(error_traceback)
+    except OSError:
+        log_path = None
+
+    return {
+        "ok": False,
+        "run_id": run_id,
+        "error": str(error)[:300],
+        "log": log_path,
+        "seconds": round(duration_seconds, 1),
+        "retries": retrier.stats.as_dict()["total_retries"],
+        "peak_rss_mb": monitor.as_dict()["peak_rss_mb"],
+    }
+
+
+def _finish_run(run_id: str, scrape_start_time: datetime, projects: List[Dict[str, Any]],
+                total_projects: int, sample_projects: List[Dict[str, Any]], retrier: Retrier,
+                monitor: MemoryMonitor, spill: Optional[NdjsonSpill] = None,
+                extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Save the full run to /tmp and build the compact result for the agent."""
+    scrape_end_time = datetime.now()
+    duration_seconds = (scrape_end_time - scrape_start_time).total_seconds()
+
+    logger.info(
+        f"✅ Completed scrape_projects_list: Returning {total_projects} projects in {duration_seconds:.1f}s")
+
+    # Build FULL response object (for file storage); projects are streamed
+    # into it from the spill file and/or the in-memory list
+    full_response_data = {
+        "success": True,
+        "data": {
+            "total_projects": total_projects,
+            "projects": [],  # All projects included in file
+            "run_id": run_id,
+            "scraped_at": scrape_end_time.isoformat(),
+            "duration_seconds": duration_seconds,
+            "retries": retrier.stats.as_dict(),
+            "memory": monitor.as_dict(),
+            **(extra or {})
+        },
+        "message": f"Successfully scraped {total_projects} projects in {duration_seconds:.1f}s"
+    }
+
+    # Save to file immediately after scraping
+    filepath = None
+    file_size = 0
+
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"up_rera_projects_{timestamp}_{run_id}.json"
+        filepath = f"/tmp/{filename}"
+
+        records = itertools.chain(spill, projects) if spill else projects
+        write_json_document(filepath, full_response_data, records)
+
+        file_size = os.path.getsize(filepath)
+        logger.info(f"💾 Saved scraped data to: {filepath}")
+        logger.info(
+            f"   File size: {file_size:,} bytes ({file_size / 1024:.2f} KB)")
+
+    except Exception as save_error:
+        logger.error(f"⚠️  Failed to save file: {save_error}")
+        if spill:
+            spill.remove()
+        return {"ok": False, "run_id": run_id, "error": f"Scraped {total_projects} projects but saving failed: {save_error}"}
+
+    if spill:
+        spill.remove()
+
+    # Compact result for the agent: records, per-partition stats, retries by
+    # operation and memory samples stay in the saved file
+    extra = extra or {}
+    memory = monitor.as_dict()
+    partitions = extra.get("partitions") or {}
+    result = {
+        "ok": True,
+        "run_id": run_id,
+        "file": filepath,
+        "projects": total_projects,
+        "kb": round(file_size / 1024, 1),
+        "seconds": round(duration_seconds, 1),
+        "retries": retrier.stats.as_dict()["total_retries"],
+        "peak_rss_mb": memory["peak_rss_mb"],
+        "ceiling_hit": memory["ceiling_hit"] or None,
+        "partition_by": extra.get("partition_by"),
+        "failed_partitions": partitions.get("failed") or None,
+        "snapshot_index": (extra.get("snapshots") or {}).get("index_key"),
+        "har": har_stats(),
+        "sample": [f'{p.get("project_name", "")} | {p.get("rera_number", "")} | {p.get("district", "")}'
+                   for p in sample_projects],
+    }
+
+    logger.info(
+        f"📤 Returning compact result (metadata only, {total_projects} projects in file)")
+    return result
+
+
+async def _archive_run(snapshots: Optional[SnapshotStore], context, projects) -> Dict[str, Any]:
+    """Fetch detail pages into the snapshot store (SCRAPER_SNAPSHOT_DETAILS caps how many), write the run index."""
+    if snapshots is None:
+        return {}
+    detail_limit = int(os.environ.get("SCRAPER_SNAPSHOT_DETAILS", 0))
+    if detail_limit > 0:
+        await archive_detail_pages(context.request, snapshots, projects, detail_limit)
+    await asyncio.to_thread(snapshots.write_index)
+    return {"snapshots": snapshots.stats()}
+
+
+async def _scrape_partitioned(run_id: str, scrape_start_time: datetime, max_projects: int, timeout: int,
+                              grid_pages: int, contexts: int, districts: str, retrier: Retrier,
+                              monitor: MemoryMonitor, window_size: int,
+                              snapshots: Optional[SnapshotStore] = None) -> Dict[str, Any]:
+    """Scrape grid pages 1..grid_pages, or district partitions, across isolated contexts of one browser."""
+    extra: Dict[str, Any] = {}
+    # Grid HTML parsing in worker processes keeps the event loop free for the contexts
+    parse_workers = int(os.environ.get("SCRAPER_PARSE_WORKERS", "0"))
+    async with async_playwright() as p:
+        logger.info('🚀 Launching browser...')
+        # Several live contexts need Chromium's normal multi-process model
+        browser = await launch_browser(p, single_process=False)
+        monitor.sample('browser_launched')
+        try:
+            if districts:
+                # Busiest districts first, from the project index when it has history
+                partitions = await plan_districts(browser, districts, retrier, timeout_ms=timeout * 1000)
+                logger.info(f'🧩 District crawl: {len(partitions)} districts over {contexts} contexts')
+                projects, outcome = await scrape_districts(
+                    browser, partitions, contexts, retrier,
+                    timeout_ms=timeout * 1000, window_size=window_size, snapshots=snapshots,
+                    parse_workers=parse_workers, max_rows=max_projects)
+                extra["partition_by"] = "district"
+            else:
+                logger.info(f'🧩 Partitioned scrape: {grid_pages} grid pages over {contexts} contexts')
+                projects, outcome = await scrape_grid_pages(
+                    browser, range(1, grid_pages + 1), contexts, retrier,
+                    timeout_ms=timeout * 1000, window_size=window_size, snapshots=snapshots,
+                    parse_workers=parse_workers, max_rows=max_projects)
+            monitor.sample('extraction_done')
+            if not outcome.results:
+                raise Exception(f'All {len(outcome.errors)} partitions failed: {outcome.errors}')
+            if snapshots:
+                archive_context = await new_context(browser, **DEFAULT_CONTEXT_OPTIONS)
+                extra.update(await _archive_run(snapshots, archive_context, projects))
+                await archive_context.close()
+        except Exception as e:
+            logger.error(f'\n❌ Error during scraping: {e}')
+            import traceback
+            error_traceback = traceback.format_exc()
+            logger.error(error_traceback)
+            return _failure_response(run_id, scrape_start_time, e, error_traceback, retrier, monitor)
+        finally:
+            logger.info('\n🔒 Closing browser...')
+            try:
+                await browser.close()
+            except Exception:
+                pass  # Ignore errors during cleanup
+
+    # Districts are kept whole so CDC can treat each one as fully read; the
+    # crawl stopped starting new ones once max_projects rows were in
+    if max_projects is not None and not districts:
+        projects = projects[:max_projects]
+    projects = normalize_projects(projects, scraped_at=datetime.now().isoformat())
+    extra["partitions"] = outcome.as_dict()
+    return _finish_run(run_id, scrape_start_time, projects, len(projects), projects[:3],
+                       retrier, monitor, extra=extra)
+
+
+@mcp.tool(structured_output=False)
+async def scrape_projects_list(max_projects: int = 50, timeout: int = 180, memory_bounded: bool = False,
+                               grid_pages: int = 1, contexts: int = 1, districts: str = "",
+                               snapshot: bool = False, profile: bool = False) -> str:
     """
     Scrape UP RERA projects list from the main projects page.
 
@@ -38,104 +227,92 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
     Args:
         max_projects: Maximum number of projects to scrape (default: 50, recommended: 10-20 for speed)
         timeout: Page load timeout in seconds (default 180s for slow website)
+        memory_bounded: Extract the grid in windows of SCRAPER_WINDOW_SIZE rows,
+            flushing each window to disk, and stop early if the process tree goes
+            over SCRAPER_RSS_CEILING_MB (also enabled by SCRAPER_MEMORY_BOUNDED=1)
+        grid_pages: Number of grid pages to scrape (default: 1, the first page)
+        contexts: Isolated browser contexts (separate site sessions) sharing one
+            browser; grid pages are handed to whichever context is free next.
+            Only useful together with grid_pages > 1 or districts.
+        districts: Crawl district by district instead of by grid page: "all",
+            "top:N" (the N districts with the most recent registrations in the
+            project index; every district when the index is empty) or a
+            comma-separated list such as "Lucknow,Agra". Every page of each
+            district is scraped and the saved file is marked partition_by="district",
+            so upload_to_s3 writes one district=<name> partition per district.
+            No new district is started once max_projects rows are in; districts
+            already started are kept whole, so the total can exceed max_projects.
+        snapshot: Archive the grid HTML of every scraped page (gzipped,
+            content-addressed) to SNAPSHOT_BUCKET so records can be rebuilt later
+            with reparse_snapshots.py without re-scraping (also enabled by
+            SCRAPER_SNAPSHOTS=1; SCRAPER_SNAPSHOT_DETAILS=N also archives N detail pages)
+        profile: Run under a sampling profiler and tracemalloc and write a
+            flamegraph (folded stacks), top allocations and a summary to a run
+            directory under SCRAPER_PROFILE_DIR (also enabled by SCRAPER_PROFILE=1)
 
     Returns:
-        JSON response with structure:
-        {
-            "success": bool,
-            "data": {
-                "total_projects": int,
-                "projects": [...],
-                "run_id": str,
-                "scraped_at": str
-            },
-            "error": str (only present on failure),
-            "message": str
-        }
+        Compact JSON: {"ok", "run_id", "file" (saved JSON with every record and
+        full run stats), "projects", "kb", "seconds", "retries", "peak_rss_mb",
+        "sample" ("name | rera_number | district"), and when relevant
+        "partition_by", "failed_partitions", "snapshot_index", "ceiling_hit",
+        "har" (record/playback stats under SCRAPER_HAR), "profile" (artifact paths)}.
+        On failure: {"ok": false, "error", "log" (traceback file)}.
     """
+    return tool_result("scrape_projects_list", await profiled(
+        "scrape_projects_list", profiling_enabled(profile),
+        lambda: _scrape_projects_list(max_projects, timeout, memory_bounded, grid_pages, contexts,
+                                      districts, snapshot)))
+
+
+async def _scrape_projects_list(max_projects: int, timeout: int, memory_bounded: bool, grid_pages: int,
+                                contexts: int, districts: str, snapshot: bool) -> Dict[str, Any]:
+    """Run one scrape and return the compact result dict (see scrape_projects_list)."""
     # Generate unique run ID for file naming (avoid conflicts with parallel runs)
     import uuid
     run_id = str(uuid.uuid4())[:8]
+    start_playback_run()
     logger.info(
         f"Starting scrape_projects_list [run_id={run_id}]: max_projects={max_projects}, timeout={timeout}s")
     projects = []
     scrape_start_time = datetime.now()
+    # One retry budget shared by navigation, page fetch and row extraction
+    retrier = Retrier()
+    memory_bounded = memory_bounded or os.environ.get("SCRAPER_MEMORY_BOUNDED") == "1"
+    window_size = int(os.environ.get("SCRAPER_WINDOW_SIZE", 50))
+    monitor = MemoryMonitor()
+    # Rows flushed to disk window by window in memory-bounded mode
+    spill = None
+    sample_projects = []
+    snapshots = None
+    if snapshot or os.environ.get("SCRAPER_SNAPSHOTS") == "1":
+        snapshots = SnapshotStore(run_id)
+    extra: Dict[str, Any] = {}
+
+    if grid_pages > 1 or contexts > 1 or districts:
+        return await _scrape_partitioned(run_id, scrape_start_time, max_projects, timeout,
+                                         grid_pages, contexts, districts, retrier, monitor, window_size,
+                                         snapshots)
 
     async with async_playwright() as p:
         logger.info('🚀 Launching browser...')
-        browser = await p.chromium.launch(
-            headless=True,  # Must be True for Docker/production
-            slow_mo=0,  # No delay needed in headless mode
-            args=[
-                # Use /tmp instead of /dev/shm (limited in Docker)
-                '--disable-dev-shm-usage',
-                '--disable-gpu',  # Disable GPU to reduce memory
-                '--no-sandbox',  # Required for Docker
-                '--disable-setuid-sandbox',
-                '--single-process',  # Use single process to reduce memory
-            ]
-        )
-
-        context = await browser.new_context(
-            # Smaller viewport to reduce memory
-            viewport={'width': 1280, 'height': 720},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        browser = await launch_browser(p)
+        context = await new_context(browser, **DEFAULT_CONTEXT_OPTIONS)
 
         # Increase default timeouts for slow website
         context.set_default_timeout(timeout * 1000)
         context.set_default_navigation_timeout(timeout * 1000)
 
         page = await context.new_page()
+        monitor.sample('browser_launched')
 
         try:
             logger.info(
                 f'🔍 Navigating to UP RERA homepage (timeout: {timeout}s)...')
             logger.info('⏳ This may take a while due to slow website...')
 
-            # Step 1: Go to homepage
-            await page.goto('https://www.up-rera.in/index', wait_until='domcontentloaded', timeout=timeout * 1000)
-            await page.wait_for_timeout(5000)
-            logger.info('✅ Landed on homepage.')
-
-            # Step 2: Find and click the "REGISTERED PROJECTS" link
-            logger.info('🔗 Searching for "REGISTERED PROJECTS" link...')
-
-            # Use page.click() with text selector (more robust than element handles)
-            # This avoids element detachment issues from parallel runs
-            clicked = False
-            try:
-                # Try clicking by text (handles dynamic DOM better)
-                await page.click('text="Registered Projects"', timeout=10000)
-                clicked = True
-                logger.info('✅ Clicked link via text selector')
-            except:
-                try:
-                    await page.click('text="REGISTERED PROJECTS"', timeout=10000)
-                    clicked = True
-                    logger.info('✅ Clicked link via text selector (uppercase)')
-                except:
-                    pass
-
-            if not clicked:
-                # Fallback to element handle approach
-                logger.info(
-                    '⚠️  Text selector failed, trying element handle approach...')
-                all_links = await page.query_selector_all('a')
-                for link in all_links:
-                    try:
-                        text = (await link.inner_text()).strip()
-                        if text == 'Registered Projects' or text == 'REGISTERED PROJECTS':
-                            await link.click()
-                            clicked = True
-                            logger.info(f'✅ Clicked link with text: "{text}"')
-                            break
-                    except:
-                        continue
-
-            if not clicked:
-                raise Exception(
-                    'Could not find or click "REGISTERED PROJECTS" link on homepage.')
+            # Steps 1-2 are retried together: a failed click usually means the
+            # homepage didn't finish loading, so the whole navigation is redone
+            await retrier.call("navigation", lambda: open_projects_list(page, timeout * 1000))
 
             # Wait for navigation
             logger.info('⏳ Waiting for navigation after click...')
@@ -144,9 +321,9 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
 
             # Step 3: Wait for projects list to appear
             logger.info('⏳ Waiting for projects list page to load...')
-            # Wait for table or project list to appear
+            # Wait for table or project list to appear (reloaded between attempts)
             try:
-                await page.wait_for_selector('table, .project-list, .data-table, tbody tr', timeout=60000)
+                await retrier.call("page_fetch", lambda: wait_for_grid(page))
                 logger.info('✅ Found table elements')
             except Exception as e1:
                 logger.info(
@@ -166,23 +343,41 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
             logger.info(
                 'ℹ️  Skipping screenshot/HTML dump (memory optimization for production)')
 
-            # Get page text for fallback extraction (but don't log it to save memory)
-            page_text = ""
-            try:
-                page_text = await page.inner_text('body')
-                logger.info(f'📝 Got page content ({len(page_text)} chars)')
-            except Exception as e:
-                logger.warning(f'⚠️  Could not get page text: {str(e)[:100]}')
-                page_text = ""  # Continue anyway
+            monitor.sample('grid_loaded')
+            if snapshots:
+                # Only the grid table is archived, not the whole DOM
+                await snapshots.aput(await read_grid_html(page), "grid", page=1, url=page.url)
 
             # Try to find project data with multiple strategies
             logger.info('🔍 Searching for project data...\n')
 
-            # Strategy 1: Look for standard table structure
-            # Target the specific projects table with ID grdPojDetail
-            table_rows = await page.query_selector_all('#grdPojDetail tbody tr')
-            logger.info(
-                f'   Found {len(table_rows)} table rows in projects table')
+            # Strategy 1 (memory-bounded): read the grid in windows without
+            # element handles, normalize and flush each window to disk
+            table_rows = []
+            if memory_bounded:
+                spill = NdjsonSpill(f"/tmp/up_rera_projects_{run_id}.ndjson")
+                logger.info(
+                    f'📊 Extracting grid in windows of {window_size} rows (memory-bounded)...')
+                try:
+                    async for start, window in iter_grid_windows(page, max_rows=max_projects, window_size=window_size):
+                        window = normalize_projects(
+                            window, scraped_at=datetime.now().isoformat())
+                        spill.write(window)
+                        sample_projects.extend(
+                            window[:3 - len(sample_projects)])
+                        logger.info(
+                            f'✓ Extracted {spill.rows} projects (window at row {start})...')
+                        monitor.check(f'window_{start}')
+                except MemoryCeilingExceeded as e:
+                    logger.warning(
+                        f'⚠️  {e} - stopping extraction with {spill.rows} projects')
+
+            else:
+                # Strategy 1: Look for standard table structure
+                # Target the specific projects table with ID grdPojDetail
+                table_rows = await page.query_selector_all('#grdPojDetail tbody tr')
+                logger.info(
+                    f'   Found {len(table_rows)} table rows in projects table')
 
             if table_rows:
                 logger.info('📊 Extracting data from table rows...\n')
@@ -190,129 +385,77 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
                 # Process all rows or up to max_projects if specified
                 rows_to_process = table_rows if max_projects is None else table_rows[
                     :max_projects]
-                for idx, row in enumerate(rows_to_process):
-                    try:
-                        # Get all cells in the row
-                        cells = await row.query_selector_all('td, th')
-
-                        # Debug: Print first few rows
-                        if idx < 5:
-                            logger.info(
-                                f'   Row {idx}: Found {len(cells)} cells')
-
-                        # Skip header rows
-                        if not cells or len(cells) < 2:
-                            if idx < 5:
-                                logger.info(
-                                    f'   Row {idx}: Skipped (not enough cells)')
-                            continue
-
-                        # Extract text from cells
-                        cell_texts = []
-                        for cell in cells:
-                            text = (await cell.inner_text()).strip()
-                            cell_texts.append(text)
-
-                        # Debug: Print first few rows' cell texts
+                async def read_row(idx, row):
+                    """Return (cell_texts, detail_link, link_text), or None for short rows."""
+                    # Get all cells in the row
+                    cells = await row.query_selector_all('td, th')
+
+                    # Debug: Print first few rows
+                    if idx < 5:
+                        logger.info(
+                            f'   Row {idx}: Found {len(cells)} cells')
+
+                    # Skip header rows
+                    if not cells or len(cells) < 2:
                         if idx < 5:
                             logger.info(
-                                f'   Row {idx} cells: {cell_texts[:4]}')
-
-                        # Skip empty rows or header rows
-                        if not cell_texts or all(not t for t in cell_texts):
-                            if idx < 5:
-                                logger.info(f'   Row {idx}: Skipped (empty)')
-                            continue
-
-                        # Check if this looks like a header row
-                        first_cell_text = cell_texts[0].lower()
-                        if any(keyword in first_cell_text for keyword in ['s.no', 'sr.', 'serial', 'project name', 'rera']):
-                            logger.info(f'   Header row: {cell_texts[:3]}')
-                            continue
-
-                        # Look for links in the row
-                        link_elements = await row.query_selector_all('a[href]')
-                        detail_link = ''
-                        rera_number = ''
-
-                        for link in link_elements:
-                            href = await link.get_attribute('href')
-                            if href and ('Frm_View_Project_Details' in href or 'project' in href.lower()):
-                                if href.startswith('http'):
-                                    detail_link = href
-                                else:
-                                    detail_link = f'https://www.up-rera.in/{href.lstrip("/")}'
-
-                                # Try to extract RERA number from link text
-                                link_text = await link.inner_text()
-                                rera_match = re.search(
-                                    r'UPRERAPRJ\d+', link_text)
-                                if rera_match:
-                                    rera_number = rera_match.group(0)
-                                break
-
-                        # Build project object
-                        # UP RERA table columns: S.No, Promoter Name, Project Name, RERA Reg.No., ProjectType, District, StartDate, EndDate, Registration Date, Details
-                        project = {
-                            'serial_no': cell_texts[0] if len(cell_texts) > 0 else '',
-                            'promoter_name': cell_texts[1] if len(cell_texts) > 1 else '',
-                            'project_name': cell_texts[2] if len(cell_texts) > 2 else '',
-                            'rera_number': rera_number or (cell_texts[3] if len(cell_texts) > 3 else ''),
-                            'project_type': cell_texts[4] if len(cell_texts) > 4 else '',
-                            'district': cell_texts[5] if len(cell_texts) > 5 else '',
-                            'start_date': cell_texts[6] if len(cell_texts) > 6 else '',
-                            'end_date': cell_texts[7] if len(cell_texts) > 7 else '',
-                            'registration_date': cell_texts[8] if len(cell_texts) > 8 else '',
-                            'detail_link': detail_link,
-                            'scraped_at': datetime.now().isoformat()
-                        }
-
-                        # Generate raw_text for vector DB
-                        raw_text_parts = []
-                        if project['project_name']:
-                            raw_text_parts.append(
-                                f"Project Name: {project['project_name']}")
-                        if project['rera_number']:
-                            raw_text_parts.append(
-                                f"RERA Number: {project['rera_number']}")
-                        if project['promoter_name']:
-                            raw_text_parts.append(
-                                f"Promoter: {project['promoter_name']}")
-                        if project['project_type']:
-                            raw_text_parts.append(
-                                f"Type: {project['project_type']}")
-                        if project['district']:
-                            raw_text_parts.append(
-                                f"District: {project['district']}")
-                        if project['start_date']:
-                            raw_text_parts.append(
-                                f"Start Date: {project['start_date']}")
-                        if project['end_date']:
-                            raw_text_parts.append(
-                                f"End Date: {project['end_date']}")
-                        if project['registration_date']:
-                            raw_text_parts.append(
-                                f"Registration Date: {project['registration_date']}")
-                        if project['detail_link']:
-                            raw_text_parts.append(
-                                f"Details: {project['detail_link']}")
-
-                        project['raw_text'] = " | ".join(raw_text_parts)
-
-                        # Only add if we have meaningful data
-                        if project['project_name'] or project['rera_number']:
-                            projects.append(project)
+                                f'   Row {idx}: Skipped (not enough cells)')
+                        return None
+
+                    # Extract text from cells
+                    cell_texts = []
+                    for cell in cells:
+                        text = (await cell.inner_text()).strip()
+                        cell_texts.append(text)
+
+                    # Debug: Print first few rows' cell texts
+                    if idx < 5:
+                        logger.info(
+                            f'   Row {idx} cells: {cell_texts[:4]}')
+
+                    # Look for the detail link in the row
+                    link_elements = await row.query_selector_all('a[href]')
+                    detail_link = ''
+                    link_text = ''
+
+                    for link in link_elements:
+                        href = await link.get_attribute('href')
+                        if is_detail_href(href):
+                            detail_link = resolve_detail_link(href)
+                            # RERA number is usually the link text
+                            link_text = await link.inner_text()
+                            break
 
-                            if len(projects) % 10 == 0:
-                                logger.info(
-                                    f'✓ Extracted {len(projects)} projects...')
+                    return cell_texts, detail_link, link_text
 
+                for idx, row in enumerate(rows_to_process):
+                    try:
+                        row_data = await retrier.call(
+                            "row_extraction", lambda: read_row(idx, row))
                     except Exception as e:
                         logger.info(f'⚠️  Error extracting row {idx}: {e}')
                         continue
+                    if row_data is None:
+                        continue
+
+                    # Skips empty/header rows and rows without name or RERA number
+                    cell_texts, detail_link, link_text = row_data
+                    project = build_project_from_cells(
+                        cell_texts, detail_link=detail_link, link_text=link_text)
+                    if project is None:
+                        if idx < 5:
+                            logger.info(f'   Row {idx}: Skipped (empty/header)')
+                        continue
+
+                    projects.append(project)
+                    if len(projects) % 10 == 0:
+                        logger.info(
+                            f'✓ Extracted {len(projects)} projects...')
+
+            flushed_rows = spill.rows if spill else 0
 
             # Strategy 2: Look for divs/cards if table not found
-            if not projects:
+            if not projects and not flushed_rows:
                 logger.info('\n🔍 Trying card/div layout...')
                 cards = await page.query_selector_all('.project-card, .project-item, div[data-project]')
                 logger.info(f'   Found {len(cards)} card elements')
@@ -322,42 +465,16 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
                     try:
                         card_text = await card.inner_text()
 
-                        # Extract RERA number
-                        rera_match = re.search(r'UPRERAPRJ\d+', card_text)
-                        rera_number = rera_match.group(0) if rera_match else ''
-
                         # Extract link
                         link = await card.query_selector('a[href]')
                         detail_link = ''
                         if link:
                             href = await link.get_attribute('href')
                             if href:
-                                detail_link = href if href.startswith(
-                                    'http') else f'https://www.up-rera.in/{href.lstrip("/")}'
-
-                        # Extract project name from card text (usually first line or after RERA number)
-                        project_name = ''
-                        lines = card_text.split('\n')
-                        for line in lines:
-                            clean_line = line.strip()
-                            if clean_line and 'UPRERAPRJ' not in clean_line:
-                                project_name = clean_line
-                                break
-
-                        project = {
-                            'project_name': project_name,
-                            'rera_number': rera_number,
-                            'detail_link': detail_link,
-                            'scraped_at': datetime.now().isoformat()
-                        }
-
-                        # Generate raw_text for vector DB (include all card text + detail link)
-                        raw_text_parts = [card_text.strip()]
-                        if detail_link:
-                            raw_text_parts.append(f"Details: {detail_link}")
-                        project['raw_text'] = " | ".join(raw_text_parts)
-
-                        if rera_number or detail_link:
+                                detail_link = resolve_detail_link(href)
+
+                        project = build_project_from_card(card_text, detail_link)
+                        if project is not None:
                             projects.append(project)
 
                     except Exception as e:
@@ -365,36 +482,40 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
                         continue
 
             # Strategy 3: Extract all RERA numbers from page text
-            if not projects:
+            if not projects and not flushed_rows:
                 logger.info('\n🔍 Extracting RERA numbers from page text...')
-                rera_numbers = re.findall(r'UPRERAPRJ\d+', page_text)
-                unique_rera = list(set(rera_numbers))
+                # Page text is only fetched when this fallback needs it
+                page_text = ""
+                try:
+                    page_text = await page.inner_text('body')
+                    logger.info(f'📝 Got page content ({len(page_text)} chars)')
+                except Exception as e:
+                    logger.warning(f'⚠️  Could not get page text: {str(e)[:100]}')
+                # Distinct RERA numbers in page order
+                unique_rera = extract_rera_numbers(page_text)
                 logger.info(f'   Found {len(unique_rera)} unique RERA numbers')
 
                 rera_to_process = unique_rera if max_projects is None else unique_rera[
                     :max_projects]
-                for rera_num in rera_to_process:
-                    projects.append({
-                        'serial_no': '',
-                        'promoter_name': '',
-                        'project_name': '',
-                        'rera_number': rera_num,
-                        'project_type': '',
-                        'district': '',
-                        'start_date': '',
-                        'end_date': '',
-                        'registration_date': '',
-                        'detail_link': f'https://www.up-rera.in/Frm_View_Project_Details.aspx?id={rera_num.replace("UPRERAPRJ", "")}',
-                        'raw_text': f'RERA Number: {rera_num}. Visit detail link for full project information.',
-                        'extracted_from': 'page_text',
-                        'note': 'Only RERA number extracted. Visit detail_link for full information.',
-                        'scraped_at': datetime.now().isoformat()
-                    })
+                projects.extend(build_project_from_rera_number(rera_num)
+                                for rera_num in rera_to_process)
+
+            # Parse dates, clean categories and stamp scraped_at for the whole batch
+            projects = normalize_projects(
+                projects, scraped_at=datetime.now().isoformat())
+
+            total_projects = flushed_rows + len(projects)
+            sample_projects = sample_projects or projects[:3]
+            monitor.sample('extraction_done')
+            extra.update(await _archive_run(
+                snapshots, context, itertools.chain(spill, projects) if spill else projects))
 
             logger.info(f'\n✅ Extraction complete!')
-            logger.info(f'   Total projects found: {len(projects)}')
+            logger.info(f'   Total projects found: {total_projects}')
+            logger.info(
+                f'   Peak RSS: {monitor.as_dict()["peak_rss_mb"]} MB')
             # Log first 3 projects for verification
-            logger.info(f'   Sample projects: {projects[:3]}')
+            logger.info(f'   Sample projects: {sample_projects}')
 
         except Exception as e:
             logger.error(f'\n❌ Error during scraping: {e}')
@@ -402,107 +523,21 @@ async def scrape_projects_list(max_projects: int = 50, timeout: int = 180) -> Di
             error_traceback = traceback.format_exc()
             logger.error(error_traceback)
 
-            # Return error response
-            scrape_end_time = datetime.now()
-            duration_seconds = (
-                scrape_end_time - scrape_start_time).total_seconds()
-
-            return {
-                "success": False,
-                "data": {
-                    "total_projects": 0,
-                    "projects": [],
-                    "run_id": run_id,
-                    "scraped_at": scrape_end_time.isoformat(),
-                    "duration_seconds": duration_seconds
-                },
-                "error": str(e),
-                "error_details": error_traceback,
-                "message": f"Scraping failed after {duration_seconds:.1f}s: {str(e)}"
-            }
+            if spill:
+                spill.remove()
+
+            return _failure_response(run_id, scrape_start_time, e, error_traceback, retrier, monitor)
 
         finally:
             logger.info('\n🔒 Closing browser...')
             try:
                 await context.close()
                 await browser.close()
-            except:
+            except Exception:
                 pass  # Ignore errors during cleanup
 
-    # Success response
-    scrape_end_time = datetime.now()
-    duration_seconds = (scrape_end_time - scrape_start_time).total_seconds()
-
-    logger.info(
-        f"✅ Completed scrape_projects_list: Returning {len(projects)} projects in {duration_seconds:.1f}s")
-
-    # Build FULL response object with all projects (for file storage)
-    full_response_data = {
-        "success": True,
-        "data": {
-            "total_projects": len(projects),
-            "projects": projects,  # All projects included in file
-            "run_id": run_id,
-            "scraped_at": scrape_end_time.isoformat(),
-            "duration_seconds": duration_seconds
-        },
-        "message": f"Successfully scraped {len(projects)} projects in {duration_seconds:.1f}s"
-    }
-
-    # Save to file immediately after scraping
-    filepath = None
-    file_size = 0
-
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"up_rera_projects_{timestamp}_{run_id}.json"
-        filepath = f"/tmp/{filename}"
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(full_response_data, f, indent=2, ensure_ascii=False)
-
-        file_size = os.path.getsize(filepath)
-        logger.info(f"💾 Saved scraped data to: {filepath}")
-        logger.info(
-            f"   File size: {file_size:,} bytes ({file_size / 1024:.2f} KB)")
-
-    except Exception as save_error:
-        logger.error(f"⚠️  Failed to save file: {save_error}")
-        # Return error if file save fails
-        return {
-            "success": False,
-            "error": f"Failed to save file: {str(save_error)}",
-            "message": "Scraping succeeded but file save failed"
-        }
-
-    # Return LIGHTWEIGHT response to agent (no projects array to avoid token limits)
-    # Include only metadata - tools will read full data from file
-    lightweight_response = {
-        "success": True,
-        "data": {
-            "total_projects": len(projects),
-            "run_id": run_id,
-            "scraped_at": scrape_end_time.isoformat(),
-            "duration_seconds": duration_seconds,
-            "saved_file": filepath,
-            "file_size_bytes": file_size,
-            "file_size_kb": round(file_size / 1024, 2),
-            # Include sample of first 3 projects for verification
-            "sample_projects": [
-                {
-                    "project_name": p.get("project_name", "N/A"),
-                    "rera_number": p.get("rera_number", "N/A"),
-                    "district": p.get("district", "N/A")
-                }
-                for p in projects[:3]
-            ]
-        },
-        "message": f"Successfully scraped {len(projects)} projects in {duration_seconds:.1f}s and saved to {filepath}"
-    }
-
-    logger.info(
-        f"📤 Returning lightweight response (metadata only, {len(projects)} projects in file)")
-    return lightweight_response
+    return _finish_run(run_id, scrape_start_time, projects, total_projects, sample_projects,
+                       retrier, monitor, spill, extra=extra)
 
 if __name__ == "__main__":
     mcp.run(transport='stdio')
@@ -0,0 +1,8 @@
+"""
+Scraping pipeline helpers shared by the FastAPI agent and the MCP scraper.
+
+The MCP server (mcp_servers.py) runs as a standalone stdio script, so modules
+in this package must only use relative imports within ``pipeline`` and must
+not import ``agents``/FastAPI. The script imports them as ``pipeline.<module>``,
+the server package as ``.pipeline.<module>``.
+"""
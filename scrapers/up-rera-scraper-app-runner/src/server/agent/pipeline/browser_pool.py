@@ -0,0 +1,203 @@
+"""
+One Chromium, many isolated contexts.
+
+Every BrowserContext has its own cookie jar, so each one holds a separate
+ASP.NET session (and view state) on up-rera.in. A ContextPool opens K of them
+with one page each inside a single browser process, and run_partitioned
+hands work items (grid page numbers, district filters) to whichever context
+is free next, so a slow partition doesn't hold up the others.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+from . import har
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Smaller viewport to reduce memory
+DEFAULT_CONTEXT_OPTIONS: Dict[str, Any] = {
+    "viewport": {"width": 1280, "height": 720},
+    "user_agent": USER_AGENT,
+}
+
+
+def browser_args(single_process: bool = True) -> List[str]:
+    """Chromium flags for Docker/App Runner.
+
+    --single-process saves memory with one page but is unstable with several
+    concurrent contexts, so it is dropped when a pool is used.
+    """
+    args = [
+        '--disable-dev-shm-usage',  # Use /tmp instead of /dev/shm (limited in Docker)
+        '--disable-gpu',  # Disable GPU to reduce memory
+        '--no-sandbox',  # Required for Docker
+        '--disable-setuid-sandbox',
+    ]
+    if single_process:
+        args.append('--single-process')
+    return args
+
+
+async def launch_browser(playwright, single_process: bool = True):
+    """Launch headless Chromium with the service's flags."""
+    return await playwright.chromium.launch(
+        headless=True,  # Must be True for Docker/production
+        slow_mo=0,
+        args=browser_args(single_process),
+    )
+
+
+async def new_context(browser, **options):
+    """browser.new_context that records or plays back traffic per SCRAPER_HAR (see har.py)."""
+    context = await browser.new_context(**har.context_options(options or DEFAULT_CONTEXT_OPTIONS))
+    await har.attach(context)
+    return context
+
+
+class ContextPool:
+    """K isolated contexts, one page each, inside one browser.
+
+    Usage:
+        async with ContextPool(browser, size=4, timeout_ms=180000) as pool:
+            results = await run_partitioned(pool, items, work, setup)
+    """
+
+    def __init__(self, browser, size: int, timeout_ms: int = 180000,
+                 context_options: Optional[Dict[str, Any]] = None):
+        if size < 1:
+            raise ValueError("ContextPool size must be at least 1")
+        self.browser = browser
+        self.size = size
+        self.timeout_ms = timeout_ms
+        self.context_options = context_options or DEFAULT_CONTEXT_OPTIONS
+        self.contexts: List[Any] = []
+        self.pages: List[Any] = []
+
+    async def __aenter__(self) -> "ContextPool":
+        for _ in range(self.size):
+            context = await new_context(self.browser, **self.context_options)
+            context.set_default_timeout(self.timeout_ms)
+            context.set_default_navigation_timeout(self.timeout_ms)
+            self.contexts.append(context)
+            self.pages.append(await context.new_page())
+        logger.info(f'🧩 Opened {self.size} isolated browser contexts')
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        for context in self.contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass  # Ignore errors during cleanup
+        self.contexts, self.pages = [], []
+
+
+@dataclass
+class PartitionResults:
+    """Outcome of run_partitioned: results and errors keyed by work item."""
+    results: Dict[Hashable, Any] = field(default_factory=dict)
+    errors: Dict[Hashable, str] = field(default_factory=dict)
+    skipped: List[Hashable] = field(default_factory=list)
+    slots: List[Dict[str, Any]] = field(default_factory=list)
+    seconds: float = 0.0
+    parse: Optional[Dict[str, Any]] = None
+    metrics: Optional[Dict[str, Any]] = None
+
+    def ordered(self, items: Sequence[Hashable]) -> List[Any]:
+        """Results in the original item order, skipping failed items."""
+        return [self.results[item] for item in items if item in self.results]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "contexts": len(self.slots),
+            "partitions": len(self.results) + len(self.errors),
+            "failed": {str(k): v for k, v in self.errors.items()},
+            **({"skipped": [str(k) for k in self.skipped]} if self.skipped else {}),
+            "rows": {str(k): len(v) for k, v in self.results.items() if isinstance(v, list)},
+            "seconds": round(self.seconds, 3),
+            "by_context": self.slots,
+            **({"parse": self.parse} if self.parse else {}),
+            **({"metrics": self.metrics} if self.metrics else {}),
+        }
+
+
+async def run_partitioned(
+    pool: ContextPool,
+    items: Sequence[Hashable],
+    work: Callable[[Any, Hashable], Awaitable[Any]],
+    setup: Optional[Callable[[Any], Awaitable[None]]] = None,
+    stop: Optional[Callable[[], bool]] = None
+) -> PartitionResults:
+    """Run work(page, item) for every item across the pool's pages.
+
+    Items sit in a shared queue and each context pulls the next one when it
+    is free. A failed item is recorded in errors and the context moves on; a
+    context whose setup fails drops out and leaves its items to the others.
+    Once stop() returns True no context takes another item; items already
+    started finish and the rest are listed in skipped.
+
+    Args:
+        pool: Open ContextPool
+        items: Work items (grid page numbers, district names, ...)
+        work: Coroutine run per item with the context's page
+        setup: Coroutine run once per page before it takes work (e.g. login,
+            navigate to the grid)
+        stop: Checked before each item is taken (e.g. enough rows collected)
+
+    Returns:
+        PartitionResults with per-item results/errors and per-context stats
+    """
+    queue: "asyncio.Queue[Hashable]" = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    out = PartitionResults()
+    start = time.perf_counter()
+
+    async def worker(slot: int, page) -> None:
+        stats = {"context": slot, "items": 0, "failed": 0, "busy_seconds": 0.0}
+        out.slots.append(stats)
+        if setup is not None:
+            try:
+                await setup(page)
+            except Exception as e:
+                logger.warning(f'⚠️  Context {slot} setup failed, dropping it: {str(e)[:120]}')
+                stats["setup_error"] = str(e)[:200]
+                return
+        while True:
+            if stop is not None and stop():
+                return
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            item_start = time.perf_counter()
+            try:
+                out.results[item] = await work(page, item)
+                stats["items"] += 1
+            except Exception as e:
+                logger.warning(f'⚠️  Context {slot} failed on {item!r}: {str(e)[:120]}')
+                out.errors[item] = str(e)[:200]
+                stats["failed"] += 1
+            stats["busy_seconds"] = round(stats["busy_seconds"] + time.perf_counter() - item_start, 3)
+
+    await asyncio.gather(*(worker(slot, page) for slot, page in enumerate(pool.pages)))
+
+    # Items left behind because the run was stopped or every context dropped out
+    stopped = stop is not None and stop()
+    while not queue.empty():
+        item = queue.get_nowait()
+        if stopped:
+            out.skipped.append(item)
+        else:
+            out.errors[item] = "no browser context available"
+    out.seconds = time.perf_counter() - start
+    logger.info(f'🧩 {len(out.results)}/{len(items)} partitions done across {pool.size} contexts '
+                f'in {out.seconds:.1f}s')
+    return out
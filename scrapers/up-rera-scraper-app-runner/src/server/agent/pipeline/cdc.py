@@ -0,0 +1,493 @@
+"""
+Change-data-capture: insert/update/delete events for scraped projects.
+
+Downstream consumers that react to an extended end_date or a new
+registration should not have to diff full dumps. A ChangeCapture compares
+one run's records with the last known version of every project (kept in
+SQLite at CDC_DB_PATH, keyed by project_store.project_key) and emits one
+event per change:
+
+    {"event_id", "seq", "op": "insert", "key", "rera_number", "project_name",
+     "district", "version", "run_id", "ts", "after": {...full record...}}
+    {... "op": "update", "changes": {"end_date": {"before": "2026-03-31",
+                                                   "after": "2027-03-31"}}}
+    {... "op": "delete", "before": {...last known record...}}
+
+Updates carry only the changed fields; VOLATILE_FIELDS (scraped_at,
+serial_no) never count as changes, and partial Strategy 3 rows are merged
+into the known record first (dedup.merge_records), so they don't show up
+as fields being cleared. Deletes are only emitted for a scope the run
+covered completely (all projects, or a set of districts): a capped or
+single-page scrape says nothing about projects it didn't reach.
+
+Events are appended to a log partition, one object per run that changed
+anything (never rewritten):
+
+    up-rera-changes/year=2025/month=11/day=08/events-063012-ab12cd34.json
+
+and, when CDC_QUEUE_URL is set, published to a queue: an SQS queue URL, or
+"file:///path/queue.ndjson" for a local stand-in that consumers read with
+LocalEventQueue.receive(). The log is written first, then the queue, and
+the state only after both, so a failed run is re-emitted by the next one
+(at least once). Every change bumps the project's version and event_id is
+derived from key and version, so consumers can drop replayed events.
+
+A flush looks up the known versions, emits and commits under the state's
+capture lock (a mutex plus flock on <CDC_DB_PATH>.lock), so concurrent runs
+in one process or on one host see each other's versions instead of both
+claiming the next one. The lock only covers writers of the same file:
+CDC_DB_PATH must be shared by everything that captures changes for a
+bucket (one instance, or a volume they all mount). The /tmp default is
+per instance and lost on restart.
+"""
+
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .dedup import VOLATILE_FIELDS, merge_records, record_hash
+from .project_store import project_key
+from .retry import Retrier
+from .storage import (get_s3_client, make_day_prefix, partition_value, put_idempotency_key, put_object,
+                      resolve_target, to_ndjson, upload_executor)
+
+try:
+    import boto3
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "/tmp/up_rera_cdc.sqlite3"
+DEFAULT_CDC_PREFIX = "up-rera-changes"
+DEFAULT_LOCAL_QUEUE = "/tmp/up_rera_cdc_queue.ndjson"
+
+# SQS SendMessageBatch takes at most 10 messages
+SQS_BATCH = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS current (
+    project_key TEXT PRIMARY KEY,
+    version     INTEGER,
+    hash        TEXT,
+    district    TEXT,
+    deleted     INTEGER,
+    record      TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_current_district ON current(district);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+@dataclass
+class Known:
+    """Last known version of one project."""
+    record: Dict[str, Any]
+    version: int
+    hash: str
+    deleted: bool = False
+
+
+def diff_records(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Fields that differ between two versions of a project, as {field: {"before", "after"}}."""
+    changes: Dict[str, Dict[str, Any]] = {}
+    for field in sorted(before.keys() | after.keys()):
+        if field in VOLATILE_FIELDS:
+            continue
+        old, new = before.get(field), after.get(field)
+        if old != new:
+            changes[field] = {"before": old, "after": new}
+    return changes
+
+
+def event_id(key: str, version: int) -> str:
+    """Id of the change that produced a version of a project; the same when a run is replayed."""
+    return hashlib.blake2b(f"{key}\x1f{version}".encode("utf-8"), digest_size=12).hexdigest()
+
+
+class CdcState:
+    """Last known version of every project, plus the event sequence counter.
+
+    Safe to share across threads.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("CDC_DB_PATH", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._capture_mutex = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def capturing(self):
+        """Hold the capture lock: one flush at a time per db_path, across threads and processes."""
+        with self._capture_mutex, open(f"{self.db_path}.lock", "a") as handle:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def lookup(self, keys: List[str]) -> Dict[str, Known]:
+        """Last known version per key, deleted ones included; keys never seen are absent."""
+        found: Dict[str, Known] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT project_key, record, version, hash, deleted FROM current WHERE project_key IN "
+                    f"({', '.join('?' for _ in chunk)})", chunk)
+                found.update((key, Known(json.loads(record), version, digest, bool(deleted)))
+                             for key, record, version, digest, deleted in rows)
+        return found
+
+    def live(self, districts: Optional[Iterable[str]] = None) -> Dict[str, Known]:
+        """Every project not deleted, optionally only those in these districts."""
+        sql = "SELECT project_key, record, version, hash FROM current WHERE deleted = 0"
+        params: List[str] = []
+        if districts is not None:
+            params = sorted({partition_value(d) for d in districts})
+            if not params:
+                return {}
+            sql += f" AND district IN ({', '.join('?' for _ in params)})"
+        with self._lock:
+            return {key: Known(json.loads(record), version, digest)
+                    for key, record, version, digest in self._conn.execute(sql, params)}
+
+    def next_seq(self, count: int) -> int:
+        """Reserve count sequence numbers and return the first."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'seq'").fetchone()
+            first = (row[0] if row else 0) + 1
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('seq', ?)", (first + count - 1,))
+        return first
+
+    def commit(self, versions: Dict[str, Known]) -> None:
+        """Store versions as the last known ones."""
+        now = datetime.now(UTC).isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO current VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(key, k.version, k.hash, partition_value(k.record.get("district")), int(k.deleted),
+                  json.dumps(k.record, ensure_ascii=False), now)
+                 for key, k in versions.items()])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live, deleted = self._conn.execute(
+                "SELECT COALESCE(SUM(deleted = 0), 0), COALESCE(SUM(deleted), 0) FROM current").fetchone()
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'seq'").fetchone()
+        return {"db_path": self.db_path, "projects": live, "deleted": deleted, "seq": row[0] if row else 0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_state: Optional[CdcState] = None
+_default_state_lock = threading.Lock()
+
+
+def get_cdc_state() -> CdcState:
+    """Process-wide CdcState at CDC_DB_PATH."""
+    global _default_state
+    with _default_state_lock:
+        if _default_state is None:
+            _default_state = CdcState()
+            if _default_state.db_path == DEFAULT_DB_PATH:
+                logger.warning(f"⚠️  CDC state is in {DEFAULT_DB_PATH}, local to this instance; set CDC_DB_PATH "
+                               f"to a path every instance capturing changes shares")
+        return _default_state
+
+
+class EventQueue(ABC):
+    """Where events go besides the log."""
+
+    @abstractmethod
+    def publish(self, events: List[Dict[str, Any]]) -> int:
+        """Send events in order and return how many were sent."""
+
+
+class SqsEventQueue(EventQueue):
+    """Amazon SQS queue; each event is one message (FIFO queues group by project key)."""
+
+    def __init__(self, queue_url: str, client=None, retrier: Optional[Retrier] = None):
+        if client is None and not BOTO3_AVAILABLE:
+            raise RuntimeError("boto3 is required for SQS event queues")
+        self.queue_url = queue_url
+        self.client = client or boto3.client("sqs")
+        self.retrier = retrier or Retrier()
+        self.fifo = queue_url.endswith(".fifo")
+
+    def _send(self, entries: List[Dict[str, Any]]) -> None:
+        response = self.client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        failed = {f["Id"] for f in response.get("Failed", [])}
+        if failed:
+            # Resend only the failed entries on the next attempt
+            entries[:] = [e for e in entries if e["Id"] in failed]
+            raise RuntimeError(f"SQS rejected {len(failed)} of the batch")
+
+    def publish(self, events: List[Dict[str, Any]]) -> int:
+        for i in range(0, len(events), SQS_BATCH):
+            entries = []
+            for n, event in enumerate(events[i:i + SQS_BATCH]):
+                entry = {"Id": str(n), "MessageBody": json.dumps(event, ensure_ascii=False)}
+                if self.fifo:
+                    entry["MessageGroupId"] = event["key"]
+                    entry["MessageDeduplicationId"] = event["event_id"]
+                entries.append(entry)
+            self.retrier.call_sync("queue_publish", lambda: self._send(entries))
+        return len(events)
+
+
+class LocalEventQueue(EventQueue):
+    """Local stand-in for a queue: an append-only NDJSON file read by byte offset."""
+
+    def __init__(self, path: str = DEFAULT_LOCAL_QUEUE):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def publish(self, events: List[Dict[str, Any]]) -> int:
+        body = to_ndjson(events)
+        with self._lock, open(self.path, "ab") as f:
+            f.write(body)
+        return len(events)
+
+    def receive(self, offset: int = 0, max_events: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """Read up to max_events after a byte offset.
+
+        Returns:
+            (events, offset to pass to the next call)
+        """
+        if not os.path.exists(self.path):
+            return [], offset
+        events: List[Dict[str, Any]] = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while len(events) < max_events:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file, or a line still being written
+                offset += len(line)
+                if line.strip():
+                    events.append(json.loads(line))
+        return events, offset
+
+
+def get_event_queue(url: Optional[str] = None) -> Optional[EventQueue]:
+    """Queue for CDC_QUEUE_URL (or url): an SQS queue URL, "file:///path" or "local"; None when unset."""
+    url = url if url is not None else os.environ.get("CDC_QUEUE_URL", "")
+    if not url:
+        return None
+    if url == "local":
+        return LocalEventQueue()
+    if url.startswith("file://"):
+        return LocalEventQueue(url[len("file://"):])
+    if url.startswith("https://sqs.") or url.startswith("https://queue.amazonaws.com"):
+        return SqsEventQueue(url)
+    raise ValueError(f"Unsupported CDC_QUEUE_URL {url!r} (expected an SQS queue URL, file:///path or local)")
+
+
+class ChangeCapture:
+    """Turns one run's records into change events against the last known versions.
+
+    Usage:
+        capture = ChangeCapture(get_cdc_state(), run_id="ab12cd34")
+        capture.add(records)          # any number of batches
+        stats = capture.flush("my-bucket", districts=["Lucknow"])
+
+    Known versions are read in flush, under the state's capture lock, not
+    when records are added.
+    """
+
+    def __init__(self, state: CdcState, run_id: Optional[str] = None):
+        self.state = state
+        self.run_id = run_id
+        # key -> this run's records, in order, until they are resolved against the state
+        self.pending: Dict[str, List[Dict[str, Any]]] = {}
+        # key -> (last known version or None, this run's merged record)
+        self.current: Dict[str, Tuple[Optional[Known], Dict[str, Any]]] = {}
+        self.counts = {"records": 0, "inserts": 0, "updates": 0, "deletes": 0,
+                       "unchanged": 0, "unkeyed": 0}
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Collect records by project key for this run."""
+        for record in records:
+            self.counts["records"] += 1
+            key = project_key(record)
+            if key:
+                self.pending.setdefault(key, []).append(record)
+            else:
+                self.counts["unkeyed"] += 1
+
+    def _resolve(self) -> None:
+        """Merge pending records onto the last known versions, looked up in one batch."""
+        known = self.state.lookup(list(self.pending.keys() - self.current.keys()))
+        for key, records in self.pending.items():
+            if key in self.current:
+                before, merged = self.current[key]
+            else:
+                before, merged = known.get(key), None
+                if before is not None and not before.deleted:
+                    # Partial rows and empty fields fill in from the known version instead of clearing it
+                    merged = before.record
+            for record in records:
+                merged = record if merged is None else merge_records(merged, record)
+            self.current[key] = (before, merged)
+        self.pending = {}
+
+    def events(self, full: bool = False, districts: Optional[Iterable[str]] = None,
+               now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Known]]:
+        """Build the events of the run and the versions they lead to.
+
+        Args:
+            full: The run covered every project: unseen ones are deleted
+            districts: The run covered these districts completely: unseen projects in them are deleted
+            now: Event timestamp (default: UTC now)
+
+        Returns:
+            (events in key order, deletes last and without seq; {key: new Known version})
+        """
+        self._resolve()
+        ts = (now or datetime.utcnow()).isoformat() + "Z"
+        events: List[Dict[str, Any]] = []
+        versions: Dict[str, Known] = {}
+        counts = dict.fromkeys(("inserts", "updates", "deletes", "unchanged"), 0)
+
+        def event(op: str, key: str, version: int, record: Dict[str, Any], **body: Any) -> None:
+            events.append({"event_id": event_id(key, version), "op": op, "key": key,
+                           "rera_number": record.get("rera_number"),
+                           "project_name": record.get("project_name"),
+                           "district": record.get("district"),
+                           "version": version, "run_id": self.run_id, "ts": ts, **body})
+            counts[op + "s"] += 1
+
+        for key in sorted(self.current):
+            before, record = self.current[key]
+            digest = record_hash(record)
+            if before is None or before.deleted:
+                version = (before.version if before else 0) + 1
+                event("insert", key, version, record, after=record)
+            elif digest == before.hash:
+                counts["unchanged"] += 1
+                continue
+            else:
+                changes = diff_records(before.record, record)
+                if not changes:
+                    # Only volatile fields moved: keep the new version without an event
+                    counts["unchanged"] += 1
+                    versions[key] = Known(record, before.version, digest)
+                    continue
+                version = before.version + 1
+                event("update", key, version, record, changes=changes)
+            versions[key] = Known(record, version, digest)
+
+        if full or districts is not None:
+            live = self.state.live(None if full else districts)
+            for key in sorted(live.keys() - self.current.keys()):
+                gone = live[key]
+                version = gone.version + 1
+                event("delete", key, version, gone.record, before=gone.record)
+                versions[key] = Known(gone.record, version, gone.hash, deleted=True)
+
+        self.counts.update(counts)
+        return events, versions
+
+    def flush(self, bucket: str, cdc_prefix: Optional[str] = None, full: bool = False,
+              districts: Optional[Iterable[str]] = None, queue: Optional[EventQueue] = None,
+              now: Optional[datetime] = None, s3_client=None,
+              local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> Dict[str, Any]:
+        """Append the run's events to the log, publish them, then update the state.
+
+        Args:
+            bucket: S3 bucket name, "LOCAL", or "file://path"
+            cdc_prefix: Log prefix (default: CDC_PREFIX or "up-rera-changes")
+            full, districts: Scope the run covered completely, for deletes (see events())
+            queue: Where to publish besides the log (default: get_event_queue())
+
+        Returns:
+            Stats: counters, events, log_key, first_seq, last_seq, published, seconds
+        """
+        start = time.perf_counter()
+        now = now or datetime.utcnow()
+        cdc_prefix = cdc_prefix or os.environ.get("CDC_PREFIX", DEFAULT_CDC_PREFIX)
+        queue = queue if queue is not None else get_event_queue()
+
+        # From lookup to commit: another run's flush in between would diff
+        # against the same versions and emit the same event_ids
+        with self.state.capturing():
+            events, versions = self.events(full=full, districts=districts, now=now)
+            result: Dict[str, Any] = {**self.counts, "events": len(events), "log_key": None, "published": 0}
+            if events:
+                first = self.state.next_seq(len(events))
+                for n, event in enumerate(events):
+                    event["seq"] = first + n
+                result.update(first_seq=first, last_seq=first + len(events) - 1)
+                result["log_key"] = write_event_log(bucket, cdc_prefix, events, now, run_id=self.run_id,
+                                                    s3_client=s3_client,
+                                                    local_output_dir_env=local_output_dir_env)
+                if queue is not None:
+                    result["published"] = queue.publish(events)
+            if versions:
+                self.state.commit(versions)
+        self.current = {}
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"📣 CDC: {result['inserts']} inserts, {result['updates']} updates, "
+                    f"{result['deletes']} deletes from {result['records']} records")
+        return result
+
+
+def write_event_log(bucket: str, cdc_prefix: str, events: List[Dict[str, Any]], now: datetime,
+                    run_id: Optional[str] = None, s3_client=None,
+                    local_output_dir_env: str = "LOCAL_OUTPUT_DIR", retrier: Optional[Retrier] = None) -> str:
+    """Write one run's events as a new NDJSON object in the day's log partition."""
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "s3" and s3_client is None:
+        s3_client = get_s3_client()
+    key = (f"{make_day_prefix(cdc_prefix, now)}/events-{now:%H%M%S}-"
+           f"{run_id or events[0]['event_id'][:8]}.json")
+    body = to_ndjson(events)
+    (retrier or Retrier()).call_sync("s3_part_upload",
+                                     lambda: put_object(target_type, target, key, body, s3_client=s3_client),
+                                     idempotency_key=put_idempotency_key(key, body))
+    return key
+
+
+def capture_changes(bucket: str, records: List[Dict[str, Any]], state: Optional[CdcState] = None,
+                    run_id: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+    """Emit the change events of one run (see ChangeCapture.flush for kwargs)."""
+    capture = ChangeCapture(state or get_cdc_state(), run_id=run_id)
+    capture.add(records)
+    return capture.flush(bucket, **kwargs)
+
+
+async def acapture_changes(bucket: str, records: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+    """capture_changes on the upload executor; takes the same arguments."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(upload_executor(),
+                                      functools.partial(capture_changes, bucket, records, **kwargs))
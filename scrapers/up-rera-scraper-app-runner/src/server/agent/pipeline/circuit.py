@@ -0,0 +1,82 @@
+"""
+Circuit breaker for the upstream UP RERA site.
+
+Consecutive scrape failures open the circuit. It stays open for
+CIRCUIT_RESET_SECONDS, then goes half-open, and the next outcome either
+closes it (success) or opens it again (failure). Readiness reports the
+state, so a failing upstream shows up in health checks and not only in
+individual error responses.
+
+    closed --(CIRCUIT_FAILURES consecutive failures)--> open
+    open --(CIRCUIT_RESET_SECONDS)--> half_open
+    half_open --(success)--> closed, --(failure)--> open
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker; thread-safe."""
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.environ.get("CIRCUIT_FAILURES", 5))
+        self.reset_seconds = reset_seconds or float(os.environ.get("CIRCUIT_RESET_SECONDS", 60))
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"🟢 Circuit {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = (error or "")[:300] or None
+            if self._state() == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state() != OPEN:
+                    logger.warning(f"🔴 Circuit {self.name} open after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state()
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(self.reset_seconds - (time.monotonic() - self.opened_at), 1)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": retry_in,
+                "last_error": self.last_error,
+            }
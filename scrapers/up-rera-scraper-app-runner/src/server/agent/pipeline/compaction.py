@@ -0,0 +1,340 @@
+"""
+Compaction of a day's or month's small NDJSON objects into large sorted gzip parts.
+
+Every upload writes its own run directory, so frequent scheduled runs leave
+thousands of small objects per month, which query engines list and open one
+by one. compact_period merges every data object of one period:
+
+    prefix/year=2025/month=11/day=08/...        (period "2025-11-08")
+    prefix/year=2025/month=11/...               (period "2025-11")
+
+into parts sorted by sort_by (default district, rera_number, scraped_at, so
+a project's rows come out oldest first) and gzipped, so engines can skip
+files by min/max and read fewer, larger objects:
+
+    prefix/year=2025/month=11/day=08/run_id=compacted-ab12cd34ef56/part-00000.json.gz
+    prefix/year=2025/month=11/day=08/run_id=compacted-ab12cd34ef56/_manifest.json
+
+With partition_by="district" every district keeps its own directory
+(.../day=08/district=lucknow/run_id=compacted-.../). Earlier compacted
+output is an input like any other, so compaction can be re-run as new runs
+land. The daily snapshots of dedup.py are left alone: they are already one
+object per day and their manifest must keep pointing at them.
+
+Records are sorted externally: sorted chunks of COMPACT_SORT_CHUNK rows are
+spilled to temporary files and merged with a heap, so memory stays bounded
+by one chunk plus one output part, not by the size of the period. Inputs
+are deleted (with their run manifests) only after the new manifest is
+written. Readers in between see rows twice, never none.
+
+Every manifest lists the source_keys it replaced. Incremental readers that
+record what they have ingested (ProjectStore) use storage.compacted_sources to skip
+parts made only of rows they already have, instead of reading the period
+again under the new keys.
+"""
+
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import logging
+import os
+import posixpath
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .dedup import SNAPSHOT_DIR
+from .retry import Retrier
+from .storage import (COMPACTED_RUN_PREFIX, MANIFEST_NAME, MANIFEST_VERSION, UPLOAD_CONCURRENCY,
+                      delete_objects, get_s3_client, iter_ndjson, list_keys, new_run_id, partition_value,
+                      put_idempotency_key, put_object, read_object, resolve_target)
+
+logger = logging.getLogger(__name__)
+
+COMPACT_ROWS_PER_PART = int(os.environ.get("COMPACT_ROWS_PER_PART", 500_000))
+COMPACT_SORT_CHUNK = int(os.environ.get("COMPACT_SORT_CHUNK", 200_000))
+DEFAULT_SORT_BY = ("district", "rera_number", "scraped_at")
+
+
+def period_prefix(prefix: str, period: str) -> str:
+    """prefix/year=YYYY/month=MM[/day=DD] for a period "YYYY-MM" or "YYYY-MM-DD"."""
+    parts = period.split("-")
+    if len(parts) == 3:
+        day = datetime.strptime(period, "%Y-%m-%d")
+        return f"{prefix}/year={day:%Y}/month={day:%m}/day={day:%d}"
+    if len(parts) == 2:
+        month = datetime.strptime(period, "%Y-%m")
+        return f"{prefix}/year={month:%Y}/month={month:%m}"
+    raise ValueError(f'period must be "YYYY-MM" or "YYYY-MM-DD", got "{period}"')
+
+
+def list_compactable(bucket: str, base: str, s3_client=None,
+                     local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> List[str]:
+    """Data objects (.json, .json.gz) under base in finished run directories.
+
+    A run's manifest is written after all of its parts, so only directories
+    that already had one when listed are taken; a run still uploading is left
+    alone. Dedup snapshot directories are never compacted.
+    """
+    keys = list_keys(bucket, base, suffix="", s3_client=s3_client, local_output_dir_env=local_output_dir_env,
+                     keep_names=(MANIFEST_NAME,))
+    finished = {posixpath.dirname(k) for k in keys if posixpath.basename(k) == MANIFEST_NAME}
+    return [k for k in keys
+            if k.endswith((".json", ".json.gz")) and posixpath.basename(k) != MANIFEST_NAME
+            and posixpath.dirname(k) in finished and f"/{SNAPSHOT_DIR}/" not in k]
+
+
+def _sort_key(fields: Sequence[str]) -> Callable[[Dict[str, Any]], Tuple[str, ...]]:
+    def key(record: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(record.get(f) or "") for f in fields)
+    return key
+
+
+def _read_records(bucket: str, key: str, s3_client, local_output_dir_env: str) -> Tuple[List[Dict[str, Any]], int]:
+    body = read_object(bucket, key, s3_client=s3_client, local_output_dir_env=local_output_dir_env)
+    size = len(body)
+    if key.endswith(".gz"):
+        body = gzip.decompress(body)
+    return list(iter_ndjson(body)), size
+
+
+class _ExternalSort:
+    """Sorts records with bounded memory: sorted chunks are spilled and merged with a heap."""
+
+    def __init__(self, key: Callable[[Dict[str, Any]], Any], chunk_rows: int, directory: str):
+        self.key = key
+        self.chunk_rows = max(1, chunk_rows)
+        self.directory = directory
+        self.buffer: List[Dict[str, Any]] = []
+        self.spills: List[str] = []
+        self.rows = 0
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.buffer.append(record)
+            self.rows += 1
+            if len(self.buffer) >= self.chunk_rows:
+                self._spill()
+
+    def _spill(self) -> None:
+        self.buffer.sort(key=self.key)
+        path = os.path.join(self.directory, f"chunk-{len(self.spills):05d}.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.buffer:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.spills.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.buffer.sort(key=self.key)
+        if not self.spills:
+            return iter(self.buffer)
+        return heapq.merge(*(self._read(p) for p in self.spills), iter(self.buffer), key=self.key)
+
+
+class _PartWriter:
+    """Writes sorted records as gzip NDJSON parts of up to rows_per_part rows under one directory."""
+
+    def __init__(self, bucket: str, directory: str, rows_per_part: int, retrier: Retrier,
+                 s3_client, local_output_dir_env: str):
+        self.bucket, self.directory, self.rows_per_part = bucket, directory, max(1, rows_per_part)
+        self.retrier, self.s3_client = retrier, s3_client
+        self.target_type, self.target = resolve_target(bucket, local_output_dir_env)
+        self.parts: List[Dict[str, Any]] = []
+        self._buffer: Optional[io.BytesIO] = None
+        self._gz: Optional[gzip.GzipFile] = None
+        self._rows = 0
+        self.raw_bytes = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._gz is None:
+            self._buffer = io.BytesIO()
+            self._gz = gzip.GzipFile(fileobj=self._buffer, mode="wb", compresslevel=6, mtime=0)
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        self._gz.write(line)
+        self.raw_bytes += len(line)
+        self._rows += 1
+        if self._rows >= self.rows_per_part:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._gz is None:
+            return
+        self._gz.close()
+        body = self._buffer.getvalue()
+        key = f"{self.directory}/part-{len(self.parts):05d}.json.gz"
+        self.retrier.call_sync(
+            "s3_part_upload",
+            lambda: put_object(self.target_type, self.target, key, body,
+                               content_type="application/gzip", s3_client=self.s3_client),
+            idempotency_key=put_idempotency_key(key, body))
+        self.parts.append({"key": key, "rows": self._rows, "bytes": len(body),
+                           "sha256": hashlib.sha256(body).hexdigest()})
+        self._buffer, self._gz, self._rows = None, None, 0
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> str:
+        key = f"{self.directory}/{MANIFEST_NAME}"
+        body = json.dumps(manifest, indent=2).encode("utf-8")
+        self.retrier.call_sync(
+            "s3_part_upload",
+            lambda: put_object(self.target_type, self.target, key, body,
+                               content_type="application/json", s3_client=self.s3_client),
+            idempotency_key=put_idempotency_key(key, body))
+        return key
+
+
+def compact_period(
+    bucket: str,
+    prefix: str,
+    period: str,
+    sort_by: Sequence[str] = DEFAULT_SORT_BY,
+    partition_by: Optional[str] = None,
+    rows_per_part: int = COMPACT_ROWS_PER_PART,
+    chunk_rows: int = COMPACT_SORT_CHUNK,
+    min_objects: int = 2,
+    delete_sources: bool = True,
+    dry_run: bool = False,
+    concurrency: Optional[int] = None,
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> Dict[str, Any]:
+    """Merge the data objects of one day or month into sorted, gzipped parts plus a manifest.
+
+    Args:
+        bucket: S3 bucket name, "LOCAL", or "file://path"
+        prefix: Data prefix (e.g., "up-rera-projects")
+        period: "YYYY-MM-DD" (one day) or "YYYY-MM" (a whole month)
+        sort_by: Record fields the output is sorted by (scraped_at is always last)
+        partition_by: Keep one field=value directory per value of this field
+            (sorted first); default one directory for the whole period
+        rows_per_part: Rows per output part
+        chunk_rows: Rows sorted in memory before spilling to disk
+        min_objects: Skip periods with fewer data objects than this
+        delete_sources: Delete the inputs and their run manifests afterwards
+        dry_run: Only list what would be compacted
+        concurrency: Objects read at once (default: UPLOAD_CONCURRENCY)
+
+    Returns:
+        Stats: objects_in, bytes_in, rows, objects_out, bytes_out, ratio,
+        rows_per_second, mb_per_second, the manifests and phase_seconds
+        (read includes sorting and spilling full chunks; write includes the
+        heap merge and compression)
+    """
+    start = time.perf_counter()
+    target_type, _ = resolve_target(bucket, local_output_dir_env)
+    if target_type == "s3" and s3_client is None:
+        s3_client = get_s3_client()
+    base = period_prefix(prefix, period)
+    keys = list_compactable(bucket, base, s3_client=s3_client, local_output_dir_env=local_output_dir_env)
+    stats: Dict[str, Any] = {"period": period, "prefix": base, "objects_in": len(keys)}
+    if len(keys) < min_objects or dry_run:
+        stats.update({"skipped": len(keys) < min_objects, "dry_run": dry_run, "keys": keys if dry_run else None})
+        logger.info(f"🗜️  {base}: {len(keys)} object(s), nothing compacted")
+        return stats
+
+    # scraped_at breaks ties last, so duplicates of a project stay in scrape order
+    sort_fields = [f for f in sort_by if f != "scraped_at"] + ["scraped_at"]
+    if partition_by:
+        sort_fields = [partition_by] + [f for f in sort_fields if f != partition_by]
+    concurrency = UPLOAD_CONCURRENCY if concurrency is None else max(1, concurrency)
+    timings = {"read": 0.0, "write": 0.0, "delete": 0.0}
+    run_id = f"{COMPACTED_RUN_PREFIX}{new_run_id()}"
+    retrier = Retrier()
+    bytes_in = 0
+
+    with tempfile.TemporaryDirectory(prefix="compact-") as spill_dir:
+        sorter = _ExternalSort(_sort_key(sort_fields), chunk_rows, spill_dir)
+        phase = time.perf_counter()
+        # Read in windows of `concurrency` objects so at most that many are held at once
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="compact-read") as pool:
+            for i in range(0, len(keys), concurrency):
+                window = keys[i:i + concurrency]
+                for records, size in pool.map(
+                        lambda k: _read_records(bucket, k, s3_client, local_output_dir_env), window):
+                    bytes_in += size
+                    sorter.add(records)
+        timings["read"] = time.perf_counter() - phase
+
+        # The heap merge is lazy: it runs as the writers consume it, so it is timed with them
+        phase = time.perf_counter()
+        merged = iter(sorter)
+        writers: Dict[str, _PartWriter] = {}
+        current: Optional[_PartWriter] = None
+        current_value: Optional[str] = None
+        for record in merged:
+            value = partition_value(record.get(partition_by)) if partition_by else ""
+            if current is None or value != current_value:
+                if current is not None:
+                    current.flush()
+                extra = f"/{partition_by}={value}" if partition_by else ""
+                current = writers.setdefault(value, _PartWriter(
+                    bucket, f"{base}{extra}/run_id={run_id}", rows_per_part, retrier,
+                    s3_client, local_output_dir_env))
+                current_value = value
+            current.write(record)
+        if current is not None:
+            current.flush()
+
+        manifests: Dict[str, str] = {}
+        for value, writer in writers.items():
+            manifest = {
+                "manifest_version": MANIFEST_VERSION,
+                "kind": "compaction",
+                "run_id": run_id,
+                "prefix": prefix,
+                "period": period,
+                "partition": {partition_by: value} if partition_by else {},
+                "created_at": datetime.utcnow().isoformat() + "Z",
+                "format": "ndjson",
+                "compression": "gzip",
+                "content_type": "application/x-ndjson",
+                "sort_by": sort_fields,
+                "source_objects": len(keys),
+                "source_keys": keys,
+                "total_rows": sum(p["rows"] for p in writer.parts),
+                "total_bytes": sum(p["bytes"] for p in writer.parts),
+                "uncompressed_bytes": writer.raw_bytes,
+                "parts": writer.parts,
+            }
+            manifests[value] = writer.write_manifest(manifest)
+        timings["write"] = time.perf_counter() - phase
+        spilled = len(sorter.spills)
+
+    if delete_sources:
+        phase = time.perf_counter()
+        run_manifests = sorted({f"{k.rsplit('/', 1)[0]}/{MANIFEST_NAME}" for k in keys})
+        delete_objects(bucket, keys + run_manifests, s3_client=s3_client,
+                       local_output_dir_env=local_output_dir_env)
+        timings["delete"] = time.perf_counter() - phase
+
+    seconds = time.perf_counter() - start
+    parts = [p for writer in writers.values() for p in writer.parts]
+    bytes_out = sum(p["bytes"] for p in parts)
+    stats.update({
+        "bytes_in": bytes_in,
+        "rows": sorter.rows,
+        "objects_out": len(parts),
+        "bytes_out": bytes_out,
+        "ratio": round(bytes_in / bytes_out, 2) if bytes_out else None,
+        "sort_spills": spilled,
+        "run_id": run_id,
+        "manifests": manifests if partition_by else next(iter(manifests.values()), None),
+        "deleted": len(keys) if delete_sources else 0,
+        "seconds": round(seconds, 3),
+        "phase_seconds": {k: round(v, 3) for k, v in timings.items()},
+        "rows_per_second": round(sorter.rows / seconds) if seconds else None,
+        "mb_per_second": round(bytes_in / 1e6 / seconds, 2) if seconds else None,
+    })
+    logger.info(f"🗜️  {base}: {len(keys)} objects ({bytes_in / 1e6:.1f} MB) -> {len(parts)} part(s) "
+                f"({bytes_out / 1e6:.1f} MB), {sorter.rows} rows in {seconds:.1f}s")
+    return stats
@@ -0,0 +1,110 @@
+"""
+Partitioned crawls of the UP RERA projects grid across a ContextPool.
+
+The crawl itself is the up-rera source of the scraper SDK
+(sources/up_rera.py) driven by the engine in runtime.py; these wrappers
+keep the entry points the MCP tools and the stream endpoint call, with rows
+left raw so callers normalize after truncating.
+
+- scrape_grid_pages: grid page numbers of the unfiltered grid
+- scrape_districts: district filter values, every page of each filtered grid
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .browser_pool import PartitionResults
+from .retry import Retrier
+from .runtime import CallbackSink, PageCallback, ScrapeRuntime, run_partitions
+from .snapshots import SnapshotStore
+from .sources.up_rera import (MAX_PAGES_PER_PARTITION, DistrictPartition, UpReraSource,
+                              discover_districts, parse_district_spec, plan_district_partitions,
+                              plan_districts, read_grid)
+
+# District planning lives with the up-rera source; callers keep importing it from here
+__all__ = [
+    "MAX_PAGES_PER_PARTITION",
+    "DistrictPartition",
+    "discover_districts",
+    "parse_district_spec",
+    "plan_district_partitions",
+    "plan_districts",
+    "read_grid",
+    "scrape_districts",
+    "scrape_grid_pages",
+]
+
+
+def _runtime(browser, retrier: Retrier, timeout_ms: int, window_size: int,
+             snapshots: Optional[SnapshotStore], parse_workers: int,
+             on_page: Optional[PageCallback]) -> ScrapeRuntime:
+    return ScrapeRuntime(retrier=retrier, browser=browser, timeout_ms=timeout_ms, window_size=window_size,
+                         parse_workers=parse_workers, snapshots=snapshots,
+                         sinks=[CallbackSink(on_page)] if on_page else [])
+
+
+async def scrape_grid_pages(
+    browser,
+    pages: Sequence[int],
+    contexts: int,
+    retrier: Retrier,
+    timeout_ms: int = 180000,
+    window_size: int = 50,
+    base_url: Optional[str] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    parse_workers: int = 0,
+    on_page: Optional[PageCallback] = None,
+    max_rows: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], PartitionResults]:
+    """Scrape grid pages with up to `contexts` isolated sessions in one browser.
+
+    Args:
+        browser: Launched Playwright browser
+        pages: 1-based grid page numbers to scrape
+        contexts: Number of contexts (capped at len(pages))
+        retrier: Shared Retrier; navigation and paging use its policies
+        timeout_ms: Navigation/default timeout per context
+        window_size: Rows read per evaluate round trip
+        base_url: Site root (default: UP_RERA_BASE_URL or up-rera.in)
+        snapshots: Archive each grid page's HTML here when given
+        parse_workers: Parse grid HTML in this many worker processes instead
+            of building records on the event loop (0 = in-page extraction)
+        on_page: Awaited with (meta, rows) as each page's rows are ready, in
+            completion order rather than page order
+        max_rows: Stop handing out pages once this many rows are in
+
+    Returns:
+        (projects in page order, PartitionResults with per-page stats)
+    """
+    runtime = _runtime(browser, retrier, timeout_ms, window_size, snapshots, parse_workers, on_page)
+    return await run_partitions(UpReraSource(base_url), runtime, pages, contexts, raw=True,
+                                max_rows=max_rows)
+
+
+async def scrape_districts(
+    browser,
+    partitions: Sequence[DistrictPartition],
+    contexts: int,
+    retrier: Retrier,
+    timeout_ms: int = 180000,
+    window_size: int = 50,
+    base_url: Optional[str] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    parse_workers: int = 0,
+    on_page: Optional[PageCallback] = None,
+    max_rows: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], PartitionResults]:
+    """Scrape every page of each district's filtered grid across isolated contexts.
+
+    Rows get the partition's district name when the grid leaves it blank.
+    With snapshots, every page of every district is archived; with
+    parse_workers, pages are parsed in worker processes as in scrape_grid_pages.
+    With max_rows, no new district is started once that many rows are in;
+    districts already started are read to the end and the rest are listed in
+    outcome.skipped.
+
+    Returns:
+        (projects in partition order, PartitionResults keyed by DistrictPartition)
+    """
+    runtime = _runtime(browser, retrier, timeout_ms, window_size, snapshots, parse_workers, on_page)
+    return await run_partitions(UpReraSource(base_url), runtime, partitions, contexts, raw=True,
+                                max_rows=max_rows)
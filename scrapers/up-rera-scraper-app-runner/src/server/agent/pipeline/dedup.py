@@ -0,0 +1,447 @@
+"""
+Cross-run deduplication of scraped projects into compacted daily snapshots.
+
+Every scrape returns the full project set, so writing each run as-is
+stores N copies of every project per day. A Deduplicator instead keeps,
+across runs, the content hash of the last version written for every
+project key (project_store.project_key: the RERA number, else name +
+promoter). Only new and changed records go out, as one snapshot per day:
+
+    prefix/year=2025/month=11/day=08/snapshot/snapshot-g00003.json
+    prefix/year=2025/month=11/day=08/snapshot/_manifest.json
+
+Each flush merges the run's changes into the day's snapshot and writes the
+result as the next generation. The manifest goes last and names it, then
+the previous generation is deleted, so a day always holds one data object
+with each key once. Storage and downstream scans grow with the number of
+changes, not the number of runs. Replaying the daily snapshots in order
+(e.g. ProjectStore.ingest) rebuilds the current state.
+
+Seen keys live in SQLite (DEDUP_DB_PATH) next to a Bloom filter of them
+(DEDUP_BLOOM_CAPACITY keys at DEDUP_BLOOM_ERROR false positives). A key
+the filter has never seen is new without a lookup, and the filter
+persists as one small blob. Keys are scoped by destination (the resolved
+bucket plus prefix): a project written to one destination is still new to
+every other one.
+
+The index is what makes a record "already written", so DEDUP_DB_PATH must
+be shared by everything uploading to the same destination (one instance,
+or a volume they all mount). The /tmp default is per instance and lost on
+restart: another instance, or this one after a restart, writes every
+project again.
+
+Partial records (Strategy 3 "page_text" rows with only a RERA number) are
+merged into full ones and never replace them: see merge_records.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .project_store import project_key
+from .storage import (MANIFEST_NAME, delete_objects, get_s3_client, iter_ndjson, make_day_prefix,
+                      put_object, read_manifest, read_object, resolve_target, to_ndjson, upload_executor)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "/tmp/up_rera_dedup.sqlite3"
+BLOOM_CAPACITY = int(os.environ.get("DEDUP_BLOOM_CAPACITY", 500_000))
+BLOOM_ERROR = float(os.environ.get("DEDUP_BLOOM_ERROR", 0.001))
+
+SNAPSHOT_DIR = "snapshot"
+
+# Fields that change between runs without the project changing
+VOLATILE_FIELDS = frozenset({"scraped_at", "serial_no"})
+# Markers and placeholder text of a Strategy 3 row, dropped once a full record is merged in
+PARTIAL_FIELDS = ("extracted_from", "note", "raw_text")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    destination TEXT,
+    project_key TEXT,
+    hash        TEXT,
+    partial     INTEGER,
+    first_seen  TEXT,
+    last_seen   TEXT,
+    PRIMARY KEY (destination, project_key)
+);
+CREATE TABLE IF NOT EXISTS bloom (
+    name       TEXT PRIMARY KEY,
+    capacity   INTEGER,
+    error_rate REAL,
+    count      INTEGER,
+    bits       BLOB
+);
+"""
+
+# One flush at a time per day snapshot in this process
+_snapshot_locks: Dict[str, threading.Lock] = {}
+_snapshot_locks_guard = threading.Lock()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (double hashing on one BLAKE2b digest)."""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR,
+                 bits: Optional[bytes] = None, count: int = 0):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        new = False
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        self.count += new
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate at the current fill."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "keys": self.count,
+            "capacity": self.capacity,
+            "kb": round(len(self.bits) / 1024, 1),
+            "hashes": self.hashes,
+            "false_positive_rate": round(self.false_positive_rate(), 6),
+        }
+
+
+def destination(bucket: str, prefix: str, local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> str:
+    """Scope of the seen keys: the resolved target plus the data prefix."""
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    return f"{target_type}://{target.rstrip('/')}/{prefix.strip('/')}"
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Content hash of a record, ignoring VOLATILE_FIELDS."""
+    body = "\x1f".join(f"{k}\x1e{v}" for k, v in sorted(record.items()) if k not in VOLATILE_FIELDS)
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def is_partial(record: Dict[str, Any]) -> bool:
+    """True for a Strategy 3 row built from page text with only the RERA number."""
+    return record.get("extracted_from") == "page_text"
+
+
+def merge_records(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two versions of one project.
+
+    The update wins field by field, except that empty values never erase
+    known ones and a partial update never overrides a full record (it only
+    fills fields the full record lacks, such as detail_link). The merge of a
+    partial and a full record is full. scraped_at is the later of the two.
+    """
+    if is_partial(update) and not is_partial(base):
+        primary, secondary = base, update
+    else:
+        primary, secondary = update, base
+    merged = dict(secondary)
+    if is_partial(secondary) and not is_partial(primary):
+        for field in PARTIAL_FIELDS:
+            merged.pop(field, None)
+    merged.update({k: v for k, v in primary.items() if v not in (None, "")})
+    stamps = [r["scraped_at"] for r in (base, update) if r.get("scraped_at")]
+    if stamps:
+        merged["scraped_at"] = max(stamps)
+    return merged
+
+
+class DedupIndex:
+    """(destination, project key) -> hash of the last version written, plus a Bloom filter of the keys.
+
+    Safe to share across threads.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, capacity: int = BLOOM_CAPACITY,
+                 error_rate: float = BLOOM_ERROR):
+        self.db_path = db_path or os.environ.get("DEDUP_DB_PATH", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(seen)")}
+            if columns and "destination" not in columns:
+                # Unscoped keys from before destinations: nothing says where they were
+                # written, so drop them and let each destination write everything once
+                logger.warning(f"⚠️  Dropping unscoped dedup keys in {self.db_path}")
+                with self._conn:
+                    self._conn.execute("DROP TABLE seen")
+                    self._conn.execute("DROP TABLE IF EXISTS bloom")
+            self._conn.executescript(_SCHEMA)
+            row = self._conn.execute(
+                "SELECT capacity, error_rate, count, bits FROM bloom WHERE name = 'keys'").fetchone()
+        if row and row[0] == capacity and row[1] == error_rate:
+            self.bloom = BloomFilter(row[0], row[1], bits=row[3], count=row[2])
+        else:
+            # First use, or the filter was resized: rebuild it from the seen keys
+            self.bloom = BloomFilter(capacity, error_rate)
+            with self._lock:
+                for scope, key in self._conn.execute("SELECT destination, project_key FROM seen"):
+                    self.bloom.add(self.bloom_key(scope, key))
+
+    @staticmethod
+    def bloom_key(scope: str, key: str) -> str:
+        """Bloom filter entry of a key at a destination."""
+        return f"{scope}\x1f{key}"
+
+    def lookup(self, scope: str, keys: List[str]) -> Dict[str, Tuple[str, bool]]:
+        """(hash, partial) of the last version written per key to a destination; keys never seen are absent."""
+        found: Dict[str, Tuple[str, bool]] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT project_key, hash, partial FROM seen WHERE destination = ? AND project_key IN "
+                    f"({', '.join('?' for _ in chunk)})", [scope, *chunk])
+                found.update((key, (digest, bool(partial))) for key, digest, partial in rows)
+        return found
+
+    def commit(self, scope: str, entries: List[Tuple[str, str, bool]]) -> None:
+        """Record (key, hash, partial) for versions written to a destination, and persist the filter."""
+        now = datetime.now(UTC).isoformat()
+        for key, _, _ in entries:
+            self.bloom.add(self.bloom_key(scope, key))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO seen VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(destination, project_key) DO UPDATE SET "
+                "hash = excluded.hash, partial = excluded.partial, last_seen = excluded.last_seen",
+                [(scope, key, digest, int(partial), now, now) for key, digest, partial in entries])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bloom VALUES ('keys', ?, ?, ?, ?)",
+                (self.bloom.capacity, self.bloom.error_rate, self.bloom.count, bytes(self.bloom.bits)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        return {"db_path": self.db_path, "keys": keys, "bloom": self.bloom.as_dict()}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_index: Optional[DedupIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> DedupIndex:
+    """Process-wide DedupIndex at DEDUP_DB_PATH."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DedupIndex()
+            if _default_index.db_path == DEFAULT_DB_PATH:
+                logger.warning(f"⚠️  Dedup index is in {DEFAULT_DB_PATH}, local to this instance; set "
+                               f"DEDUP_DB_PATH to a path every instance uploading shares")
+        return _default_index
+
+
+def _missing_object(e: Exception) -> bool:
+    if isinstance(e, FileNotFoundError):
+        return True
+    code = getattr(e, "response", {}).get("Error", {}).get("Code")
+    return code in ("NoSuchKey", "404")
+
+
+class Deduplicator:
+    """Collects one run's new and changed records and flushes them into the daily snapshot.
+
+    Usage:
+        dedup = Deduplicator(get_dedup_index(), "my-bucket", "up-rera-projects")
+        dedup.add(records)            # any number of batches
+        stats = dedup.flush()
+    """
+
+    def __init__(self, index: DedupIndex, bucket: str, prefix: str,
+                 local_output_dir_env: str = "LOCAL_OUTPUT_DIR"):
+        self.index = index
+        self.bucket, self.prefix, self.local_output_dir_env = bucket, prefix, local_output_dir_env
+        self.scope = destination(bucket, prefix, local_output_dir_env)
+        # key -> (merged record, hash of the version to remember, partial)
+        self.changes: Dict[str, Tuple[Dict[str, Any], str, bool]] = {}
+        self.counts = {"records": 0, "new": 0, "changed": 0, "unchanged": 0,
+                       "partial_merged": 0, "duplicates": 0, "unkeyed": 0, "bloom_false_positives": 0}
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Classify records against this destination's keys and keep the new and changed ones.
+
+        Keys the Bloom filter has seen are looked up in one query per batch.
+        """
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        for record in records:
+            self.counts["records"] += 1
+            key = project_key(record)
+            if key:
+                batch.append((key, record))
+            else:
+                self.counts["unkeyed"] += 1
+        bloom = self.index.bloom
+        maybe_seen = {key for key, _ in batch
+                      if key not in self.changes and self.index.bloom_key(self.scope, key) in bloom}
+        known = self.index.lookup(self.scope, list(maybe_seen))
+        self.counts["bloom_false_positives"] += len(maybe_seen) - len(known)
+
+        for key, record in batch:
+            digest, partial = record_hash(record), is_partial(record)
+
+            pending = self.changes.get(key)
+            if pending is not None:
+                self.counts["duplicates"] += 1
+                merged = merge_records(pending[0], record)
+                if partial and not pending[2]:
+                    self.counts["partial_merged"] += 1
+                    self.changes[key] = (merged, pending[1], False)
+                else:
+                    self.changes[key] = (merged, digest, is_partial(merged))
+                continue
+
+            seen = known.get(key)
+            if seen is None:
+                self.counts["new"] += 1
+                self.changes[key] = (record, digest, partial)
+            elif seen[0] == digest:
+                self.counts["unchanged"] += 1
+            elif partial and not seen[1]:
+                # The full record was written before; a RERA-only row adds nothing
+                self.counts["partial_merged"] += 1
+            else:
+                self.counts["changed"] += 1
+                self.changes[key] = (record, digest, partial)
+
+    def flush(self, now: Optional[datetime] = None, s3_client=None) -> Dict[str, Any]:
+        """Merge the collected changes into the day's snapshot, then remember them in the index.
+
+        Args:
+            now: Day to write (default: UTC now)
+
+        Returns:
+            Stats: the add() counters plus written, snapshot_key, manifest_key,
+            snapshot_rows, generation and seconds
+        """
+        start = time.perf_counter()
+        now = now or datetime.utcnow()
+        result: Dict[str, Any] = dict(self.counts)
+        result["written"] = len(self.changes)
+        if self.changes:
+            result.update(write_daily_snapshot(
+                self.bucket, self.prefix, {key: record for key, (record, _, _) in self.changes.items()}, now,
+                s3_client=s3_client, local_output_dir_env=self.local_output_dir_env))
+            self.index.commit(self.scope, [(key, digest, partial) for key, (_, digest, partial) in self.changes.items()])
+            self.changes = {}
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"🧹 Dedup: {result['records']} records -> {result['written']} written "
+                    f"({result['new']} new, {result['changed']} changed, {result['unchanged']} unchanged)")
+        return result
+
+
+def write_daily_snapshot(
+    bucket: str,
+    prefix: str,
+    changes: Dict[str, Dict[str, Any]],
+    now: datetime,
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> Dict[str, Any]:
+    """Merge records keyed by project key into the day's snapshot and write the next generation.
+
+    Returns:
+        Dict with snapshot_key, manifest_key, snapshot_rows, generation
+    """
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "s3" and s3_client is None:
+        s3_client = get_s3_client()
+    directory = f"{make_day_prefix(prefix, now)}/{SNAPSHOT_DIR}"
+    manifest_key = f"{directory}/{MANIFEST_NAME}"
+
+    with _snapshot_locks_guard:
+        lock = _snapshot_locks.setdefault(f"{bucket}/{directory}", threading.Lock())
+    with lock:
+        try:
+            previous = read_manifest(bucket, manifest_key, s3_client=s3_client,
+                                     local_output_dir_env=local_output_dir_env)
+        except Exception as e:
+            if not _missing_object(e):
+                raise
+            previous = None
+
+        records: Dict[str, Dict[str, Any]] = {}
+        if previous:
+            body = read_object(bucket, previous["key"], s3_client=s3_client,
+                               local_output_dir_env=local_output_dir_env)
+            for record in iter_ndjson(body):
+                records[project_key(record) or ""] = record
+        for key, record in changes.items():
+            records[key] = merge_records(records[key], record) if key in records else record
+
+        generation = (previous or {}).get("generation", 0) + 1
+        key = f"{directory}/snapshot-g{generation:05d}.json"
+        body = to_ndjson(records[k] for k in sorted(records))
+        put_object(target_type, target, key, body, s3_client=s3_client)
+        manifest = {
+            "manifest_version": 1,
+            "kind": "daily_snapshot",
+            "prefix": prefix,
+            "day": now.strftime("%Y-%m-%d"),
+            "generation": generation,
+            "updated_at": datetime.utcnow().isoformat() + "Z",
+            "key": key,
+            "total_rows": len(records),
+            "total_bytes": len(body),
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }
+        put_object(target_type, target, manifest_key, json.dumps(manifest, indent=2).encode("utf-8"),
+                   content_type="application/json", s3_client=s3_client)
+        if previous and previous.get("key") != key:
+            delete_objects(bucket, [previous["key"]], s3_client=s3_client,
+                           local_output_dir_env=local_output_dir_env)
+
+    logger.info(f"🗓️  Daily snapshot {now:%Y-%m-%d} generation {generation}: {len(records)} projects")
+    return {"snapshot_key": key, "manifest_key": manifest_key,
+            "snapshot_rows": len(records), "generation": generation}
+
+
+def dedup_upload(bucket: str, records: List[Dict[str, Any]], prefix: str = "up-rera-projects",
+                 index: Optional[DedupIndex] = None, now: Optional[datetime] = None,
+                 s3_client=None, local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> Dict[str, Any]:
+    """Deduplicate one run's records and flush them into the daily snapshot."""
+    dedup = Deduplicator(index or get_dedup_index(), bucket, prefix, local_output_dir_env)
+    dedup.add(records)
+    return dedup.flush(now, s3_client=s3_client)
+
+
+async def adedup_upload(bucket: str, records: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+    """dedup_upload on the upload executor; takes the same arguments."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(upload_executor(),
+                                      functools.partial(dedup_upload, bucket, records, **kwargs))
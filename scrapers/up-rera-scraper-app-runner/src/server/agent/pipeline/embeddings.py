@@ -0,0 +1,108 @@
+"""
+Local text embedders and raw_text chunking for the project vector index.
+
+Embedders never call the network. The default HashingEmbedder maps word
+unigrams and bigrams into a fixed number of signed buckets (feature hashing),
+which needs no model download and is deterministic across processes. A
+sentence-transformers model can be plugged in when it is installed locally.
+"""
+
+import hashlib
+import math
+import re
+from typing import List, Protocol, Sequence
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class Embedder(Protocol):
+    """Anything that turns a batch of texts into unit-length float vectors.
+
+    ``name`` is a spec accepted by load_embedder(), so an index can recreate
+    the embedder it was built with.
+    """
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        ...
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over lower-cased word unigrams and bigrams."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _embed_one(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec))
+        return [v / norm for v in vec] if norm else vec
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._embed_one(t) for t in texts]
+
+
+class SentenceTransformerEmbedder:
+    """Wraps a locally available sentence-transformers model."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer  # optional dependency
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.name = f"st:{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        vectors = self._model.encode(list(texts), normalize_embeddings=True)
+        return [list(map(float, v)) for v in vectors]
+
+
+def load_embedder(spec: str = "hashing") -> Embedder:
+    """Create an embedder from a spec string.
+
+    Args:
+        spec: "hashing", "hashing:<dim>" or "st:<sentence-transformers model name>"
+
+    Returns:
+        Embedder instance
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(dim=int(arg) if arg else 256)
+    if kind == "st":
+        return SentenceTransformerEmbedder(arg)
+    raise ValueError(f"Unknown embedder spec: {spec}")
+
+
+def chunk_text(text: str, max_chars: int = 512, overlap: int = 64) -> List[str]:
+    """Split raw_text into overlapping chunks, preferring " | " field boundaries.
+
+    Project raw_text is usually a single chunk; long card/detail text is split
+    so no chunk exceeds max_chars.
+    """
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            cut = text.rfind(" | ", start + overlap, end)
+            if cut == -1:
+                cut = text.rfind(" ", start + overlap, end)
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end].strip(" |"))
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
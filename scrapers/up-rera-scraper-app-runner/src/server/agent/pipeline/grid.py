@@ -0,0 +1,231 @@
+"""
+Navigation to and windowed extraction from the UP RERA projects grid (#grdPojDetail).
+
+Rows are read in windows with one page.evaluate round trip each. The script
+returns plain cell/link text, so no ElementHandle is created or kept alive in
+the browser; only one window of rows is held in Python at a time.
+
+The grid is an ASP.NET GridView: paging is a __doPostBack to the grid with
+"Page$<n>" and filtering is a postback from the district dropdown. The current
+page and filter live in the session's view state, so each browser context
+pages and filters independently.
+"""
+
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .records import BASE_URL, build_project_from_cells, is_detail_href, resolve_detail_link
+
+logger = logging.getLogger(__name__)
+
+GRID_ID = "grdPojDetail"
+GRID_ROW_SELECTOR = "#grdPojDetail tbody tr"
+GRID_READY_SELECTOR = "table, .project-list, .data-table, tbody tr"
+PROJECTS_LINK_TEXTS = ("Registered Projects", "REGISTERED PROJECTS")
+DISTRICT_SELECT_SELECTOR = "select[id*='istrict'], select[name*='istrict']"
+SEARCH_BUTTON_SELECTOR = "input[type=submit][value*='earch'], button:has-text('Search'), [id*='btnSearch']"
+
+# Dropdown entries that mean "no filter"
+_PLACEHOLDER_VALUES = {"", "0", "-1", "all", "select"}
+
+# Text of the grid, used to notice that a postback replaced its rows
+_GRID_SIGNATURE_JS = """
+(id) => { const g = document.getElementById(id); return g ? g.innerText.slice(0, 4000) : null; }
+"""
+_GRID_CHANGED_JS = """
+([id, before]) => { const g = document.getElementById(id); return !!g && g.innerText.slice(0, 4000) !== before; }
+"""
+# Postback target (the grid's UniqueID, e.g. ctl00$ContentPlaceHolder1$grdPojDetail)
+# and the page numbers linked from the pager
+_PAGER_JS = r"""
+() => {
+    const pages = new Set(); let target = null;
+    for (const a of document.querySelectorAll('a[href*="Page$"]')) {
+        const m = /__doPostBack\('([^']+)','Page\$(\d+)'\)/.exec(a.getAttribute('href'));
+        if (m) { target = m[1]; pages.add(Number(m[2])); }
+    }
+    return [target, Array.from(pages).sort((a, b) => a - b)];
+}
+"""
+_DISTRICT_OPTIONS_JS = """
+(selector) => { const s = document.querySelector(selector);
+    return s ? Array.from(s.options, o => [o.value, o.text.trim()]) : []; }
+"""
+
+# Returns [[cell texts...], [[href, link text], ...]] for rows[start:end]
+_READ_WINDOW_JS = """
+([selector, start, end]) => Array.from(document.querySelectorAll(selector))
+    .slice(start, end)
+    .map(row => [
+        Array.from(row.querySelectorAll('td, th'), c => c.innerText.trim()),
+        Array.from(row.querySelectorAll('a[href]'), a => [a.getAttribute('href'), a.innerText])
+    ])
+"""
+
+RowData = Tuple[List[str], str, str]
+
+
+def site_url() -> str:
+    """Site root; UP_RERA_BASE_URL points the scraper at a mirror or fixture server."""
+    return os.environ.get("UP_RERA_BASE_URL", BASE_URL).rstrip("/")
+
+
+async def open_projects_list(page, timeout_ms: int, base_url: Optional[str] = None) -> None:
+    """Open the homepage and click through to the registered projects grid.
+
+    Raises:
+        Exception: If the "Registered Projects" link can't be found or clicked
+    """
+    await page.goto(f"{base_url or site_url()}/index", wait_until="domcontentloaded", timeout=timeout_ms)
+    await page.wait_for_timeout(5000)
+    logger.info('✅ Landed on homepage.')
+
+    logger.info('🔗 Searching for "REGISTERED PROJECTS" link...')
+    # Text selectors survive DOM re-renders better than element handles
+    for text in PROJECTS_LINK_TEXTS:
+        try:
+            await page.click(f'text="{text}"', timeout=10000)
+            logger.info(f'✅ Clicked link via text selector ("{text}")')
+            return
+        except Exception:
+            continue
+
+    logger.info('⚠️  Text selector failed, trying element handle approach...')
+    for link in await page.query_selector_all('a'):
+        try:
+            text = (await link.inner_text()).strip()
+            if text in PROJECTS_LINK_TEXTS:
+                await link.click()
+                logger.info(f'✅ Clicked link with text: "{text}"')
+                return
+        except Exception:
+            continue
+
+    raise Exception('Could not find or click "REGISTERED PROJECTS" link on homepage.')
+
+
+async def wait_for_grid(page, timeout_ms: int = 30000) -> None:
+    """Wait for the grid to render; reloads on failure so a retry re-fetches it."""
+    try:
+        await page.wait_for_selector(GRID_READY_SELECTOR, timeout=timeout_ms)
+    except Exception:
+        await page.reload(wait_until='domcontentloaded')
+        raise
+
+
+async def grid_pager(page) -> Tuple[Optional[str], List[int]]:
+    """(postback target, page numbers linked from the pager) for the current grid."""
+    target, pages = await page.evaluate(_PAGER_JS)
+    return target, pages
+
+
+async def go_to_grid_page(page, page_number: int, timeout_ms: int = 60000) -> None:
+    """Page the grid to page_number with an ASP.NET pager postback.
+
+    Works for both full-page postbacks and UpdatePanel partial updates: the
+    call returns once the grid text differs from what it was before.
+    """
+    before = await page.evaluate(_GRID_SIGNATURE_JS, GRID_ID)
+    target, _ = await grid_pager(page)
+    try:
+        await page.evaluate("([target, arg]) => __doPostBack(target, arg)",
+                            [target or GRID_ID, f"Page${page_number}"])
+    except Exception:
+        # A full postback can tear down the execution context mid-evaluate
+        pass
+    await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+    await page.wait_for_function(_GRID_CHANGED_JS, arg=[GRID_ID, before], timeout=timeout_ms)
+
+
+async def list_district_options(page) -> List[Tuple[str, str]]:
+    """(value, label) of every district in the filter dropdown, placeholders dropped."""
+    options = await page.evaluate(_DISTRICT_OPTIONS_JS, DISTRICT_SELECT_SELECTOR)
+    return [(value, label) for value, label in options
+            if value.strip().lower() not in _PLACEHOLDER_VALUES
+            and not label.lower().startswith(("select", "--", "all"))]
+
+
+async def filter_by_district(page, value: str, timeout_ms: int = 60000) -> None:
+    """Filter the grid to one district.
+
+    The dropdown usually posts back on change; when it doesn't, the search
+    button is clicked. A district with no projects may render no grid at all,
+    which is treated as an empty result rather than a failure.
+    """
+    before = await page.evaluate(_GRID_SIGNATURE_JS, GRID_ID)
+    await page.select_option(DISTRICT_SELECT_SELECTOR, value)
+    try:
+        await page.wait_for_function(_GRID_CHANGED_JS, arg=[GRID_ID, before], timeout=5000)
+        return
+    except Exception:
+        pass
+    search = page.locator(SEARCH_BUTTON_SELECTOR).first
+    if await search.count():
+        await search.click()
+    await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+    try:
+        await page.wait_for_function(_GRID_CHANGED_JS, arg=[GRID_ID, before], timeout=timeout_ms)
+    except Exception:
+        if await page.evaluate(_GRID_SIGNATURE_JS, GRID_ID) is not None:
+            raise
+
+
+async def read_grid_html(page, grid_id: str = GRID_ID) -> Optional[str]:
+    """outerHTML of the grid table only (None when the page has no grid)."""
+    return await page.evaluate(
+        "(id) => { const g = document.getElementById(id); return g ? g.outerHTML : null; }", grid_id)
+
+
+async def count_grid_rows(page, selector: str = GRID_ROW_SELECTOR) -> int:
+    """Number of rows currently in the grid."""
+    return await page.locator(selector).count()
+
+
+def _row_data(cells: List[str], links: List[List[str]]) -> RowData:
+    for href, text in links:
+        if is_detail_href(href):
+            return cells, resolve_detail_link(href), text or ""
+    return cells, "", ""
+
+
+async def read_grid_window(page, start: int, end: int,
+                           selector: str = GRID_ROW_SELECTOR) -> List[RowData]:
+    """Read rows[start:end] as (cell_texts, detail_link, link_text) tuples."""
+    raw = await page.evaluate(_READ_WINDOW_JS, [selector, start, end])
+    return [_row_data(cells, links) for cells, links in raw]
+
+
+def build_window_projects(rows: List[RowData]) -> List[Dict[str, Any]]:
+    """Turn one window of row data into project dicts (header/empty rows dropped)."""
+    projects = []
+    for cells, detail_link, link_text in rows:
+        if len(cells) < 2:
+            continue
+        project = build_project_from_cells(cells, detail_link=detail_link, link_text=link_text)
+        if project is not None:
+            projects.append(project)
+    return projects
+
+
+async def iter_grid_windows(
+    page,
+    max_rows: Optional[int] = None,
+    window_size: int = 50,
+    selector: str = GRID_ROW_SELECTOR
+) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (window_start, projects) for consecutive windows of grid rows.
+
+    Args:
+        page: Playwright page showing the grid
+        max_rows: Stop after this many rows (default: all rows)
+        window_size: Rows read per evaluate round trip
+        selector: Row selector
+    """
+    total = await count_grid_rows(page, selector)
+    if max_rows is not None:
+        total = min(total, max_rows)
+    for start in range(0, total, window_size):
+        end = min(start + window_size, total)
+        rows = await read_grid_window(page, start, end, selector)
+        yield start, build_window_projects(rows)
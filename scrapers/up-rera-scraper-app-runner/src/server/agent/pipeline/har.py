@@ -0,0 +1,281 @@
+"""
+Record/playback of the site's HTTP traffic for offline, repeatable runs.
+
+SCRAPER_HAR=record makes every BrowserContext write a HAR file (bodies
+embedded) into SCRAPER_HAR_PATH when it closes. SCRAPER_HAR=playback loads
+every HAR in that directory and answers the contexts' requests from it
+through context.route, after an injected delay (SCRAPER_HAR_LATENCY), so a
+crawl runs against a frozen copy of up-rera.in at a latency you choose and
+extraction, pagination and concurrency changes can be timed offline.
+
+Playwright's route_from_har can't inject latency and matches POST bodies
+byte for byte; every ASP.NET postback carries a __VIEWSTATE that differs
+per session, so requests here are matched on method, URL and the form
+fields minus the view-state ones. Identical requests recorded several
+times are answered in recorded order, cycling. Recordings are loaded once
+per process; each run calls start_playback_run() for its own cursor, so
+every run replays from the first recording with its own latency sequence
+and stats. Requests made with context.request (detail-page archiving)
+bypass routing and are neither recorded nor played back.
+"""
+
+import asyncio
+import base64
+import glob
+import json
+import logging
+import os
+import random
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode
+
+logger = logging.getLogger(__name__)
+
+HAR_MODES = ("off", "record", "playback")
+DEFAULT_HAR_DIR = "/tmp/up_rera_har"
+
+# Server state echoed back by every postback; never identifies the request
+VOLATILE_FORM_FIELDS = frozenset({
+    "__VIEWSTATE", "__VIEWSTATEGENERATOR", "__VIEWSTATEENCRYPTED",
+    "__EVENTVALIDATION", "__PREVIOUSPAGE",
+})
+# Headers describing the wire encoding, which no longer match the decoded body
+DROP_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+
+RequestKey = Tuple[str, str, str]
+
+
+def har_mode() -> str:
+    """SCRAPER_HAR: off (default), record or playback."""
+    mode = os.environ.get("SCRAPER_HAR", "off").strip().lower() or "off"
+    if mode not in HAR_MODES:
+        raise ValueError(f"SCRAPER_HAR must be one of {', '.join(HAR_MODES)}, got {mode!r}")
+    return mode
+
+
+def har_dir() -> str:
+    return os.environ.get("SCRAPER_HAR_PATH", DEFAULT_HAR_DIR)
+
+
+def request_key(method: str, url: str, post_data: Optional[str] = None) -> RequestKey:
+    """Playback lookup key: method, URL without fragment, form body without view state."""
+    body = ""
+    if post_data:
+        try:
+            fields = parse_qsl(post_data, keep_blank_values=True, strict_parsing=True)
+        except ValueError:
+            body = post_data  # Not a form post; match it as is
+        else:
+            body = urlencode(sorted((k, v) for k, v in fields if k not in VOLATILE_FORM_FIELDS))
+    return method.upper(), urldefrag(url)[0], body
+
+
+class Latency:
+    """Delay before each played-back response.
+
+    Specs: "0.3" (fixed seconds), "0.2-0.8" (uniform, seeded), "recorded"
+    (the entry's recorded time) or "recorded*0.5" (scaled).
+    """
+
+    def __init__(self, spec: str = "0", seed: int = 0):
+        self.spec = (spec or "0").strip().lower()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.scale: Optional[float] = None
+        self.low = self.high = 0.0
+        try:
+            if self.spec.startswith("recorded"):
+                _, _, factor = self.spec.partition("*")
+                self.scale = float(factor) if factor else 1.0
+            else:
+                low, _, high = self.spec.partition("-")
+                self.low = float(low)
+                self.high = float(high) if high else self.low
+        except ValueError:
+            raise ValueError(f"Invalid HAR latency {spec!r}") from None
+        if min(self.low, self.high, self.scale or 0.0) < 0 or self.high < self.low:
+            raise ValueError(f"Invalid HAR latency {spec!r}")
+
+    def seconds(self, recorded: float) -> float:
+        if self.scale is not None:
+            return recorded * self.scale
+        if self.high == self.low:
+            return self.low
+        return self.rng.uniform(self.low, self.high)
+
+
+@dataclass
+class HarResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    seconds: float  # Recorded request time
+
+
+def _response_from_entry(entry: Dict[str, Any]) -> Optional[HarResponse]:
+    response = entry["response"]
+    if response.get("status", 0) <= 0:
+        return None  # Failed or aborted request; nothing to replay
+    content = response.get("content") or {}
+    text = content.get("text") or ""
+    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+    headers: Dict[str, str] = {}
+    for header in response.get("headers", []):
+        name = header["name"].lower()
+        if name in DROP_HEADERS:
+            continue
+        # Playwright takes several Set-Cookie values newline-separated
+        sep = "\n" if name == "set-cookie" else ", "
+        headers[name] = f"{headers[name]}{sep}{header['value']}" if name in headers else header["value"]
+    return HarResponse(response["status"], headers, body, max(entry.get("time", 0.0), 0.0) / 1000)
+
+
+class HarPlayback:
+    """Recorded responses indexed by request_key, served to context.route."""
+
+    def __init__(self, paths: List[str], latency: Optional[Latency] = None, miss: str = "abort"):
+        if miss not in ("abort", "passthrough"):
+            raise ValueError(f"HAR miss policy must be abort or passthrough, got {miss!r}")
+        self.latency = latency or Latency()
+        self.miss = miss
+        self.entries: Dict[RequestKey, List[HarResponse]] = {}
+        self._served: Dict[RequestKey, int] = {}
+        self.missed: List[str] = []
+        self.stats: Dict[str, Any] = {"files": 0, "entries": 0, "hits": 0, "misses": 0,
+                                      "bytes": 0, "delay_seconds": 0.0}
+        for path in paths:
+            self.load(path)
+
+    @classmethod
+    def from_env(cls, directory: Optional[str] = None) -> "HarPlayback":
+        """All *.har files in SCRAPER_HAR_PATH, with SCRAPER_HAR_LATENCY/_SEED/_MISS."""
+        directory = directory or har_dir()
+        paths = sorted(glob.glob(os.path.join(directory, "*.har")))
+        if not paths:
+            raise FileNotFoundError(f"No .har files to play back in {directory}")
+        latency = Latency(os.environ.get("SCRAPER_HAR_LATENCY", "0"),
+                          int(os.environ.get("SCRAPER_HAR_SEED", 0)))
+        return cls(paths, latency, os.environ.get("SCRAPER_HAR_MISS", "abort"))
+
+    def load(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            har = json.load(f)
+        for entry in har["log"]["entries"]:
+            response = _response_from_entry(entry)
+            if response is None:
+                continue
+            request = entry["request"]
+            key = request_key(request["method"], request["url"], (request.get("postData") or {}).get("text"))
+            self.entries.setdefault(key, []).append(response)
+            self.stats["entries"] += 1
+        self.stats["files"] += 1
+        logger.info(f'📼 Loaded {path} ({self.stats["entries"]} recorded responses so far)')
+
+    def fork(self) -> "HarPlayback":
+        """The same recordings with a fresh cursor, latency sequence and stats, for one run."""
+        run = HarPlayback([], Latency(self.latency.spec, self.latency.seed), self.miss)
+        run.entries = self.entries
+        run.stats.update(files=self.stats["files"], entries=self.stats["entries"])
+        return run
+
+    def match(self, method: str, url: str, post_data: Optional[str] = None) -> Optional[HarResponse]:
+        """Next recorded response for the request, or None when it was never recorded."""
+        key = request_key(method, url, post_data)
+        responses = self.entries.get(key)
+        if not responses:
+            return None
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        return responses[served % len(responses)]
+
+    async def handle(self, route) -> None:
+        """context.route handler: fulfill from the recording or apply the miss policy."""
+        request = route.request
+        try:
+            post_data = request.post_data
+        except Exception:
+            post_data = None  # Binary body; Playwright can't decode it as text
+        response = self.match(request.method, request.url, post_data)
+        if response is None:
+            self.stats["misses"] += 1
+            if len(self.missed) < 20:
+                self.missed.append(f"{request.method} {request.url}")
+            if self.miss == "passthrough":
+                await route.continue_()
+            else:
+                await route.abort()
+            return
+        delay = self.latency.seconds(response.seconds)
+        if delay:
+            await asyncio.sleep(delay)
+        self.stats["hits"] += 1
+        self.stats["bytes"] += len(response.body)
+        self.stats["delay_seconds"] += delay
+        await route.fulfill(status=response.status, headers=response.headers, body=response.body)
+
+    async def attach(self, context) -> None:
+        await context.route("**/*", self.handle)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"mode": "playback", "latency": self.latency.spec, "miss": self.miss,
+                **self.stats, "delay_seconds": round(self.stats["delay_seconds"], 3),
+                "missed": self.missed or None}
+
+
+_playback: Optional[HarPlayback] = None
+# The current run's cursor over _playback; set by start_playback_run in the run's task
+_run_playback: ContextVar[Optional[HarPlayback]] = ContextVar("har_run_playback", default=None)
+
+
+def _loaded() -> HarPlayback:
+    """Process-wide playback set, loaded from SCRAPER_HAR_PATH on first use."""
+    global _playback
+    if _playback is None:
+        _playback = HarPlayback.from_env()
+    return _playback
+
+
+def get_playback() -> HarPlayback:
+    """The current run's playback (see start_playback_run), else the process-wide set."""
+    run = _run_playback.get()
+    return run if run is not None else _loaded()
+
+
+def start_playback_run() -> None:
+    """Give the calling task's run its own playback cursor and stats when SCRAPER_HAR=playback.
+
+    Contexts opened later in this task (or tasks it starts) replay from the
+    first recording of each request and count into this run's har_stats().
+    """
+    if har_mode() == "playback":
+        _run_playback.set(_loaded().fork())
+
+
+def context_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """new_context options plus a per-context HAR file when recording."""
+    if har_mode() != "record":
+        return options
+    directory = har_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.har")
+    return {**options, "record_har_path": path, "record_har_content": "embed", "record_har_mode": "full"}
+
+
+async def attach(context) -> None:
+    """Route a new context through the playback set when SCRAPER_HAR=playback."""
+    if har_mode() == "playback":
+        await get_playback().attach(context)
+
+
+def har_stats() -> Optional[Dict[str, Any]]:
+    """What the HAR layer did in this process; None when it is off."""
+    mode = har_mode()
+    if mode == "off":
+        return None
+    if mode == "record":
+        return {"mode": "record", "dir": har_dir()}
+    return get_playback().as_dict()
@@ -0,0 +1,91 @@
+"""
+Browser-free parsing of the projects grid HTML (#grdPojDetail).
+
+Produces the same (cell_texts, detail_link, link_text) rows as the in-page
+extraction in grid.py, so archived snapshots and live pages go through the
+same record building. Parsing uses the stdlib HTMLParser.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+
+from .grid import GRID_ID, RowData, _row_data, build_window_projects
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _text(parts: List[str]) -> str:
+    return _WS_RE.sub(" ", "".join(parts)).strip()
+
+
+class _GridParser(HTMLParser):
+    """Collects [[cell texts], [[href, link text]]] for each row of the grid table."""
+
+    def __init__(self, grid_id: str):
+        super().__init__(convert_charrefs=True)
+        self.grid_id = grid_id
+        self.depth = 0  # table nesting depth inside the grid; 0 = outside
+        self.rows: List[Tuple[List[str], List[List[str]]]] = []
+        self._row: Optional[Tuple[List[str], List[List[str]]]] = None
+        self._cell: Optional[List[str]] = None
+        self._link: Optional[List[Any]] = None
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag == "table":
+            if self.depth or dict(attrs).get("id") == self.grid_id:
+                self.depth += 1
+            return
+        if not self.depth:
+            return
+        if tag == "tr":
+            self._row = ([], [])
+            self.rows.append(self._row)
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag == "a" and self._row is not None:
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._link = [href, []]
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self.depth:
+            return
+        if tag == "table":
+            self.depth -= 1
+        elif tag in ("td", "th") and self._cell is not None and self._row is not None:
+            self._row[0].append(_text(self._cell))
+            self._cell = None
+        elif tag == "a" and self._link is not None and self._row is not None:
+            self._row[1].append([self._link[0], _text(self._link[1])])
+            self._link = None
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None:
+            self._cell.append(data)
+        if self._link is not None:
+            self._link[1].append(data)
+
+
+def _raw_rows(html: str, grid_id: str) -> List[Tuple[List[str], List[List[str]]]]:
+    parser = _GridParser(grid_id)
+    parser.feed(html)
+    parser.close()
+    return parser.rows
+
+
+def parse_grid_rows(html: str, grid_id: str = GRID_ID) -> List[RowData]:
+    """Rows of the grid table in html as (cell_texts, detail_link, link_text).
+
+    Args:
+        html: Grid outerHTML or a whole page
+        grid_id: id of the grid table
+    """
+    return [_row_data(cells, links) for cells, links in _raw_rows(html, grid_id)]
+
+
+def parse_grid_html(html: str, grid_id: str = GRID_ID) -> List[Dict[str, Any]]:
+    """Project dicts for every data row in a grid snapshot (header rows dropped)."""
+    return build_window_projects(parse_grid_rows(html, grid_id))
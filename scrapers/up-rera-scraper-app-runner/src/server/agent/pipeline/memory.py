@@ -0,0 +1,168 @@
+"""
+RSS instrumentation and ceiling enforcement for scraper runs.
+
+The App Runner instance has 2 GB for the FastAPI process, the MCP subprocess
+and Chromium together, so RSS is measured over the whole process tree
+(this process plus every descendant, which includes the Playwright driver
+and browser) rather than for the Python process alone.
+
+The tree is walked through /proc/<pid>/task/*/children where the kernel
+provides it (CONFIG_PROC_CHILDREN). Otherwise every /proc/<pid>/stat is
+read to map parents to children, and that map is reused for
+PROCESS_TREE_TTL_SECONDS, so frequent readiness probes don't rescan /proc.
+RSS itself is always read fresh.
+"""
+
+import logging
+import os
+import resource
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RSS_CEILING_MB = 1536
+PROCESS_TREE_TTL_SECONDS = 5.0
+
+# (monotonic time, parent pid -> child pids) of the last full /proc scan
+_scan_cache: Optional[Tuple[float, Dict[int, List[int]]]] = None
+
+
+def _read_status(pid: int) -> Dict[str, str]:
+    status: Dict[str, str] = {}
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                status[key] = value.strip()
+    except OSError:
+        pass
+    return status
+
+
+def process_rss_bytes(pid: Optional[int] = None) -> int:
+    """Current RSS of one process (0 if it has exited)."""
+    status = _read_status(pid or os.getpid())
+    if "VmRSS" in status:
+        return int(status["VmRSS"].split()[0]) * 1024
+    if pid is None:
+        # No /proc (macOS): fall back to this process's peak RSS (bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return 0
+
+
+def _task_children(pid: int) -> Optional[List[int]]:
+    """Children of pid from /proc/<pid>/task/*/children; None if the kernel has no such file."""
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children: List[int] = []
+    supported = False
+    for tid in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children", "r") as f:
+                children.extend(int(c) for c in f.read().split())
+            supported = True
+        except FileNotFoundError:
+            continue
+        except OSError:
+            supported = True
+    return children if supported else None
+
+
+def _parent_pid(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # pid (comm) state ppid ...; comm may contain spaces and parentheses
+    fields = stat[stat.rfind(")") + 2:].split()
+    return int(fields[1]) if len(fields) > 1 else None
+
+
+def _scan_children() -> Dict[int, List[int]]:
+    """Parent pid -> child pids for every process in /proc, reused for PROCESS_TREE_TTL_SECONDS."""
+    global _scan_cache
+    now = time.monotonic()
+    if _scan_cache is not None and now - _scan_cache[0] < PROCESS_TREE_TTL_SECONDS:
+        return _scan_cache[1]
+    children: Dict[int, List[int]] = {}
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        pids = []
+    for pid in pids:
+        ppid = _parent_pid(pid)
+        if ppid:
+            children.setdefault(ppid, []).append(pid)
+    _scan_cache = (now, children)
+    return children
+
+
+def _descendants(root: int) -> List[int]:
+    scanned: Optional[Dict[int, List[int]]] = None
+    out, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        children = _task_children(pid) if scanned is None else None
+        if children is None:
+            scanned = scanned if scanned is not None else _scan_children()
+            children = scanned.get(pid, [])
+        out.extend(children)
+        stack.extend(children)
+    return out
+
+
+def process_tree_rss_bytes(root: Optional[int] = None) -> int:
+    """RSS of a process plus all of its descendants (browser included)."""
+    root = root or os.getpid()
+    return process_rss_bytes(root) + sum(process_rss_bytes(pid) for pid in _descendants(root))
+
+
+class MemoryCeilingExceeded(RuntimeError):
+    """Raised by MemoryMonitor.check() when the process tree is over its ceiling."""
+
+
+class MemoryMonitor:
+    """Samples process-tree RSS at named checkpoints and tracks the peak.
+
+    The ceiling comes from SCRAPER_RSS_CEILING_MB (default 1536 MB) unless
+    given explicitly.
+    """
+
+    def __init__(self, ceiling_mb: Optional[int] = None):
+        self.ceiling_mb = ceiling_mb or int(os.environ.get("SCRAPER_RSS_CEILING_MB", DEFAULT_RSS_CEILING_MB))
+        self.peak_bytes = 0
+        self.peak_label = ""
+        self.samples: List[Dict[str, Any]] = []
+        self.ceiling_hit = False
+        self._start = time.monotonic()
+
+    def sample(self, label: str) -> int:
+        """Record the current tree RSS under label and return it in bytes."""
+        rss = process_tree_rss_bytes()
+        if rss > self.peak_bytes:
+            self.peak_bytes, self.peak_label = rss, label
+        self.samples.append({"label": label,
+                             "t": round(time.monotonic() - self._start, 2),
+                             "rss_mb": round(rss / 1024 / 1024, 1)})
+        return rss
+
+    def check(self, label: str) -> None:
+        """Sample and raise MemoryCeilingExceeded if above the ceiling."""
+        rss = self.sample(label)
+        if rss > self.ceiling_mb * 1024 * 1024:
+            self.ceiling_hit = True
+            raise MemoryCeilingExceeded(
+                f"RSS {rss / 1024 / 1024:.0f} MB over ceiling {self.ceiling_mb} MB at {label}")
+
+    def as_dict(self, max_samples: int = 20) -> Dict[str, Any]:
+        return {
+            "peak_rss_mb": round(self.peak_bytes / 1024 / 1024, 1),
+            "peak_at": self.peak_label,
+            "ceiling_mb": self.ceiling_mb,
+            "ceiling_hit": self.ceiling_hit,
+            "samples": self.samples[-max_samples:],
+        }
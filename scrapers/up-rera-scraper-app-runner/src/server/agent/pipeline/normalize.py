@@ -0,0 +1,202 @@
+"""
+Batch normalization of scraped UP RERA project rows.
+
+The grid yields every field as a raw string. This stage converts a whole page
+of rows at once into the typed ProjectRecord schema:
+
+- dates are parsed column-wise, once per distinct value (a page typically has
+  far fewer distinct dates than rows), into ISO "YYYY-MM-DD" strings; a
+  value that can't be parsed becomes None and is kept as scraped in
+  <field>_raw (e.g. end_date_raw), so it can be fixed up later
+- district / project_type / promoter_name are cleaned once per distinct value
+  and interned, so repeated categories share one string object
+- scraped_at is stamped once per batch instead of once per row
+
+normalize_project() is the per-row equivalent, kept for single records and as
+the baseline in benchmarks/bench_normalize.py.
+"""
+
+import re
+import sys
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypedDict
+
+DATE_FIELDS = ("start_date", "end_date", "registration_date")
+CATEGORY_FIELDS = ("district", "project_type", "promoter_name")
+
+
+class ProjectRecord(TypedDict, total=False):
+    """Normalized project row as written to NDJSON."""
+    serial_no: Optional[int]
+    promoter_name: str
+    project_name: str
+    rera_number: str
+    project_type: str
+    district: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    registration_date: Optional[str]
+    start_date_raw: str
+    end_date_raw: str
+    registration_date_raw: str
+    detail_link: str
+    raw_text: str
+    scraped_at: str
+    extracted_from: str
+    note: str
+
+
+# Column types for downstream table definitions (Glue/Athena/DuckDB)
+PROJECT_SCHEMA: Dict[str, str] = {
+    "serial_no": "int",
+    "promoter_name": "string",
+    "project_name": "string",
+    "rera_number": "string",
+    "project_type": "string",
+    "district": "string",
+    "start_date": "date",
+    "end_date": "date",
+    "registration_date": "date",
+    "start_date_raw": "string",
+    "end_date_raw": "string",
+    "registration_date_raw": "string",
+    "detail_link": "string",
+    "raw_text": "string",
+    "scraped_at": "timestamp",
+}
+
+_WS_RE = re.compile(r"\s+")
+_DMY_RE = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$")
+_YMD_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})")
+_FALLBACK_DATE_FORMATS = ("%d-%b-%Y", "%d %b %Y", "%d-%B-%Y", "%d %B %Y", "%b %d, %Y")
+
+
+def parse_date(value: Any) -> Optional[str]:
+    """Parse one UP RERA date string into ISO format.
+
+    Accepts dd-mm-yyyy / dd/mm/yyyy / dd.mm.yyyy (the grid's format),
+    yyyy-mm-dd, and a few month-name forms. Returns None for empty or
+    unparseable input.
+    """
+    if not value:
+        return None
+    text = str(value).strip()
+    try:
+        m = _DMY_RE.match(text)
+        if m:
+            return date(int(m.group(3)), int(m.group(2)), int(m.group(1))).isoformat()
+        m = _YMD_RE.match(text)
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3))).isoformat()
+    except ValueError:
+        return None
+    for fmt in _FALLBACK_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def unparsed_date(value: Any, parsed: Optional[str]) -> Optional[str]:
+    """The scraped text of a date parse_date couldn't read, or None when there's nothing to keep."""
+    if parsed is not None or not value:
+        return None
+    return clean_name(value) or None
+
+
+def clean_category(value: Any) -> str:
+    """Collapse whitespace and title-case a district / project type value."""
+    if not value:
+        return ""
+    return _WS_RE.sub(" ", str(value)).strip().title()
+
+
+def clean_name(value: Any) -> str:
+    """Collapse whitespace in a free-text name, preserving its casing."""
+    if not value:
+        return ""
+    return _WS_RE.sub(" ", str(value)).strip()
+
+
+def parse_serial(value: Any) -> Optional[int]:
+    """Parse the S.No column ("12", "12.") into an int."""
+    if value is None or value == "":
+        return None
+    text = str(value).strip().rstrip(".")
+    return int(text) if text.isdigit() else None
+
+
+_CLEANERS: Dict[str, Callable[[Any], Any]] = {
+    "district": clean_category,
+    "project_type": clean_category,
+    "promoter_name": clean_name,
+}
+
+
+def _map_distinct(column: List[Any], fn: Callable[[Any], Any], intern: bool = False) -> List[Any]:
+    """Apply fn once per distinct value of a column and broadcast the results."""
+    lookup: Dict[Any, Any] = {}
+    for value in column:
+        if value not in lookup:
+            out = fn(value)
+            lookup[value] = sys.intern(out) if intern and out else out
+    return [lookup[value] for value in column]
+
+
+def normalize_projects(rows: Iterable[Dict[str, Any]], scraped_at: Optional[str] = None) -> List[ProjectRecord]:
+    """Normalize a batch of raw project rows column-wise.
+
+    Args:
+        rows: Raw project dicts as built by the scraper
+        scraped_at: Timestamp stamped on every row (defaults to now, once per batch)
+
+    Returns:
+        List of ProjectRecord dicts, in input order. Unparseable dates are None
+        with the scraped text in <field>_raw. Fields not covered by the
+        schema (e.g. extracted_from, note) are passed through unchanged.
+    """
+    rows = [dict(r) for r in rows]
+    if not rows:
+        return []
+    scraped_at = scraped_at or datetime.now().isoformat()
+
+    columns: Dict[str, List[Any]] = {}
+    unparsed: Dict[str, List[Optional[str]]] = {}
+    for field in DATE_FIELDS:
+        raw = [r.get(field) for r in rows]
+        columns[field] = _map_distinct(raw, parse_date)
+        if None in columns[field]:
+            unparsed[f"{field}_raw"] = [unparsed_date(value, parsed)
+                                        for value, parsed in zip(raw, columns[field])]
+    for field, cleaner in _CLEANERS.items():
+        columns[field] = _map_distinct([r.get(field) for r in rows], cleaner, intern=True)
+    columns["serial_no"] = [parse_serial(r.get("serial_no")) for r in rows]
+
+    for i, row in enumerate(rows):
+        for field, values in columns.items():
+            if field in row:
+                row[field] = values[i]
+        for field, values in unparsed.items():
+            if values[i] is not None:
+                row[field] = values[i]
+        row["scraped_at"] = scraped_at
+    return rows  # type: ignore[return-value]
+
+
+def normalize_project(row: Dict[str, Any], scraped_at: Optional[str] = None) -> ProjectRecord:
+    """Normalize a single raw project row (per-row reference implementation)."""
+    out = dict(row)
+    for field in DATE_FIELDS:
+        if field in out:
+            raw, out[field] = out[field], parse_date(out[field])
+            kept = unparsed_date(raw, out[field])
+            if kept is not None:
+                out[f"{field}_raw"] = kept
+    for field, cleaner in _CLEANERS.items():
+        if field in out:
+            out[field] = cleaner(out[field])
+    if "serial_no" in out:
+        out["serial_no"] = parse_serial(out["serial_no"])
+    out["scraped_at"] = scraped_at or datetime.now().isoformat()
+    return out  # type: ignore[return-value]
@@ -0,0 +1,125 @@
+"""
+Grid HTML parsing off the Playwright event loop.
+
+Contexts hand each page's grid outerHTML to a ParsePool and go straight back
+to fetching. Worker processes parse and build records (html_grid), and each
+parsed page comes back on an asyncio.Queue as a ParsedPage. submit() waits
+once max_pending pages are in flight, so a slow parser applies backpressure
+to the crawl instead of letting unparsed HTML pile up in memory.
+
+Workers are started with "spawn": forking a process that already runs an
+event loop, Playwright's driver pipes and to_thread workers is unsafe.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+from .html_grid import parse_grid_html
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ParsedPage:
+    """Records parsed from one submitted page."""
+    key: Hashable
+    projects: List[Dict[str, Any]]
+    meta: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class ParsePool:
+    """Process pool that parses page content and returns results through an asyncio.Queue.
+
+    parse_fn turns one page's content into records (default: the UP RERA
+    grid parser). It runs in the worker processes, so it must be a
+    module-level function.
+
+    Usage:
+        async with ParsePool(workers=2) as parser:
+            await parser.submit(page_number, html)
+            ...
+            parsed = await parser.drain()   # {key: ParsedPage}
+    """
+
+    def __init__(self, workers: int, max_pending: Optional[int] = None,
+                 parse_fn: Callable[[str], List[Dict[str, Any]]] = parse_grid_html):
+        if workers < 1:
+            raise ValueError("ParsePool needs at least one worker")
+        self.workers = workers
+        self.parse_fn = parse_fn
+        self.results: "asyncio.Queue[Optional[ParsedPage]]" = asyncio.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._slots = asyncio.Semaphore(max_pending or workers * 4)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self.pages = 0
+        self.failed = 0
+        self.turnaround_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    async def submit(self, key: Hashable, html: Optional[str], **meta: Any) -> None:
+        """Queue one page's HTML for parsing; waits while max_pending pages are in flight."""
+        if self._closed:
+            raise RuntimeError("ParsePool is closed")
+        waited = time.perf_counter()
+        await self._slots.acquire()
+        self.wait_seconds += time.perf_counter() - waited
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.parse_fn, html or "")
+        task = asyncio.create_task(self._deliver(key, future, meta, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, key: Hashable, future, meta: Dict[str, Any], started: float) -> None:
+        try:
+            parsed = ParsedPage(key, await future, meta)
+        except Exception as e:
+            logger.warning(f"⚠️  Parsing {key!r} failed: {str(e)[:120]}")
+            parsed = ParsedPage(key, [], meta, error=str(e)[:200])
+            self.failed += 1
+        finally:
+            self._slots.release()
+        self.pages += 1
+        self.turnaround_seconds += time.perf_counter() - started
+        await self.results.put(parsed)
+
+    async def close(self) -> None:
+        """Wait for in-flight pages, then end the result stream with a None sentinel."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks))
+        await self.results.put(None)
+
+    async def __aiter__(self):
+        """Yield ParsedPages as they finish until close() has been called and everything is delivered."""
+        while (item := await self.results.get()) is not None:
+            yield item
+
+    async def drain(self) -> Dict[Hashable, ParsedPage]:
+        """close() and collect every remaining result by key."""
+        await self.close()
+        return {item.key: item async for item in self}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pages": self.pages,
+            "failed": self.failed,
+            "turnaround_seconds": round(self.turnaround_seconds, 3),
+            "submit_wait_seconds": round(self.wait_seconds, 3),
+        }
+
+    async def __aenter__(self) -> "ParsePool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._closed = True
+        await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
@@ -0,0 +1,253 @@
+"""
+Opt-in CPU and memory profiling of a tool run in the MCP subprocess.
+
+The scraper runs as a stdio subprocess of the service, so the usual way of
+attaching a profiler from a shell doesn't reach it. profiled() runs one
+tool call under a sampling profiler and tracemalloc instead, and writes
+the results to a run directory whose paths go back in the tool result:
+
+- stacks.folded: collapsed stacks ("thread;outer;...;leaf count"), the input
+  format of flamegraph.pl, speedscope and inferno
+- allocations.txt: top allocating lines and the tracebacks of the largest
+  ones, from a tracemalloc snapshot taken when the run ends
+- summary.json: samples per thread, the hottest leaf functions, how much of
+  the event loop's time was spent idle in select(), tracemalloc totals, and
+  the overhead of both (time the sampler held the GIL, and how much slower
+  allocations ran under tracemalloc in a calibration loop at start)
+
+The sampler is a thread reading sys._current_frames() every
+SCRAPER_PROFILE_INTERVAL_MS, so it needs nothing beyond the standard
+library. It only sees Python: time spent inside the browser shows up as the
+event loop idling in select().
+
+tracemalloc keeps SCRAPER_PROFILE_TRACEMALLOC_FRAMES frames per allocation
+(default 1, the allocating line). Every extra frame makes allocation-heavy
+code markedly slower, so deeper tracebacks are opt-in.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = "/tmp/up_rera_profiles"
+
+# One profiled run per process: the sampler and tracemalloc are process-wide
+_active = threading.Lock()
+
+
+def profiling_enabled(requested: bool = False) -> bool:
+    """Profile when the tool asked for it or SCRAPER_PROFILE=1."""
+    return requested or os.environ.get("SCRAPER_PROFILE") == "1"
+
+
+def _alloc_seconds(rounds: int = 3) -> float:
+    """Best-of time of a short loop of small allocations, to measure tracing cost."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(1000):
+            [str(i) for i in range(10)]
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/")
+    short = "/".join(path.rsplit("/", 2)[-2:])
+    # ";" separates frames and the last space the count in folded stacks
+    return f"{code.co_qualname} ({short}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Counts the folded stack of every thread each interval, in a daemon thread."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.busy_seconds = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _fold(self, thread_name: str, frame) -> str:
+        labels: List[str] = []
+        while frame is not None and len(labels) < self.max_depth:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            labels.append(label)
+            frame = frame.f_back
+        labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+        return ";".join(reversed(labels))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    self.stacks[self._fold(names.get(ident, f"thread-{ident}"), frame)] += 1
+            self.samples += 1
+            self.busy_seconds += time.perf_counter() - start
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, loop_thread: str, seconds: float, top: int = 20) -> Dict[str, Any]:
+        """Samples per thread, hottest leaf frames, the loop's share idle in select(), own cost."""
+        threads: Counter = Counter()
+        leaves: Counter = Counter()
+        loop_total = loop_idle = 0
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            threads[frames[0]] += count
+            leaves[frames[-1]] += count
+            if frames[0] == loop_thread:
+                loop_total += count
+                if "selectors.py:" in frames[-1]:
+                    loop_idle += count
+        total = sum(threads.values()) or 1
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": self.samples,
+            # Time spent taking samples, holding the GIL the profiled code needed
+            "sampler_seconds": round(self.busy_seconds, 3),
+            "sampler_share": round(self.busy_seconds / seconds, 4) if seconds else None,
+            "threads": dict(threads.most_common()),
+            "loop_idle_share": round(loop_idle / loop_total, 3) if loop_total else None,
+            "top_leaves": [{"frame": frame, "share": round(count / total, 4)}
+                           for frame, count in leaves.most_common(top)],
+        }
+
+
+class Profiler:
+    """StackSampler plus tracemalloc around one run; stop() writes the run directory."""
+
+    def __init__(self, name: str, base_dir: Optional[str] = None):
+        base_dir = base_dir or os.environ.get("SCRAPER_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+        stamp = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.dir = os.path.join(base_dir, f"{name}-{stamp}")
+        self.sampler = StackSampler(float(os.environ.get("SCRAPER_PROFILE_INTERVAL_MS", 10)) / 1000)
+        self.frames = int(os.environ.get("SCRAPER_PROFILE_TRACEMALLOC_FRAMES", 1))
+        self.top = int(os.environ.get("SCRAPER_PROFILE_TOP", 25))
+        self.loop_thread = threading.current_thread().name
+        self._owns_tracemalloc = False
+        self._alloc_slowdown: Optional[float] = None
+        self._start = 0.0
+
+    def start(self) -> None:
+        if self.frames > 0 and not tracemalloc.is_tracing():
+            plain = _alloc_seconds()
+            tracemalloc.start(self.frames)
+            self._alloc_slowdown = round(_alloc_seconds() / plain, 1) if plain else None
+            self._owns_tracemalloc = True
+        self._start = time.perf_counter()
+        self.sampler.start()
+        logger.info(f'🔬 Profiling run into {self.dir}')
+
+    def _write_allocations(self, path: str) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, __file__),
+        ))
+        by_line = snapshot.statistics("lineno")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n")
+            f.write(f"\nTop {self.top} allocating lines (live at end of run):\n")
+            for stat in by_line[:self.top]:
+                f.write(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback[0]}\n")
+            if tracemalloc.get_traceback_limit() > 1:
+                f.write("\nLargest by traceback:\n")
+                for stat in snapshot.statistics("traceback")[:5]:
+                    f.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                    f.write("\n".join(stat.traceback.format()) + "\n")
+        return {
+            "current_mb": round(current / 1e6, 1),
+            "peak_mb": round(peak / 1e6, 1),
+            "frames": tracemalloc.get_traceback_limit(),
+            # Memory tracemalloc itself used for its traces
+            "own_mb": round(tracemalloc.get_tracemalloc_memory() / 1e6, 1),
+            # Allocation loop time traced / untraced, measured when profiling started
+            "alloc_slowdown": self._alloc_slowdown,
+        }
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling, write the artifacts and return their paths for the tool result."""
+        self.sampler.stop()
+        seconds = time.perf_counter() - self._start
+        os.makedirs(self.dir, exist_ok=True)
+        artifacts: Dict[str, Any] = {"dir": self.dir, "seconds": round(seconds, 1),
+                                     "samples": self.sampler.samples}
+        flamegraph = os.path.join(self.dir, "stacks.folded")
+        self.sampler.write_folded(flamegraph)
+        artifacts["flamegraph"] = flamegraph
+        summary = {"seconds": round(seconds, 3), "cpu": self.sampler.summary(self.loop_thread, seconds, self.top)}
+        if tracemalloc.is_tracing():
+            allocations = os.path.join(self.dir, "allocations.txt")
+            summary["tracemalloc"] = self._write_allocations(allocations)
+            artifacts["allocations"] = allocations
+            artifacts["traced_peak_mb"] = summary["tracemalloc"]["peak_mb"]
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        artifacts["summary"] = os.path.join(self.dir, "summary.json")
+        with open(artifacts["summary"], "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f'🔬 Profile written: {self.sampler.samples} samples in {seconds:.1f}s → {self.dir}')
+        return artifacts
+
+
+async def profiled(name: str, enabled: bool,
+                   run: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Await run(), under a Profiler when enabled; adds result["profile"] with the artifact paths.
+
+    Only one run per process is profiled at a time; a concurrent request runs
+    unprofiled and says so in result["profile"].
+    """
+    if not enabled:
+        return await run()
+    if not _active.acquire(blocking=False):
+        result = await run()
+        result["profile"] = {"skipped": "another profiled run is in progress"}
+        return result
+    try:
+        profiler = Profiler(name)
+        profiler.start()
+        try:
+            result = await run()
+        finally:
+            # Snapshot statistics take a while with many traces; keep the loop free
+            try:
+                artifacts = await asyncio.to_thread(profiler.stop)
+            except Exception as e:
+                logger.warning(f'⚠️  Failed to write profile to {profiler.dir}: {e}')
+                artifacts = {"dir": profiler.dir, "error": str(e)[:200]}
+        result["profile"] = artifacts
+        return result
+    finally:
+        _active.release()
@@ -0,0 +1,272 @@
+"""
+Embedded SQLite index over scraped project history.
+
+Partitioned NDJSON objects are ingested incrementally: every ingested key is
+recorded in ingested_objects, so a re-run only reads objects written since the
+last ingest, and compacted parts whose source objects were all ingested
+already are recorded without being read. Projects are upserted by project_key (the RERA number when
+present). The row with the newest scraped_at wins each field whatever order
+objects are read in, and a known value is never overwritten with an empty
+one, so Strategy 3's RERA-only rows don't erase full records.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional, Tuple
+
+from .normalize import clean_category, clean_name, parse_date
+from .storage import DATA_SUFFIXES, compacted_sources, list_keys, read_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "/tmp/up_rera_projects.sqlite3"
+
+PROJECT_COLUMNS = (
+    "rera_number",
+    "project_name",
+    "promoter_name",
+    "project_type",
+    "district",
+    "start_date",
+    "end_date",
+    "registration_date",
+    "detail_link",
+    "raw_text",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_key       TEXT PRIMARY KEY,
+    rera_number       TEXT,
+    project_name      TEXT,
+    promoter_name     TEXT COLLATE NOCASE,
+    project_type      TEXT COLLATE NOCASE,
+    district          TEXT COLLATE NOCASE,
+    start_date        TEXT,
+    end_date          TEXT,
+    registration_date TEXT,
+    detail_link       TEXT,
+    raw_text          TEXT,
+    first_seen_at     TEXT,
+    last_seen_at      TEXT,
+    source_key        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_rera ON projects (rera_number);
+CREATE INDEX IF NOT EXISTS idx_projects_district_reg ON projects (district, registration_date);
+CREATE INDEX IF NOT EXISTS idx_projects_promoter ON projects (promoter_name);
+CREATE INDEX IF NOT EXISTS idx_projects_registration ON projects (registration_date);
+CREATE INDEX IF NOT EXISTS idx_projects_start ON projects (start_date);
+CREATE INDEX IF NOT EXISTS idx_projects_end ON projects (end_date);
+CREATE TABLE IF NOT EXISTS ingested_objects (
+    object_key  TEXT PRIMARY KEY,
+    rows        INTEGER,
+    ingested_at TEXT
+);
+"""
+
+# Objects are not ingested in scrape order (run_id directories sort randomly
+# within a day, compaction rewrites old rows under new keys), so the row with
+# the newer scraped_at wins each field; the older one only fills empty fields
+_NEWER = "excluded.last_seen_at >= projects.last_seen_at"
+_UPSERT = f"""
+INSERT INTO projects (project_key, {", ".join(PROJECT_COLUMNS)}, first_seen_at, last_seen_at, source_key)
+VALUES (?, {", ".join("?" for _ in PROJECT_COLUMNS)}, ?, ?, ?)
+ON CONFLICT(project_key) DO UPDATE SET
+    {", ".join(f"{c} = CASE WHEN {_NEWER} THEN COALESCE(NULLIF(excluded.{c}, ''), projects.{c}) "
+               f"ELSE COALESCE(NULLIF(projects.{c}, ''), excluded.{c}) END" for c in PROJECT_COLUMNS)},
+    first_seen_at = MIN(projects.first_seen_at, excluded.first_seen_at),
+    last_seen_at = MAX(projects.last_seen_at, excluded.last_seen_at),
+    source_key = CASE WHEN {_NEWER} THEN excluded.source_key ELSE projects.source_key END
+"""
+
+# Columns a caller may sort by
+SORTABLE = {"registration_date", "start_date", "end_date", "project_name", "district", "last_seen_at"}
+
+
+def project_key(record: Dict[str, Any]) -> Optional[str]:
+    """Stable identity of a project row: RERA number, else name + promoter."""
+    if record.get("rera_number"):
+        return record["rera_number"]
+    if record.get("project_name"):
+        return f"name:{record['project_name']}|{record.get('promoter_name', '')}"
+    return None
+
+
+def _row_values(record: Dict[str, Any]) -> Tuple[Any, ...]:
+    # Rows written before the normalization stage still carry raw strings
+    return (
+        record.get("rera_number") or "",
+        clean_name(record.get("project_name")),
+        clean_name(record.get("promoter_name")),
+        clean_category(record.get("project_type")),
+        clean_category(record.get("district")),
+        parse_date(record.get("start_date")),
+        parse_date(record.get("end_date")),
+        parse_date(record.get("registration_date")),
+        record.get("detail_link") or "",
+        record.get("raw_text") or "",
+    )
+
+
+class ProjectStore:
+    """SQLite-backed project index. Safe to share across threads."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("PROJECT_DB_PATH", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def ingest_records(self, records: List[Dict[str, Any]], source_key: str = "") -> int:
+        """Upsert a batch of project records; returns the number of rows applied."""
+        rows = []
+        for record in records:
+            key = project_key(record)
+            if not key:
+                continue
+            seen_at = record.get("scraped_at") or datetime.now(UTC).isoformat()
+            rows.append((key, *_row_values(record), seen_at, seen_at, source_key))
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def ingest(self, bucket: str, prefix: str, s3_client=None) -> Dict[str, Any]:
+        """Ingest NDJSON objects under bucket/prefix that were not ingested before.
+
+        Args:
+            bucket: S3 bucket name, "LOCAL", or "file://path"
+            prefix: Data prefix (e.g., "up-rera-projects")
+            s3_client: Optional boto3 S3 client
+
+        Returns:
+            Stats dict: new_objects, skipped_objects, compacted_skipped (new
+            compacted parts not read because their sources were ingested),
+            rows, seconds
+        """
+        start = time.perf_counter()
+        keys = list_keys(bucket, prefix, suffix=DATA_SUFFIXES, s3_client=s3_client)
+        with self._lock:
+            done = {r[0] for r in self._conn.execute("SELECT object_key FROM ingested_objects")}
+
+        new_keys = [k for k in keys if k not in done]
+        total_rows = 0
+        already_ingested = 0
+        sources: Dict[str, Optional[List[str]]] = {}
+        for key in new_keys:
+            # A compacted part made only of objects ingested before adds nothing
+            directory = key.rsplit("/", 1)[0]
+            if directory not in sources:
+                sources[directory] = compacted_sources(bucket, key, s3_client=s3_client)
+            if sources[directory] and done.issuperset(sources[directory]):
+                rows = 0
+                already_ingested += 1
+            else:
+                records = list(read_records(bucket, key, s3_client=s3_client))
+                rows = self.ingest_records(records, source_key=key)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ingested_objects VALUES (?, ?, ?)",
+                    (key, rows, datetime.now(UTC).isoformat()))
+            done.add(key)
+            total_rows += rows
+
+        stats = {
+            "new_objects": len(new_keys),
+            "skipped_objects": len(keys) - len(new_keys),
+            "compacted_skipped": already_ingested,
+            "rows": total_rows,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"🗄️  Ingested {stats['new_objects']} new objects ({total_rows} rows) into {self.db_path}")
+        return stats
+
+    def query(
+        self,
+        district: Optional[str] = None,
+        promoter_name: Optional[str] = None,
+        project_type: Optional[str] = None,
+        rera_number: Optional[str] = None,
+        name_contains: Optional[str] = None,
+        registered_from: Optional[str] = None,
+        registered_to: Optional[str] = None,
+        end_before: Optional[str] = None,
+        order_by: str = "registration_date",
+        descending: bool = True,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Filter projects; dates are ISO "YYYY-MM-DD" and bounds are inclusive.
+
+        Returns:
+            (total matching rows, page of rows as dicts)
+        """
+        clauses, params = [], []
+        for column, value in (("district", district), ("promoter_name", promoter_name),
+                              ("project_type", project_type), ("rera_number", rera_number)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if name_contains:
+            clauses.append("project_name LIKE ?")
+            params.append(f"%{name_contains}%")
+        if registered_from:
+            clauses.append("registration_date >= ?")
+            params.append(registered_from)
+        if registered_to:
+            clauses.append("registration_date <= ?")
+            params.append(registered_to)
+        if end_before:
+            clauses.append("end_date <= ?")
+            params.append(end_before)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if order_by not in SORTABLE:
+            raise ValueError(f"order_by must be one of {sorted(SORTABLE)}")
+        direction = "DESC" if descending else "ASC"
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM projects {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM projects {where} ORDER BY {order_by} {direction}, project_key "
+                f"LIMIT ? OFFSET ?", [*params, limit, offset]).fetchall()
+        return total, [dict(r) for r in rows]
+
+    def get(self, rera_number: str) -> Optional[Dict[str, Any]]:
+        """Return one project by RERA number."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM projects WHERE rera_number = ? LIMIT 1", (rera_number,)).fetchone()
+        return dict(row) if row else None
+
+    def district_churn(self, days: int = 30) -> Dict[str, int]:
+        """Projects per district registered or first seen in the last `days` days.
+
+        Used by the district crawl planner to refresh the busiest districts first.
+        """
+        since = (datetime.now(UTC) - timedelta(days=days)).date().isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT district, COUNT(*) FROM projects "
+                "WHERE district != '' AND (registration_date >= ? OR first_seen_at >= ?) "
+                "GROUP BY district", (since, since)).fetchall()
+        return {district: count for district, count in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Row and object counts for status endpoints."""
+        with self._lock:
+            projects = self._conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+            objects = self._conn.execute("SELECT COUNT(*) FROM ingested_objects").fetchone()[0]
+        return {"db_path": self.db_path, "projects": projects, "ingested_objects": objects}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
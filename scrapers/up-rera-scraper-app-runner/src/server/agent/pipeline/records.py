@@ -0,0 +1,141 @@
+"""
+Record building for UP RERA grid rows, cards and page text.
+
+All patterns are compiled once at import time, raw_text is generated in a
+single pass from RAW_TEXT_TEMPLATE, and RERA numbers found in free text are
+de-duplicated in first-seen order, so the page-text fallback returns them in
+page order on every run (not faster than set(); see bench_records.py).
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+BASE_URL = "https://www.up-rera.in"
+
+RERA_NUMBER_RE = re.compile(r"UPRERAPRJ\d+")
+HEADER_ROW_RE = re.compile(r"s\.no|sr\.|serial|project name|rera", re.IGNORECASE)
+DETAIL_HREF_RE = re.compile(r"Frm_View_Project_Details|project", re.IGNORECASE)
+
+# UP RERA table columns: S.No, Promoter Name, Project Name, RERA Reg.No.,
+# ProjectType, District, StartDate, EndDate, Registration Date, Details
+GRID_COLUMNS = (
+    "serial_no",
+    "promoter_name",
+    "project_name",
+    "rera_number",
+    "project_type",
+    "district",
+    "start_date",
+    "end_date",
+    "registration_date",
+)
+
+# (field, label) pairs rendered as "label: value" into raw_text, in order
+RAW_TEXT_TEMPLATE = (
+    ("project_name", "Project Name"),
+    ("rera_number", "RERA Number"),
+    ("promoter_name", "Promoter"),
+    ("project_type", "Type"),
+    ("district", "District"),
+    ("start_date", "Start Date"),
+    ("end_date", "End Date"),
+    ("registration_date", "Registration Date"),
+    ("detail_link", "Details"),
+)
+_RAW_TEXT_PREFIXES = tuple((field, f"{label}: ") for field, label in RAW_TEXT_TEMPLATE)
+_EMPTY_ROW = ("",) * len(GRID_COLUMNS)
+
+
+def build_raw_text(project: Dict[str, Any]) -> str:
+    """Render the vector-DB text for a project in one pass over the template."""
+    return " | ".join(prefix + value
+                      for field, prefix in _RAW_TEXT_PREFIXES
+                      if (value := project.get(field)))
+
+
+def is_header_row(first_cell: str) -> bool:
+    """True when the first cell of a row looks like a column header."""
+    return HEADER_ROW_RE.search(first_cell) is not None
+
+
+def is_detail_href(href: Optional[str]) -> bool:
+    """True for links that point at a project detail page."""
+    return bool(href) and DETAIL_HREF_RE.search(href) is not None
+
+
+def resolve_detail_link(href: str) -> str:
+    """Turn a relative detail href into an absolute up-rera.in URL."""
+    return href if href.startswith("http") else f'{BASE_URL}/{href.lstrip("/")}'
+
+
+def find_rera_number(text: str) -> str:
+    """Return the first RERA registration number in text, or ''."""
+    match = RERA_NUMBER_RE.search(text) if text else None
+    return match.group(0) if match else ""
+
+
+def extract_rera_numbers(text: str) -> List[str]:
+    """Return every distinct RERA number in text, in first-seen order."""
+    return list(dict.fromkeys(RERA_NUMBER_RE.findall(text or "")))
+
+
+def build_project_from_cells(
+    cell_texts: Sequence[str],
+    detail_link: str = "",
+    link_text: str = ""
+) -> Optional[Dict[str, Any]]:
+    """Build a project dict from one grid row's stripped cell texts.
+
+    Args:
+        cell_texts: Cell texts in GRID_COLUMNS order (shorter rows are padded)
+        detail_link: Absolute detail page URL, if the row has one
+        link_text: Text of the detail link, searched for the RERA number
+
+    Returns:
+        Project dict, or None for empty, header and meaningless rows
+    """
+    if len(cell_texts) < 2 or not any(cell_texts):
+        return None
+    if is_header_row(cell_texts[0]):
+        return None
+
+    padded = tuple(cell_texts[:len(GRID_COLUMNS)]) + _EMPTY_ROW[len(cell_texts):]
+    project: Dict[str, Any] = dict(zip(GRID_COLUMNS, padded))
+    project["rera_number"] = find_rera_number(link_text) or project["rera_number"]
+    project["detail_link"] = detail_link
+    if not (project["project_name"] or project["rera_number"]):
+        return None
+    project["raw_text"] = build_raw_text(project)
+    return project
+
+
+def build_project_from_card(card_text: str, detail_link: str = "") -> Optional[Dict[str, Any]]:
+    """Build a project dict from a card/div layout's text."""
+    project_name = next((line.strip() for line in card_text.split("\n")
+                         if line.strip() and "UPRERAPRJ" not in line), "")
+    rera_number = find_rera_number(card_text)
+    if not (rera_number or detail_link):
+        return None
+
+    raw_text = card_text.strip()
+    if detail_link:
+        raw_text += f" | Details: {detail_link}"
+    return {
+        "project_name": project_name,
+        "rera_number": rera_number,
+        "detail_link": detail_link,
+        "raw_text": raw_text,
+    }
+
+
+def build_project_from_rera_number(rera_number: str) -> Dict[str, Any]:
+    """Build a partial project dict when only the RERA number is known."""
+    project: Dict[str, Any] = dict(zip(GRID_COLUMNS, _EMPTY_ROW))
+    project.update({
+        "rera_number": rera_number,
+        "detail_link": f'{BASE_URL}/Frm_View_Project_Details.aspx?id={rera_number.replace("UPRERAPRJ", "")}',
+        "raw_text": f"RERA Number: {rera_number}. Visit detail link for full project information.",
+        "extracted_from": "page_text",
+        "note": "Only RERA number extracted. Visit detail_link for full information.",
+    })
+    return project
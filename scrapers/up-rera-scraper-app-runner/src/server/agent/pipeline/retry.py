@@ -0,0 +1,216 @@
+"""
+Retry policies for navigation, extraction and upload, built on tenacity.
+
+Each operation type has its own RetryPolicy (attempts, jittered exponential
+backoff, which errors are transient). A Retrier is created per run and shares
+one RetryBudget across all operations, so a flaky site can't turn a run into
+an endless retry loop. The budget is charged for the time spent in failed
+attempts as well as the backoff sleeps between them, so slow timeouts use it
+up as fast as long waits do. Every retry and the time spent retrying are
+recorded in RetryStats and reported in tool responses.
+
+Calls can carry an idempotency key: once a keyed call succeeds, repeating it
+within the same Retrier returns the stored result instead of re-running the
+side effect. Uploads key each put by object key and content hash, so a
+caller that repeats a failed upload with the same Retrier and run_id only
+re-puts the parts that did not make it.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from tenacity import (AsyncRetrying, RetryCallState, Retrying, retry_if_exception,
+                      stop_after_attempt, wait_random_exponential)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# S3 error codes worth retrying; anything else (AccessDenied, NoSuchBucket) fails fast
+_TRANSIENT_S3_CODES = {
+    "SlowDown", "Throttling", "ThrottlingException", "RequestTimeout",
+    "RequestTimeTooSkewed", "InternalError", "ServiceUnavailable", "503",
+}
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Default classifier: programming and configuration errors are not retried."""
+    return not isinstance(exc, (ValueError, TypeError, KeyError, ImportError,
+                                AttributeError, NotImplementedError))
+
+
+def is_transient_s3_error(exc: BaseException) -> bool:
+    """Retry throttling, 5xx and connection errors from boto3; fail fast otherwise."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        code = str(response.get("Error", {}).get("Code", ""))
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code in _TRANSIENT_S3_CODES or status >= 500
+    return is_transient_error(exc)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How one kind of operation is retried."""
+    name: str
+    max_attempts: int = 3
+    initial_wait: float = 1.0
+    max_wait: float = 10.0
+    retryable: Callable[[BaseException], bool] = is_transient_error
+
+
+def _env_policy(name: str, max_attempts: int, initial_wait: float, max_wait: float,
+                retryable: Callable[[BaseException], bool] = is_transient_error) -> RetryPolicy:
+    """Build a policy whose attempts can be overridden with RETRY_<NAME>_ATTEMPTS."""
+    attempts = int(os.environ.get(f"RETRY_{name.upper()}_ATTEMPTS", max_attempts))
+    return RetryPolicy(name, max(1, attempts), initial_wait, max_wait, retryable)
+
+
+POLICIES: Dict[str, RetryPolicy] = {
+    "navigation": _env_policy("navigation", 3, 2.0, 20.0),
+    "page_fetch": _env_policy("page_fetch", 3, 1.0, 10.0),
+    "row_extraction": _env_policy("row_extraction", 2, 0.2, 1.0),
+    "s3_part_upload": _env_policy("s3_part_upload", 5, 0.5, 8.0, is_transient_s3_error),
+    "queue_publish": _env_policy("queue_publish", 4, 0.5, 8.0, is_transient_s3_error),
+}
+
+
+@dataclass
+class RetryBudget:
+    """Caps total retries and total seconds lost to failed attempts and backoff for one run."""
+    max_retries: int = int(os.environ.get("RETRY_BUDGET", 20))
+    max_retry_seconds: float = float(os.environ.get("RETRY_BUDGET_SECONDS", 120))
+    used_retries: int = 0
+    used_seconds: float = 0.0
+
+    def exhausted(self) -> bool:
+        return self.used_retries >= self.max_retries or self.used_seconds >= self.max_retry_seconds
+
+
+@dataclass
+class RetryStats:
+    """Per-operation counters: calls, retries, failures, time in retry."""
+    ops: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def _op(self, name: str) -> Dict[str, float]:
+        return self.ops.setdefault(name, {"calls": 0, "retries": 0, "failures": 0,
+                                          "retry_seconds": 0.0})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_retries": int(sum(o["retries"] for o in self.ops.values())),
+            "total_retry_seconds": round(sum(o["retry_seconds"] for o in self.ops.values()), 3),
+            "by_operation": {name: {k: (round(v, 3) if isinstance(v, float) else int(v))
+                                    for k, v in op.items()}
+                             for name, op in self.ops.items()},
+        }
+
+
+class Retrier:
+    """Runs sync or async callables under a named policy and a shared budget.
+
+    call_sync may run on several threads at once (concurrent part uploads);
+    budget and stats counters are updated under a lock.
+    """
+
+    def __init__(self, budget: Optional[RetryBudget] = None,
+                 policies: Optional[Dict[str, RetryPolicy]] = None):
+        self.budget = budget or RetryBudget()
+        self.policies = policies or POLICIES
+        self.stats = RetryStats()
+        self._completed: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _controls(self, op: str) -> Dict[str, Any]:
+        policy = self.policies.get(op) or RetryPolicy(op)
+        state: Dict[str, Optional[float]] = {"first_failure": None, "attempt_start": time.monotonic()}
+
+        def after(retry_state: RetryCallState) -> None:
+            # Runs after every retryable failure, before the stop check
+            now = time.monotonic()
+            if state["first_failure"] is None:
+                state["first_failure"] = now
+            with self._lock:
+                self.budget.used_seconds += now - state["attempt_start"]
+
+        def before_sleep(retry_state: RetryCallState) -> None:
+            sleep = retry_state.next_action.sleep if retry_state.next_action else 0.0
+            state["attempt_start"] = time.monotonic() + sleep
+            with self._lock:
+                self.budget.used_retries += 1
+                self.budget.used_seconds += sleep
+                self.stats._op(op)["retries"] += 1
+            exc = retry_state.outcome.exception() if retry_state.outcome else None
+            logger.warning(
+                f"🔁 Retrying {op} (attempt {retry_state.attempt_number + 1}/{policy.max_attempts}) "
+                f"in {sleep:.1f}s after: {str(exc)[:120]}")
+
+        def budget_stop(retry_state: RetryCallState) -> bool:
+            if self.budget.exhausted():
+                logger.warning(f"⛔ Retry budget exhausted, not retrying {op}")
+                return True
+            return False
+
+        kwargs = dict(
+            stop=stop_after_attempt(policy.max_attempts) | budget_stop,
+            wait=wait_random_exponential(multiplier=policy.initial_wait, max=policy.max_wait),
+            retry=retry_if_exception(policy.retryable),
+            after=after,
+            before_sleep=before_sleep,
+            reraise=True,
+        )
+        return {"kwargs": kwargs, "state": state}
+
+    def _finish(self, op: str, state: Dict[str, Optional[float]], failed: bool) -> None:
+        with self._lock:
+            stats = self.stats._op(op)
+            if failed:
+                stats["failures"] += 1
+            if state["first_failure"] is not None:
+                stats["retry_seconds"] += time.monotonic() - state["first_failure"]
+
+    async def call(self, op: str, fn: Callable[[], Awaitable[T]],
+                   idempotency_key: Optional[str] = None) -> T:
+        """Await fn() under the policy for op; a completed idempotency_key returns its stored result."""
+        if idempotency_key is not None and idempotency_key in self._completed:
+            return self._completed[idempotency_key]
+        with self._lock:
+            self.stats._op(op)["calls"] += 1
+        controls = self._controls(op)
+        failed = True
+        try:
+            async for attempt in AsyncRetrying(**controls["kwargs"]):
+                with attempt:
+                    result = await fn()
+            failed = False
+        finally:
+            self._finish(op, controls["state"], failed)
+        if idempotency_key is not None:
+            with self._lock:
+                self._completed[idempotency_key] = result
+        return result
+
+    def call_sync(self, op: str, fn: Callable[[], T],
+                  idempotency_key: Optional[str] = None) -> T:
+        """Call fn() under the policy for op (blocking backoff sleeps); see call for idempotency_key."""
+        if idempotency_key is not None and idempotency_key in self._completed:
+            return self._completed[idempotency_key]
+        with self._lock:
+            self.stats._op(op)["calls"] += 1
+        controls = self._controls(op)
+        failed = True
+        try:
+            for attempt in Retrying(**controls["kwargs"]):
+                with attempt:
+                    result = fn()
+            failed = False
+        finally:
+            self._finish(op, controls["state"], failed)
+        if idempotency_key is not None:
+            with self._lock:
+                self._completed[idempotency_key] = result
+        return result
@@ -0,0 +1,414 @@
+"""
+Shared runtime and engine of the scraper SDK (sources are in pipeline/sources).
+
+ScrapeRuntime holds what every source reuses, so a new site gets the
+concurrency, retries and memory behaviour of the UP RERA crawl:
+
+- browser: one Chromium (passed in, or launched on first use), sessions are
+  the pages of a ContextPool
+- rate limits: requests/s per source across all its sessions
+  (Source.requests_per_second, overridden by SCRAPER_RATE_LIMITS="up-rera=2,other=0.5")
+- retries (Retrier), grid parsing in worker processes (ParsePool) and HTML
+  snapshots (SnapshotStore)
+- sinks: awaited with each page's records as soon as they are parsed
+  (CallbackSink, NdjsonSink, UploadSink, DedupSink, ChangeSink)
+- metrics: page/row/request counters and fetch/parse/throttle timings
+
+run_partitions drives a source over partitions: each session takes the
+next partition, fetches its pages, and every page is parsed (inline or in
+the pool), annotated, normalized and handed to the sinks. run_source
+plans the partitions first.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .browser_pool import ContextPool, PartitionResults, launch_browser, run_partitioned
+from .cdc import CdcState, ChangeCapture, get_cdc_state
+from .dedup import DedupIndex, Deduplicator, get_dedup_index
+from .parse_pool import ParsePool
+from .retry import Retrier
+from .snapshots import SnapshotStore
+from .sources.base import CrawlPlan, Source
+from .storage import NdjsonSpill, aupload_json_to_s3, new_run_id, upload_executor
+
+logger = logging.getLogger(__name__)
+
+# Called with (meta, records) as soon as each page's records are known;
+# meta has "page" and, for district crawls, "district". Awaited by the crawl,
+# so a slow consumer slows the sessions down instead of buffering rows.
+PageCallback = Callable[[Dict[str, Any], List[Dict[str, Any]]], Awaitable[None]]
+
+
+def _env_rate_limits() -> Dict[str, float]:
+    limits = {}
+    for item in os.environ.get("SCRAPER_RATE_LIMITS", "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+class RateLimiter:
+    """Spaces acquisitions at least 1/rate seconds apart, across all callers."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> float:
+        """Wait for the next slot; returns the seconds waited."""
+        if not self.interval:
+            return 0.0
+        async with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class Metrics:
+    """Counters and accumulated timings of one run."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.counters, **{f"{k}_seconds": round(v, 3) for k, v in self.seconds.items()}}
+
+
+class Sink(ABC):
+    """Receives each page's records as soon as they are ready."""
+
+    @abstractmethod
+    async def write(self, meta: Dict[str, Any], records: List[Dict[str, Any]]) -> None:
+        """Take one page's records."""
+
+    async def close(self) -> Optional[Dict[str, Any]]:
+        """Finish and return a summary for the run stats (or None)."""
+        return None
+
+
+class CallbackSink(Sink):
+    """Awaits a PageCallback per page; a slow callback slows the crawl down."""
+
+    def __init__(self, callback: PageCallback):
+        self.callback = callback
+
+    async def write(self, meta: Dict[str, Any], records: List[Dict[str, Any]]) -> None:
+        await self.callback(meta, records)
+
+
+class NdjsonSink(Sink):
+    """Appends records to a local NDJSON file, keeping nothing in memory."""
+
+    def __init__(self, path: str):
+        self.spill = NdjsonSpill(path)
+
+    async def write(self, meta: Dict[str, Any], records: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.spill.write, records)
+
+    async def close(self) -> Dict[str, Any]:
+        self.spill.close()
+        return {"file": self.spill.path, "rows": self.spill.rows}
+
+
+class UploadSink(NdjsonSink):
+    """Spills records to disk during the crawl and uploads them with aupload_json_to_s3 at the end."""
+
+    def __init__(self, bucket: str, prefix: str, run_id: Optional[str] = None,
+                 partition_by: Optional[str] = None, spill_path: Optional[str] = None):
+        super().__init__(spill_path or f"/tmp/upload_sink_{run_id or new_run_id()}.ndjson")
+        self.bucket, self.prefix, self.run_id, self.partition_by = bucket, prefix, run_id, partition_by
+
+    async def close(self) -> Dict[str, Any]:
+        try:
+            records = await asyncio.to_thread(list, self.spill)
+            result = await aupload_json_to_s3(self.bucket, records, prefix=self.prefix, run_id=self.run_id,
+                                              partition_by=self.partition_by)
+        finally:
+            self.spill.remove()
+        return {"key": result.get("key"), "manifest": result.get("manifest_key"), "rows": len(records)}
+
+
+class DedupSink(Sink):
+    """Keeps only new and changed records and merges them into the daily snapshot at the end (see dedup.py)."""
+
+    def __init__(self, bucket: str, prefix: str, index: Optional[DedupIndex] = None):
+        self.bucket, self.prefix = bucket, prefix
+        self.dedup = Deduplicator(index or get_dedup_index(), bucket, prefix)
+
+    async def write(self, meta: Dict[str, Any], records: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.dedup.add, records)
+
+    async def close(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(upload_executor(), self.dedup.flush)
+
+
+class ChangeSink(Sink):
+    """Emits insert/update/delete events against the last known versions at the end (see cdc.py).
+
+    Deletes need the scope the run covered completely: full=True for every
+    project, or districts=[...].
+    """
+
+    def __init__(self, bucket: str, state: Optional[CdcState] = None, run_id: Optional[str] = None,
+                 full: bool = False, districts: Optional[List[str]] = None):
+        self.bucket, self.full, self.districts = bucket, full, districts
+        self.capture = ChangeCapture(state or get_cdc_state(), run_id=run_id)
+
+    async def write(self, meta: Dict[str, Any], records: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.capture.add, records)
+
+    async def close(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(upload_executor(), functools.partial(
+            self.capture.flush, self.bucket, full=self.full, districts=self.districts))
+
+
+class ScrapeRuntime:
+    """Browser, rate limits, retries, parse workers, snapshots, sinks and metrics for a run.
+
+    Usage:
+        async with ScrapeRuntime(sinks=[NdjsonSink(path)]) as runtime:
+            run = await run_source(get_source("up-rera"), runtime, contexts=3, grid_pages=10)
+    """
+
+    def __init__(self, retrier: Optional[Retrier] = None, browser=None, timeout_ms: int = 180000,
+                 window_size: int = 50, parse_workers: int = 0, snapshots: Optional[SnapshotStore] = None,
+                 sinks: Optional[Sequence[Sink]] = None, single_process: bool = False):
+        self.retrier = retrier or Retrier()
+        self.timeout_ms = timeout_ms
+        self.window_size = window_size
+        self.parse_workers = parse_workers
+        self.snapshots = snapshots
+        self.sinks: List[Sink] = list(sinks or [])
+        self.single_process = single_process
+        self.metrics = Metrics()
+        self.rate_limits = _env_rate_limits()
+        self._browser = browser
+        self._playwright = None
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    async def get_browser(self):
+        """The run's browser; launched on first use unless one was passed in."""
+        if self._browser is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+            logger.info('🚀 Launching browser...')
+            self._browser = await launch_browser(self._playwright, single_process=self.single_process)
+        return self._browser
+
+    def limiter(self, source: Source) -> RateLimiter:
+        if source.name not in self._limiters:
+            rate = self.rate_limits.get(source.name, source.requests_per_second)
+            self._limiters[source.name] = RateLimiter(rate)
+        return self._limiters[source.name]
+
+    async def throttle(self, source: Source) -> None:
+        """Wait for the source's rate limit before a request or postback."""
+        waited = await self.limiter(source).wait()
+        if waited:
+            self.metrics.add_time("throttle", waited)
+
+    def sessions(self, source: Source, size: int, browser):
+        """ContextPool of `size` sessions for source."""
+        return ContextPool(browser, size=size, timeout_ms=self.timeout_ms)
+
+    async def close(self) -> None:
+        if self._playwright is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass  # Ignore errors during cleanup
+            await self._playwright.stop()
+            self._playwright = self._browser = None
+
+    async def __aenter__(self) -> "ScrapeRuntime":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+@asynccontextmanager
+async def _parse_pool(runtime: ScrapeRuntime, source: Source,
+                      collect: Callable[[ParsePool], Awaitable[None]]):
+    """ParsePool running source.parser plus the task consuming it; (None, None) without workers.
+
+    Call parser.close() before awaiting the collector.
+    """
+    if runtime.parse_workers <= 0 or source.parser is None:
+        yield None, None
+        return
+    async with ParsePool(runtime.parse_workers, parse_fn=source.parser) as parser:
+        collector = asyncio.create_task(collect(parser))
+        try:
+            yield parser, collector
+        except BaseException:
+            collector.cancel()
+            raise
+        finally:
+            await parser.close()
+
+
+@dataclass
+class SourceRun:
+    """Result of run_source."""
+    records: List[Dict[str, Any]]
+    outcome: PartitionResults
+    plan: CrawlPlan
+    sinks: List[Dict[str, Any]] = field(default_factory=list)
+
+
+async def run_partitions(
+    source: Source,
+    runtime: ScrapeRuntime,
+    partitions: Sequence[Hashable],
+    contexts: int = 1,
+    raw: bool = False,
+    max_rows: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], PartitionResults]:
+    """Fetch, parse, annotate and normalize every partition across `contexts` sessions.
+
+    Args:
+        source: Source to crawl
+        runtime: Shared runtime (browser, parse workers, sinks, ...)
+        partitions: Work items from the source's plan
+        contexts: Sessions working in parallel (capped at len(partitions))
+        raw: Skip source.normalize (callers that normalize after truncating)
+        max_rows: Stop handing out partitions once this many rows are in;
+            partitions already started still finish (see outcome.skipped)
+
+    Returns:
+        (records in partition and page order, PartitionResults with per-partition
+        rows, per-session stats, parse stats and runtime metrics)
+    """
+    metrics = runtime.metrics
+    scraped_at = datetime.now().isoformat()
+    page_counts: Dict[Hashable, int] = {}
+    # Sinks see pages in completion order; results are reassembled in page order
+    by_page: Dict[Tuple[Hashable, int], List[Dict[str, Any]]] = {}
+    # First page per partition that a worker failed to parse
+    parse_errors: Dict[Hashable, str] = {}
+    delivered = 0
+
+    async def deliver(partition: Hashable, seq: int, meta: Dict[str, Any],
+                      rows: List[Dict[str, Any]]) -> None:
+        nonlocal delivered
+        rows = source.annotate(rows, meta)
+        if not raw:
+            rows = source.normalize(rows, scraped_at=scraped_at)
+        by_page[(partition, seq)] = rows
+        delivered += len(rows)
+        metrics.incr("rows", len(rows))
+        for sink in runtime.sinks:
+            await sink.write(meta, rows)
+
+    async def collect(parser: ParsePool) -> None:
+        async for item in parser:
+            partition, seq = item.key
+            if item.error is not None:
+                parse_errors.setdefault(partition, f"parsing page {seq} failed: {item.error}")
+                continue
+            await deliver(partition, seq, item.meta, item.projects)
+
+    async def setup(session) -> None:
+        await source.open_session(runtime, session)
+
+    async def work(session, partition: Hashable) -> int:
+        seq = 0
+        fetch_start = time.perf_counter()
+        async for page in source.fetch(runtime, session, partition):
+            metrics.add_time("fetch", time.perf_counter() - fetch_start)
+            seq = page.seq
+            metrics.incr("pages")
+            if runtime.snapshots and page.content is not None:
+                url = {"url": page.url} if page.url else {}
+                await runtime.snapshots.aput(page.content, page.kind, **url, **page.meta)
+            if page.rows is not None:
+                await deliver(partition, seq, page.meta, page.rows)
+            elif parser is not None:
+                await parser.submit((partition, seq), page.content, **page.meta)
+            else:
+                with metrics.timer("parse"):
+                    rows = source.parse(page)
+                await deliver(partition, seq, page.meta, rows)
+            fetch_start = time.perf_counter()
+        page_counts[partition] = seq
+        return seq
+
+    browser = await runtime.get_browser()
+    size = max(1, min(contexts, len(partitions)))
+    async with _parse_pool(runtime, source, collect) as (parser, collector):
+        async with runtime.sessions(source, size, browser) as pool:
+            outcome = await run_partitioned(
+                pool, list(partitions), work, setup,
+                stop=(lambda: delivered >= max_rows) if max_rows is not None else None)
+        if parser:
+            await parser.close()
+            await collector
+            outcome.parse = parser.stats()
+    # A partition with an unparsed page is incomplete: fail it as if its fetch had failed
+    for partition, error in parse_errors.items():
+        if outcome.results.pop(partition, None) is not None:
+            outcome.errors[partition] = error
+
+    for partition in outcome.results:
+        outcome.results[partition] = [row for seq in range(1, page_counts.get(partition, 0) + 1)
+                                      for row in by_page.get((partition, seq), [])]
+        logger.info(f'✓ {source.name} {partition}: {len(outcome.results[partition])} rows '
+                    f'over {page_counts.get(partition, 0)} page(s)')
+    outcome.metrics = metrics.as_dict()
+    records = [row for rows in outcome.ordered(partitions) for row in rows]
+    return records, outcome
+
+
+async def run_source(source: Source, runtime: ScrapeRuntime, contexts: int = 1,
+                     max_records: Optional[int] = None, **params: Any) -> SourceRun:
+    """Plan a crawl of source from params and run it; closes the runtime's sinks.
+
+    Args:
+        source: Source to crawl
+        runtime: Shared runtime
+        contexts: Sessions working in parallel
+        max_records: Keep at most this many records in the result
+        **params: Passed to source.plan (e.g. grid_pages, districts)
+    """
+    with runtime.metrics.timer("plan"):
+        plan = await source.plan(runtime, **params)
+    logger.info(f'🧭 {source.name}: {len(plan.partitions)} partitions over {contexts} session(s)')
+    try:
+        records, outcome = await run_partitions(source, runtime, plan.partitions, contexts)
+    finally:
+        summaries = [s for s in [await sink.close() for sink in runtime.sinks] if s]
+    if max_records is not None:
+        records = records[:max_records]
+    return SourceRun(records=records, outcome=outcome, plan=plan, sinks=summaries)
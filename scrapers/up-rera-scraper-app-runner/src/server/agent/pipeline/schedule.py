@@ -0,0 +1,417 @@
+"""
+Building blocks of the in-service crawl scheduler (see agent/scheduler.py).
+
+- CronSpec: 5-field cron expressions ("0 */6 * * *", "@daily"), evaluated
+  in the scheduler's time zone
+- Windows: daily time windows such as the off-peak "22:00-06:00"
+- LeaderLock: a lease that at most one instance holds at a time, so only
+  that instance crawls. S3LeaderLock uses conditional puts (If-None-Match
+  to create, If-Match on the ETag to take over or renew).
+  FileLeaderLock is the local equivalent for tests and single hosts.
+- SchedulerState: last runs, last full crawl and the detail-page backlog,
+  one JSON document next to the lock so a new leader carries on
+- plan_crawl / detail_batch_size: full vs incremental crawls, and how many
+  detail pages to fetch per tick so the backlog drains evenly over the
+  off-peak windows
+"""
+
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from .storage import get_s3_client, put_object, read_object, resolve_target
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "_scheduler/leader.json"
+STATE_KEY = "_scheduler/state.json"
+
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+# (name, lowest, highest) of the five cron fields
+_CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+
+def _parse_cron_field(spec: str, lo: int, hi: int) -> FrozenSet[int]:
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Cron step must be positive: {spec!r}")
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = hi if step > 1 else start
+        if not lo <= start <= end <= hi:
+            raise ValueError(f"Cron field {spec!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSpec:
+    """A cron expression: minute hour day-of-month month day-of-week.
+
+    As in cron, a restricted day-of-month and day-of-week match when either
+    does; 0 and 7 are both Sunday.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        fields = _CRON_ALIASES.get(self.expr, self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        parsed = [_parse_cron_field(f, lo, hi) for f, (_, lo, hi) in zip(fields, _CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        # Python: Monday=0; cron: Sunday=0
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return (dt.minute in self.minutes and dt.hour in self.hours
+                and dt.month in self.months and self._day_matches(dt))
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute strictly after dt (same tzinfo as dt)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression {self.expr!r} never matches")
+
+    def __repr__(self) -> str:
+        return f"CronSpec({self.expr!r})"
+
+
+class Windows:
+    """Daily time windows, e.g. "22:00-06:00,13:00-14:00" (a window may cross midnight)."""
+
+    def __init__(self, spec: str):
+        self.spec = spec.strip()
+        self.ranges: List[Tuple[int, int]] = []
+        for part in filter(None, (p.strip() for p in self.spec.split(","))):
+            start, end = (self._minutes(v) for v in part.split("-", 1))
+            self.ranges.append((start, end))
+
+    @staticmethod
+    def _minutes(text: str) -> int:
+        hour, minute = text.strip().split(":")
+        value = int(hour) * 60 + int(minute)
+        if not 0 <= value <= 24 * 60:
+            raise ValueError(f"Invalid time {text!r}")
+        return value
+
+    def _remaining(self, minute: int, start: int, end: int) -> Optional[int]:
+        """Minutes left in start-end at minute of day, or None outside it."""
+        if start <= end:
+            return end - minute if start <= minute < end else None
+        if minute >= start:
+            return 24 * 60 - minute + end
+        return end - minute if minute < end else None
+
+    def remaining(self, dt: datetime) -> float:
+        """Seconds until the window dt is in closes, 0 outside every window; a full day when none are set."""
+        if not self.ranges:
+            return 24 * 3600.0
+        minute = dt.hour * 60 + dt.minute
+        left = [r for r in (self._remaining(minute, s, e) for s, e in self.ranges) if r is not None]
+        return max(left) * 60 - dt.second if left else 0.0
+
+    def __contains__(self, dt: datetime) -> bool:
+        return self.remaining(dt) > 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"spec": self.spec or "always"}
+
+
+def default_owner() -> str:
+    """Lock owner id of this process: host, pid and a random suffix."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class LeaderLock:
+    """A lease on the scheduler: acquire() takes or renews it for ttl seconds."""
+
+    def __init__(self, owner: Optional[str] = None, ttl: Optional[float] = None):
+        self.owner = owner or default_owner()
+        self.ttl = ttl or float(os.environ.get("SCHEDULER_LEASE_SECONDS", 120))
+        self.held_until = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return time.time() < self.held_until
+
+    def _claim(self, current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The lease document to write, or None when another owner's lease is still valid."""
+        now = time.time()
+        if current and current.get("owner") != self.owner and current.get("expires_at", 0) > now:
+            return None
+        mine = current if current and current.get("owner") == self.owner else None
+        return {
+            "owner": self.owner,
+            "acquired_at": (mine or {}).get("acquired_at", now),
+            "renewed_at": now,
+            "expires_at": now + self.ttl,
+        }
+
+    def _took(self, lease: Optional[Dict[str, Any]], previous: Optional[Dict[str, Any]]) -> bool:
+        if lease is None:
+            self.held_until = 0.0
+            return False
+        if not previous or previous.get("owner") != self.owner:
+            logger.info(f"👑 {self.owner} is now the scheduler leader")
+        self.held_until = lease["expires_at"]
+        return True
+
+    def acquire(self) -> bool:
+        raise NotImplementedError
+
+    def release(self) -> None:
+        raise NotImplementedError
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        """The current lease document, if any."""
+        raise NotImplementedError
+
+
+class FileLeaderLock(LeaderLock):
+    """Lease in a local JSON file; read-modify-write runs under flock."""
+
+    def __init__(self, path: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._mutex = threading.Lock()
+
+    def _locked(self):
+        handle = open(f"{self.path}.flock", "a")
+        if FCNTL_AVAILABLE:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def acquire(self) -> bool:
+        with self._mutex, self._locked():
+            current = self.holder()
+            lease = self._claim(current)
+            if lease is not None:
+                tmp_path = f"{self.path}.tmp-{uuid.uuid4().hex[:8]}"
+                with open(tmp_path, "w") as f:
+                    json.dump(lease, f)
+                os.replace(tmp_path, self.path)
+            return self._took(lease, current)
+
+    def release(self) -> None:
+        with self._mutex, self._locked():
+            current = self.holder()
+            if current and current.get("owner") == self.owner:
+                os.remove(self.path)
+        self.held_until = 0.0
+
+
+class S3LeaderLock(LeaderLock):
+    """Lease in an S3 object, written only with conditional puts.
+
+    Creating the lease uses If-None-Match: *, taking over an expired one or
+    renewing uses If-Match on the ETag that was read, so two instances
+    racing for the same lease can't both win.
+    """
+
+    def __init__(self, bucket: str, key: str = LOCK_KEY, s3_client=None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.bucket, self.key = bucket, key
+        self.s3_client = s3_client or get_s3_client()
+
+    def _read(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        try:
+            obj = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
+        except Exception as e:
+            if _error_code(e) in ("NoSuchKey", "404"):
+                return None, None
+            raise
+        return json.loads(obj["Body"].read()), obj["ETag"]
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        return self._read()[0]
+
+    def acquire(self) -> bool:
+        current, etag = self._read()
+        lease = self._claim(current)
+        if lease is not None:
+            condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+            try:
+                self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(lease).encode(),
+                                          ContentType="application/json", **condition)
+            except Exception as e:
+                if _error_code(e) not in ("PreconditionFailed", "ConditionalRequestConflict", "412", "409"):
+                    raise
+                # Another instance wrote the lease between our read and put
+                lease = None
+        return self._took(lease, current)
+
+    def release(self) -> None:
+        current, etag = self._read()
+        if current and current.get("owner") == self.owner:
+            # Expire it rather than delete it, so the release stays conditional
+            expired = {**current, "expires_at": 0}
+            try:
+                self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(expired).encode(),
+                                          ContentType="application/json", IfMatch=etag)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not release scheduler lease: {e}")
+        self.held_until = 0.0
+
+
+def _error_code(e: Exception) -> str:
+    return str(getattr(e, "response", {}).get("Error", {}).get("Code", ""))
+
+
+def get_leader_lock(bucket: str, owner: Optional[str] = None, ttl: Optional[float] = None,
+                    local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> LeaderLock:
+    """S3LeaderLock for an S3 bucket, FileLeaderLock under the target directory otherwise."""
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "file":
+        return FileLeaderLock(os.path.join(target, LOCK_KEY), owner=owner, ttl=ttl)
+    return S3LeaderLock(target, owner=owner, ttl=ttl)
+
+
+class SchedulerState:
+    """Scheduler bookkeeping shared by whichever instance leads, stored as one JSON document.
+
+    Fields: jobs ({name: {last_run, last_status, last_seconds, runs}}),
+    last_full_at, detail_backlog (detail links still to fetch).
+    """
+
+    def __init__(self, bucket: str, key: str = STATE_KEY, s3_client=None,
+                 local_output_dir_env: str = "LOCAL_OUTPUT_DIR"):
+        self.bucket, self.key = bucket, key
+        self.local_output_dir_env = local_output_dir_env
+        self.target_type, self.target = resolve_target(bucket, local_output_dir_env)
+        self.s3_client = s3_client if s3_client or self.target_type == "file" else get_s3_client()
+        self.data: Dict[str, Any] = {"jobs": {}, "last_full_at": None, "detail_backlog": []}
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            body = read_object(self.bucket, self.key, s3_client=self.s3_client,
+                               local_output_dir_env=self.local_output_dir_env)
+            self.data.update(json.loads(body))
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError) and _error_code(e) not in ("NoSuchKey", "404"):
+                raise
+        return self.data
+
+    def save(self) -> None:
+        put_object(self.target_type, self.target, self.key, json.dumps(self.data).encode("utf-8"),
+                   content_type="application/json", s3_client=self.s3_client)
+
+    def job(self, name: str) -> Dict[str, Any]:
+        return self.data["jobs"].setdefault(name, {"runs": 0})
+
+
+def plan_crawl(last_full_at: Optional[str], now: datetime, full_every: timedelta, off_peak: Windows,
+               incremental: str = "top:10") -> Dict[str, Any]:
+    """Full or incremental crawl for a run starting at now.
+
+    A full crawl ("all" districts) is due once full_every has passed since
+    the last one. It waits for an off-peak window, unless it is overdue by
+    half an interval. Otherwise the run is incremental: the busiest
+    districts first (e.g. "top:10", see sources.up_rera.plan_districts).
+
+    Returns:
+        {"mode": "full" | "incremental", "districts", "reason"}
+    """
+    if last_full_at is None:
+        return {"mode": "full", "districts": "all", "reason": "no full crawl yet"}
+    age = now - datetime.fromisoformat(last_full_at)
+    if age >= full_every and (now in off_peak or age >= full_every * 1.5):
+        return {"mode": "full", "districts": "all", "reason": f"last full crawl {age} ago"}
+    return {"mode": "incremental", "districts": incremental,
+            "reason": f"last full crawl {age} ago" + (" (waiting for off-peak)" if age >= full_every else "")}
+
+
+def detail_batch_size(backlog: int, window_seconds: float, tick_seconds: float, max_batch: int) -> int:
+    """Detail pages to fetch this tick so the backlog drains evenly over what's left of the window."""
+    if backlog <= 0 or window_seconds <= 0:
+        return 0
+    ticks_left = max(1, int(window_seconds // max(tick_seconds, 1)))
+    return min(max_batch, math.ceil(backlog / ticks_left))
+
+
+def merge_backlog(backlog: Sequence[Dict[str, Any]], items: Sequence[Dict[str, Any]],
+                  limit: int) -> List[Dict[str, Any]]:
+    """Append {"detail_link", "rera_number"} items to the backlog, oldest first and once per link.
+
+    A link already waiting keeps its entry (and its "attempts"). Keeps the
+    newest `limit` items (0: no limit).
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for item in [*backlog, *items]:
+        if item.get("detail_link"):
+            merged.setdefault(item["detail_link"], item)
+    kept = list(merged.values())
+    return kept[-limit:] if limit > 0 else kept
+
+
+def retry_failed(batch: Sequence[Dict[str, Any]], archived: Set[str],
+                 max_attempts: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Backlog items of a batch that were not archived, with "attempts" counted up.
+
+    Returns:
+        (items to retry, links given up on after max_attempts attempts)
+    """
+    retry: List[Dict[str, Any]] = []
+    given_up: List[str] = []
+    for item in batch:
+        if item["detail_link"] in archived:
+            continue
+        attempts = int(item.get("attempts", 0)) + 1
+        if attempts >= max_attempts > 0:
+            given_up.append(item["detail_link"])
+        else:
+            retry.append({**item, "attempts": attempts})
+    return retry, given_up
@@ -0,0 +1,252 @@
+"""
+Compressed, content-addressed archive of the HTML a scrape saw.
+
+Only the grid table's outerHTML is archived per grid page, not the full DOM or
+a screenshot. Detail pages are fetched through the context's request API, so
+they are never rendered in the browser. Every body is gzipped and stored once
+under its SHA-256:
+
+    prefix/objects/ab/ab12...ef.html.gz
+    prefix/runs/<run_id>.ndjson      one line per snapshot: sha256, kind, page, district, url, ...
+
+Unchanged pages across runs cost one existence check and no extra storage.
+reparse_snapshots rebuilds project records from a run's grid snapshots in a
+process pool, so fixing an extraction bug does not need another crawl of the
+live site.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, UTC
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .storage import (BOTO3_AVAILABLE, get_s3_client, iter_ndjson, list_keys, put_object,
+                      read_object, resolve_target, to_ndjson)
+
+if BOTO3_AVAILABLE:
+    import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_BUCKET = "file:///tmp/up_rera_snapshots"
+DEFAULT_SNAPSHOT_PREFIX = "up-rera-snapshots"
+
+
+def object_key(prefix: str, sha256: str) -> str:
+    """Key of a snapshot body: prefix/objects/<first two hex chars>/<sha256>.html.gz."""
+    return f"{prefix}/objects/{sha256[:2]}/{sha256}.html.gz"
+
+
+def run_index_key(prefix: str, run_id: str) -> str:
+    return f"{prefix}/runs/{run_id}.ndjson"
+
+
+class SnapshotStore:
+    """Writes gzipped HTML snapshots for one run plus the run's index.
+
+    The bucket and prefix come from SNAPSHOT_BUCKET (S3 bucket, "LOCAL" or
+    "file://path", default file:///tmp/up_rera_snapshots) and SNAPSHOT_PREFIX
+    unless given explicitly.
+    """
+
+    def __init__(self, run_id: str, bucket: Optional[str] = None,
+                 prefix: Optional[str] = None, s3_client=None):
+        self.run_id = run_id
+        self.bucket = bucket or os.environ.get("SNAPSHOT_BUCKET", DEFAULT_SNAPSHOT_BUCKET)
+        self.prefix = prefix or os.environ.get("SNAPSHOT_PREFIX", DEFAULT_SNAPSHOT_PREFIX)
+        self.target_type, self.target = resolve_target(self.bucket)
+        if self.target_type == "s3" and s3_client is None:
+            s3_client = get_s3_client()
+        self.s3_client = s3_client
+        self.entries: List[Dict[str, Any]] = []
+        self.new_objects = 0
+        self._lock = threading.Lock()
+
+    def _exists(self, key: str) -> bool:
+        if self.target_type == "file":
+            return os.path.exists(os.path.join(self.target, key))
+        try:
+            self.s3_client.head_object(Bucket=self.target, Key=key)
+            return True
+        except Exception:
+            return False
+
+    def put(self, html: str, kind: str, **meta: Any) -> Dict[str, Any]:
+        """Archive one HTML body; returns its index entry.
+
+        Args:
+            html: Page or fragment HTML
+            kind: "grid" or "detail"
+            **meta: Extra index fields (page, district, url, rera_number)
+        """
+        body = html.encode("utf-8")
+        sha256 = hashlib.sha256(body).hexdigest()
+        key = object_key(self.prefix, sha256)
+        # mtime=0 keeps the compressed bytes identical for identical content
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        is_new = not self._exists(key)
+        if is_new:
+            put_object(self.target_type, self.target, key, compressed,
+                       content_type="application/gzip", s3_client=self.s3_client)
+        entry = {"sha256": sha256, "kind": kind, "bytes": len(body), "gz_bytes": len(compressed),
+                 "captured_at": datetime.now(UTC).isoformat(), **meta}
+        with self._lock:
+            self.entries.append(entry)
+            self.new_objects += is_new
+        return entry
+
+    async def aput(self, html: Optional[str], kind: str, **meta: Any) -> Optional[Dict[str, Any]]:
+        """put() in a worker thread so compression and I/O stay off the event loop."""
+        if not html:
+            return None
+        try:
+            return await asyncio.to_thread(self.put, html, kind, **meta)
+        except Exception as e:
+            # Archiving is best effort; it must never fail a scrape
+            logger.warning(f"⚠️  Snapshot of {kind} failed: {str(e)[:120]}")
+            return None
+
+    def write_index(self) -> Optional[str]:
+        """Write the run index (one NDJSON line per snapshot); returns its key."""
+        if not self.entries:
+            return None
+        key = run_index_key(self.prefix, self.run_id)
+        put_object(self.target_type, self.target, key, to_ndjson(self.entries),
+                   s3_client=self.s3_client)
+        logger.info(f"🗄️  Archived {len(self.entries)} snapshots ({self.new_objects} new) to {self.bucket}/{key}")
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bucket": self.bucket,
+            "index_key": run_index_key(self.prefix, self.run_id) if self.entries else None,
+            "snapshots": len(self.entries),
+            "new_objects": self.new_objects,
+            "bytes": sum(e["bytes"] for e in self.entries),
+            "gz_bytes": sum(e["gz_bytes"] for e in self.entries),
+        }
+
+
+async def archive_detail_pages(request, store: SnapshotStore, projects: Iterable[Dict[str, Any]],
+                               limit: int, concurrency: int = 4) -> List[str]:
+    """Fetch up to `limit` detail pages with a context's APIRequestContext and archive them.
+
+    Args:
+        request: BrowserContext.request (shares cookies with the context, no rendering)
+        store: Run's SnapshotStore
+        projects: Project dicts with detail_link
+        limit: Max detail pages to fetch
+        concurrency: Parallel requests
+
+    Returns:
+        detail_link of every page archived; the others failed (non-OK
+        response, fetch error or failed put) and can be retried
+    """
+    targets = list(islice((p for p in projects if p.get("detail_link")), limit))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(project: Dict[str, Any]) -> bool:
+        async with semaphore:
+            try:
+                response = await request.get(project["detail_link"])
+                if not response.ok:
+                    return False
+                html = (await response.body()).decode("utf-8", errors="replace")
+            except Exception as e:
+                logger.warning(f"⚠️  Detail fetch failed for {project['detail_link']}: {str(e)[:80]}")
+                return False
+        return await store.aput(html, "detail", url=project["detail_link"],
+                                rera_number=project.get("rera_number", "")) is not None
+
+    results = await asyncio.gather(*(fetch(p) for p in targets))
+    archived = [p["detail_link"] for p, ok in zip(targets, results) if ok]
+    logger.info(f"🗄️  Archived {len(archived)}/{len(targets)} detail pages")
+    return archived
+
+
+def list_runs(bucket: str, prefix: str = DEFAULT_SNAPSHOT_PREFIX, s3_client=None) -> List[str]:
+    """Run ids that have a snapshot index, sorted by id."""
+    keys = list_keys(bucket, f"{prefix}/runs", suffix=".ndjson", s3_client=s3_client)
+    return [os.path.basename(k)[:-len(".ndjson")] for k in keys]
+
+
+def read_run_index(bucket: str, run_id: str, prefix: str = DEFAULT_SNAPSHOT_PREFIX,
+                   s3_client=None) -> List[Dict[str, Any]]:
+    return list(iter_ndjson(read_object(bucket, run_index_key(prefix, run_id), s3_client=s3_client)))
+
+
+_worker_s3 = None
+
+
+def _parse_snapshot(job: Tuple[str, str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Process-pool task: read, decompress and parse one grid snapshot.
+
+    Each project's scraped_at is the snapshot's captured_at, when the page was actually read.
+    """
+    global _worker_s3
+    from .html_grid import parse_grid_html
+
+    bucket, prefix, entry = job
+    if _worker_s3 is None and resolve_target(bucket)[0] == "s3":
+        _worker_s3 = boto3.client("s3")
+    body = gzip.decompress(read_object(bucket, object_key(prefix, entry["sha256"]), s3_client=_worker_s3))
+    projects = parse_grid_html(body.decode("utf-8"))
+    for project in projects:
+        project["district"] = project.get("district") or entry.get("district", "")
+        if entry.get("captured_at"):
+            project["scraped_at"] = entry["captured_at"]
+    return projects
+
+
+def reparse_snapshots(
+    bucket: str,
+    run_ids: Sequence[str],
+    prefix: str = DEFAULT_SNAPSHOT_PREFIX,
+    workers: Optional[int] = None,
+    s3_client=None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Rebuild raw project records from the grid snapshots of one or more runs.
+
+    Each distinct snapshot is parsed once, in a process pool with one worker
+    per CPU core by default.
+
+    Returns:
+        (raw project dicts in run/district/page order, each with scraped_at set
+        to its snapshot's captured_at; stats dict)
+    """
+    start = time.perf_counter()
+    entries: List[Dict[str, Any]] = []
+    for run_id in run_ids:
+        entries.extend(e for e in read_run_index(bucket, run_id, prefix, s3_client)
+                       if e.get("kind") == "grid")
+    unique = list({e["sha256"]: e for e in entries}.values())
+    unique.sort(key=lambda e: (str(e.get("district", "")), int(e.get("page") or 0)))
+
+    workers = workers or os.cpu_count() or 1
+    jobs = [(bucket, prefix, entry) for entry in unique]
+    if workers == 1 or len(jobs) <= 1:
+        parsed = [_parse_snapshot(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_snapshot, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    projects = [project for batch in parsed for project in batch]
+    stats = {
+        "runs": list(run_ids),
+        "snapshots": len(entries),
+        "distinct_snapshots": len(unique),
+        "projects": len(projects),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 3),
+        "html_bytes": sum(e["bytes"] for e in unique),
+    }
+    logger.info(f"🔁 Re-parsed {len(unique)} snapshots into {len(projects)} projects "
+                f"with {workers} workers in {stats['seconds']}s")
+    return projects, stats
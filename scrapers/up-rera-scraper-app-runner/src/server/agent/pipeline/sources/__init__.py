@@ -0,0 +1,22 @@
+"""
+Scraper SDK sources: one Source subclass per website (see base.py).
+
+Adding a site means a module here with a @register_source class and an
+import below; the engine (pipeline/runtime.py) provides everything else.
+"""
+
+from .base import ContentParser, CrawlPlan, FetchedPage, Source
+from .registry import available_sources, get_source, register_source
+
+# Built-in sources register themselves on import
+from . import up_rera  # noqa: E402,F401
+
+__all__ = [
+    "ContentParser",
+    "CrawlPlan",
+    "FetchedPage",
+    "Source",
+    "available_sources",
+    "get_source",
+    "register_source",
+]
@@ -0,0 +1,98 @@
+"""
+The Source interface of the scraper SDK.
+
+A source describes one website in four steps. The engine in
+pipeline/runtime.py drives them, with a shared ScrapeRuntime providing the
+browser sessions, rate limits, retries, parse workers, snapshots,
+sinks and metrics:
+
+    plan       which partitions a crawl covers (grid pages, districts, ...)
+    fetch      per partition, the pages to read, from one browser page
+    parse      page content -> raw rows; a module-level function, so pages
+               can be parsed in ParsePool worker processes
+    normalize  raw rows -> records in the data-lake schema
+
+Partitions are independent: each session (browser context) takes
+the next one from a shared queue. A source therefore never deals
+with concurrency, batching or storage.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+# Page content (HTML, JSON text) -> raw rows
+ContentParser = Callable[[str], List[Dict[str, Any]]]
+
+
+@dataclass
+class FetchedPage:
+    """One page read by Source.fetch.
+
+    Sources that extract rows while fetching (e.g. with page.evaluate) set
+    rows; otherwise the engine parses content with the source's parser.
+    """
+    partition: Hashable
+    seq: int
+    content: Optional[str] = None
+    rows: Optional[List[Dict[str, Any]]] = None
+    # Goes into the snapshot index and to sinks (e.g. page, district)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    kind: str = "grid"
+    url: Optional[str] = None
+
+
+@dataclass
+class CrawlPlan:
+    """Partitions of one crawl, in crawl order."""
+    partitions: List[Hashable]
+    # Field the saved file and uploads are partitioned by (e.g. "district")
+    partition_by: Optional[str] = None
+
+
+class Source(ABC):
+    """Base class for a scraped website; register subclasses with @register_source.
+
+    Attributes:
+        name: Registry key, e.g. "up-rera"
+        title: Human-readable description
+        requests_per_second: Default rate limit across all sessions (0 = none);
+            SCRAPER_RATE_LIMITS overrides it per source
+        parser: Module-level ContentParser for fetched content, wrapped in
+            staticmethod() so it stays picklable for worker processes
+    """
+
+    name: str = ""
+    title: str = ""
+    requests_per_second: float = 0.0
+    parser: Optional[ContentParser] = None
+
+    @abstractmethod
+    async def plan(self, runtime, **params: Any) -> CrawlPlan:
+        """Decide the partitions of a crawl from request parameters."""
+
+    async def open_session(self, runtime, session) -> None:
+        """Prepare a session once before it takes partitions (login, open a list page)."""
+
+    @abstractmethod
+    def fetch(self, runtime, session, partition: Hashable) -> AsyncIterator[FetchedPage]:
+        """Yield the pages of one partition; an async generator."""
+
+    def parse(self, page: FetchedPage) -> List[Dict[str, Any]]:
+        """Raw rows of a page whose rows weren't extracted while fetching."""
+        if self.parser is None:
+            raise NotImplementedError(f"Source {self.name} has no parser")
+        return self.parser(page.content or "")
+
+    def annotate(self, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fill fields the page implies but the rows lack (e.g. the partition's district)."""
+        return rows
+
+    def normalize(self, rows: List[Dict[str, Any]], scraped_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Records in the data-lake schema; the default only stamps scraped_at."""
+        scraped_at = scraped_at or datetime.now().isoformat()
+        return [{**row, "scraped_at": scraped_at} for row in rows]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "title": self.title}
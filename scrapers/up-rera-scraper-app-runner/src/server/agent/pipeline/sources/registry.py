@@ -0,0 +1,36 @@
+"""
+Registry of scraper sources, keyed by Source.name.
+"""
+
+from typing import Any, Dict, List, Type
+
+from .base import Source
+
+_SOURCES: Dict[str, Type[Source]] = {}
+
+
+def register_source(cls: Type[Source]) -> Type[Source]:
+    """Class decorator adding a Source subclass to the registry."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no name")
+    if _SOURCES.get(cls.name, cls) is not cls:
+        raise ValueError(f"Source {cls.name!r} is already registered by {_SOURCES[cls.name].__name__}")
+    _SOURCES[cls.name] = cls
+    return cls
+
+
+def get_source(name: str, **options: Any) -> Source:
+    """Instantiate a registered source.
+
+    Raises:
+        ValueError: No source is registered under name
+    """
+    try:
+        cls = _SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown source {name!r}; available: {', '.join(sorted(_SOURCES))}") from None
+    return cls(**options)
+
+
+def available_sources() -> List[Dict[str, Any]]:
+    return [cls().describe() for _, cls in sorted(_SOURCES.items())]
@@ -0,0 +1,222 @@
+"""
+UP RERA registered projects (up-rera.in), the first source of the scraper SDK.
+
+Every session (browser context) opens the projects list once, on its own
+ASP.NET session, and then takes partitions:
+
+- grid page numbers of the unfiltered grid (int partitions), or
+- district filter values (DistrictPartition): the session selects the
+  district and walks every page of the filtered grid.
+
+plan_district_partitions decides which districts a run covers and in what
+order. Busiest districts go first, so a daily refresh can stop at the top N
+and a full crawl doesn't start its biggest district last.
+
+Rows are read in-page in windows (grid.iter_grid_windows). When the runtime
+parses in worker processes, or archives snapshots, the grid HTML is read
+instead, and html_grid.parse_grid_html builds the same records from it.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from ..browser_pool import ContextPool
+from ..grid import (filter_by_district, go_to_grid_page, grid_pager, iter_grid_windows,
+                    list_district_options, open_projects_list, read_grid_html, site_url, wait_for_grid)
+from ..html_grid import parse_grid_html
+from ..normalize import clean_category, normalize_projects
+from ..project_store import ProjectStore
+from ..retry import Retrier
+from ..storage import partition_value
+from .base import CrawlPlan, FetchedPage, Source
+from .registry import register_source
+
+logger = logging.getLogger(__name__)
+
+# Safety stop for a runaway pager within one district
+MAX_PAGES_PER_PARTITION = 500
+
+
+@dataclass(frozen=True)
+class DistrictPartition:
+    """One district filter value of the projects grid."""
+    value: str
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def plan_district_partitions(
+    options: Sequence[Tuple[str, str]],
+    include: Optional[Sequence[str]] = None,
+    churn: Optional[Dict[str, int]] = None,
+    top: Optional[int] = None
+) -> List[DistrictPartition]:
+    """Choose and order the districts a crawl covers.
+
+    Args:
+        options: (value, label) pairs from the district dropdown
+        include: Only these districts (matched case-insensitively by label)
+        churn: Recent activity per district (e.g. ProjectStore.district_churn());
+            districts are ordered by it, busiest first
+        top: Keep only the `top` busiest districts (needs churn)
+
+    Returns:
+        DistrictPartitions in crawl order
+    """
+    partitions = [DistrictPartition(value, clean_category(label)) for value, label in options]
+    if include:
+        wanted = {partition_value(name) for name in include}
+        partitions = [p for p in partitions if partition_value(p.name) in wanted]
+    if churn:
+        activity = {partition_value(k): v for k, v in churn.items()}
+        partitions.sort(key=lambda p: activity.get(partition_value(p.name), 0), reverse=True)
+        if top:
+            partitions = partitions[:top]
+    return partitions
+
+
+def parse_district_spec(spec: str) -> Tuple[Optional[List[str]], Optional[int]]:
+    """"all" -> every district, "top:N" -> N busiest, else a comma-separated list.
+
+    Returns:
+        (include, top) for plan_district_partitions
+    """
+    spec = spec.strip()
+    if spec.lower() == "all":
+        return None, None
+    if spec.lower().startswith("top:"):
+        return None, int(spec[4:])
+    return [d.strip() for d in spec.split(",") if d.strip()], None
+
+
+def open_grid_session(retrier: Retrier, timeout_ms: int, base_url: Optional[str]):
+    """Setup coroutine for a session: open the projects list and wait for the grid."""
+    async def setup(page) -> None:
+        await retrier.call("navigation", lambda: open_projects_list(page, timeout_ms, base_url))
+        await retrier.call("page_fetch", lambda: wait_for_grid(page))
+    return setup
+
+
+async def discover_districts(browser, retrier: Retrier, timeout_ms: int = 180000,
+                             base_url: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Open the projects list in a throwaway context and read the district dropdown."""
+    async with ContextPool(browser, size=1, timeout_ms=timeout_ms) as pool:
+        page = pool.pages[0]
+        await open_grid_session(retrier, timeout_ms, base_url)(page)
+        options = await list_district_options(page)
+    logger.info(f'🗺️  Found {len(options)} district filter values')
+    return options
+
+
+def _district_churn() -> Dict[str, int]:
+    store = ProjectStore()
+    try:
+        return store.district_churn()
+    finally:
+        store.close()
+
+
+async def plan_districts(browser, spec: str, retrier: Retrier, timeout_ms: int = 180000,
+                         base_url: Optional[str] = None) -> List[DistrictPartition]:
+    """Read the live district dropdown and plan a crawl for a districts spec.
+
+    Districts are ordered by recent registrations in the project index
+    (ProjectStore.district_churn) when it has any history.
+
+    Raises:
+        ValueError: No district filter value matched the spec
+    """
+    include, top = parse_district_spec(spec)
+    churn = await asyncio.to_thread(_district_churn)
+    options = await discover_districts(browser, retrier, timeout_ms=timeout_ms, base_url=base_url)
+    partitions = plan_district_partitions(options, include=include, churn=churn, top=top)
+    if not partitions:
+        raise ValueError(f'No district filter value matched "{spec}"')
+    return partitions
+
+
+async def read_grid(page, max_rows: Optional[int] = None, window_size: int = 50) -> List[Dict[str, Any]]:
+    """All project rows on the grid page currently shown."""
+    projects: List[Dict[str, Any]] = []
+    async for _, window in iter_grid_windows(page, max_rows=max_rows, window_size=window_size):
+        projects.extend(window)
+    return projects
+
+
+def with_district(rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fill a blank district from the partition the page was read under."""
+    if meta.get("district"):
+        for project in rows:
+            project["district"] = project.get("district") or meta["district"]
+    return rows
+
+
+@register_source
+class UpReraSource(Source):
+    """Registered projects grid of up-rera.in, by grid page or by district."""
+
+    name = "up-rera"
+    title = "UP RERA registered projects (up-rera.in)"
+    parser = staticmethod(parse_grid_html)
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or site_url()
+        # Grid page each session is showing, so consecutive pages skip a postback
+        self._current_page: Dict[int, int] = {}
+
+    async def plan(self, runtime, grid_pages: int = 1, districts: str = "", **params: Any) -> CrawlPlan:
+        """Grid pages 1..grid_pages, or the districts of a spec ("all", "top:N", "Lucknow,Agra")."""
+        if districts:
+            partitions = await plan_districts(await runtime.get_browser(), districts, runtime.retrier,
+                                              timeout_ms=runtime.timeout_ms, base_url=self.base_url)
+            return CrawlPlan(list(partitions), partition_by="district")
+        return CrawlPlan(list(range(1, grid_pages + 1)))
+
+    async def open_session(self, runtime, session) -> None:
+        await open_grid_session(runtime.retrier, runtime.timeout_ms, self.base_url)(session)
+        self._current_page[id(session)] = 1
+
+    async def _read(self, runtime, page, partition: Any, seq: int, meta: Dict[str, Any]) -> FetchedPage:
+        """The grid page shown: its HTML when it will be parsed or archived, in-page rows otherwise."""
+        html = await read_grid_html(page) if (runtime.parse_workers or runtime.snapshots) else None
+        rows = None if runtime.parse_workers else await read_grid(page, window_size=runtime.window_size)
+        return FetchedPage(partition, seq, content=html, rows=rows, meta=meta)
+
+    async def _go_to(self, runtime, page, page_number: int) -> None:
+        if self._current_page.get(id(page)) != page_number:
+            await runtime.throttle(self)
+            await runtime.retrier.call(
+                "page_fetch", lambda: go_to_grid_page(page, page_number, runtime.timeout_ms))
+            self._current_page[id(page)] = page_number
+
+    async def fetch(self, runtime, session, partition: Any) -> AsyncIterator[FetchedPage]:
+        if not isinstance(partition, DistrictPartition):
+            await self._go_to(runtime, session, partition)
+            yield await self._read(runtime, session, partition, 1, {"page": partition})
+            return
+
+        await runtime.throttle(self)
+        await runtime.retrier.call(
+            "page_fetch", lambda: filter_by_district(session, partition.value, runtime.timeout_ms))
+        self._current_page[id(session)] = 1
+        current = 1
+        while True:
+            yield await self._read(runtime, session, partition, current,
+                                   {"page": current, "district": partition.name})
+            if current >= MAX_PAGES_PER_PARTITION:
+                break
+            _, linked = await grid_pager(session)
+            if current + 1 not in linked:
+                break
+            current += 1
+            await self._go_to(runtime, session, current)
+
+    def annotate(self, rows: List[Dict[str, Any]], meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return with_district(rows, meta)
+
+    def normalize(self, rows: List[Dict[str, Any]], scraped_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        return normalize_projects(rows, scraped_at=scraped_at)
@@ -0,0 +1,673 @@
+"""
+Partitioned NDJSON storage for scraped records.
+
+Objects are written under Hive-style date partitions with one directory per
+run, so parallel writers (or several parts of one run) never share a key:
+
+    prefix/year=2025/month=11/day=08/run_id=ab12cd34ef56/20251108T123456123456_part-00000.json
+    prefix/year=2025/month=11/day=08/run_id=ab12cd34ef56/_manifest.json
+
+The manifest is written last and lists every part with its row count, size
+and SHA-256, so downstream jobs can read one object instead of listing
+partitions. Query engines (Athena, Spark) skip files starting with "_".
+
+Runs can also be split by a record field (partition_by="district"). Each
+value then gets its own directory, parts and manifest:
+
+    prefix/year=2025/month=11/day=08/district=lucknow/run_id=ab12cd34ef56/..._part-00000.json
+
+Parts and partitions are written concurrently from a bounded thread pool
+(UPLOAD_CONCURRENCY, default 8); the manifest still goes last. Async
+callers use aupload_json_to_s3, which runs the whole upload on a dedicated
+executor so serialization, disk writes and boto3 calls never block the
+event loop.
+"""
+
+import asyncio
+import base64
+import functools
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+from urllib.parse import urlparse
+
+from .retry import Retrier
+
+# boto3 takes a few hundred ms to import, so it is only looked up here and
+# imported with the first S3 client; API routes that read local data and
+# the /healthz startup path don't pay for it
+BOTO3_AVAILABLE = importlib.util.find_spec("boto3") is not None
+if not BOTO3_AVAILABLE:
+    logging.warning("⚠️  boto3 not available - S3 uploads will not work")
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+# Data objects readers should pick up: per-run NDJSON and compacted gzip parts
+DATA_SUFFIXES = (".json", ".json.gz")
+# run_id of directories written by compaction.py; their manifests list source_keys
+COMPACTED_RUN_PREFIX = "compacted-"
+
+# Parallel part/partition writes within one upload
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", 8))
+# Uploads running at once through aupload_json_to_s3
+UPLOAD_THREADS = int(os.environ.get("UPLOAD_THREADS", 4))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_s3_client():
+    """Process-wide boto3 S3 client.
+
+    Clients are thread-safe but slow to create (credential and endpoint
+    resolution), and creating them concurrently from the default session
+    is not, so one is created under a lock and reused.
+    """
+    global _s3_client
+    if not BOTO3_AVAILABLE:
+        raise ImportError(
+            "boto3 is required for S3 uploads. Install with: pip install boto3")
+    with _s3_client_lock:
+        if _s3_client is None:
+            import boto3
+            _s3_client = boto3.client("s3")
+        return _s3_client
+
+
+def upload_executor() -> ThreadPoolExecutor:
+    """Thread pool that runs aupload_json_to_s3 calls (UPLOAD_THREADS workers)."""
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_THREADS, thread_name_prefix="upload")
+    return _upload_executor
+
+
+def _map_concurrent(fn: Callable[[T], R], items: List[T], concurrency: int) -> List[R]:
+    """fn over items in input order, on up to `concurrency` threads."""
+    if concurrency <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items)), thread_name_prefix="upload-part") as pool:
+        return list(pool.map(fn, items))
+
+
+def new_run_id() -> str:
+    """Generate a run identifier that is unique across parallel writers."""
+    return uuid.uuid4().hex[:12]
+
+
+def partition_value(value: Any) -> str:
+    """Hive-safe partition value: "Gautam Buddha Nagar" -> "gautam-buddha-nagar"."""
+    slug = re.sub(r"[^a-z0-9]+", "-", str(value or "").lower()).strip("-")
+    return slug or "unknown"
+
+
+def make_day_prefix(prefix: str, now: datetime) -> str:
+    """Return the date partition: prefix/year=YYYY/month=MM/day=DD."""
+    return f"{prefix}/year={now:%Y}/month={now:%m}/day={now:%d}"
+
+
+def make_partition_prefix(prefix: str, now: datetime, run_id: str,
+                          partition: Optional[Dict[str, str]] = None) -> str:
+    """Return the per-run directory: prefix/year=YYYY/month=MM/day=DD[/field=value]/run_id=<run_id>."""
+    extra = "".join(f"/{field}={value}" for field, value in (partition or {}).items())
+    return f"{make_day_prefix(prefix, now)}{extra}/run_id={run_id}"
+
+
+def make_partitioned_key(
+    prefix: str = "data",
+    now: Optional[datetime] = None,
+    ext: str = "json",
+    run_id: Optional[str] = None,
+    part: int = 0,
+    partition: Optional[Dict[str, str]] = None
+) -> str:
+    """Generate a collision-free partitioned key with year/month/day structure.
+
+    Args:
+        prefix: Prefix for the key (e.g., "data", "scrapes")
+        now: Datetime to use for partitioning (defaults to UTC now)
+        ext: File extension (default: "json")
+        run_id: Run identifier (a fresh one is generated if not provided)
+        part: Part number within the run (default: 0)
+        partition: Extra Hive partitions placed before run_id (e.g. {"district": "lucknow"})
+
+    Returns:
+        Partitioned key like:
+        "prefix/year=2025/month=11/day=08/run_id=ab12cd34ef56/20251108T123456123456_part-00000.json"
+    """
+    now = now or datetime.now(UTC)
+    run_id = run_id or new_run_id()
+    ts = now.strftime("%Y%m%dT%H%M%S%f")
+    filename = f"{ts}_part-{part:05d}.{ext}"
+    return f"{make_partition_prefix(prefix, now, run_id, partition)}/{filename}"
+
+
+def make_manifest_key(prefix: str, now: datetime, run_id: str,
+                      partition: Optional[Dict[str, str]] = None) -> str:
+    """Return the key of the run manifest that sits next to the run's parts."""
+    return f"{make_partition_prefix(prefix, now, run_id, partition)}/{MANIFEST_NAME}"
+
+
+def _ensure_dir(path: str) -> None:
+    """Create directory if it doesn't exist."""
+    os.makedirs(path, exist_ok=True)
+
+
+def resolve_target(bucket: str, local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> Tuple[str, str]:
+    """Resolve a bucket argument into a (type, target) pair.
+
+    Args:
+        bucket: S3 bucket name, "LOCAL", or "file://path"
+        local_output_dir_env: Environment variable name for local output directory
+
+    Returns:
+        ("file", root_dir) for LOCAL and file:// targets, ("s3", bucket) otherwise
+    """
+    if bucket == "LOCAL":
+        local_dir = os.environ.get(local_output_dir_env)
+        if not local_dir:
+            raise ValueError(
+                f"Environment variable {local_output_dir_env} not set for LOCAL bucket")
+        return "file", local_dir
+
+    if bucket.startswith("file://"):
+        parsed = urlparse(bucket)
+        root = parsed.path or parsed.netloc
+        if not root.startswith("/"):
+            root = os.path.abspath(root)
+        return "file", root
+
+    return "s3", bucket
+
+
+def put_object(
+    target_type: str,
+    target: str,
+    key: str,
+    body: bytes,
+    content_type: str = "application/x-ndjson",
+    s3_client=None
+) -> str:
+    """Write one object to a resolved target.
+
+    Local files are written to a temporary name and renamed, so readers never
+    observe a partially written part or manifest. S3 puts carry a SHA-256
+    checksum that S3 verifies server-side.
+
+    Returns:
+        Absolute file path for file targets, the object key for S3
+    """
+    if target_type == "file":
+        path = os.path.join(target, key)
+        _ensure_dir(os.path.dirname(path))
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        return path
+
+    s3_client = s3_client or get_s3_client()
+    s3_client.put_object(
+        Bucket=target,
+        Key=key,
+        Body=body,
+        ContentType=content_type,
+        ChecksumSHA256=base64.b64encode(hashlib.sha256(body).digest()).decode("ascii")
+    )
+    return key
+
+
+def to_ndjson(records: Iterable[Any]) -> bytes:
+    """Serialize records as newline-delimited JSON."""
+    return "".join(json.dumps(record, default=str) + "\n"
+                   for record in records).encode("utf-8")
+
+
+def put_idempotency_key(key: str, body: bytes) -> str:
+    """Retrier idempotency key of a put: the object key plus its content hash."""
+    return f"{key}#{hashlib.sha256(body).hexdigest()}"
+
+
+def _chunks(records: List[Any], size: Optional[int]) -> List[List[Any]]:
+    if not size or size <= 0 or len(records) <= size:
+        return [records]
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+
+def upload_json_to_s3(
+    bucket: str,
+    data: Any,
+    prefix: str = "scrapes",
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR",
+    content_type: str = "application/x-ndjson",
+    run_id: Optional[str] = None,
+    rows_per_part: Optional[int] = None,
+    retrier: Optional[Retrier] = None,
+    partition_by: Optional[str] = None,
+    partition: Optional[Dict[str, str]] = None,
+    concurrency: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Save data as newline-delimited JSON (NDJSON) parts plus a run manifest to:
+    - local directory (when bucket == "LOCAL"),
+    - file:// path,
+    - or S3.
+
+    Args:
+        bucket: S3 bucket name, "LOCAL", or "file://path"
+        data: Data to upload (dict or list of dicts)
+        prefix: Prefix for partitioned key (e.g., "scrapes", "up-rera-projects")
+        s3_client: Optional boto3 S3 client (created if not provided)
+        local_output_dir_env: Environment variable name for local output directory
+        content_type: MIME type for the uploaded content
+        run_id: Run identifier used in keys and manifest (generated if not provided)
+        rows_per_part: Split the records into parts of this many rows (default: one part)
+        retrier: Retrier used for each part/manifest put (default: a new one);
+            each put is keyed by put_idempotency_key, so repeating a failed
+            upload with the same retrier, run_id and now skips the parts
+            already written
+        partition_by: Record field to split the run by (e.g. "district"); each
+            value is written under its own field=value directory with its own
+            manifest, all sharing one run_id
+        partition: Fixed extra partitions for every key (set per group by partition_by)
+        concurrency: Parts (or partitions) written at once (default: UPLOAD_CONCURRENCY)
+        now: Upload time used in keys and the manifest (default: UTC now)
+
+    Returns:
+        Dict with keys: type, target, key (first part), manifest_key, run_id,
+        parts, total_rows, retries, and url/manifest_url (for S3). With
+        partition_by, also "partitions": {value: {manifest_key, parts, rows}}
+    """
+    # Always work with a list of records
+    if not isinstance(data, list):
+        data = [data]
+
+    if partition_by:
+        return _upload_partitioned(bucket, data, prefix, partition_by, s3_client=s3_client,
+                                   local_output_dir_env=local_output_dir_env,
+                                   content_type=content_type, run_id=run_id,
+                                   rows_per_part=rows_per_part, retrier=retrier,
+                                   concurrency=concurrency, now=now)
+
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "s3" and s3_client is None:
+        # One client for every part and the manifest
+        s3_client = get_s3_client()
+
+    run_id = run_id or new_run_id()
+    now = now or datetime.now(UTC)
+    retrier = retrier or Retrier()
+
+    def write_part(numbered: Tuple[int, List[Any]]) -> Tuple[str, Dict[str, Any]]:
+        part_no, chunk = numbered
+        body = to_ndjson(chunk)
+        key = make_partitioned_key(
+            prefix=prefix, now=now, run_id=run_id, part=part_no, partition=partition)
+        written = retrier.call_sync(
+            "s3_part_upload",
+            lambda: put_object(target_type, target, key, body,
+                               content_type=content_type, s3_client=s3_client),
+            idempotency_key=put_idempotency_key(key, body))
+        return written, {
+            "key": key,
+            "rows": len(chunk),
+            "bytes": len(body),
+            "sha256": hashlib.sha256(body).hexdigest()
+        }
+
+    outcomes = _map_concurrent(write_part, list(enumerate(_chunks(data, rows_per_part))),
+                               UPLOAD_CONCURRENCY if concurrency is None else concurrency)
+    written = [w for w, _ in outcomes]
+    parts = [p for _, p in outcomes]
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "run_id": run_id,
+        "prefix": prefix,
+        "partition": partition or {},
+        "created_at": now.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "format": "ndjson",
+        "content_type": content_type,
+        "total_rows": len(data),
+        "total_bytes": sum(p["bytes"] for p in parts),
+        "parts": parts
+    }
+    manifest_key = make_manifest_key(prefix, now, run_id, partition)
+    manifest_body = json.dumps(manifest, indent=2).encode("utf-8")
+    manifest_written = retrier.call_sync(
+        "s3_part_upload",
+        lambda: put_object(target_type, target, manifest_key, manifest_body,
+                           content_type="application/json", s3_client=s3_client),
+        idempotency_key=put_idempotency_key(manifest_key, manifest_body))
+
+    result: Dict[str, Any] = {
+        "type": target_type,
+        "target": target,
+        "key": written[0],
+        "manifest_key": manifest_written,
+        "run_id": run_id,
+        "parts": len(parts),
+        "total_rows": len(data),
+        "retries": retrier.stats.as_dict()
+    }
+
+    if target_type == "file":
+        logger.info(
+            f"💾 Saved {len(parts)} part(s) + manifest to: {os.path.dirname(manifest_written)}")
+        return result
+
+    result["url"] = f"s3://{bucket}/{written[0]}"
+    result["manifest_url"] = f"s3://{bucket}/{manifest_key}"
+    logger.info(f"☁️  Uploaded {len(parts)} part(s) to S3: {result['manifest_url']}")
+    return result
+
+
+async def aupload_json_to_s3(bucket: str, data: Any, **kwargs: Any) -> Dict[str, Any]:
+    """upload_json_to_s3 on the upload executor; takes the same arguments.
+
+    Concurrent callers (API requests, agent tools) each get a worker thread
+    instead of queueing behind one another on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(upload_executor(),
+                                      functools.partial(upload_json_to_s3, bucket, data, **kwargs))
+
+
+def _upload_partitioned(
+    bucket: str,
+    data: List[Any],
+    prefix: str,
+    partition_by: str,
+    **kwargs: Any
+) -> Dict[str, Any]:
+    """upload_json_to_s3 once per distinct partition_by value, sharing run_id, retrier and now.
+
+    Partitions are written concurrently; each one writes its own parts serially.
+    """
+    groups: Dict[str, List[Any]] = {}
+    for record in data:
+        value = record.get(partition_by) if isinstance(record, dict) else None
+        groups.setdefault(partition_value(value), []).append(record)
+
+    kwargs["run_id"] = kwargs.get("run_id") or new_run_id()
+    kwargs["retrier"] = kwargs.get("retrier") or Retrier()
+    kwargs["now"] = kwargs.get("now") or datetime.now(UTC)
+    if resolve_target(bucket, kwargs["local_output_dir_env"])[0] == "s3" and kwargs.get("s3_client") is None:
+        kwargs["s3_client"] = get_s3_client()
+    concurrency = kwargs.pop("concurrency", None)
+    concurrency = UPLOAD_CONCURRENCY if concurrency is None else concurrency
+
+    def write_group(group: Tuple[str, List[Any]]) -> Dict[str, Any]:
+        value, rows = group
+        return upload_json_to_s3(bucket, rows, prefix=prefix, partition={partition_by: value},
+                                 concurrency=1, **kwargs)
+
+    ordered = sorted(groups.items())
+    results = dict(zip((value for value, _ in ordered), _map_concurrent(write_group, ordered, concurrency)))
+    first = next(iter(results.values()))
+    result = {k: v for k, v in first.items() if k not in ("parts", "total_rows", "url", "manifest_url")}
+    result.update({
+        "parts": sum(r["parts"] for r in results.values()),
+        "total_rows": len(data),
+        "partition_by": partition_by,
+        "partitions": {value: {"manifest_key": r["manifest_key"], "parts": r["parts"],
+                               "rows": r["total_rows"]}
+                       for value, r in results.items()},
+        "retries": kwargs["retrier"].stats.as_dict(),
+    })
+    if "url" in first:
+        result["url"] = first["url"]
+        result["manifest_url"] = first["manifest_url"]
+    logger.info(f"🗂️  Wrote {len(results)} {partition_by} partition(s) for run {kwargs['run_id']}")
+    return result
+
+
+def read_manifest(
+    bucket: str,
+    manifest_key: str,
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> Dict[str, Any]:
+    """Load a run manifest written by upload_json_to_s3.
+
+    Args:
+        bucket: S3 bucket name, "LOCAL", or "file://path"
+        manifest_key: Manifest key relative to the target (or absolute path for files)
+        s3_client: Optional boto3 S3 client
+
+    Returns:
+        Parsed manifest dict
+    """
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "file":
+        path = manifest_key if os.path.isabs(manifest_key) else os.path.join(target, manifest_key)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    s3_client = s3_client or get_s3_client()
+    obj = s3_client.get_object(Bucket=target, Key=manifest_key)
+    return json.loads(obj["Body"].read())
+
+
+def compacted_sources(bucket: str, key: str, s3_client=None,
+                      local_output_dir_env: str = "LOCAL_OUTPUT_DIR") -> Optional[List[str]]:
+    """Keys a compacted part replaced (from its manifest); None for other objects."""
+    directory = key.rsplit("/", 1)[0]
+    if not directory.rsplit("/", 1)[-1].startswith(f"run_id={COMPACTED_RUN_PREFIX}"):
+        return None
+    try:
+        manifest = read_manifest(bucket, f"{directory}/{MANIFEST_NAME}", s3_client=s3_client,
+                                 local_output_dir_env=local_output_dir_env)
+    except Exception as e:
+        logger.warning(f"⚠️  No readable manifest for compacted part {key}: {e}")
+        return None
+    return manifest.get("source_keys")
+
+
+def list_keys(
+    bucket: str,
+    prefix: str,
+    suffix: Union[str, Tuple[str, ...]] = ".json",
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR",
+    keep_names: Tuple[str, ...] = ()
+) -> List[str]:
+    """List data object keys under a prefix, skipping "_"-prefixed files and directories.
+
+    Args:
+        bucket: S3 bucket name, "LOCAL", or "file://path"
+        prefix: Key prefix to list (e.g., "up-rera-projects/year=2025/month=11")
+        suffix: Only return keys ending with this suffix (or any of a tuple of suffixes)
+        s3_client: Optional boto3 S3 client
+        keep_names: "_"-prefixed file names to list anyway (e.g. MANIFEST_NAME)
+
+    Returns:
+        Sorted keys relative to the target root
+    """
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    keys: List[str] = []
+
+    if target_type == "file":
+        base = os.path.join(target, prefix)
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith("_")]
+            for name in filenames:
+                if (name.startswith("_") and name not in keep_names) or not name.endswith(suffix):
+                    continue
+                keys.append(os.path.relpath(os.path.join(dirpath, name), target))
+        return sorted(keys)
+
+    s3_client = s3_client or get_s3_client()
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=target, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            *dirs, name = key.split("/")
+            if (not key.endswith(suffix) or any(seg.startswith("_") for seg in dirs)
+                    or (name.startswith("_") and name not in keep_names)):
+                continue
+            keys.append(key)
+    return sorted(keys)
+
+
+def read_object(
+    bucket: str,
+    key: str,
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> bytes:
+    """Read one object written by upload_json_to_s3 (key relative to the target root)."""
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "file":
+        with open(os.path.join(target, key), "rb") as f:
+            return f.read()
+
+    s3_client = s3_client or get_s3_client()
+    return s3_client.get_object(Bucket=target, Key=key)["Body"].read()
+
+
+def read_records(
+    bucket: str,
+    key: str,
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> Iterable[Dict[str, Any]]:
+    """Yield the records of one NDJSON object, gunzipping compacted ".gz" parts."""
+    body = read_object(bucket, key, s3_client=s3_client, local_output_dir_env=local_output_dir_env)
+    if key.endswith(".gz"):
+        body = gzip.decompress(body)
+    return iter_ndjson(body)
+
+
+def delete_objects(
+    bucket: str,
+    keys: List[str],
+    s3_client=None,
+    local_output_dir_env: str = "LOCAL_OUTPUT_DIR"
+) -> int:
+    """Delete objects (keys relative to the target root); missing ones are ignored.
+
+    Empty local directories left behind are removed up to the target root.
+
+    Returns:
+        Number of keys deleted
+    """
+    if not keys:
+        return 0
+    target_type, target = resolve_target(bucket, local_output_dir_env)
+    if target_type == "file":
+        deleted = 0
+        for key in keys:
+            path = os.path.join(target, key)
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                continue
+            directory = os.path.dirname(path)
+            while os.path.abspath(directory) != os.path.abspath(target):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        return deleted
+
+    s3_client = s3_client or get_s3_client()
+    # DeleteObjects takes at most 1000 keys per call
+    for i in range(0, len(keys), 1000):
+        s3_client.delete_objects(Bucket=target, Delete={
+            "Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True})
+    return len(keys)
+
+
+def iter_ndjson(body: bytes) -> Iterable[Dict[str, Any]]:
+    """Yield records from an NDJSON payload, skipping blank lines."""
+    for line in body.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+class NdjsonSpill:
+    """Append-only NDJSON file that rows are flushed to during a run.
+
+    Lets extraction keep only the current window in memory; iterate the
+    spill afterwards to read the rows back in order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        _ensure_dir(os.path.dirname(os.path.abspath(path)))
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self._f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.rows += 1
+        self._f.flush()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+    def __iter__(self):
+        self.close()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def remove(self) -> None:
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+_RECORDS_PLACEHOLDER = "__RECORDS_PLACEHOLDER__"
+
+
+def write_json_document(path: str, document: Dict[str, Any], records: Iterable[Any],
+                        field: Tuple[str, ...] = ("data", "projects")) -> int:
+    """Write document to path with records streamed into document[field...].
+
+    The records list is never materialized: the document is serialized around
+    a placeholder and records are written one per line in its place.
+
+    Returns:
+        Number of records written
+    """
+    doc = json.loads(json.dumps(document, default=str))
+    node = doc
+    for name in field[:-1]:
+        node = node.setdefault(name, {})
+    node[field[-1]] = _RECORDS_PLACEHOLDER
+    head, tail = json.dumps(doc, indent=2, ensure_ascii=False).split(f'"{_RECORDS_PLACEHOLDER}"')
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(head + "[")
+        for record in records:
+            f.write(("\n" if count == 0 else ",\n") + json.dumps(record, ensure_ascii=False, default=str))
+            count += 1
+        f.write("\n]" + tail if count else "]" + tail)
+    return count
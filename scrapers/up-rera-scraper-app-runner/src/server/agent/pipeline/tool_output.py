@@ -0,0 +1,63 @@
+"""
+Compact tool results for agent turns.
+
+Every byte a tool returns is sent back to the model as input on every later
+turn of the run, so tool results follow one protocol:
+
+- JSON without indentation or separator spaces; None, "" and empty
+  containers are dropped
+- only what the agent needs for its next call or its summary, under short keys
+- bulky or diagnostic content (records, per-context stats, memory samples,
+  tracebacks) stays in files and the result carries their paths
+
+tool_result() serializes a result, logs its size and passes it to every
+hook registered with add_size_hook.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# (tool name, result size in bytes)
+SizeHook = Callable[[str, int], None]
+
+_size_hooks: List[SizeHook] = []
+
+
+def add_size_hook(hook: SizeHook) -> None:
+    """Call hook(tool, size_bytes) for every result built with tool_result()."""
+    _size_hooks.append(hook)
+
+
+def remove_size_hook(hook: SizeHook) -> None:
+    if hook in _size_hooks:
+        _size_hooks.remove(hook)
+
+
+def prune(value: Any) -> Any:
+    """Drop None, "" and empty containers, recursively."""
+    if isinstance(value, dict):
+        pruned = {k: prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [prune(v) for v in value]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(prune(value), ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def tool_result(tool: str, payload: Dict[str, Any]) -> str:
+    """Serialize a tool result compactly and account for its size."""
+    text = compact_json(payload)
+    size = len(text.encode("utf-8"))
+    logger.info(f"📏 {tool} result: {size} bytes (~{size // 4} tokens)")
+    for hook in list(_size_hooks):
+        try:
+            hook(tool, size)
+        except Exception as e:
+            logger.warning(f"⚠️  Tool size hook failed: {e}")
+    return text
@@ -0,0 +1,281 @@
+"""
+Memory-mapped IVF vector index over scraped project raw_text.
+
+Layout of an index directory:
+
+    index.json     dim, embedder, centroids, per-list offsets, build stats
+    vectors.f32    float32 vectors, grouped by inverted list (memory-mapped)
+    meta.ndjson    one metadata line per vector, same order as vectors.f32
+
+Search scores the query against the centroids, probes the nprobe closest
+lists and ranks only their vectors, so a query touches a small slice of the
+mapped file instead of every vector.
+"""
+
+import heapq
+import json
+import logging
+import math
+import mmap
+import operator
+import os
+import random
+import shutil
+import uuid
+from array import array
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .embeddings import Embedder, chunk_text, load_embedder
+from .storage import DATA_SUFFIXES, list_keys, read_records, resolve_target
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR_NAME = "_vector_index"
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.ndjson"
+
+_dot = getattr(math, "sumprod", None) or (lambda a, b: sum(map(operator.mul, a, b)))
+
+
+def default_index_dir(bucket: str, prefix: str) -> str:
+    """Return where the index for bucket/prefix lives on local disk.
+
+    File targets keep the index next to the partitioned data
+    (<root>/<prefix>/_vector_index); S3 indexes are built into
+    VECTOR_INDEX_DIR (default /tmp/up_rera_vector_index) since they must be
+    memory-mapped locally.
+    """
+    target_type, target = resolve_target(bucket)
+    if target_type == "file":
+        return os.path.join(target, prefix, INDEX_DIR_NAME)
+    return os.environ.get("VECTOR_INDEX_DIR", "/tmp/up_rera_vector_index")
+
+
+def _record_text(record: Dict[str, Any]) -> str:
+    if record.get("raw_text"):
+        return record["raw_text"]
+    return " | ".join(str(record.get(f, "")) for f in
+                      ("project_name", "rera_number", "promoter_name", "district") if record.get(f))
+
+
+def _kmeans(vectors: List[List[float]], k: int, iters: int, seed: int) -> List[List[float]]:
+    """Spherical k-means on a sample of unit vectors."""
+    rng = random.Random(seed)
+    sample = vectors if len(vectors) <= 20 * k else rng.sample(vectors, 20 * k)
+    centroids = [list(v) for v in rng.sample(sample, k)]
+    dim = len(centroids[0])
+    for _ in range(iters):
+        sums = [[0.0] * dim for _ in range(k)]
+        counts = [0] * k
+        for v in sample:
+            best = max(range(k), key=lambda c: _dot(v, centroids[c]))
+            counts[best] += 1
+            acc = sums[best]
+            for i, x in enumerate(v):
+                acc[i] += x
+        for c in range(k):
+            if counts[c]:
+                norm = math.sqrt(sum(x * x for x in sums[c])) or 1.0
+                centroids[c] = [x / norm for x in sums[c]]
+    return centroids
+
+
+def build_index(
+    records: Iterable[Dict[str, Any]],
+    out_dir: str,
+    embedder: Optional[Embedder] = None,
+    batch_size: int = 256,
+    nlist: Optional[int] = None,
+    kmeans_iters: int = 5,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Embed project records in batches and write an IVF index to out_dir.
+
+    Records are de-duplicated by rera_number, keeping the one with the
+    greatest scraped_at, so building over several runs indexes each project
+    once, as last scraped. The new index is written to a
+    sibling directory and swapped in, so readers never see a half-built index.
+
+    Args:
+        records: Project dicts (from NDJSON parts)
+        out_dir: Index directory to (re)create
+        embedder: Embedder to use (default: HashingEmbedder)
+        batch_size: Texts embedded per batch
+        nlist: Number of inverted lists (default: sqrt(number of vectors))
+        kmeans_iters: Clustering iterations
+        seed: RNG seed for reproducible builds
+
+    Returns:
+        Build stats dict
+    """
+    started = datetime.now(UTC)
+    embedder = embedder or load_embedder("hashing")
+
+    # Objects aren't read in scrape order (random run_ids, compacted parts),
+    # so keep the newest scraped_at per project; ties go to the later record
+    latest: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        key = record.get("rera_number") or record.get("project_name") or record.get("detail_link")
+        if key and (key not in latest or
+                    str(record.get("scraped_at") or "") >= str(latest[key].get("scraped_at") or "")):
+            latest[key] = record
+
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    for record in latest.values():
+        for chunk_no, chunk in enumerate(chunk_text(_record_text(record))):
+            texts.append(chunk)
+            metas.append({
+                "rera_number": record.get("rera_number", ""),
+                "project_name": record.get("project_name", ""),
+                "promoter_name": record.get("promoter_name", ""),
+                "district": record.get("district", ""),
+                "detail_link": record.get("detail_link", ""),
+                "chunk": chunk_no,
+                "text": chunk[:300],
+            })
+
+    vectors: List[List[float]] = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embedder.embed(texts[i:i + batch_size]))
+
+    n = len(vectors)
+    nlist = max(1, min(nlist or int(math.sqrt(n)) or 1, n or 1))
+    centroids = _kmeans(vectors, nlist, kmeans_iters, seed) if n else [[0.0] * embedder.dim]
+
+    lists: List[List[int]] = [[] for _ in centroids]
+    for idx, v in enumerate(vectors):
+        lists[max(range(len(centroids)), key=lambda c: _dot(v, centroids[c]))].append(idx)
+
+    tmp_dir = f"{out_dir}.building-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    offsets = [0]
+    flat = array("f")
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as meta_f:
+        for members in lists:
+            for idx in members:
+                flat.extend(vectors[idx])
+                meta_f.write(json.dumps(metas[idx], ensure_ascii=False) + "\n")
+            offsets.append(offsets[-1] + len(members))
+    with open(os.path.join(tmp_dir, VECTORS_FILE), "wb") as f:
+        flat.tofile(f)
+
+    stats = {
+        "dim": embedder.dim,
+        "embedder": embedder.name,
+        "projects": len(latest),
+        "vectors": n,
+        "nlist": len(centroids),
+        "built_at": started.isoformat(),
+        "build_seconds": round((datetime.now(UTC) - started).total_seconds(), 3),
+    }
+    with open(os.path.join(tmp_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump({**stats, "offsets": offsets, "centroids": centroids}, f)
+
+    old_dir = f"{out_dir}.old-{uuid.uuid4().hex[:8]}"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"🧭 Built vector index: {n} vectors, {len(centroids)} lists -> {out_dir}")
+    return stats
+
+
+def build_index_from_storage(
+    bucket: str,
+    prefix: str,
+    out_dir: Optional[str] = None,
+    embedder_spec: str = "hashing",
+    batch_size: int = 256,
+    s3_client=None
+) -> Dict[str, Any]:
+    """Build the index from every NDJSON part under bucket/prefix."""
+    keys = list_keys(bucket, prefix, suffix=DATA_SUFFIXES, s3_client=s3_client)
+
+    def records():
+        for key in keys:
+            yield from read_records(bucket, key, s3_client=s3_client)
+
+    out_dir = out_dir or default_index_dir(bucket, prefix)
+    stats = build_index(records(), out_dir,
+                        embedder=load_embedder(embedder_spec), batch_size=batch_size)
+    return {**stats, "source_objects": len(keys), "index_dir": out_dir}
+
+
+class VectorIndex:
+    """Read-only view over an index directory; vectors stay memory-mapped."""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        self.dim: int = info["dim"]
+        self.embedder_name: str = info["embedder"]
+        self.offsets: List[int] = info["offsets"]
+        self.centroids: List[List[float]] = info["centroids"]
+        self.stats = {k: v for k, v in info.items() if k not in ("offsets", "centroids")}
+
+        with open(os.path.join(index_dir, META_FILE), "r", encoding="utf-8") as f:
+            self.meta = [json.loads(line) for line in f if line.strip()]
+
+        self._file = open(os.path.join(index_dir, VECTORS_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._vectors = memoryview(self._mmap).cast("f") if self._mmap else memoryview(array("f"))
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 10,
+        nprobe: int = 8,
+        district: Optional[str] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return up to k (score, metadata) hits, best chunk per project.
+
+        Args:
+            query_vector: Unit-length query embedding
+            k: Number of projects to return
+            nprobe: Number of inverted lists to scan
+            district: Optional case-insensitive district filter
+        """
+        if not self.meta:
+            return []
+        probe = heapq.nlargest(min(nprobe, len(self.centroids)), range(len(self.centroids)),
+                               key=lambda c: _dot(query_vector, self.centroids[c]))
+        district_lc = district.lower() if district else None
+        dim = self.dim
+        heap: List[Tuple[float, int]] = []
+        for c in probe:
+            for idx in range(self.offsets[c], self.offsets[c + 1]):
+                if district_lc and self.meta[idx].get("district", "").lower() != district_lc:
+                    continue
+                score = _dot(query_vector, self._vectors[idx * dim:(idx + 1) * dim])
+                if len(heap) < k * 4:
+                    heapq.heappush(heap, (score, idx))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, idx))
+
+        hits: List[Tuple[float, Dict[str, Any]]] = []
+        seen = set()
+        for score, idx in sorted(heap, reverse=True):
+            meta = self.meta[idx]
+            project_key = meta.get("rera_number") or meta.get("project_name")
+            if project_key in seen:
+                continue
+            seen.add(project_key)
+            hits.append((score, meta))
+            if len(hits) == k:
+                break
+        return hits
+
+    def close(self) -> None:
+        self._vectors.release()
+        if self._mmap:
+            self._mmap.close()
+        self._file.close()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Rebuild project NDJSON from archived grid snapshots, without touching the live site.
+
+Reads the snapshot index of one or more runs (written when scrape_projects_list
+runs with snapshot=True), parses every distinct grid snapshot in a process
+pool, normalizes the records and writes them with the usual partitioned
+layout and manifest.
+
+Usage:
+    uv run ./src/server/agent/reparse_snapshots.py --list
+    uv run ./src/server/agent/reparse_snapshots.py --run-id ab12cd34 --out-bucket LOCAL
+    uv run ./src/server/agent/reparse_snapshots.py --all --workers 4 --out-bucket my-bucket \\
+        --out-prefix up-rera-projects-reparsed --partition-by district
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from pipeline.normalize import normalize_projects
+from pipeline.snapshots import DEFAULT_SNAPSHOT_BUCKET, DEFAULT_SNAPSHOT_PREFIX, list_runs, reparse_snapshots
+from pipeline.storage import upload_json_to_s3
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[REPARSE] %(asctime)s - %(levelname)s - %(message)s',
+    stream=sys.stderr
+)
+logger = logging.getLogger(__name__)
+
+
+def normalize_reparsed(projects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize re-parsed projects, keeping each one's snapshot capture time as scraped_at.
+
+    Projects from index entries without captured_at are stamped with the current time.
+    """
+    now = datetime.now().isoformat()
+    return [record
+            for scraped_at, batch in groupby(projects, key=lambda p: p.get("scraped_at"))
+            for record in normalize_projects(batch, scraped_at=scraped_at or now)]
+
+
+def main():
+    load_dotenv(override=True)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default=os.environ.get("SNAPSHOT_BUCKET", DEFAULT_SNAPSHOT_BUCKET),
+                        help="Snapshot store: S3 bucket, LOCAL or file://path")
+    parser.add_argument("--prefix", default=os.environ.get("SNAPSHOT_PREFIX", DEFAULT_SNAPSHOT_PREFIX))
+    parser.add_argument("--run-id", action="append", default=[], help="Run to re-parse (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Re-parse every archived run")
+    parser.add_argument("--list", action="store_true", help="List archived runs and exit")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--out-bucket", default=None,
+                        help="Where to write NDJSON (S3 bucket, LOCAL or file://path); omit for a dry run")
+    parser.add_argument("--out-prefix", default="up-rera-projects")
+    parser.add_argument("--partition-by", default=None, help='Split output by a field, e.g. "district"')
+    args = parser.parse_args()
+
+    runs = list_runs(args.bucket, args.prefix)
+    if args.list:
+        print("\n".join(runs))
+        return
+    run_ids = runs if args.all else args.run_id
+    if not run_ids:
+        parser.error("pass --run-id, --all or --list")
+
+    projects, stats = reparse_snapshots(args.bucket, run_ids, prefix=args.prefix, workers=args.workers)
+    projects = normalize_reparsed(projects)
+
+    if args.out_bucket:
+        result = upload_json_to_s3(args.out_bucket, projects, prefix=args.out_prefix,
+                                   run_id=f"reparse-{run_ids[0]}" if len(run_ids) == 1 else None,
+                                   partition_by=args.partition_by)
+        stats["output"] = {k: result.get(k) for k in ("type", "manifest_key", "run_id", "parts", "total_rows")}
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,64 @@
+import asyncio
+import importlib
 import logging
 from datetime import datetime, UTC
-from fastapi import APIRouter, Query
-from .agent import run_up_rera_scraper_agent
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from .admission import AdmissionRejected, Ticket, admission, client_key
+from .capacity import upstream_circuit
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+async def load_agent_module():
+    """Import the agent stack (agents SDK, LiteLLM, MCP client) on first use.
+
+    It takes seconds to import, so it is kept out of app startup and loaded
+    in a thread, usually already done by the startup prewarm.
+    """
+    return await asyncio.to_thread(importlib.import_module, ".agent", __package__)
+
+
+async def load_stream_module():
+    """Import the in-process crawl (Playwright and the scraping pipeline) on first use.
+
+    Like the agent stack, it stays out of app startup so /healthz is served
+    without loading a browser driver.
+    """
+    return await asyncio.to_thread(importlib.import_module, ".stream", __package__)
+
+
+async def admit(request: Request, max_projects: int, kind: str) -> Ticket:
+    """Admit a scrape or answer 429 with Retry-After (see admission.py)."""
+    try:
+        return await admission.acquire(client_key(request), max_projects, kind)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=e.as_dict(),
+                            headers={"Retry-After": e.retry_after_header})
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases its admission ticket once the response is over.
+
+    Released here rather than in the body generator, which never runs if
+    the client disconnects before the first chunk.
+    """
+
+    def __init__(self, *args, ticket: Ticket, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release(self.ticket)
+
+
 @router.get("/")
 async def run_agent(
+    request: Request,
     max_projects: int = Query(
         default=20, description="Maximum number of projects to scrape")
 ):
@@ -21,16 +71,82 @@ async def run_agent(
     Args:
         max_projects: Number of projects to scrape (default: 20)
 
+    Requests pass admission control first and get 429 with Retry-After when
+    the instance is at capacity or the client over its rate.
+
     Examples:
         - Basic scraping: GET /?max_projects=50
         - Scrape and upload: Set S3_BUCKET env var, then GET /?max_projects=50
     """
-    result = await run_up_rera_scraper_agent(max_projects=max_projects)
-    logger.info("Scraping result: %s", result)
-    return {
+    ticket = await admit(request, max_projects, "agent")
+    try:
+        agent = await load_agent_module()
+        run = await agent.run_up_rera_scraper_agent(max_projects=max_projects)
+    except Exception as e:
+        upstream_circuit.record_failure(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        admission.release(ticket)
+    if run.status == "success":
+        upstream_circuit.record_success()
+    logger.info("Scraping result: %s", run.final_output)
+    response = {
         "service": "UP RERA Scraper",
-        "status": "success",
+        "status": run.status,
         "timestamp": datetime.now(UTC).isoformat(),
         "max_projects": max_projects,
-        "agent_response": result,  # Human-readable formatted response from agent
+        "agent_response": run.final_output,  # Human-readable formatted response from agent
+        "agent_usage": run.usage,  # Tokens, cache hits and latency per LLM turn
     }
+    if run.error:
+        response["error"] = run.error
+    return response
+
+
+@router.get("/stream")
+async def stream_agent(
+    request: Request,
+    max_projects: int = Query(default=20, ge=1, description="Stop after this many projects"),
+    grid_pages: int = Query(default=1, ge=1, description="Grid pages to crawl"),
+    contexts: int = Query(default=1, ge=1, le=8, description="Isolated browser contexts"),
+    districts: str = Query(default="", description='"all", "top:N" or "Lucknow,Agra"'),
+    timeout: int = Query(default=180, ge=10, description="Page load timeout in seconds"),
+    format: str = Query(default="ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse")
+):
+    """Scrape and stream project records as each grid page is extracted.
+
+    Unlike GET /agent/, no agent is involved and nothing is uploaded: the
+    records themselves are the response. One JSON event per line (or per SSE
+    event): a "start" event, one "project" event per normalized record, and a
+    final "stats" trailer with status, counts, time to first record, retries
+    and per-partition results.
+
+    Examples:
+        - curl -N "/agent/stream?max_projects=500&grid_pages=10&contexts=3"
+        - curl -N "/agent/stream?districts=top:5&max_projects=2000&format=sse"
+    """
+    stream = await load_stream_module()
+    ticket = await admit(request, max_projects, "stream")
+    events = stream.stream_projects(max_projects=max_projects, grid_pages=grid_pages, contexts=contexts,
+                                    districts=districts, timeout=timeout)
+    encode = stream.encode_sse if format == "sse" else stream.encode_ndjson
+
+    async def body():
+        try:
+            async for event in events:
+                if event["type"] == "stats":
+                    if event["status"] == "error":
+                        upstream_circuit.record_failure(event.get("error"))
+                    else:
+                        upstream_circuit.record_success()
+                yield encode(event)
+        finally:
+            # Stops the crawl right away when the client disconnects
+            await events.aclose()
+
+    return AdmittedStreamingResponse(
+        body(),
+        ticket=ticket,
+        media_type=stream.SSE_MEDIA_TYPE if format == "sse" else stream.NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
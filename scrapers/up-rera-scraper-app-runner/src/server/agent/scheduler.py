@@ -0,0 +1,384 @@
+"""
+In-service crawl scheduler (SCHEDULER_ENABLED=1).
+
+Runs scheduled crawls inside the API process, so scrapes don't depend on
+someone calling /agent/. Every instance runs the loop, but only the one
+holding the leader lease (pipeline/schedule.py: an S3 object with
+conditional puts, or a local file) starts jobs. The lease is renewed every
+tick, and a crashed leader's lease expires after SCHEDULER_LEASE_SECONDS.
+
+Jobs:
+
+- crawl (SCHEDULER_CRAWL_CRON, default "15 */6 * * *"): district crawl,
+  upload (deduplicated with SCRAPER_DEDUP=1, with change events with
+  SCRAPER_CDC=1) and queueing of the detail pages it found.
+  plan_crawl picks the kind of crawl. A full crawl of every district runs
+  every SCHEDULER_FULL_EVERY_HOURS, preferably off-peak. Other runs are
+  incremental and cover the busiest districts (SCHEDULER_INCREMENTAL,
+  default "top:10").
+- details (SCHEDULER_DETAIL_CRON, default every 10 minutes): only inside
+  the off-peak windows (SCHEDULER_OFF_PEAK, default "22:00-06:00" in
+  SCHEDULER_TZ, default Asia/Kolkata). Each tick archives just enough
+  detail pages from the backlog to drain it evenly by the end of the
+  window, at most SCHEDULER_DETAIL_MAX_BATCH. Pages that fail go back
+  to the end of the backlog and are dropped after SCHEDULER_DETAIL_ATTEMPTS
+  attempts.
+
+Start times get up to SCHEDULER_JITTER_SECONDS of random delay. A due job
+is deferred by SCHEDULER_DEFER_SECONDS when this instance is at its scrape
+limit or the upstream circuit is open. Jobs hold admission units
+(admission.py, kind "scheduled") while they scrape, so /agent requests
+queue behind them and start as soon as they finish; a job that isn't
+admitted within ADMISSION_QUEUE_TIMEOUT is deferred the same way. The load on up-rera.in and on the
+instance stays steady instead of arriving in bursts. The last runs, the
+last full crawl and the detail backlog are kept in _scheduler/state.json
+next to the lease, so a new leader carries on where the old one stopped.
+Status: GET /healthz/scheduler.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from .admission import AdmissionRejected, admission
+from .capacity import scrapes, upstream_circuit
+from .pipeline.circuit import OPEN
+from .pipeline.schedule import (CronSpec, LeaderLock, SchedulerState, Windows, detail_batch_size,
+                                get_leader_lock, merge_backlog, plan_crawl, retry_failed)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TZ = "Asia/Kolkata"
+
+# Runs a job at the given (local) time and returns a summary for the state document
+JobRunner = Callable[[datetime], Awaitable[Dict[str, Any]]]
+
+SCHEDULER_CLIENT = "scheduler"
+
+
+@asynccontextmanager
+async def admitted(projects: int):
+    """Hold admission units for a scheduled scrape of about `projects` projects."""
+    ticket = await admission.acquire(SCHEDULER_CLIENT, projects, kind="scheduled", rate_limited=False)
+    try:
+        yield ticket
+    finally:
+        admission.release(ticket)
+
+
+@dataclass
+class Job:
+    """A cron-scheduled job; window, when set, limits the times it may start."""
+    name: str
+    cron: CronSpec
+    run: JobRunner
+    jitter: float = 0.0
+    window: Optional[Windows] = None
+    next_run: Optional[datetime] = None
+    task: Optional[asyncio.Task] = None
+    skipped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class Scheduler:
+    """Starts due jobs on the instance holding the leader lease."""
+
+    def __init__(self, bucket: str, lock: Optional[LeaderLock] = None, state: Optional[SchedulerState] = None,
+                 tz: Optional[str] = None, tick_seconds: Optional[float] = None,
+                 defer_seconds: Optional[float] = None):
+        self.bucket = bucket
+        self.lock = lock or get_leader_lock(bucket)
+        self.state = state or SchedulerState(bucket)
+        self.tz = ZoneInfo(tz or os.environ.get("SCHEDULER_TZ", DEFAULT_TZ))
+        self.tick_seconds = tick_seconds or float(os.environ.get("SCHEDULER_TICK_SECONDS", 30))
+        self.defer_seconds = defer_seconds or float(os.environ.get("SCHEDULER_DEFER_SECONDS", 300))
+        self.jobs: Dict[str, Job] = {}
+        self.state_lock = asyncio.Lock()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def add_job(self, name: str, cron: str, run: JobRunner, jitter: float = 0.0,
+                window: Optional[Windows] = None) -> Job:
+        job = Job(name, CronSpec(cron), run, jitter=jitter, window=window)
+        self._schedule(job, self.now())
+        self.jobs[name] = job
+        return job
+
+    def _schedule(self, job: Job, after: datetime) -> None:
+        job.next_run = job.cron.next_after(after) + timedelta(seconds=random.uniform(0, job.jitter))
+
+    def _skip(self, job: Job, reason: str, retry_at: Optional[datetime] = None) -> None:
+        job.skipped[reason] = job.skipped.get(reason, 0) + 1
+        if retry_at is None:
+            self._schedule(job, job.next_run)
+        else:
+            job.next_run = retry_at
+        logger.info(f"⏭️  Scheduler: {job.name} {reason}, next run {job.next_run:%Y-%m-%d %H:%M}")
+
+    def _busy_reason(self) -> Optional[str]:
+        if scrapes.in_flight >= scrapes.max_in_flight:
+            return "deferred: instance at its scrape limit"
+        if upstream_circuit.state == OPEN:
+            return "deferred: upstream circuit open"
+        return None
+
+    async def tick(self) -> None:
+        """Renew or take the lease, then start the jobs that are due."""
+        try:
+            leader = await asyncio.to_thread(self.lock.acquire)
+        except Exception as e:
+            logger.warning(f"⚠️  Scheduler lease check failed: {e}")
+            return
+        if not leader:
+            return
+        now = self.now()
+        for job in self.jobs.values():
+            if job.running or job.next_run is None or job.next_run > now:
+                continue
+            if job.window is not None and now not in job.window:
+                self._skip(job, "outside its window")
+                continue
+            busy = self._busy_reason()
+            if busy:
+                self._skip(job, busy, retry_at=now + timedelta(seconds=self.defer_seconds))
+                continue
+            self._schedule(job, now)
+            job.task = asyncio.create_task(self._run(job, now))
+
+    async def _run(self, job: Job, now: datetime) -> None:
+        start = time.perf_counter()
+        status, summary = "ok", {}
+        logger.info(f"⏰ Scheduler: starting {job.name}")
+        try:
+            summary = await job.run(now)
+        except asyncio.CancelledError:
+            raise
+        except AdmissionRejected as e:
+            status, summary = "deferred", {"error": f"not admitted: {e}"}
+            self._skip(job, "deferred: not admitted", retry_at=self.now() + timedelta(seconds=self.defer_seconds))
+        except Exception as e:
+            status, summary = "error", {"error": f"{type(e).__name__}: {str(e)[:300]}"}
+            logger.error(f"❌ Scheduled {job.name} failed: {e}")
+        seconds = round(time.perf_counter() - start, 3)
+        async with self.state_lock:
+            await asyncio.to_thread(self.state.load)
+            record = self.state.job(job.name)
+            record.update(last_run=now.isoformat(), last_status=status, last_seconds=seconds,
+                          last_summary=summary, runs=record.get("runs", 0) + 1)
+            await asyncio.to_thread(self.state.save)
+        logger.info(f"⏰ Scheduler: {job.name} {status} in {seconds}s")
+
+    async def run_forever(self) -> None:
+        logger.info(f"⏰ Scheduler started as {self.lock.owner}: "
+                    + ", ".join(f"{j.name} next {j.next_run:%Y-%m-%d %H:%M}" for j in self.jobs.values()))
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"❌ Scheduler tick failed: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    def start(self) -> asyncio.Task:
+        self._loop_task = asyncio.create_task(self.run_forever())
+        return self._loop_task
+
+    async def stop(self) -> None:
+        """Stop the loop and running jobs, then hand the lease back."""
+        tasks = [t for t in [self._loop_task, *(j.task for j in self.jobs.values())] if t and not t.done()]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except BaseException:
+                pass
+        try:
+            await asyncio.to_thread(self.lock.release)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not release scheduler lease: {e}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "owner": self.lock.owner,
+            "leader": self.lock.is_leader,
+            "tz": str(self.tz),
+            "jobs": {
+                name: {"cron": job.cron.expr, "next_run": job.next_run.isoformat() if job.next_run else None,
+                       "running": job.running, "window": job.window.as_dict() if job.window else None,
+                       "skipped": job.skipped, **self.state.data["jobs"].get(name, {})}
+                for name, job in self.jobs.items()
+            },
+            "last_full_at": self.state.data.get("last_full_at"),
+            "detail_backlog": len(self.state.data.get("detail_backlog") or []),
+        }
+
+
+async def crawl_districts(districts: str, run_id: str) -> Dict[str, Any]:
+    """District crawl in this process; returns projects, the districts read completely and partition stats."""
+    from playwright.async_api import async_playwright
+    from .pipeline.browser_pool import launch_browser
+    from .pipeline.crawl import plan_districts, scrape_districts
+    from .pipeline.har import start_playback_run
+    from .pipeline.normalize import normalize_projects
+    from .pipeline.retry import Retrier
+
+    contexts = int(os.environ.get("SCHEDULER_CONTEXTS", 2))
+    timeout_ms = int(os.environ.get("SCHEDULER_TIMEOUT", 180)) * 1000
+    retrier = Retrier()
+    start_playback_run()
+    async with async_playwright() as p:
+        browser = await launch_browser(p, single_process=contexts <= 1)
+        try:
+            partitions = await plan_districts(browser, districts, retrier, timeout_ms=timeout_ms)
+            projects, outcome = await scrape_districts(
+                browser, partitions, contexts, retrier, timeout_ms=timeout_ms,
+                window_size=int(os.environ.get("SCRAPER_WINDOW_SIZE", 50)),
+                parse_workers=int(os.environ.get("SCRAPER_PARSE_WORKERS", "0")))
+        finally:
+            try:
+                await browser.close()
+            except Exception:
+                pass  # Ignore errors during cleanup
+    stats = outcome.as_dict()
+    return {
+        "projects": normalize_projects(projects, scraped_at=datetime.now().isoformat()),
+        "complete": list(stats["rows"]),
+        "partitions": stats,
+        "retries": retrier.stats.as_dict()["total_retries"],
+    }
+
+
+async def archive_details(items: List[Dict[str, Any]], run_id: str) -> List[str]:
+    """Fetch and archive detail pages (SnapshotStore, SNAPSHOT_BUCKET); returns the links archived."""
+    from playwright.async_api import async_playwright
+    from .pipeline.browser_pool import DEFAULT_CONTEXT_OPTIONS, launch_browser, new_context
+    from .pipeline.snapshots import SnapshotStore, archive_detail_pages
+
+    store = SnapshotStore(run_id)
+    concurrency = int(os.environ.get("SCHEDULER_DETAIL_CONCURRENCY", 2))
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+        try:
+            context = await new_context(browser, **DEFAULT_CONTEXT_OPTIONS)
+            archived = await archive_detail_pages(context.request, store, items, len(items),
+                                                  concurrency=concurrency)
+        finally:
+            try:
+                await browser.close()
+            except Exception:
+                pass  # Ignore errors during cleanup
+    await asyncio.to_thread(store.write_index)
+    return archived
+
+
+def build_scheduler(bucket: str, prefix: str = "up-rera-projects",
+                    crawl: Callable[[str, str], Awaitable[Dict[str, Any]]] = crawl_districts,
+                    details: Callable[[List[Dict[str, Any]], str], Awaitable[List[str]]] = archive_details,
+                    **kwargs: Any) -> Scheduler:
+    """Scheduler with the crawl and details jobs, configured from SCHEDULER_* variables."""
+    from .pipeline.cdc import acapture_changes
+    from .pipeline.dedup import adedup_upload
+    from .pipeline.storage import aupload_json_to_s3
+
+    scheduler = Scheduler(bucket, **kwargs)
+    off_peak = Windows(os.environ.get("SCHEDULER_OFF_PEAK", "22:00-06:00"))
+    full_every = timedelta(hours=float(os.environ.get("SCHEDULER_FULL_EVERY_HOURS", 168)))
+    incremental = os.environ.get("SCHEDULER_INCREMENTAL", "top:10")
+    jitter = float(os.environ.get("SCHEDULER_JITTER_SECONDS", 300))
+    detail_cron = CronSpec(os.environ.get("SCHEDULER_DETAIL_CRON", "*/10 * * * *"))
+    max_batch = int(os.environ.get("SCHEDULER_DETAIL_MAX_BATCH", 200))
+    backlog_limit = int(os.environ.get("SCHEDULER_DETAIL_BACKLOG", 20000))
+    max_attempts = int(os.environ.get("SCHEDULER_DETAIL_ATTEMPTS", 5))
+
+    async def run_crawl(now: datetime) -> Dict[str, Any]:
+        async with scheduler.state_lock:
+            state = await asyncio.to_thread(scheduler.state.load)
+        plan = plan_crawl(state.get("last_full_at"), now, full_every, off_peak, incremental)
+        run_id = uuid.uuid4().hex[:8]
+        logger.info(f"🗓️  Scheduled {plan['mode']} crawl [run_id={run_id}]: {plan['reason']}")
+        # Costed like a scrape of as many projects as the last crawl found
+        last = (state.get("jobs") or {}).get("crawl", {}).get("last_summary") or {}
+        async with admitted(last.get("projects") or 1):
+            try:
+                result = await crawl(plan["districts"], run_id)
+            except Exception as e:
+                upstream_circuit.record_failure(f"{type(e).__name__}: {e}")
+                raise
+            upstream_circuit.record_success()
+        projects = result["projects"]
+        summary: Dict[str, Any] = {**plan, "run_id": run_id, "projects": len(projects),
+                                   "failed_partitions": len(result["partitions"].get("failed") or {})}
+        if projects:
+            if os.environ.get("SCRAPER_DEDUP") == "1":
+                stats = await adedup_upload(bucket, projects, prefix=prefix)
+                summary["upload"] = {"snapshot": stats.get("snapshot_key"), "written": stats["written"]}
+            else:
+                stats = await aupload_json_to_s3(bucket, projects, prefix=prefix, run_id=run_id,
+                                                 partition_by="district")
+                summary["upload"] = {"manifest": stats["manifest_key"], "parts": stats["parts"]}
+            if os.environ.get("SCRAPER_CDC") == "1":
+                changes = await acapture_changes(bucket, projects, run_id=run_id, districts=result["complete"])
+                summary["cdc"] = {k: changes[k] for k in ("inserts", "updates", "deletes", "log_key")}
+        async with scheduler.state_lock:
+            state = await asyncio.to_thread(scheduler.state.load)
+            if plan["mode"] == "full" and not summary["failed_partitions"]:
+                state["last_full_at"] = now.isoformat()
+            state["detail_backlog"] = merge_backlog(
+                state.get("detail_backlog") or [],
+                [{"detail_link": p["detail_link"], "rera_number": p.get("rera_number", "")}
+                 for p in projects if p.get("detail_link")],
+                backlog_limit)
+            await asyncio.to_thread(scheduler.state.save)
+        return summary
+
+    async def run_details(now: datetime) -> Dict[str, Any]:
+        async with scheduler.state_lock:
+            state = await asyncio.to_thread(scheduler.state.load)
+            backlog = state.get("detail_backlog") or []
+            tick = (detail_cron.next_after(now) - now).total_seconds()
+            size = detail_batch_size(len(backlog), off_peak.remaining(now), tick, max_batch)
+            batch = backlog[:size]
+        if not batch:
+            return {"archived": 0, "backlog": len(backlog)}
+        async with admitted(len(batch)):
+            archived = set(await details(batch, f"details-{now:%Y%m%d-%H%M}"))
+        async with scheduler.state_lock:
+            state = await asyncio.to_thread(scheduler.state.load)
+            attempted = {item["detail_link"] for item in batch}
+            # Failed links go to the back with one more attempt, so a page that
+            # keeps failing doesn't block the head of the backlog
+            retry, given_up = retry_failed(batch, archived, max_attempts)
+            state["detail_backlog"] = [i for i in state.get("detail_backlog") or []
+                                       if i["detail_link"] not in attempted] + retry
+            await asyncio.to_thread(scheduler.state.save)
+        if given_up:
+            logger.warning(f"⚠️  Gave up on {len(given_up)} detail page(s) after {max_attempts} attempts: "
+                           f"{', '.join(given_up[:3])}")
+        return {"archived": len(archived), "batch": len(batch), "failed": len(batch) - len(archived),
+                "given_up": len(given_up), "backlog": len(state["detail_backlog"])}
+
+    scheduler.add_job("crawl", os.environ.get("SCHEDULER_CRAWL_CRON", "15 */6 * * *"), run_crawl, jitter=jitter)
+    scheduler.add_job("details", detail_cron.expr, run_details, jitter=min(jitter, 60), window=off_peak)
+    return scheduler
+
+
+def scheduler_enabled() -> bool:
+    return os.environ.get("SCHEDULER_ENABLED", "0") == "1"
+
+
+def scheduler_bucket() -> Optional[str]:
+    return os.environ.get("SCHEDULER_BUCKET") or os.environ.get("S3_BUCKET")
@@ -0,0 +1,171 @@
+"""
+Streaming scrape for GET /agent/stream.
+
+Runs the grid crawl directly in the API process (no agent, no MCP round
+trip) and yields events as pages are extracted:
+
+    {"type": "start", "run_id": ..., ...}
+    {"type": "project", "page": 3, "district": "Lucknow", "data": {...normalized record...}}
+    ...
+    {"type": "stats", "status": "success", "projects": 120, "first_record_seconds": 4.2, ...}
+
+The crawl hands each page's rows to a bounded queue (STREAM_QUEUE_PAGES
+pages, default 4) and waits when it is full, so a slow client slows the
+browser contexts down instead of letting rows pile up in memory. The
+stream stops the crawl once max_projects records have been sent, and when
+the client disconnects.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, UTC
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from .pipeline.browser_pool import launch_browser
+from .pipeline.crawl import plan_districts, scrape_districts, scrape_grid_pages
+from .pipeline.har import start_playback_run
+from .pipeline.normalize import normalize_projects
+from .pipeline.retry import Retrier
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def encode_ndjson(event: Dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def encode_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+async def stream_projects(
+    max_projects: int = 20,
+    grid_pages: int = 1,
+    contexts: int = 1,
+    districts: str = "",
+    timeout: int = 180,
+    queue_pages: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Scrape the projects grid and yield start, project and stats events.
+
+    Args:
+        max_projects: Stop after this many records
+        grid_pages: Grid pages to crawl (ignored when districts is set)
+        contexts: Isolated browser contexts sharing one browser
+        districts: District spec as for scrape_projects_list ("all", "top:N", "Lucknow,Agra")
+        timeout: Page load timeout in seconds
+        queue_pages: Pages buffered between crawl and client (default: STREAM_QUEUE_PAGES or 4)
+
+    Yields:
+        Event dicts; the last one is always {"type": "stats", ...}
+    """
+    run_id = str(uuid.uuid4())[:8]
+    start_playback_run()
+    start = time.perf_counter()
+    scraped_at = datetime.now().isoformat()
+    queue_pages = queue_pages or int(os.environ.get("STREAM_QUEUE_PAGES", 4))
+    window_size = int(os.environ.get("SCRAPER_WINDOW_SIZE", 50))
+    parse_workers = int(os.environ.get("SCRAPER_PARSE_WORKERS", "0"))
+    timeout_ms = timeout * 1000
+    retrier = Retrier()
+    # (meta, rows) per page, then ("end", None) once the crawl has finished
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_pages)
+
+    async def on_page(meta: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+        await queue.put((meta, rows))
+
+    async def crawl():
+        async with async_playwright() as p:
+            browser = await launch_browser(p, single_process=contexts <= 1)
+            try:
+                if districts:
+                    partitions = await plan_districts(browser, districts, retrier, timeout_ms=timeout_ms)
+                    _, outcome = await scrape_districts(
+                        browser, partitions, contexts, retrier, timeout_ms=timeout_ms,
+                        window_size=window_size, parse_workers=parse_workers, on_page=on_page)
+                else:
+                    _, outcome = await scrape_grid_pages(
+                        browser, range(1, grid_pages + 1), contexts, retrier, timeout_ms=timeout_ms,
+                        window_size=window_size, parse_workers=parse_workers, on_page=on_page)
+                return outcome
+            finally:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass  # Ignore errors during cleanup
+
+    async def produce():
+        try:
+            return await crawl()
+        finally:
+            # Not reached with a full queue on cancellation: the consumer is gone then
+            if not asyncio.current_task().cancelling():
+                await queue.put(("end", None))
+
+    logger.info(f"📡 Streaming scrape [run_id={run_id}]: max_projects={max_projects}, "
+                f"grid_pages={grid_pages}, contexts={contexts}, districts={districts or '-'}")
+    producer = asyncio.create_task(produce())
+    sent = pages = 0
+    first_record: Optional[float] = None
+    truncated = False
+    try:
+        yield {"type": "start", "run_id": run_id, "max_projects": max_projects, "grid_pages": grid_pages,
+               "contexts": contexts, "districts": districts or None,
+               "timestamp": datetime.now(UTC).isoformat()}
+        while True:
+            meta, rows = await queue.get()
+            if meta == "end":
+                break
+            pages += 1
+            for record in normalize_projects(rows[:max_projects - sent], scraped_at=scraped_at):
+                if first_record is None:
+                    first_record = time.perf_counter() - start
+                sent += 1
+                yield {"type": "project", "page": meta.get("page"), "district": meta.get("district"),
+                       "data": record}
+            if sent >= max_projects:
+                truncated = True
+                break
+
+        stats: Dict[str, Any] = {"type": "stats", "run_id": run_id, "status": "success"}
+        if truncated:
+            producer.cancel()
+        try:
+            stats["partitions"] = (await producer).as_dict()
+            if stats["partitions"]["failed"]:
+                stats["status"] = "partial"
+        except asyncio.CancelledError:
+            if not truncated:
+                raise
+        except Exception as e:
+            logger.error(f"❌ Streaming scrape {run_id} failed: {e}")
+            stats.update(status="error" if not sent else "partial", error=str(e)[:500])
+        stats.update({
+            "projects": sent,
+            "pages": pages,
+            "truncated": truncated,
+            "seconds": round(time.perf_counter() - start, 3),
+            "first_record_seconds": round(first_record, 3) if first_record is not None else None,
+            "retries": retrier.stats.as_dict(),
+            "timestamp": datetime.now(UTC).isoformat(),
+        })
+        logger.info(f"📡 Stream {run_id} done: {sent} projects from {pages} pages "
+                    f"in {stats['seconds']}s ({stats['status']})")
+        yield stats
+    finally:
+        # Client went away (or we stopped early): stop the crawl and close the browser
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except BaseException:
+                pass
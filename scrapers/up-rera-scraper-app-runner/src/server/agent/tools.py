@@ -1,18 +1,17 @@
+import asyncio
 import json
 import logging
 import os
-from datetime import datetime
-from typing import Any, List, Dict, Optional
+from collections import Counter
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import Any, Dict, List, Optional
 from agents import function_tool
+from .pipeline.cdc import acapture_changes
+from .pipeline.dedup import adedup_upload
+from .pipeline.storage import aupload_json_to_s3, make_partitioned_key, new_run_id, upload_json_to_s3
+from .pipeline.tool_output import tool_result
 
-try:
-    import boto3
-    BOTO3_AVAILABLE = True
-except ImportError:
-    BOTO3_AVAILABLE = False
-    logging.warning("⚠️  boto3 not available - S3 uploads will not work")
+__all__ = ["ingest_scraped_data", "make_partitioned_key", "upload_json_to_s3", "upload_to_s3"]
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,134 +20,51 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# ============================================================================
-# Helper Functions for S3 Upload
-# ============================================================================
+def _load_saved_file(filepath: Path) -> Dict[str, Any]:
+    """The "data" object of a file saved by scrape_projects_list, plus its size."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data_obj = json.load(f).get("data", {})
+    return {"data": data_obj, "size": filepath.stat().st_size}
 
-def make_partitioned_key(prefix: str = "data", now: Optional[datetime] = None, ext: str = "json") -> str:
-    """Generate a partitioned S3 key with year/month/day structure.
 
-    Args:
-        prefix: Prefix for the key (e.g., "data", "scrapes")
-        now: Datetime to use for partitioning (defaults to UTC now)
-        ext: File extension (default: "json")
+def _complete_districts(data_obj: Dict[str, Any], projects: List[Dict[str, Any]]) -> Optional[List[str]]:
+    """Districts a saved district crawl read completely, or None when deletes can't be inferred.
 
-    Returns:
-        Partitioned key like: "prefix/year=2025/month=11/day=08/20251108T123456.json"
+    A district crawl records rows per finished district under partitions;
+    when the saved projects were capped (max_projects) some districts are
+    incomplete and nothing is reported.
     """
-    now = now or datetime.utcnow()
-    year = now.strftime("%Y")
-    month = now.strftime("%m")
-    day = now.strftime("%d")
-    ts = now.strftime("%Y%m%dT%H%M%S")
-    filename = f"{ts}.{ext}"
-    return f"{prefix}/year={year}/month={month}/day={day}/{filename}"
-
-
-def _ensure_dir(path: str) -> None:
-    """Create directory if it doesn't exist."""
-    os.makedirs(path, exist_ok=True)
-
-
-def upload_json_to_s3(
-    bucket: str,
-    data: Any,
-    prefix: str = "scrapes",
-    s3_client=None,
-    local_output_dir_env: str = "LOCAL_OUTPUT_DIR",
-    content_type: str = "application/x-ndjson"
-) -> Dict[str, str]:
-    """
-    Save data as newline-delimited JSON (NDJSON) to:
-    - local directory (when bucket == "LOCAL"),
-    - file:// path,
-    - or S3.
-
-    Args:
-        bucket: S3 bucket name, "LOCAL", or "file://path"
-        data: Data to upload (dict or list of dicts)
-        prefix: Prefix for partitioned key (e.g., "scrapes", "up-rera-projects")
-        s3_client: Optional boto3 S3 client (created if not provided)
-        local_output_dir_env: Environment variable name for local output directory
-        content_type: MIME type for the uploaded content
-
-    Returns:
-        Dict with keys: type, target, key, url (for S3)
-    """
-    # Always work with a list of records
-    if not isinstance(data, list):
-        data = [data]
-
-    # Convert records to NDJSON string
-    ndjson_data = "\n".join(json.dumps(record, default=str)
-                            for record in data) + "\n"
-
-    # Case 1: Local output dir
-    if bucket == "LOCAL":
-        local_dir = os.environ.get(local_output_dir_env)
-        if not local_dir:
-            raise ValueError(
-                f"Environment variable {local_output_dir_env} not set for LOCAL bucket")
-
-        key = make_partitioned_key(prefix=prefix)
-        path = os.path.join(local_dir, key)
-        _ensure_dir(os.path.dirname(path))
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(ndjson_data)
-
-        logger.info(f"💾 Saved to local file: {path}")
-        return {"type": "file", "target": local_dir, "key": path}
-
-    # Case 2: file:// destination
-    if bucket.startswith("file://"):
-        parsed = urlparse(bucket)
-        root = parsed.path or parsed.netloc
-        if not root.startswith("/"):
-            root = os.path.abspath(root)
-
-        key = make_partitioned_key(prefix=prefix)
-        path = os.path.join(root, key)
-        _ensure_dir(os.path.dirname(path))
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(ndjson_data)
-
-        logger.info(f"💾 Saved to file:// path: {path}")
-        return {"type": "file", "target": root, "key": path}
-
-    # Case 3: Upload to S3
-    if not BOTO3_AVAILABLE:
-        raise ImportError(
-            "boto3 is required for S3 uploads. Install with: pip install boto3")
-
-    s3_client = s3_client or boto3.client("s3")
-    key = make_partitioned_key(prefix=prefix)
-
-    s3_client.put_object(
-        Bucket=bucket,
-        Key=key,
-        Body=ndjson_data.encode("utf-8"),
-        ContentType=content_type
-    )
-
-    s3_url = f"s3://{bucket}/{key}"
-    logger.info(f"☁️  Uploaded to S3: {s3_url}")
-
-    return {
-        "type": "s3",
-        "target": bucket,
-        "key": key,
-        "url": s3_url
-    }
+    if data_obj.get("partition_by") != "district":
+        return None
+    rows = (data_obj.get("partitions") or {}).get("rows") or {}
+    if not rows or sum(rows.values()) != len(projects):
+        return None
+    return list(rows)
 
 
 @function_tool
-def upload_to_s3(file_path: str, bucket: str, prefix: str = "up-rera-projects") -> str:
+async def upload_to_s3(file_path: str, bucket: str, prefix: str = "up-rera-projects",
+                       dedup: bool = False, cdc: bool = False) -> str:
     """Upload scraped UP RERA project data to AWS S3 with partitioned keys.
 
-    Uploads the JSON file to S3 using a partitioned key structure:
-    s3://bucket/prefix/year=YYYY/month=MM/day=DD/YYYYMMDDTHHmmss.json
+    Uploads the JSON file to S3 using a partitioned, per-run key structure:
+    s3://bucket/prefix/year=YYYY/month=MM/day=DD/run_id=<run_id>/<timestamp>_part-00000.json
+    plus a _manifest.json in the same run directory listing parts, row counts
+    and checksums. Files from a district crawl (partition_by="district") are
+    split into one .../day=DD/district=<name>/run_id=<run_id>/ directory per
+    district, each with its own manifest. Every call gets a fresh run_id, so
+    uploading the same file again writes a new run next to the first one
+    instead of overwriting its manifest.
+
+    With dedup (or SCRAPER_DEDUP=1), only projects that are new or changed
+    since earlier runs are written, merged into one daily snapshot:
+    prefix/year=YYYY/month=MM/day=DD/snapshot/snapshot-g<generation>.json.
+
+    With cdc (or SCRAPER_CDC=1), insert/update/delete events against the
+    previous upload are also appended to the change log (CDC_PREFIX,
+    default up-rera-changes/year=YYYY/month=MM/day=DD/events-*.json) and
+    published to CDC_QUEUE_URL when set. Deletes are only emitted for
+    districts a district crawl read completely.
 
     Supports three destination types:
     1. S3 bucket: bucket="my-bucket-name"
@@ -159,17 +75,17 @@ def upload_to_s3(file_path: str, bucket: str, prefix: str = "up-rera-projects")
         file_path: Absolute path to the JSON file to upload (from scrape_projects_list)
         bucket: S3 bucket name, "LOCAL", or "file://path"
         prefix: S3 key prefix for organizing data (default: "up-rera-projects")
+        dedup: Write only new/changed projects into the daily snapshot
+        cdc: Also emit change events (inserts, updates with field diffs, deletes)
 
     Returns:
-        JSON string containing:
-        - status: "success" or "error"
-        - upload_type: "s3", "file", or "local"
-        - bucket/target: Destination identifier
-        - s3_key: Full S3 key or file path
-        - s3_url: Full S3 URL (for S3 uploads)
-        - file_size: Original file size in bytes
-        - total_projects: Number of projects uploaded
-        - message: Human-readable status message
+        Compact JSON: {"ok", "type" ("s3", "file" or "local"), "key" (first data
+        part), "manifest" (run manifest listing every part), "parts", "projects",
+        "url" (S3 only), "retries", and for district crawls "partition_by" and
+        "partitions" (count; per-partition keys are in the manifests)}.
+        With dedup: {"ok", "dedup": true, "snapshot", "projects", "written", "new",
+        "changed", "unchanged"}. With cdc, also "cdc": {"inserts", "updates",
+        "deletes", "log", "published"}. On failure: {"ok": false, "error"}.
     """
     try:
         logger.info("☁️  Starting S3 upload...")
@@ -181,83 +97,130 @@ def upload_to_s3(file_path: str, bucket: str, prefix: str = "up-rera-projects")
         filepath = Path(file_path)
         if not filepath.exists():
             logger.error(f"❌ Source file not found: {file_path}")
-            return json.dumps({
-                "status": "error",
-                "message": "Source file not found",
-                "error": f"The file {file_path} does not exist"
-            })
+            return tool_result("upload_to_s3", {"ok": False, "error": f"File not found: {file_path}"})
 
-        # Read the JSON file
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Read the JSON file off the event loop
+        data_obj = (await asyncio.to_thread(_load_saved_file, filepath))["data"]
 
         logger.info("   ✅ Source file loaded successfully")
 
         # Extract project data for NDJSON format
-        data_obj = data.get("data", {})
         projects = data_obj.get("projects", [])
 
         if not projects:
             logger.warning("⚠️  No projects found in file")
-            return json.dumps({
-                "status": "error",
-                "message": "No projects found",
-                "error": "The file contains no project data to upload"
-            })
+            return tool_result("upload_to_s3", {"ok": False, "error": "The file contains no projects"})
 
         logger.info(f"   Total projects to upload: {len(projects)}")
 
-        # Upload to S3 (or local/file)
-        upload_result = upload_json_to_s3(
-            bucket=bucket,
-            data=projects,  # Upload projects as NDJSON
-            prefix=prefix
-        )
-
-        logger.info(f"   ✅ Upload complete!")
-        logger.info(f"   Type: {upload_result['type']}")
-        logger.info(f"   Key: {upload_result['key']}")
-        if upload_result.get('url'):
-            logger.info(f"   URL: {upload_result['url']}")
-
-        # Build response
-        result = {
-            "status": "success",
-            "upload_type": upload_result["type"],
-            "bucket": bucket,
-            "target": upload_result["target"],
-            "s3_key": upload_result["key"],
-            "file_size": filepath.stat().st_size,
-            "file_size_kb": round(filepath.stat().st_size / 1024, 2),
-            "total_projects": len(projects),
-            "run_id": data_obj.get('run_id', 'N/A'),
-            "scraped_at": data_obj.get('scraped_at', 'N/A'),
-            "message": f"Successfully uploaded {len(projects)} projects to {bucket}"
-        }
-
-        # Add S3 URL if available
-        if upload_result.get('url'):
-            result["s3_url"] = upload_result["url"]
-
-        logger.info(f"\n✅ Upload to S3 complete!")
-        return json.dumps(result, indent=2)
+        if dedup or os.environ.get("SCRAPER_DEDUP") == "1":
+            stats = await adedup_upload(bucket, projects, prefix=prefix)
+            logger.info(f"   ✅ Daily snapshot: {stats.get('snapshot_key') or 'unchanged'}")
+            result = {
+                "ok": True,
+                "dedup": True,
+                "snapshot": stats.get("snapshot_key"),
+                "projects": len(projects),
+                "written": stats["written"],
+                "new": stats["new"],
+                "changed": stats["changed"],
+                "unchanged": stats["unchanged"],
+            }
+        else:
+            # Upload to S3 (or local/file) on the upload thread pool
+            upload_result = await aupload_json_to_s3(
+                bucket=bucket,
+                data=projects,  # Upload projects as NDJSON
+                prefix=prefix,
+                # Not the scrape's run_id: a second upload of the same file would replace
+                # the first one's manifest and orphan its parts
+                run_id=new_run_id(),
+                partition_by=data_obj.get('partition_by')
+            )
+
+            logger.info(f"   ✅ Upload complete!")
+            logger.info(f"   Type: {upload_result['type']}")
+            logger.info(f"   Key: {upload_result['key']}")
+            logger.info(f"   Manifest: {upload_result['manifest_key']}")
+            if upload_result.get('url'):
+                logger.info(f"   URL: {upload_result['url']}")
+
+            logger.info(f"\n✅ Upload to S3 complete!")
+            result = {
+                "ok": True,
+                "type": upload_result["type"],
+                "key": upload_result["key"],
+                "manifest": upload_result["manifest_key"],
+                "parts": upload_result["parts"],
+                "projects": len(projects),
+                "url": upload_result.get("url"),
+                "retries": upload_result["retries"]["total_retries"],
+                "partition_by": upload_result.get("partition_by"),
+                "partitions": len(upload_result.get("partitions") or {}) or None,
+            }
+
+        if cdc or os.environ.get("SCRAPER_CDC") == "1":
+            changes = await acapture_changes(bucket, projects, run_id=data_obj.get('run_id'),
+                                             districts=_complete_districts(data_obj, projects))
+            logger.info(f"   ✅ Change log: {changes.get('log_key') or 'no changes'}")
+            result["cdc"] = {
+                "inserts": changes["inserts"],
+                "updates": changes["updates"],
+                "deletes": changes["deletes"],
+                "log": changes.get("log_key"),
+                "published": changes["published"],
+            }
+        return tool_result("upload_to_s3", result)
 
     except ImportError as e:
         logger.error(f"❌ Missing dependency: {e}")
-        return json.dumps({
-            "status": "error",
-            "message": "Missing boto3 dependency",
-            "error": str(e),
-            "hint": "Install boto3 with: pip install boto3"
-        })
+        return tool_result("upload_to_s3", {"ok": False, "error": f"Missing dependency: {e}"})
     except Exception as e:
         logger.error(f"❌ Failed to upload to S3: {e}")
         import traceback
         logger.error(traceback.format_exc())
-        return json.dumps({
-            "status": "error",
-            "message": "S3 upload failed",
-            "error": str(e),
-            "file_path": file_path,
-            "bucket": bucket
+        return tool_result("upload_to_s3", {"ok": False, "error": f"Upload to {bucket} failed: {str(e)[:300]}"})
+
+
+# Fields whose emptiness is worth reporting when verifying a scrape
+_CHECKED_FIELDS = ("project_name", "rera_number", "promoter_name", "district", "project_type",
+                   "registration_date", "detail_link")
+
+
+@function_tool
+async def ingest_scraped_data(file_path: str) -> str:
+    """Verify a file saved by scrape_projects_list and summarize its contents.
+
+    Args:
+        file_path: The "file" path from the scrape_projects_list result
+
+    Returns:
+        Compact JSON: {"ok", "projects", "kb", "scraped_at", "districts" (top 5
+        as "name:count"), "duplicates" (repeated rera_number count), "empty"
+        ({field: rows with no value} for key fields)}. On failure: {"ok": false, "error"}.
+    """
+    try:
+        filepath = Path(file_path)
+        if not filepath.exists():
+            return tool_result("ingest_scraped_data", {"ok": False, "error": f"File not found: {file_path}"})
+        saved = await asyncio.to_thread(_load_saved_file, filepath)
+        data_obj = saved["data"]
+        projects = data_obj.get("projects", [])
+        logger.info(f"🔎 Verifying {file_path}: {len(projects)} projects")
+
+        districts = Counter(p.get("district") or "unknown" for p in projects)
+        rera_numbers = Counter(p.get("rera_number") for p in projects if p.get("rera_number"))
+        return tool_result("ingest_scraped_data", {
+            "ok": bool(projects),
+            "error": None if projects else "The file contains no projects",
+            "projects": len(projects),
+            "kb": round(saved["size"] / 1024, 1),
+            "scraped_at": data_obj.get("scraped_at"),
+            "districts": [f"{name}:{count}" for name, count in districts.most_common(5)],
+            "duplicates": sum(count - 1 for count in rera_numbers.values()) or None,
+            "empty": {field: n for field in _CHECKED_FIELDS
+                      if (n := sum(1 for p in projects if not p.get(field)))} or None,
         })
+    except Exception as e:
+        logger.error(f"❌ Failed to verify {file_path}: {e}")
+        return tool_result("ingest_scraped_data", {"ok": False, "error": f"Unreadable file: {str(e)[:300]}"})
@@ -1,16 +1,54 @@
+import asyncio
 import logging
 from datetime import datetime, UTC
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from ..agent.admission import admission
+from ..agent.capacity import readiness
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
 @router.get("/")
+@router.get("/live")
 async def root():
-    """Health check endpoint."""
+    """Liveness: the process is up and its event loop is responding."""
     return {
         "service": "UP RERA Scraper",
-        "status": "healthy2",
+        "status": "healthy",
         "timestamp": datetime.now(UTC).isoformat(),
     }
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    """Readiness: 200 while this instance can take another scrape, 503 when saturated.
+
+    Reports in-flight scrapes, browser slots, queue depth, memory headroom and
+    the upstream circuit (see src/server/agent/capacity.py).
+    """
+    profile = getattr(request.app.state, "startup_profile", None)
+    browser = next((p for p in (profile.phases if profile else []) if p["phase"] == "browser"), None)
+    report = await asyncio.to_thread(
+        readiness, browser_launchable=None if browser is None else browser["status"] == "ok")
+    report["admission"] = admission.as_dict()
+    report.update(service="UP RERA Scraper", status="ready" if report["ready"] else "saturated",
+                  timestamp=datetime.now(UTC).isoformat())
+    if not report["ready"]:
+        logger.info(f"🚦 Not ready: {'; '.join(report['reasons'])}")
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@router.get("/startup")
+async def startup(request: Request):
+    """Startup profile: import and app creation time, then each prewarm step."""
+    profile = getattr(request.app.state, "startup_profile", None)
+    return profile.as_dict() if profile else {"prewarm_done": False, "phases": []}
+
+
+@router.get("/scheduler")
+async def scheduler(request: Request):
+    """Crawl scheduler: leader lease, next and last run of each job, detail backlog (SCHEDULER_ENABLED=1)."""
+    running = getattr(request.app.state, "scheduler", None)
+    return running.as_dict() if running else {"enabled": False}
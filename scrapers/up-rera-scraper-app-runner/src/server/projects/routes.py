@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, UTC
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..agent.pipeline.project_store import ProjectStore, SORTABLE
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+_store: Optional[ProjectStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ProjectStore:
+    """Open the project index once per process (PROJECT_DB_PATH)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProjectStore()
+        return _store
+
+
+@router.get("/")
+async def list_projects(
+    district: Optional[str] = Query(default=None, description="District (case-insensitive)"),
+    promoter_name: Optional[str] = Query(default=None, description="Exact promoter name"),
+    project_type: Optional[str] = Query(default=None, description="Residential, Commercial, ..."),
+    q: Optional[str] = Query(default=None, description="Substring of the project name"),
+    registered_from: Optional[str] = Query(default=None, description="YYYY-MM-DD, inclusive"),
+    registered_to: Optional[str] = Query(default=None, description="YYYY-MM-DD, inclusive"),
+    end_before: Optional[str] = Query(default=None, description="Projects ending on/before YYYY-MM-DD"),
+    order_by: str = Query(default="registration_date", description=f"One of {sorted(SORTABLE)}"),
+    desc: bool = Query(default=True, description="Sort descending"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0)
+):
+    """Query previously scraped projects without launching a browser.
+
+    Examples:
+        - Projects in Lucknow registered this month:
+          GET /projects/?district=Lucknow&registered_from=2025-11-01
+        - Second page of a promoter's projects:
+          GET /projects/?promoter_name=ABC%20Infra&limit=50&offset=50
+    """
+    start = time.perf_counter()
+    try:
+        # SQLite queries block: run them in a worker thread (the store serializes them)
+        total, rows = await asyncio.to_thread(
+            lambda: get_store().query(
+                district=district, promoter_name=promoter_name, project_type=project_type,
+                name_contains=q, registered_from=registered_from, registered_to=registered_to,
+                end_before=end_before, order_by=order_by, descending=desc,
+                limit=limit, offset=offset))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "service": "UP RERA Scraper",
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "projects": rows,
+    }
+
+
+@router.get("/{rera_number}")
+async def get_project(rera_number: str):
+    """Fetch one project by RERA registration number."""
+    project = await asyncio.to_thread(lambda: get_store().get(rera_number))
+    if project is None:
+        raise HTTPException(status_code=404, detail=f"Project {rera_number} not found")
+    return project
+
+
+@router.post("/ingest")
+async def ingest_projects():
+    """Incrementally ingest new NDJSON objects under S3_BUCKET/S3_PREFIX into the index.
+
+    Set QUERY_BUCKET to read from a different location (e.g. "LOCAL" or "file:///data").
+    """
+    bucket = os.environ.get("QUERY_BUCKET") or os.environ.get("S3_BUCKET")
+    prefix = os.environ.get("S3_PREFIX", "up-rera-projects")
+    if not bucket:
+        raise HTTPException(
+            status_code=503, detail="No data location configured (set QUERY_BUCKET or S3_BUCKET)")
+    stats = await asyncio.to_thread(get_store().ingest, bucket, prefix)
+    return {
+        "service": "UP RERA Scraper",
+        "status": "success",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "ingest": stats,
+        "store": await asyncio.to_thread(lambda: get_store().stats()),
+    }
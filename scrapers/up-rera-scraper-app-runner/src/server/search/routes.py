@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, UTC
+from typing import Any, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
+from ..agent.pipeline.embeddings import load_embedder
+from ..agent.pipeline.vector_index import VectorIndex, build_index_from_storage, default_index_dir, INDEX_FILE
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Loaded index, reopened when index.json changes on disk (after a rebuild)
+_state = {"index": None, "embedder": None, "mtime": None}
+_state_lock = threading.Lock()
+
+
+def _data_location():
+    bucket = os.environ.get("SEARCH_BUCKET") or os.environ.get("S3_BUCKET")
+    prefix = os.environ.get("S3_PREFIX", "up-rera-projects")
+    if not bucket:
+        raise HTTPException(
+            status_code=503, detail="No data location configured (set SEARCH_BUCKET or S3_BUCKET)")
+    return bucket, prefix
+
+
+def _get_index() -> Tuple[VectorIndex, Any]:
+    """(index, embedder), reloaded if the index changed on disk. Blocking; runs in a worker thread."""
+    bucket, prefix = _data_location()
+    index_dir = default_index_dir(bucket, prefix)
+    try:
+        mtime = os.path.getmtime(os.path.join(index_dir, INDEX_FILE))
+    except OSError:
+        raise HTTPException(
+            status_code=404, detail="Vector index not built yet (POST /search/index)")
+
+    with _state_lock:
+        if _state["index"] is None or _state["mtime"] != mtime:
+            # The old index is not closed here: searches in other threads may still be reading
+            # it, and its memory map is released when the last of them drops it
+            index = VectorIndex(index_dir)
+            _state.update(index=index, embedder=load_embedder(index.embedder_name), mtime=mtime)
+            logger.info(f"🧭 Loaded vector index {index_dir} ({len(index)} vectors)")
+        return _state["index"], _state["embedder"]
+
+
+def _search(q: str, k: int, district: Optional[str], nprobe: int):
+    index, embedder = _get_index()
+    query_vector = embedder.embed([q])[0]
+    return index.search(query_vector, k=k, nprobe=nprobe, district=district)
+
+
+@router.get("/")
+async def search_projects(
+    q: str = Query(..., min_length=1, description="Free-text query"),
+    k: int = Query(default=10, ge=1, le=100, description="Number of projects to return"),
+    district: Optional[str] = Query(default=None, description="Restrict to one district"),
+    nprobe: int = Query(default=8, ge=1, le=256, description="Inverted lists to scan")
+):
+    """Similarity search over scraped projects' raw_text.
+
+    Examples:
+        - GET /search/?q=residential+towers+noida
+        - GET /search/?q=plotted+colony&district=Lucknow&k=5
+    """
+    start = time.perf_counter()
+    # Loading, embedding and scanning the index are CPU and disk work: keep them off the event loop
+    hits = await asyncio.to_thread(_search, q, k, district, nprobe)
+    return {
+        "service": "UP RERA Scraper",
+        "query": q,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "total": len(hits),
+        "results": [{"score": round(score, 4), **meta} for score, meta in hits],
+    }
+
+
+@router.post("/index")
+async def rebuild_index(
+    embedder: str = Query(default="hashing", description='Embedder spec, e.g. "hashing:256"')
+):
+    """(Re)build the vector index from the partitioned NDJSON under S3_BUCKET/S3_PREFIX."""
+    bucket, prefix = _data_location()
+    stats = await asyncio.to_thread(build_index_from_storage, bucket, prefix, embedder_spec=embedder)
+    return {
+        "service": "UP RERA Scraper",
+        "status": "success",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "index": stats,
+    }
@@ -0,0 +1,176 @@
+"""
+Service startup: profile and background prewarm.
+
+The app serves /healthz as soon as the routers are registered. The agent
+stack (agents SDK, LiteLLM, MCP client) is imported lazily, so it isn't
+paid for before the first health check. The lifespan then prewarms it in
+the background, together with the S3 client and a Chromium launch, so the
+first /agent request doesn't pay for them either.
+
+STARTUP_PREWARM selects the steps (comma-separated, default
+"model,s3,browser"; "none" disables prewarming). Every phase is recorded
+in a StartupProfile, logged when prewarming finishes and served by
+GET /healthz/startup.
+
+With SCHEDULER_ENABLED=1 the lifespan also starts the crawl scheduler
+(agent/scheduler.py) and stops it, releasing its lease, on shutdown.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, UTC
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+PREWARM_STEPS = ("model", "s3", "browser")
+
+
+class StartupProfile:
+    """Seconds spent in each startup phase, measured from `origin`."""
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.started_at = datetime.now(UTC).isoformat()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_seconds: Optional[float] = None
+        self.prewarm_seconds: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self.origin, 3)
+
+    def record(self, phase: str, seconds: float, status: str = "ok", error: Optional[str] = None) -> None:
+        entry = {"phase": phase, "seconds": round(seconds, 3), "at": self.elapsed(), "status": status}
+        if error:
+            entry["error"] = error[:300]
+        self.phases.append(entry)
+
+    def mark_ready(self) -> None:
+        """The app accepts requests (the lifespan has started)."""
+        self.ready_seconds = self.elapsed()
+        logger.info(f"⏱️  Serving requests {self.ready_seconds}s after import")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "ready_seconds": self.ready_seconds,
+            "prewarm_done": self.prewarm_seconds is not None,
+            "prewarm_seconds": self.prewarm_seconds,
+            "phases": self.phases,
+        }
+
+    def report(self) -> str:
+        lines = [f"⏱️  Startup profile: ready in {self.ready_seconds}s, prewarmed in {self.prewarm_seconds}s"]
+        for p in self.phases:
+            mark = "✅" if p["status"] == "ok" else "⚠️ "
+            lines.append(f"   {mark} {p['phase']:<10} {p['seconds']:>7.3f}s  (done at {p['at']}s)"
+                         + (f"  {p['error']}" if p.get("error") else ""))
+        return "\n".join(lines)
+
+
+def prewarm_steps() -> List[str]:
+    spec = os.environ.get("STARTUP_PREWARM", ",".join(PREWARM_STEPS)).strip().lower()
+    if spec in ("", "none", "0", "off"):
+        return []
+    steps = [s.strip() for s in spec.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in PREWARM_STEPS]
+    if unknown:
+        logger.warning(f"⚠️  Ignoring unknown STARTUP_PREWARM steps: {unknown}")
+    return [s for s in steps if s in PREWARM_STEPS]
+
+
+def _warm_model() -> None:
+    """Import the agent stack and build the shared LitellmModel."""
+    agent = importlib.import_module(".agent.agent", __package__)
+    agent.get_model()
+
+
+def _warm_s3() -> None:
+    from .agent.pipeline.storage import get_s3_client
+    get_s3_client()
+
+
+async def _warm_browser() -> None:
+    """Launch and close Chromium once, so the binary and its libraries are paged in."""
+    from playwright.async_api import async_playwright
+    from .agent.pipeline.browser_pool import launch_browser
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+        await browser.close()
+
+
+async def _timed(profile: StartupProfile, phase: str, step: Callable[[], Awaitable[Any]]) -> None:
+    start = time.perf_counter()
+    try:
+        await step()
+        profile.record(phase, time.perf_counter() - start)
+    except Exception as e:
+        # A failed prewarm only means the first request pays for it
+        message = (str(e).splitlines() or [""])[0]
+        profile.record(phase, time.perf_counter() - start, status="error", error=f"{type(e).__name__}: {message}")
+
+
+async def prewarm(profile: StartupProfile, steps: Optional[List[str]] = None) -> None:
+    """Run the prewarm steps one after another, off the event loop where they block."""
+    steps = prewarm_steps() if steps is None else steps
+    start = time.perf_counter()
+    runners = {
+        "model": lambda: asyncio.to_thread(_warm_model),
+        "s3": lambda: asyncio.to_thread(_warm_s3),
+        "browser": _warm_browser,
+    }
+    for step in steps:
+        await _timed(profile, step, runners[step])
+    profile.prewarm_seconds = round(time.perf_counter() - start, 3)
+    logger.info(profile.report())
+
+
+def start_scheduler(app: FastAPI) -> None:
+    """Start the crawl scheduler when SCHEDULER_ENABLED=1 and a bucket is configured."""
+    from .agent.scheduler import build_scheduler, scheduler_bucket, scheduler_enabled
+
+    app.state.scheduler = None
+    if not scheduler_enabled():
+        return
+    bucket = scheduler_bucket()
+    if not bucket:
+        logger.warning("⚠️  SCHEDULER_ENABLED=1 but no SCHEDULER_BUCKET or S3_BUCKET set - scheduler not started")
+        return
+    try:
+        scheduler = build_scheduler(bucket, prefix=os.environ.get("S3_PREFIX", "up-rera-projects"))
+    except Exception as e:
+        logger.error(f"❌ Scheduler not started: {e}")
+        return
+    scheduler.start()
+    app.state.scheduler = scheduler
+
+
+def lifespan_with(profile: StartupProfile):
+    """FastAPI lifespan that starts prewarming (and the scheduler) in the background and returns immediately."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.startup_profile = profile
+        profile.mark_ready()
+        task = asyncio.create_task(prewarm(profile))
+        start_scheduler(app)
+        try:
+            yield
+        finally:
+            if app.state.scheduler is not None:
+                await app.state.scheduler.stop()
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except BaseException:
+                    pass
+
+    return lifespan
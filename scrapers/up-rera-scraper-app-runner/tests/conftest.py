@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Server modules import as src.server...; the pipeline package is also
+# importable on its own, the way the MCP server and benchmarks load it
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "src" / "server" / "agent"))
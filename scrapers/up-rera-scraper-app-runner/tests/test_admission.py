@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from src.server.agent.admission import AdmissionController, AdmissionRejected, client_key
+from src.server.agent.capacity import ScrapeTracker
+
+
+def _controller(max_in_flight=4, max_queued=4, **kwargs):
+    # 100 projects per unit, so max_projects=300 costs 3 units
+    options = dict(capacity=4, projects_per_unit=100, queue_timeout=2.0, client_rate_per_minute=6,
+                   client_burst=4, enabled=True)
+    options.update(kwargs)
+    return AdmissionController(ScrapeTracker(max_in_flight=max_in_flight, max_queued=max_queued), **options)
+
+
+def _request(forwarded=None, peer="172.16.0.9"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded is not None else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 40000)})
+
+
+def test_client_is_the_hop_the_trusted_proxy_appended():
+    # The caller sent "1.2.3.4"; the load balancer appended the address it saw
+    spoofed = _request("1.2.3.4, 203.0.113.7")
+
+    assert client_key(spoofed, trusted_proxies=1) == "203.0.113.7"
+    assert client_key(spoofed, trusted_proxies=2) == "1.2.3.4"
+    assert client_key(_request("203.0.113.7"), trusted_proxies=2) == "203.0.113.7"
+    assert client_key(spoofed, trusted_proxies=0) == "172.16.0.9"
+    assert client_key(_request(), trusted_proxies=1) == "172.16.0.9"
+
+
+def test_trusted_proxies_from_env(monkeypatch):
+    monkeypatch.setenv("ADMISSION_TRUSTED_PROXIES", "2")
+    assert client_key(_request("1.2.3.4, 198.51.100.1, 203.0.113.7")) == "198.51.100.1"
+
+
+def test_queue_is_fifo_so_cheap_requests_cannot_jump_ahead():
+    controller = _controller()
+    admitted = []
+
+    async def request(name, projects):
+        ticket = await controller.acquire(name, projects, "agent")
+        admitted.append(name)
+        return ticket
+
+    async def main():
+        first = await request("a", 200)
+        expensive = asyncio.create_task(request("b", 300))
+        await asyncio.sleep(0.01)
+        # One unit is free, but "b" is waiting ahead of "c"
+        cheap = asyncio.create_task(request("c", 100))
+        await asyncio.sleep(0.01)
+        assert admitted == ["a"] and len(controller.queue) == 2
+        controller.release(first)
+        await asyncio.gather(expensive, cheap)
+        return controller.used
+
+    assert asyncio.run(main()) == 4
+    assert admitted == ["a", "b", "c"]
+    assert controller.tracker.running == {"agent": 2}
+
+
+def test_queue_timeout_leaves_the_queue_and_refunds_tokens():
+    controller = _controller(queue_timeout=0.05)
+
+    async def main():
+        held = await controller.acquire("a", 400, "agent")
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("b", 100, "agent")
+        return held, exc.value
+
+    held, rejected = asyncio.run(main())
+    assert rejected.reason == "queue_timeout"
+    assert not controller.queue and controller.tracker.waiting == 0
+    assert controller.buckets["b"].tokens == pytest.approx(4, abs=0.01)
+    assert controller.used == 4 and controller.rejected == {"queue_timeout": 1}
+
+    controller.release(held)
+    controller.release(held)
+    assert controller.used == 0 and controller.tracker.in_flight == 0
+
+
+def test_full_queue_refunds_tokens_and_estimates_retry_after():
+    controller = _controller(max_in_flight=1, max_queued=0)
+    controller.avg_seconds = 40.0
+
+    async def main():
+        await controller.acquire("a", 100, "agent")
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("b", 300, "agent")
+        return exc.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after == 40.0
+    assert rejected.as_dict() == {"reason": "queue_full", "message": "0 scrapes already waiting",
+                                  "retry_after": 40}
+    assert controller.buckets["b"].tokens == pytest.approx(4, abs=0.01)
+
+
+def test_rate_limited_client_is_told_when_its_tokens_are_back():
+    # 6 units/min: one unit every 10s, after a burst of 1
+    controller = _controller(client_burst=1)
+
+    async def main():
+        await controller.acquire("a", 100, "agent")
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("a", 100, "agent")
+        # Other clients have their own bucket
+        await controller.acquire("b", 100, "agent")
+        return exc.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == "rate_limited"
+    assert rejected.retry_after == pytest.approx(10, abs=0.1)
+    assert rejected.retry_after_header == "10"
+    assert controller.admitted == 2
+
+
+def test_retry_after_header_is_clamped():
+    assert AdmissionRejected("queue_timeout", 0.2, "").retry_after_header == "1"
+    assert AdmissionRejected("rate_limited", 12.1, "").retry_after_header == "13"
+    assert AdmissionRejected("rate_limited", 10_000, "").retry_after_header == "600"
@@ -0,0 +1,22 @@
+import asyncio
+from types import SimpleNamespace
+
+from pipeline.browser_pool import run_partitioned
+
+
+def test_stop_leaves_remaining_items_undispatched():
+    pool = SimpleNamespace(pages=["page"], size=1)
+    rows = []
+
+    async def work(page, item):
+        batch = [{"item": item}] * 3
+        rows.extend(batch)
+        return batch
+
+    outcome = asyncio.run(run_partitioned(pool, list(range(10)), work, stop=lambda: len(rows) >= 5))
+
+    # The item that crossed the limit is finished; nothing new is started after it
+    assert list(outcome.results) == [0, 1]
+    assert outcome.skipped == [2, 3, 4, 5, 6, 7, 8, 9]
+    assert outcome.errors == {}
+    assert outcome.as_dict()["skipped"] == [str(i) for i in range(2, 10)]
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from pipeline.cdc import CdcState, ChangeCapture, EventQueue, capture_changes
+from pipeline.project_store import project_key
+
+
+def _project(end_date):
+    return {"rera_number": "UPRERAPRJ1", "project_name": "Green Park", "district": "Lucknow",
+            "end_date": end_date, "scraped_at": "2026-10-19T00:00:00"}
+
+
+def test_interleaved_captures_get_their_own_versions(tmp_path):
+    state = CdcState(str(tmp_path / "cdc.sqlite3"))
+    bucket = f"file://{tmp_path / 'out'}"
+    capture_changes(bucket, [_project("2026-03-31")], state=state, queue=None)
+
+    first, second = ChangeCapture(state, run_id="run1"), ChangeCapture(state, run_id="run2")
+    first.add([_project("2027-03-31")])
+    second.add([_project("2028-03-31")])
+    one = first.flush(bucket, queue=None)
+    two = second.flush(bucket, queue=None)
+
+    assert one["updates"] == two["updates"] == 1
+    # The second flush diffs against the first one's version instead of claiming the same one
+    assert two["first_seq"] == one["last_seq"] + 1
+    latest = state.lookup([project_key(_project(""))])[project_key(_project(""))]
+    assert latest.version == 3 and latest.record["end_date"] == "2028-03-31"
+
+
+def test_concurrent_captures_never_share_an_event_id(tmp_path):
+    state = CdcState(str(tmp_path / "cdc.sqlite3"))
+    bucket = f"file://{tmp_path / 'out'}"
+    events = []
+    barrier = threading.Barrier(6)
+
+    class Collect(EventQueue):
+        def publish(self, batch):
+            events.extend(batch)
+            return len(batch)
+
+    def run(year):
+        barrier.wait()
+        capture_changes(bucket, [_project(f"{year}-03-31")], state=state, queue=Collect(), run_id=str(year))
+
+    threads = [threading.Thread(target=run, args=(2026 + n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(e["version"] for e in events) == [1, 2, 3, 4, 5, 6]
+    assert len({e["event_id"] for e in events}) == 6
+    # Each update diffs against the version committed just before it
+    events.sort(key=lambda e: e["version"])
+    for previous, event in zip(events, events[1:]):
+        if previous["op"] == "insert":
+            end_date = previous["after"]["end_date"]
+        else:
+            end_date = previous["changes"]["end_date"]["after"]
+        assert event["op"] == "update" and event["changes"]["end_date"]["before"] == end_date
+
+
+def test_event_queue_requires_publish():
+    with pytest.raises(TypeError):
+        EventQueue()
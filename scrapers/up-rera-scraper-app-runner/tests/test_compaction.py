@@ -0,0 +1,39 @@
+from datetime import datetime, UTC
+
+from pipeline.compaction import compact_period
+from pipeline.storage import (list_keys, make_partitioned_key, put_object, read_manifest, read_records,
+                              to_ndjson, upload_json_to_s3)
+
+
+def test_duplicates_come_out_in_scrape_order_and_sources_are_recorded(tmp_path):
+    bucket = f"file://{tmp_path}"
+    stamps = ["2026-10-18T05:00:00", "2026-10-18T01:00:00", "2026-10-18T03:00:00"]
+    for run_id, stamp in zip(("0000", "ffff", "8888"), stamps):
+        upload_json_to_s3(bucket, [{"rera_number": "R1", "district": "Agra", "scraped_at": stamp}],
+                          prefix="p", run_id=run_id)
+    keys = list_keys(bucket, "p")
+
+    result = compact_period(bucket, "p", datetime.now(UTC).strftime("%Y-%m-%d"))
+
+    [part] = list_keys(bucket, "p", suffix=".json.gz")
+    assert [r["scraped_at"] for r in read_records(bucket, part)] == sorted(stamps)
+    manifest = read_manifest(bucket, result["manifests"])
+    assert manifest["source_keys"] == keys
+    assert manifest["sort_by"][-1] == "scraped_at"
+
+
+def test_runs_without_a_manifest_are_left_alone(tmp_path):
+    bucket = f"file://{tmp_path}"
+    now = datetime.now(UTC)
+    for run_id in ("0000", "ffff"):
+        upload_json_to_s3(bucket, [{"rera_number": "R1", "scraped_at": "2026-10-18T01:00:00"}],
+                          prefix="p", run_id=run_id, now=now)
+    # A run that has written a part but not yet its manifest
+    live = make_partitioned_key("p", now=now, run_id="live")
+    put_object("file", str(tmp_path), live, to_ndjson([{"rera_number": "R2"}]))
+
+    result = compact_period(bucket, "p", now.strftime("%Y-%m-%d"))
+
+    assert result["objects_in"] == result["rows"] == 2
+    assert live not in read_manifest(bucket, result["manifests"])["source_keys"]
+    assert (tmp_path / live).exists()
@@ -0,0 +1,39 @@
+import sqlite3
+from datetime import datetime
+
+from pipeline.dedup import DedupIndex, dedup_upload
+
+NOW = datetime(2026, 10, 19)
+
+
+def _project(end_date="2027-03-31"):
+    return {"rera_number": "UPRERAPRJ1", "project_name": "Green Park", "district": "Lucknow",
+            "end_date": end_date, "scraped_at": "2026-10-19T00:00:00"}
+
+
+def test_seen_keys_are_scoped_by_destination(tmp_path):
+    index = DedupIndex(db_path=str(tmp_path / "dedup.sqlite3"))
+    a, b = f"file://{tmp_path / 'a'}", f"file://{tmp_path / 'b'}"
+
+    assert dedup_upload(a, [_project()], index=index, now=NOW)["written"] == 1
+    to_b = dedup_upload(b, [_project()], index=index, now=NOW)
+    assert to_b["written"] == 1 and to_b["new"] == 1
+    assert (tmp_path / "b" / to_b["snapshot_key"]).exists()
+    # Another prefix in the same bucket is another destination too
+    assert dedup_upload(a, [_project()], prefix="other", index=index, now=NOW)["written"] == 1
+
+    again = dedup_upload(a, [_project()], index=index, now=NOW)
+    assert again["written"] == 0 and again["unchanged"] == 1
+    assert dedup_upload(b, [_project("2028-03-31")], index=index, now=NOW)["changed"] == 1
+
+
+def test_unscoped_index_is_dropped(tmp_path):
+    db_path = str(tmp_path / "dedup.sqlite3")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE seen (project_key TEXT PRIMARY KEY, hash TEXT, partial INTEGER, "
+                     "first_seen TEXT, last_seen TEXT)")
+        conn.execute("INSERT INTO seen VALUES ('UPRERAPRJ1', 'x', 0, '', '')")
+
+    index = DedupIndex(db_path=db_path)
+    assert index.stats()["keys"] == 0
+    assert dedup_upload(f"file://{tmp_path / 'a'}", [_project()], index=index, now=NOW)["written"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from agents import Agent, function_tool, set_tracing_disabled
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+from src.server.agent.execution import (AgentBudget, BudgetedModel, BudgetExceeded, CacheMiss, RunAccounting,
+                                        TurnCache, run_within_budget)
+
+
+@function_tool
+def ping() -> str:
+    return "pong"
+
+
+class PingModel(Model):
+    """Calls ping `pings` times, then answers; bills 100 input and 10 output tokens per call."""
+
+    def __init__(self, pings: int = 1, delay: float = 0.0):
+        self.pings, self.delay = pings, delay
+        self.calls = 0
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        step = sum(1 for i in input if isinstance(i, dict) and i.get("type") == "function_call_output")
+        if step < self.pings:
+            output = [ResponseFunctionToolCall(type="function_call", call_id=f"call_{step}", id=f"fc_{step}",
+                                               name="ping", arguments="{}")]
+        else:
+            output = [ResponseOutputMessage(id="msg", type="message", role="assistant", status="completed",
+                                            content=[ResponseOutputText(type="output_text", annotations=[],
+                                                                        text="done")])]
+        return ModelResponse(output=output, response_id=None,
+                             usage=Usage(requests=1, input_tokens=100, output_tokens=10, total_tokens=110))
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def _run(model, budget=None, cache=None):
+    set_tracing_disabled(True)
+    accounting = RunAccounting(budget=budget or AgentBudget())
+    agent = Agent(name="test", instructions="Ping, then say done.", tools=[ping],
+                  model=BudgetedModel(model, "mock", accounting, cache))
+    result = asyncio.run(run_within_budget(agent, "go", accounting))
+    return result, accounting
+
+
+def test_identical_state_replays_from_the_cache(tmp_path):
+    cache = TurnCache("readwrite", str(tmp_path))
+    first_model, second_model = PingModel(pings=2), PingModel(pings=2)
+
+    first, live = _run(first_model, cache=cache)
+    second, replayed = _run(second_model, cache=cache)
+
+    assert first.final_output == second.final_output == "done"
+    assert first_model.calls == 3 and second_model.calls == 0
+    assert live.as_dict()["model_calls"] == 3
+    stats = replayed.as_dict()
+    assert stats["cache_hits"] == 3 and stats["model_calls"] == 0
+    assert stats["tokens_saved_by_cache"] == 330
+    assert replayed.billed_tokens == 0
+    assert [t.key for t in replayed.turns] == [t.key for t in live.turns]
+
+
+def test_changed_state_misses_the_cache(tmp_path):
+    cache = TurnCache("readwrite", str(tmp_path))
+    _run(PingModel(pings=1), cache=cache)
+
+    model = PingModel(pings=1)
+    accounting = RunAccounting()
+    agent = Agent(name="test", instructions="Different instructions.", tools=[ping],
+                  model=BudgetedModel(model, "mock", accounting, cache))
+    asyncio.run(run_within_budget(agent, "go", accounting))
+
+    assert model.calls == 2
+    assert accounting.as_dict()["cache_hits"] == 0
+
+
+def test_replay_mode_fails_on_a_miss(tmp_path):
+    model = PingModel()
+    with pytest.raises(CacheMiss):
+        _run(model, cache=TurnCache("replay", str(tmp_path)))
+    assert model.calls == 0
+
+
+def test_unknown_cache_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="LLM cache mode"):
+        TurnCache("write", str(tmp_path))
+
+
+def test_token_budget_stops_before_the_next_turn():
+    model = PingModel(pings=5)
+    with pytest.raises(BudgetExceeded) as exc:
+        _run(model, budget=AgentBudget(max_tokens=200))
+
+    assert exc.value.kind == "tokens"
+    assert exc.value.used == 220
+    assert model.calls == 2
+
+
+def test_seconds_budget_cancels_a_slow_turn():
+    with pytest.raises(BudgetExceeded) as exc:
+        _run(PingModel(delay=5.0), budget=AgentBudget(max_seconds=0.2))
+
+    assert exc.value.kind == "seconds"
+    assert exc.value.limit == 0.2
+
+
+def test_turn_budget():
+    model = PingModel(pings=5)
+    with pytest.raises(BudgetExceeded) as exc:
+        _run(model, budget=AgentBudget(max_turns=2))
+
+    assert exc.value.kind == "turns"
+    assert exc.value.used == 2
+    assert model.calls == 2
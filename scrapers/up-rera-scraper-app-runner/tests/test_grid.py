@@ -0,0 +1,72 @@
+import asyncio
+
+from pipeline.grid import GRID_ROW_SELECTOR, iter_grid_windows
+from pipeline.records import BASE_URL
+
+
+def _row(n):
+    cells = [str(n), f"Promoter {n}", f"Project {n}", f"UPRERAPRJ{n:05d}", "Residential", "Lucknow",
+             "2024-01-01", "2027-12-31", "2024-01-15"]
+    return [cells, [[f"Frm_View_Project_Details.aspx?id={n}", f"UPRERAPRJ{n:05d}"]]]
+
+
+class GridPage:
+    """The parts of a Playwright page iter_grid_windows uses, over fixed grid rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.windows = []
+
+    def locator(self, selector):
+        assert selector == GRID_ROW_SELECTOR
+        page = self
+
+        class Rows:
+            async def count(self):
+                return len(page.rows)
+        return Rows()
+
+    async def evaluate(self, script, args):
+        selector, start, end = args
+        self.windows.append((start, end))
+        return self.rows[start:end]
+
+
+def _windows(page, **kwargs):
+    async def main():
+        return [(start, projects) async for start, projects in iter_grid_windows(page, **kwargs)]
+    return asyncio.run(main())
+
+
+def test_rows_are_read_one_window_per_evaluate():
+    header = [["S.No.", "Promoter Name", "Project Name"], []]
+    page = GridPage([header] + [_row(n) for n in range(1, 6)])
+
+    windows = _windows(page, window_size=2)
+
+    assert page.windows == [(0, 2), (2, 4), (4, 6)]
+    assert [start for start, _ in windows] == [0, 2, 4]
+    # The header row is dropped; every other row becomes one project
+    assert [[p["project_name"] for p in projects] for _, projects in windows] == \
+        [["Project 1"], ["Project 2", "Project 3"], ["Project 4", "Project 5"]]
+    first = windows[0][1][0]
+    assert first["rera_number"] == "UPRERAPRJ00001"
+    assert first["detail_link"] == f"{BASE_URL}/Frm_View_Project_Details.aspx?id=1"
+
+
+def test_max_rows_limits_what_is_read():
+    page = GridPage([_row(n) for n in range(1, 11)])
+
+    windows = _windows(page, max_rows=3, window_size=2)
+
+    assert page.windows == [(0, 2), (2, 3)]
+    assert sum(len(projects) for _, projects in windows) == 3
+
+
+def test_rows_without_a_detail_link_keep_their_cells():
+    page = GridPage([[_row(1)[0], [["#top", "Back to top"]]]])
+
+    [(_, [project])] = _windows(page)
+
+    assert project["project_name"] == "Project 1"
+    assert not project.get("detail_link")
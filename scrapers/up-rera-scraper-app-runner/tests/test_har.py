@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from pipeline import har
+from pipeline.har import HarPlayback, request_key
+
+URL = "https://www.up-rera.in/Frm_View_Project.aspx"
+
+
+def _entry(post_data, body, status=200):
+    return {
+        "request": {"method": "POST", "url": URL, "postData": {"text": post_data}},
+        "response": {"status": status, "headers": [{"name": "Content-Type", "value": "text/html"},
+                                                   {"name": "Content-Length", "value": "9"}],
+                     "content": {"text": body}},
+        "time": 120.0,
+    }
+
+
+def _recording(tmp_path):
+    path = tmp_path / "run.har"
+    path.write_text(json.dumps({"log": {"entries": [
+        _entry("__VIEWSTATE=aaa&__EVENTTARGET=pager&__EVENTARGUMENT=Page%242", "page 2 a"),
+        _entry("__EVENTARGUMENT=Page%242&__VIEWSTATE=bbb&__EVENTTARGET=pager", "page 2 b"),
+        _entry("__VIEWSTATE=ccc&__EVENTTARGET=pager&__EVENTARGUMENT=Page%243", "", status=0),
+    ]}}))
+    return path
+
+
+def test_request_key_ignores_view_state_and_field_order():
+    first = request_key("post", URL + "#grid",
+                        "__VIEWSTATE=aaa&__EVENTVALIDATION=x&__EVENTTARGET=pager&__EVENTARGUMENT=Page%242")
+    second = request_key("POST", URL, "__EVENTARGUMENT=Page%242&__EVENTTARGET=pager&__VIEWSTATE=zzz")
+    assert first == second == ("POST", URL, "__EVENTARGUMENT=Page%242&__EVENTTARGET=pager")
+    assert request_key("POST", URL, "__EVENTARGUMENT=Page%243") != second
+    # A body that isn't a form is matched verbatim
+    assert request_key("POST", URL, '{"page": 2}')[2] == '{"page": 2}'
+
+
+def test_match_cycles_recorded_responses_and_skips_failed_ones(tmp_path):
+    playback = HarPlayback([str(_recording(tmp_path))])
+    post = "__EVENTTARGET=pager&__EVENTARGUMENT=Page%242&__VIEWSTATE=live"
+
+    bodies = [playback.match("POST", URL, post).body for _ in range(3)]
+    assert bodies == [b"page 2 a", b"page 2 b", b"page 2 a"]
+    response = playback.match("POST", URL, post)
+    assert response.headers == {"content-type": "text/html"}
+    assert response.seconds == 0.12
+    # The aborted request was never recorded with a response
+    assert playback.match("POST", URL, "__EVENTTARGET=pager&__EVENTARGUMENT=Page%243") is None
+    assert playback.stats["entries"] == 2
+
+
+def test_each_run_replays_from_the_first_recording(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPER_HAR", "playback")
+    monkeypatch.setenv("SCRAPER_HAR_PATH", str(tmp_path))
+    monkeypatch.setattr(har, "_playback", None)
+    _recording(tmp_path)
+    post = "__EVENTTARGET=pager&__EVENTARGUMENT=Page%242"
+
+    async def run():
+        har.start_playback_run()
+        playback = har.get_playback()
+        playback.stats["hits"] += 1
+        return playback.match("POST", URL, post).body, playback
+
+    (first, a), (second, b) = asyncio.run(run()), asyncio.run(run())
+    assert first == second == b"page 2 a"
+    assert a is not b and a.entries is b.entries
+    assert b.stats["hits"] == 1
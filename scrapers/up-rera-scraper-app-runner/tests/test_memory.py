@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pipeline import memory
+from pipeline.memory import MemoryCeilingExceeded, MemoryMonitor, process_rss_bytes, process_tree_rss_bytes
+
+# The child starts a grandchild holding 64 MB and prints its pid once the memory is touched
+_GRANDCHILD = "import sys; b = b'x' * (64 << 20); print('ready', flush=True); sys.stdin.read()"
+_CHILD = f"""
+import subprocess, sys
+p = subprocess.Popen([sys.executable, "-c", {_GRANDCHILD!r}], stdout=subprocess.PIPE, stdin=subprocess.PIPE, text=True)
+p.stdout.readline()
+print(p.pid, flush=True)
+sys.stdin.read()
+p.stdin.close()
+p.wait()
+"""
+
+
+@pytest.fixture
+def fresh_scan(monkeypatch):
+    monkeypatch.setattr(memory, "_scan_cache", None)
+
+
+def test_tree_rss_includes_the_browser_like_grandchild(fresh_scan):
+    child = subprocess.Popen([sys.executable, "-c", _CHILD], stdout=subprocess.PIPE, stdin=subprocess.PIPE,
+                             text=True)
+    try:
+        grandchild = int(child.stdout.readline())
+        # Earlier tests may have left helpers running (e.g. the multiprocessing resource tracker)
+        assert {child.pid, grandchild} <= set(memory._descendants(os.getpid()))
+        assert process_tree_rss_bytes() - process_rss_bytes() >= 64 << 20
+    finally:
+        child.stdin.close()
+        child.wait()
+
+
+def test_process_scan_is_reused_within_the_ttl(fresh_scan, monkeypatch):
+    # Kernels without /proc/<pid>/task/*/children fall back to scanning /proc
+    monkeypatch.setattr(memory, "_task_children", lambda pid: None)
+    reads = []
+    parent_pid = memory._parent_pid
+    monkeypatch.setattr(memory, "_parent_pid", lambda pid: reads.append(pid) or parent_pid(pid))
+
+    memory._descendants(os.getpid())
+    scanned = len(reads)
+    memory._descendants(os.getpid())
+    assert scanned > 0 and len(reads) == scanned
+
+    monkeypatch.setattr(memory, "PROCESS_TREE_TTL_SECONDS", 0.0)
+    memory._descendants(os.getpid())
+    assert len(reads) > scanned
+
+
+def test_parent_pid_reads_past_a_command_with_spaces_and_parentheses(tmp_path):
+    script = tmp_path / "odd (name) x"
+    script.write_text("import sys; sys.stdin.read()")
+    child = subprocess.Popen([sys.executable, str(script)], stdin=subprocess.PIPE)
+    try:
+        assert memory._parent_pid(child.pid) == os.getpid()
+    finally:
+        child.stdin.close()
+        child.wait()
+
+
+def test_monitor_tracks_the_peak_and_enforces_the_ceiling():
+    monitor = MemoryMonitor(ceiling_mb=10**6)
+    monitor.check("grid_loaded")
+    assert not monitor.ceiling_hit
+
+    monitor.ceiling_mb = 1
+    with pytest.raises(MemoryCeilingExceeded, match="over ceiling 1 MB at window_50"):
+        monitor.check("window_50")
+
+    report = monitor.as_dict()
+    assert report["ceiling_hit"] is True
+    assert [s["label"] for s in report["samples"]] == ["grid_loaded", "window_50"]
+    assert report["peak_rss_mb"] == max(s["rss_mb"] for s in report["samples"])
+    assert report["peak_at"] in ("grid_loaded", "window_50")
+
+
+def test_ceiling_defaults_to_env(monkeypatch):
+    monkeypatch.setenv("SCRAPER_RSS_CEILING_MB", "900")
+    assert MemoryMonitor().ceiling_mb == 900
@@ -0,0 +1,22 @@
+from pipeline.normalize import normalize_project, normalize_projects
+
+
+def test_unparseable_dates_keep_the_scraped_text():
+    rows = [
+        {"rera_number": "UPRERAPRJ1", "start_date": "01-02-2020", "end_date": "31/13/2025",
+         "registration_date": ""},
+        {"rera_number": "UPRERAPRJ2", "start_date": "01-02-2020", "end_date": " Extended  till 2026 ",
+         "registration_date": "15-Mar-2021"},
+    ]
+
+    batch = normalize_projects(rows, scraped_at="2026-10-19T00:00:00")
+
+    assert batch[0]["end_date"] is None
+    assert batch[0]["end_date_raw"] == "31/13/2025"
+    assert batch[0]["registration_date"] is None
+    assert "registration_date_raw" not in batch[0]  # Blank, nothing was lost
+    assert batch[1]["end_date_raw"] == "Extended till 2026"
+    assert batch[1]["registration_date"] == "2021-03-15"
+    assert "start_date_raw" not in batch[1]
+    # The per-row path agrees with the batch path
+    assert [normalize_project(r, scraped_at="2026-10-19T00:00:00") for r in rows] == batch
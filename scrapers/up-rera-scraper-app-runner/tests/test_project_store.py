@@ -0,0 +1,75 @@
+from datetime import datetime, UTC
+
+import pytest
+
+import pipeline.storage as storage
+from pipeline.compaction import compact_period
+from pipeline.project_store import ProjectStore
+
+
+def _row(end_date: str, scraped_at: str, **extra):
+    return {"rera_number": "UPRERAPRJ1", "project_name": "Green Acres", "district": "Lucknow",
+            "end_date": end_date, "scraped_at": scraped_at, **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProjectStore(db_path=str(tmp_path / "projects.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_newer_row_wins_whatever_the_ingest_order(store):
+    store.ingest_records([_row("2027-12-31", "2026-10-19T06:00:00")])
+    store.ingest_records([_row("2026-01-01", "2026-10-18T06:00:00", promoter_name="Acme Builders")])
+
+    row = store.get("UPRERAPRJ1")
+    assert row["end_date"] == "2027-12-31"
+    assert row["last_seen_at"] == "2026-10-19T06:00:00"
+    assert row["first_seen_at"] == "2026-10-18T06:00:00"
+    # The older row still fills a field the newer one left empty
+    assert row["promoter_name"] == "Acme Builders"
+
+
+def test_reingesting_compacted_rows_does_not_roll_back(store, tmp_path):
+    bucket = f"file://{tmp_path / 'data'}"
+    # Within a day run_id order is random; "0000" is listed before "ffff" but is newer
+    for now, end_date, run_id in ((datetime(2026, 10, 18, 1), "2026-01-01", "ffff"),
+                                  (datetime(2026, 10, 18, 2), "2026-02-01", "0000"),
+                                  (datetime(2026, 10, 19, 1), "2027-12-31", "1111")):
+        storage.upload_json_to_s3(bucket, [_row(end_date, now.isoformat())], prefix="p", run_id=run_id, now=now)
+
+    store.ingest(bucket, "p")
+    assert store.get("UPRERAPRJ1")["end_date"] == "2027-12-31"
+
+    compact_period(bucket, "p", "2026-10-18")
+    stats = store.ingest(bucket, "p")
+    assert stats["new_objects"] == 1
+
+    row = store.get("UPRERAPRJ1")
+    assert row["end_date"] == "2027-12-31"
+    assert row["last_seen_at"] == "2026-10-19T01:00:00"
+
+
+def test_compacted_parts_of_ingested_objects_are_not_read_again(store, tmp_path):
+    bucket = f"file://{tmp_path / 'data'}"
+    for hour in range(3):
+        storage.upload_json_to_s3(bucket, [_row("2027-12-31", f"2026-10-18T0{hour}:00:00")], prefix="p")
+    assert store.ingest(bucket, "p")["rows"] == 3
+
+    today = datetime.now(UTC).strftime("%Y-%m-%d")
+    compact_period(bucket, "p", today)
+    stats = store.ingest(bucket, "p")
+    assert stats == {**stats, "new_objects": 1, "compacted_skipped": 1, "rows": 0}
+
+    # A run compacted together with one never ingested is read
+    storage.upload_json_to_s3(bucket, [_row("2028-01-01", "2026-10-18T09:00:00")], prefix="p")
+    compact_period(bucket, "p", today)
+    other = ProjectStore(db_path=str(tmp_path / "other.sqlite3"))
+    try:
+        stats = store.ingest(bucket, "p")
+        assert stats["compacted_skipped"] == 0 and stats["rows"] == 4
+        assert store.get("UPRERAPRJ1")["end_date"] == "2028-01-01"
+        assert other.ingest(bucket, "p")["rows"] == 4
+    finally:
+        other.close()
@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from pipeline.project_store import ProjectStore
+from src.server import create_app
+from src.server.projects import routes
+
+
+def test_projects_are_served_from_the_store(tmp_path, monkeypatch):
+    store = ProjectStore(db_path=str(tmp_path / "projects.sqlite3"))
+    store.ingest_records([{"rera_number": "UPRERAPRJ1", "project_name": "Green Acres", "district": "Lucknow",
+                          "scraped_at": "2026-10-19T06:00:00"}])
+    monkeypatch.setattr(routes, "_store", store)
+    client = TestClient(create_app())
+
+    listed = client.get("/projects/", params={"district": "lucknow"}).json()
+    assert listed["total"] == 1 and listed["projects"][0]["project_name"] == "Green Acres"
+    assert client.get("/projects/UPRERAPRJ1").json()["district"] == "Lucknow"
+    assert client.get("/projects/UPRERAPRJ2").status_code == 404
+    assert client.get("/projects/", params={"order_by": "nope"}).status_code == 400
+    store.close()
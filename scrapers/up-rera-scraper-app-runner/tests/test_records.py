@@ -0,0 +1,58 @@
+from pipeline.records import (build_project_from_card, build_project_from_cells, build_project_from_rera_number,
+                              build_raw_text, extract_rera_numbers, is_detail_href, resolve_detail_link)
+
+ROW = ["12", "Acme Builders", "Green Acres", "UPRERAPRJ1234", "Residential", "Lucknow",
+       "01-04-2020", "31-03-2025", "15-03-2020", "View"]
+
+
+def test_grid_row_becomes_a_project():
+    link = "https://www.up-rera.in/Frm_View_Project_Details.aspx?id=1234"
+    project = build_project_from_cells(ROW, link, "UPRERAPRJ1234")
+
+    assert project["serial_no"] == "12" and project["district"] == "Lucknow"
+    assert project["registration_date"] == "15-03-2020" and project["detail_link"] == link
+    assert project["raw_text"] == (
+        "Project Name: Green Acres | RERA Number: UPRERAPRJ1234 | Promoter: Acme Builders | "
+        "Type: Residential | District: Lucknow | Start Date: 01-04-2020 | End Date: 31-03-2025 | "
+        f"Registration Date: 15-03-2020 | Details: {link}")
+
+
+def test_link_text_rera_number_wins_and_short_rows_are_padded():
+    project = build_project_from_cells(["1", "Acme", "Green Acres", "stale"], link_text="View UPRERAPRJ99")
+    assert project["rera_number"] == "UPRERAPRJ99"
+    assert project["end_date"] == "" and project["detail_link"] == ""
+    assert "End Date" not in project["raw_text"]
+
+
+def test_header_empty_and_meaningless_rows_are_dropped():
+    assert build_project_from_cells(["S.No", "Promoter Name", "Project Name"]) is None
+    assert build_project_from_cells(["", "", ""]) is None
+    assert build_project_from_cells(["1"]) is None
+    assert build_project_from_cells(["1", "Acme", "", ""]) is None
+
+
+def test_card_and_rera_only_projects():
+    card = build_project_from_card("Green Acres\nUPRERAPRJ1234\nLucknow", "https://x/details")
+    assert card["project_name"] == "Green Acres" and card["rera_number"] == "UPRERAPRJ1234"
+    assert card["raw_text"].endswith(" | Details: https://x/details")
+    assert build_project_from_card("No registration here") is None
+
+    partial = build_project_from_rera_number("UPRERAPRJ1234")
+    assert partial["extracted_from"] == "page_text"
+    assert partial["detail_link"].endswith("Frm_View_Project_Details.aspx?id=1234")
+    assert partial["project_name"] == ""
+
+
+def test_rera_numbers_are_deduplicated_in_first_seen_order():
+    text = "UPRERAPRJ3 then UPRERAPRJ1, again UPRERAPRJ3 and UPRERAPRJ2 UPRERAPRJ1"
+    assert extract_rera_numbers(text) == ["UPRERAPRJ3", "UPRERAPRJ1", "UPRERAPRJ2"]
+    assert extract_rera_numbers("") == []
+
+
+def test_detail_links():
+    assert is_detail_href("Frm_View_Project_Details.aspx?id=1") and not is_detail_href(None)
+    assert not is_detail_href("javascript:__doPostBack('grd','Page$2')")
+    absolute = resolve_detail_link("/Frm_View_Project_Details.aspx?id=1")
+    assert absolute == "https://www.up-rera.in/Frm_View_Project_Details.aspx?id=1"
+    assert resolve_detail_link("https://other/x") == "https://other/x"
+    assert build_raw_text({"district": "Agra", "project_name": ""}) == "District: Agra"
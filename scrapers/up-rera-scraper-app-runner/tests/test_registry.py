@@ -0,0 +1,64 @@
+import pytest
+
+from pipeline.sources import registry
+from pipeline.sources.base import CrawlPlan, Source
+from pipeline.sources.registry import available_sources, get_source, register_source
+from pipeline.sources.up_rera import UpReraSource
+
+
+class ExampleSource(Source):
+    name = "example"
+    title = "Example listing"
+
+    def __init__(self, base_url="https://example.org"):
+        self.base_url = base_url
+
+    async def plan(self, runtime, **params):
+        return CrawlPlan([1])
+
+    async def fetch(self, runtime, session, partition):
+        yield
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    monkeypatch.setattr(registry, "_SOURCES", {})
+
+
+def test_up_rera_is_registered_on_import():
+    assert isinstance(get_source("up-rera"), UpReraSource)
+    assert {"name": "up-rera", "title": UpReraSource.title} in available_sources()
+
+
+def test_get_source_passes_options(sources):
+    register_source(ExampleSource)
+
+    source = get_source("example", base_url="https://mirror.example.org")
+
+    assert isinstance(source, ExampleSource)
+    assert source.base_url == "https://mirror.example.org"
+    assert available_sources() == [{"name": "example", "title": "Example listing"}]
+
+
+def test_unknown_source_lists_the_available_ones(sources):
+    register_source(ExampleSource)
+
+    with pytest.raises(ValueError, match="Unknown source 'missing'; available: example"):
+        get_source("missing")
+
+
+def test_register_rejects_unnamed_and_duplicate_names(sources):
+    register_source(ExampleSource)
+    # Registering the same class again (a module reload) is fine
+    assert register_source(ExampleSource) is ExampleSource
+
+    class Unnamed(ExampleSource):
+        name = ""
+
+    class Clash(ExampleSource):
+        pass
+
+    with pytest.raises(ValueError, match="has no name"):
+        register_source(Unnamed)
+    with pytest.raises(ValueError, match="already registered by ExampleSource"):
+        register_source(Clash)
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from pipeline.retry import Retrier, RetryBudget, RetryPolicy
+
+
+def test_time_in_failed_attempts_counts_against_the_budget():
+    budget = RetryBudget(max_retries=10, max_retry_seconds=0.1)
+    retrier = Retrier(budget, {"slow": RetryPolicy("slow", max_attempts=5, initial_wait=0.0, max_wait=0.0)})
+    attempts = []
+
+    def timeout():
+        attempts.append(1)
+        time.sleep(0.15)
+        raise TimeoutError("navigation timed out")
+
+    with pytest.raises(TimeoutError):
+        retrier.call_sync("slow", timeout)
+
+    # No backoff at all, yet one slow failure is enough to use up the budget
+    assert len(attempts) == 1
+    assert budget.used_seconds >= 0.15
+    assert retrier.stats.as_dict()["by_operation"]["slow"]["failures"] == 1
+
+
+def test_completed_keyed_call_is_not_repeated():
+    retrier = Retrier()
+    calls = []
+
+    def put():
+        calls.append(1)
+        return "etag-1"
+
+    assert retrier.call_sync("s3_part_upload", put, idempotency_key="a/part-00000.json#abc") == "etag-1"
+    assert retrier.call_sync("s3_part_upload", put, idempotency_key="a/part-00000.json#abc") == "etag-1"
+    assert retrier.call_sync("s3_part_upload", put) == "etag-1"
+    assert len(calls) == 2
+
+
+def test_repeated_upload_only_puts_the_missing_parts(tmp_path, monkeypatch):
+    import pipeline.storage as storage
+
+    retrier = Retrier(policies={"s3_part_upload": RetryPolicy("s3_part_upload", max_attempts=1)})
+    put_object, puts = storage.put_object, []
+
+    def flaky_put(target_type, target, key, body, **kwargs):
+        puts.append(key)
+        if key.endswith("part-00001.json") and puts.count(key) == 1:
+            raise ConnectionError("connection reset")
+        return put_object(target_type, target, key, body, **kwargs)
+
+    monkeypatch.setattr(storage, "put_object", flaky_put)
+    upload = dict(bucket=f"file://{tmp_path}", data=[{"n": i} for i in range(4)], run_id="run1",
+                  now=datetime(2026, 10, 19), rows_per_part=2, retrier=retrier, concurrency=1)
+    with pytest.raises(ConnectionError):
+        storage.upload_json_to_s3(**upload)
+    result = storage.upload_json_to_s3(**upload)
+
+    assert result["parts"] == 2
+    part0 = [key for key in puts if key.endswith("part-00000.json")]
+    assert len(part0) == 1
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from pipeline.runtime import CallbackSink, NdjsonSink, ScrapeRuntime, Sink, run_partitions, run_source
+from pipeline.sources.base import CrawlPlan, FetchedPage, Source
+
+
+def parse_rows(content):
+    if content == "garbled":
+        raise ValueError("grid table not found")
+    return [{"project_name": name} for name in content.split(",")]
+
+
+class ListSource(Source):
+    name = "list"
+    parser = staticmethod(parse_rows)
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def plan(self, runtime, **params):
+        return CrawlPlan(list(self.pages))
+
+    async def fetch(self, runtime, session, partition):
+        for seq, content in enumerate(self.pages[partition], start=1):
+            # Let other sessions run between pages, as a real fetch would
+            await asyncio.sleep(0)
+            yield FetchedPage(partition, seq, content=content, meta={"partition": partition})
+
+
+class Sessions:
+    """Sessions without a browser: run_partitioned only needs `pages`."""
+
+    def __init__(self, size):
+        self.size, self.pages = size, [object()] * size
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+def _runtime(**kwargs):
+    runtime = ScrapeRuntime(browser=object(), **kwargs)
+    runtime.sessions = lambda source, size, browser: Sessions(size)
+    return runtime
+
+
+def _run(source, partitions, parse_workers=0, contexts=1, sinks=None, max_rows=None):
+    async def main():
+        async with _runtime(parse_workers=parse_workers, sinks=sinks) as runtime:
+            return await run_partitions(source, runtime, partitions, contexts=contexts, max_rows=max_rows)
+    return asyncio.run(main())
+
+
+def _names(records):
+    return [r["project_name"] for r in records]
+
+
+def test_sink_and_source_are_abstract():
+    with pytest.raises(TypeError):
+        Sink()
+
+    class NoFetch(Source):
+        async def plan(self, runtime, **params):
+            return CrawlPlan([])
+
+    with pytest.raises(TypeError):
+        NoFetch()
+
+
+def test_records_follow_partition_and_page_order():
+    source = ListSource({"a": ["A1,A2", "A3"], "b": ["B1"], "c": ["C1", "C2", "C3"]})
+    records, outcome = _run(source, ["c", "a", "b"], contexts=3)
+
+    assert _names(records) == ["C1", "C2", "C3", "A1", "A2", "A3", "B1"]
+    assert _names(outcome.results["a"]) == ["A1", "A2", "A3"]
+    assert outcome.metrics["pages"] == 6
+    assert outcome.metrics["rows"] == 7
+    assert all(r["scraped_at"] for r in records)
+
+
+def test_sinks_get_every_page_as_it_is_parsed():
+    pages = []
+
+    async def on_page(meta, records):
+        pages.append((meta["partition"], _names(records)))
+
+    source = ListSource({"a": ["A1,A2", "A3"], "b": ["B1"]})
+    _run(source, ["a", "b"], sinks=[CallbackSink(on_page)])
+
+    assert pages == [("a", ["A1", "A2"]), ("a", ["A3"]), ("b", ["B1"])]
+
+
+def test_max_rows_stops_handing_out_partitions():
+    source = ListSource({"a": ["A1,A2"], "b": ["B1"], "c": ["C1"]})
+    records, outcome = _run(source, ["a", "b", "c"], max_rows=2)
+
+    assert _names(records) == ["A1", "A2"]
+    assert list(outcome.results) == ["a"]
+    assert outcome.skipped == ["b", "c"]
+
+
+def test_run_source_plans_closes_sinks_and_caps_records(tmp_path):
+    path = tmp_path / "rows.ndjson"
+    source = ListSource({"a": ["A1,A2"], "b": ["B1,B2"]})
+
+    async def main():
+        async with _runtime(sinks=[NdjsonSink(str(path))]) as runtime:
+            return await run_source(source, runtime, contexts=2, max_records=3)
+    run = asyncio.run(main())
+
+    assert run.plan.partitions == ["a", "b"]
+    assert _names(run.records) == ["A1", "A2", "B1"]
+    assert run.sinks == [{"file": str(path), "rows": 4}]
+    assert [json.loads(line)["project_name"] for line in path.read_text().splitlines()] == \
+        ["A1", "A2", "B1", "B2"]
+
+
+def test_worker_parse_error_fails_the_partition():
+    source = ListSource({"a": ["A1,A2", "garbled", "A4"], "b": ["B1", "B2,B3"]})
+    records, outcome = _run(source, ["a", "b"], parse_workers=1)
+
+    assert _names(records) == ["B1", "B2", "B3"]
+    assert list(outcome.results) == ["b"]
+    assert outcome.errors["a"].startswith("parsing page 2 failed: grid table not found")
+    assert outcome.parse["failed"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from src.server.agent import scheduler as scheduler_module
+from src.server.agent.admission import AdmissionController
+from src.server.agent.capacity import ScrapeTracker
+from src.server.agent.pipeline.schedule import FileLeaderLock, SchedulerState
+from src.server.agent.scheduler import build_scheduler
+
+
+def test_failed_detail_pages_stay_in_the_backlog(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCHEDULER_DETAIL_ATTEMPTS", "2")
+    bucket = f"file://{tmp_path}"
+    fetched = []
+
+    async def details(items, run_id):
+        fetched.append([i["detail_link"] for i in items])
+        return [i["detail_link"] for i in items if i["detail_link"] != "b"]
+
+    scheduler = build_scheduler(bucket, details=details, lock=FileLeaderLock(str(tmp_path / "lock")),
+                                state=SchedulerState(bucket), tz="Asia/Kolkata")
+    state = scheduler.state.load()
+    state["detail_backlog"] = [{"detail_link": link, "rera_number": ""} for link in ("a", "b", "c")]
+    scheduler.state.save()
+    # Five minutes before the off-peak window closes: the whole backlog is due
+    now = datetime(2026, 10, 19, 5, 55, tzinfo=ZoneInfo("Asia/Kolkata"))
+
+    summary = asyncio.run(scheduler.jobs["details"].run(now))
+    assert summary == {**summary, "archived": 2, "failed": 1, "given_up": 0, "backlog": 1}
+    assert scheduler.state.load()["detail_backlog"] == [{"detail_link": "b", "rera_number": "", "attempts": 1}]
+
+    summary = asyncio.run(scheduler.jobs["details"].run(now))
+    assert fetched[-1] == ["b"]
+    assert summary["given_up"] == 1 and summary["backlog"] == 0
+
+
+def test_queued_agent_request_starts_when_a_scheduled_scrape_ends(tmp_path, monkeypatch):
+    controller = AdmissionController(ScrapeTracker(max_in_flight=1, max_queued=4), queue_timeout=2.0,
+                                     enabled=True)
+    monkeypatch.setattr(scheduler_module, "admission", controller)
+    bucket = f"file://{tmp_path}"
+
+    async def details(items, run_id):
+        assert controller.tracker.running == {"scheduled": 1}
+        await asyncio.sleep(0.2)
+        return [i["detail_link"] for i in items]
+
+    scheduler = build_scheduler(bucket, details=details, lock=FileLeaderLock(str(tmp_path / "lock")),
+                                state=SchedulerState(bucket), tz="Asia/Kolkata")
+    scheduler.state.load()["detail_backlog"] = [{"detail_link": "a", "rera_number": ""}]
+    scheduler.state.save()
+    now = datetime(2026, 10, 19, 5, 55, tzinfo=ZoneInfo("Asia/Kolkata"))
+
+    async def agent_request():
+        await asyncio.sleep(0.05)  # Arrives while the scheduled scrape holds the only slot
+        start = time.monotonic()
+        ticket = await controller.acquire("10.0.0.1", 20, "agent")
+        waited = time.monotonic() - start
+        controller.release(ticket)
+        return waited
+
+    async def main():
+        return await asyncio.gather(scheduler.jobs["details"].run(now), agent_request())
+
+    summary, waited = asyncio.run(main())
+    assert summary["archived"] == 1
+    assert waited < 1.0
+    assert controller.used == 0 and controller.tracker.in_flight == 0
@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+from pipeline.storage import upload_json_to_s3
+from src.server import create_app
+from src.server.search import routes
+
+
+def test_search_finds_the_matching_project(tmp_path, monkeypatch):
+    bucket = f"file://{tmp_path}"
+    monkeypatch.setenv("SEARCH_BUCKET", bucket)
+    monkeypatch.setenv("S3_PREFIX", "projects")
+    monkeypatch.setattr(routes, "_state", {"index": None, "embedder": None, "mtime": None})
+    upload_json_to_s3(bucket, [
+        {"rera_number": "R1", "project_name": "Riverside Towers", "district": "Noida",
+         "raw_text": "residential towers on the riverside in Noida"},
+        {"rera_number": "R2", "project_name": "Green Plots", "district": "Lucknow",
+         "raw_text": "plotted colony with green parks in Lucknow"},
+    ], prefix="projects")
+
+    client = TestClient(create_app())
+    assert client.get("/search/", params={"q": "residential towers"}).status_code == 404
+    assert client.post("/search/index").json()["index"]["projects"] == 2
+
+    hits = client.get("/search/", params={"q": "plotted colony green parks", "k": 1}).json()["results"]
+    assert [hit["rera_number"] for hit in hits] == ["R2"]
+    in_noida = client.get("/search/", params={"q": "plotted colony", "district": "noida"}).json()
+    assert [hit["rera_number"] for hit in in_noida["results"]] == ["R1"]
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+from pipeline.snapshots import SnapshotStore, list_runs, read_run_index, reparse_snapshots
+from reparse_snapshots import normalize_reparsed
+
+# The grid renderer lives with the benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from fixture_site import FixtureSite  # noqa: E402
+
+
+def _grid_pages(pages, page_size=5):
+    site = FixtureSite(pages * page_size, page_size, latency=0)
+    site.server.server_close()
+    return [site.render(n) for n in range(1, pages + 1)]
+
+
+def test_identical_snapshots_are_stored_once(tmp_path):
+    bucket = f"file://{tmp_path}"
+    html = _grid_pages(1)[0]
+    first, second = SnapshotStore("run1", bucket=bucket), SnapshotStore("run2", bucket=bucket)
+    first.put(html, "grid", page=1)
+    first.write_index()
+    second.put(html, "grid", page=1)
+    second.write_index()
+
+    assert (first.new_objects, second.new_objects) == (1, 0)
+    assert list_runs(bucket) == ["run1", "run2"]
+    assert [e["sha256"] for e in read_run_index(bucket, "run2")] == [first.entries[0]["sha256"]]
+
+
+def test_reparsed_records_keep_their_capture_time(tmp_path):
+    bucket = f"file://{tmp_path}"
+    store = SnapshotStore("run1", bucket=bucket)
+    for page, html in enumerate(_grid_pages(2), start=1):
+        store.put(html, "grid", page=page)
+    store.entries[0]["captured_at"] = "2026-10-01T08:00:00+00:00"
+    store.entries[1]["captured_at"] = "2026-10-01T08:05:00+00:00"
+    store.write_index()
+
+    projects, stats = reparse_snapshots(bucket, ["run1"], workers=1)
+    records = normalize_reparsed(projects)
+
+    assert stats["distinct_snapshots"] == 2 and len(records) == 10
+    assert [r["scraped_at"] for r in records] == (["2026-10-01T08:00:00+00:00"] * 5
+                                                  + ["2026-10-01T08:05:00+00:00"] * 5)
+    assert all(r["rera_number"] for r in records)
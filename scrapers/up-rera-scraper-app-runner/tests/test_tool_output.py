@@ -0,0 +1,31 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from agents import set_tracing_disabled
+
+# The scripted model and the pre-compaction tool shapes live with the benchmark
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+import bench_tool_output as bench  # noqa: E402
+
+
+def test_compact_tool_results_shrink_what_the_model_reads(tmp_path):
+    set_tracing_disabled(True)
+    scrape = bench.synthetic_scrape(50)
+    runs = {}
+    for mode in ("legacy", "compact"):
+        target = tmp_path / mode
+        target.mkdir()
+        # A fast simulated prefill keeps the run short; sizes don't depend on it
+        runs[mode] = asyncio.run(bench.run(mode, scrape, 1e9, str(target))).as_dict()
+    legacy, compact = runs["legacy"], runs["compact"]
+
+    assert compact["turns"] == legacy["turns"] == len(bench.STEPS) + 1
+    assert set(compact["tool_output_bytes"]) == set(bench.STEPS)
+    for tool in bench.STEPS:
+        assert compact["tool_output_bytes"][tool] < legacy["tool_output_bytes"][tool]
+    # Every turn after the first re-sends the results so far
+    for old, new in zip(legacy["by_turn"][1:], compact["by_turn"][1:]):
+        assert new["input_chars"] < old["input_chars"]
+    assert compact["input_tokens"] < legacy["input_tokens"]
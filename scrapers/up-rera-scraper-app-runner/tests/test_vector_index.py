@@ -0,0 +1,17 @@
+import json
+
+from pipeline.vector_index import META_FILE, build_index
+
+
+def test_newest_scraped_record_is_indexed(tmp_path):
+    records = [
+        {"rera_number": "R1", "project_name": "New Name", "scraped_at": "2026-10-19T06:00:00"},
+        {"rera_number": "R1", "project_name": "Old Name", "scraped_at": "2026-10-18T06:00:00"},
+        {"rera_number": "R2", "project_name": "Only", "scraped_at": "2026-10-18T06:00:00"},
+    ]
+    stats = build_index(records, str(tmp_path / "index"))
+
+    with open(tmp_path / "index" / META_FILE, encoding="utf-8") as f:
+        names = {m["rera_number"]: m["project_name"] for m in map(json.loads, f)}
+    assert stats["projects"] == 2
+    assert names == {"R1": "New Name", "R2": "Only"}